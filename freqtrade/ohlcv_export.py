@@ -0,0 +1,418 @@
+"""
+Supabase -> Freqtrade OHLCV export pipeline
+
+Pages 1-minute candles from the ohlc_data table into columnar numpy
+buffers, resamples them into every requested timeframe in one cascading
+pass (1m -> 5m -> 15m -> 1h), and writes Freqtrade's data files
+({PAIR}-{timeframe}.feather by default). Later runs only fetch the minutes
+after the newest stored candle and append the new candles.
+"""
+
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PRICE_FIELDS = ["open", "high", "low", "close", "volume"]
+COLUMNS = ["date"] + PRICE_FIELDS  # Freqtrade's OHLCV columns
+
+DEFAULT_TIMEFRAMES = ("5m", "15m", "1h")
+DATA_FORMATS = {"feather": "feather", "parquet": "parquet", "json": "json"}
+
+_UNIT_SECONDS = {"m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def timeframe_seconds(timeframe: str) -> int:
+    """'5m' -> 300"""
+    try:
+        return int(timeframe[:-1]) * _UNIT_SECONDS[timeframe[-1]]
+    except (KeyError, ValueError):
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+
+
+def ohlcv_path(data_dir: Path, pair: str, timeframe: str, data_format: str) -> Path:
+    """Freqtrade's file name for a pair: BTC/USDT -> BTC_USDT-5m.feather"""
+    return (
+        Path(data_dir)
+        / f"{pair.replace('/', '_')}-{timeframe}.{DATA_FORMATS[data_format]}"
+    )
+
+
+# ----------------------------------------------------------------------
+# Columnar candles
+# ----------------------------------------------------------------------
+
+
+class CandleBuffer:
+    """
+    Accumulates pages of ohlc_data rows as per-column numpy chunks
+
+    Each page is converted once (one vectorized timestamp parse, one array
+    per price column) instead of growing a list of dicts for the whole
+    window; arrays() concatenates the chunks at the end.
+    """
+
+    def __init__(self):
+        self._chunks: Dict[str, List[np.ndarray]] = {c: [] for c in COLUMNS}
+        self.rows = 0
+
+    def extend(self, rows: List[Dict]):
+        if not rows:
+            return
+        dates = pd.to_datetime(
+            [r["timestamp"] for r in rows], utc=True, format="ISO8601"
+        )
+        self._chunks["date"].append(dates.asi8 // 10**9)
+        for field in PRICE_FIELDS:
+            # None -> NaN
+            self._chunks[field].append(np.array([r[field] for r in rows], dtype=float))
+        self.rows += len(rows)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Sorted, de-duplicated candles ({column: array}, date in epoch seconds)"""
+        if not self.rows:
+            return empty_candles()
+        candles = {c: np.concatenate(chunks) for c, chunks in self._chunks.items()}
+        candles["volume"] = np.nan_to_num(candles["volume"])
+
+        order = np.argsort(candles["date"], kind="stable")
+        dates = candles["date"][order]
+        keep = np.r_[dates[1:] != dates[:-1], True]  # Last row of a duplicate run
+        keep &= ~np.isnan(
+            candles["open"][order]
+            + candles["high"][order]
+            + candles["low"][order]
+            + candles["close"][order]
+        )
+        return {c: values[order][keep] for c, values in candles.items()}
+
+
+def empty_candles() -> Dict[str, np.ndarray]:
+    candles = {c: np.empty(0, dtype=float) for c in PRICE_FIELDS}
+    candles["date"] = np.empty(0, dtype=np.int64)
+    return candles
+
+
+def aggregate(candles: Dict[str, np.ndarray], seconds: int) -> Dict[str, np.ndarray]:
+    """
+    Resample sorted candles into buckets of `seconds`
+
+    Same rules as df.resample(...).agg(first/max/min/last/sum).dropna():
+    buckets without source candles are not emitted.
+    """
+    dates = candles["date"]
+    if not len(dates):
+        return empty_candles()
+
+    buckets = dates - dates % seconds
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    ends = np.r_[starts[1:], len(dates)] - 1
+    return {
+        "date": buckets[starts],
+        "open": candles["open"][starts],
+        "high": np.maximum.reduceat(candles["high"], starts),
+        "low": np.minimum.reduceat(candles["low"], starts),
+        "close": candles["close"][ends],
+        "volume": np.add.reduceat(candles["volume"], starts),
+    }
+
+
+def resample_all(
+    candles_1m: Dict[str, np.ndarray],
+    timeframes: Iterable[str],
+    end: Optional[datetime] = None,
+) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Every timeframe from one pass over the 1m candles
+
+    Each timeframe is aggregated from the largest already-built timeframe
+    that divides it (5m from 1m, 15m from 5m, 1h from 15m), so only the
+    first step touches every minute. Candles that haven't closed by `end`
+    are dropped, like Freqtrade's own downloader does.
+    """
+    end_epoch = None if end is None else int(end.timestamp())
+    built = {60: candles_1m}
+    result = {}
+    for timeframe in sorted(set(timeframes), key=timeframe_seconds):
+        seconds = timeframe_seconds(timeframe)
+        if seconds not in built:
+            base = max(s for s in built if seconds % s == 0)
+            built[seconds] = aggregate(built[base], seconds)
+        candles = built[seconds]
+        if end_epoch is not None:
+            complete = candles["date"] + seconds <= end_epoch
+            candles = {c: values[complete] for c, values in candles.items()}
+        result[timeframe] = candles
+    return result
+
+
+def to_frame(candles: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """Candles -> Freqtrade OHLCV DataFrame (UTC `date` column)"""
+    frame = pd.DataFrame({c: candles[c] for c in PRICE_FIELDS})
+    frame.insert(0, "date", pd.to_datetime(candles["date"], unit="s", utc=True))
+    return frame
+
+
+# ----------------------------------------------------------------------
+# Freqtrade data files
+# ----------------------------------------------------------------------
+
+
+def read_ohlcv(path: Path, data_format: str) -> pd.DataFrame:
+    """Load a Freqtrade OHLCV file as a DataFrame with COLUMNS"""
+    if data_format == "feather":
+        frame = pd.read_feather(path)
+    elif data_format == "parquet":
+        frame = pd.read_parquet(path)
+    else:
+        with open(path) as f:
+            values = np.array(json.load(f), dtype=float).reshape(-1, len(COLUMNS))
+        frame = pd.DataFrame(values[:, 1:], columns=PRICE_FIELDS)
+        frame.insert(
+            0,
+            "date",
+            pd.to_datetime(values[:, 0].astype(np.int64), unit="ms", utc=True),
+        )
+    frame["date"] = pd.to_datetime(frame["date"], utc=True)
+    return frame.loc[:, COLUMNS]
+
+
+def write_ohlcv(frame: pd.DataFrame, path: Path, data_format: str):
+    """Write a Freqtrade OHLCV file atomically"""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    frame = frame.reset_index(drop=True).loc[:, COLUMNS]
+    if data_format == "feather":
+        frame.to_feather(tmp, compression="lz4", compression_level=9)
+    elif data_format == "parquet":
+        frame.to_parquet(tmp, index=False)
+    else:
+        # [[timestamp_ms, open, high, low, close, volume], ...]
+        millis = frame["date"].to_numpy(dtype="datetime64[ms]").astype(np.int64)
+        columns = [millis.tolist()] + [
+            frame[c].to_numpy(dtype=float).tolist() for c in PRICE_FIELDS
+        ]
+        with open(tmp, "w") as f:
+            json.dump(list(zip(*columns)), f)
+    os.replace(tmp, path)
+
+
+def append_candles(existing: Optional[pd.DataFrame], new: pd.DataFrame) -> pd.DataFrame:
+    """Stored candles up to the first new one, then the new candles"""
+    if existing is None or existing.empty:
+        return new
+    if new.empty:
+        return existing
+    kept = existing[existing["date"] < new["date"].iloc[0]]
+    return pd.concat([kept, new], ignore_index=True)
+
+
+# ----------------------------------------------------------------------
+# Exporter
+# ----------------------------------------------------------------------
+
+
+def fetch_1m_candles(
+    client,
+    symbol: str,
+    start: datetime,
+    end: datetime,
+    page_size: int = 1000,
+    table: str = "ohlc_data",
+) -> Dict[str, np.ndarray]:
+    """
+    1-minute candles of a symbol in [start, end) as columnar arrays
+
+    Pages by timestamp (keyset) rather than by offset, so each page is an
+    index range scan however deep into the window it is.
+    """
+    buffer = CandleBuffer()
+    cursor = None
+    while True:
+        query = (
+            client.table(table)
+            .select("timestamp, open, high, low, close, volume")
+            .eq("symbol", symbol)
+            .eq("timeframe", "1m")
+        )
+        if cursor is None:
+            query = query.gte("timestamp", start.isoformat())
+        else:
+            query = query.gt("timestamp", cursor)
+        response = (
+            query.lt("timestamp", end.isoformat())
+            .order("timestamp")
+            .limit(page_size)
+            .execute()
+        )
+        rows = response.data or []
+        buffer.extend(rows)
+        if len(rows) < page_size:
+            break
+        cursor = rows[-1]["timestamp"]
+    return buffer.arrays()
+
+
+class FreqtradeExporter:
+    """
+    Incremental export of Supabase 1m candles into Freqtrade data files
+
+    A pair's fetch starts at the earliest candle any of its timeframe files
+    is missing (the whole history window on the first run), so repeated
+    syncs only move the minutes written since the previous one. Existing
+    files in another format (e.g. the old JSON exports) seed the history,
+    which migrates them on the first run.
+    """
+
+    def __init__(
+        self,
+        client,
+        data_dir,
+        timeframes: Iterable[str] = DEFAULT_TIMEFRAMES,
+        data_format: str = "feather",
+        quote: str = "USDT",
+        history_days: int = 180,
+        page_size: int = 1000,
+        max_workers: int = 4,
+        table: str = "ohlc_data",
+    ):
+        """
+        Args:
+            client: Supabase client (supabase.create_client)
+            data_dir: Freqtrade exchange data directory
+            timeframes: Timeframes to write
+            data_format: "feather", "parquet" or "json" (Freqtrade's
+                dataformat_ohlcv)
+            quote: Quote currency of the exported pairs
+            history_days: History window of a first export
+            page_size: Rows per Supabase request
+            max_workers: Pairs exported concurrently
+            table: OHLC table holding the 1m candles
+        """
+        if data_format not in DATA_FORMATS:
+            raise ValueError(f"Unsupported data format: {data_format}")
+        self.client = client
+        self.data_dir = Path(data_dir)
+        self.timeframes = list(timeframes)
+        self.data_format = data_format
+        self.quote = quote
+        self.history_days = history_days
+        self.page_size = page_size
+        self.max_workers = max_workers
+        self.table = table
+
+        for timeframe in self.timeframes:
+            timeframe_seconds(timeframe)
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+
+    def pair(self, symbol: str) -> str:
+        return f"{symbol}/{self.quote}"
+
+    def load(self, pair: str, timeframe: str) -> Optional[pd.DataFrame]:
+        """Stored candles of a pair, preferring the configured format"""
+        formats = [self.data_format] + [
+            f for f in DATA_FORMATS if f != self.data_format
+        ]
+        for data_format in formats:
+            path = ohlcv_path(self.data_dir, pair, timeframe, data_format)
+            if path.exists():
+                try:
+                    return read_ohlcv(path, data_format)
+                except Exception as e:
+                    logger.warning(f"Ignoring unreadable {path}: {e}")
+        return None
+
+    def export_pair(
+        self,
+        symbol: str,
+        end: Optional[datetime] = None,
+        timeframes: Optional[Iterable[str]] = None,
+    ) -> Dict[str, int]:
+        """
+        Bring a pair's data files up to `end` (default: now)
+
+        Returns:
+            New candles appended per timeframe
+        """
+        pair = self.pair(symbol)
+        timeframes = list(timeframes or self.timeframes)
+        end = (end or datetime.now(timezone.utc)).replace(second=0, microsecond=0)
+        window_start = end - timedelta(days=self.history_days)
+
+        stored = {tf: self.load(pair, tf) for tf in timeframes}
+        starts = []
+        for timeframe, frame in stored.items():
+            if frame is None or frame.empty:
+                starts.append(window_start)
+            else:
+                last = frame["date"].iloc[-1].to_pydatetime()
+                starts.append(last + timedelta(seconds=timeframe_seconds(timeframe)))
+
+        # Align to the largest timeframe so its first bucket is complete
+        step = max(timeframe_seconds(tf) for tf in timeframes)
+        start_epoch = int(max(min(starts), window_start).timestamp())
+        start = datetime.fromtimestamp(
+            start_epoch - start_epoch % step, tz=timezone.utc
+        )
+        if start >= end:
+            return {tf: 0 for tf in timeframes}
+
+        candles = fetch_1m_candles(
+            self.client, symbol, start, end, self.page_size, self.table
+        )
+        resampled = resample_all(candles, timeframes, end)
+
+        appended = {}
+        for timeframe in timeframes:
+            new = to_frame(resampled[timeframe])
+            existing = stored[timeframe]
+            if existing is not None and not existing.empty:
+                appended[timeframe] = int(
+                    (new["date"] > existing["date"].iloc[-1]).sum()
+                )
+            else:
+                appended[timeframe] = len(new)
+
+            path = ohlcv_path(self.data_dir, pair, timeframe, self.data_format)
+            if appended[timeframe] or not path.exists():
+                merged = append_candles(existing, new)
+                if not merged.empty:
+                    write_ohlcv(merged, path, self.data_format)
+
+        logger.info(
+            f"{pair}: {candles['date'].size} 1m candles from {start:%Y-%m-%d %H:%M}, "
+            + ", ".join(f"+{n} {tf}" for tf, n in appended.items())
+        )
+        return appended
+
+    def export_all(
+        self,
+        symbols: List[str],
+        end: Optional[datetime] = None,
+        timeframes: Optional[Iterable[str]] = None,
+    ) -> Dict[str, Optional[Dict[str, int]]]:
+        """
+        Export several pairs concurrently
+
+        Returns:
+            {symbol: appended candles per timeframe, or None if it failed}
+        """
+        end = end or datetime.now(timezone.utc)
+
+        def export(symbol):
+            try:
+                return self.export_pair(symbol, end, timeframes)
+            except Exception as e:
+                logger.error(f"Failed to export {self.pair(symbol)}: {e}")
+                return None
+
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers)) as pool:
+            return dict(zip(symbols, pool.map(export, symbols)))
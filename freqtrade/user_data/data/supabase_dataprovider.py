@@ -1,9 +1,16 @@
 """
 Supabase Data Provider for Freqtrade
 Connects Freqtrade to existing Polygon data stored in Supabase
+
+Candles are cached per pair: each call only fetches the minutes after the
+cached tail, and 5m/15m/30m/1h candles are resampled from the cached 1m
+series instead of being queried again.
 """
 
 import os
+import threading
+import time
+from collections import OrderedDict
 import pandas as pd
 from datetime import datetime, timezone, timedelta
 from typing import Optional, Dict, Any
@@ -12,30 +19,152 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Candle length of each Freqtrade timeframe
+TIMEFRAME_MINUTES = {
+    "1m": 1,
+    "5m": 5,
+    "15m": 15,
+    "30m": 30,
+    "1h": 60,
+    "4h": 240,
+    "1d": 1440,
+}
+
+# ohlc_data timeframe each Freqtrade timeframe is resampled from. Up to 1h
+# that's the 1m series; longer candles come from the stored 1h rows so a
+# 500-candle daily window doesn't pull 720k minutes.
+BASE_TIMEFRAMES = {
+    "1m": "1m",
+    "5m": "1m",
+    "15m": "1m",
+    "30m": "1m",
+    "1h": "1m",
+    "4h": "1h",
+    "1d": "1h",
+}
+
+OHLCV_AGG = {
+    "open": "first",
+    "high": "max",
+    "low": "min",
+    "close": "last",
+    "volume": "sum",
+}
+
+
+def resample_candles(df: pd.DataFrame, minutes: int) -> pd.DataFrame:
+    """OHLCV candles -> `minutes` candles (empty buckets dropped)"""
+    if df.empty:
+        return df
+    return df.resample(f"{minutes}min").agg(OHLCV_AGG).dropna(subset=["open"])
+
+
+class _CandleSeries:
+    """Cached candles of one pair at one ohlc_data timeframe"""
+
+    def __init__(self, base_minutes: int):
+        self.base_minutes = base_minutes
+        self.frame = pd.DataFrame(columns=list(OHLCV_AGG), dtype=float)
+        self.covered_from: Optional[datetime] = None  # Fetched back to here
+        self.fetched_at = float("-inf")  # Monotonic time of the last tail fetch
+        self.derived: Dict[int, pd.DataFrame] = {}  # Resampled frames by minutes
+        self.span = timedelta(0)  # Longest window requested
+
+    def append(self, new: pd.DataFrame):
+        """Merge fetched candles and bring the resampled frames up to date"""
+        if new.empty:
+            return
+        first = new.index[0]
+        kept = self.frame[self.frame.index < first]
+        self.frame = pd.concat([kept, new]) if not kept.empty else new
+
+        for minutes, derived in self.derived.items():
+            # Rebuild from the bucket holding the first new candle onward
+            bucket = first.floor(f"{minutes}min")
+            tail = resample_candles(self.frame[self.frame.index >= bucket], minutes)
+            self.derived[minutes] = pd.concat([derived[derived.index < bucket], tail])
+
+    def trim(self, now: datetime):
+        """Drop candles older than the longest window requested"""
+        rule = f"{max([self.base_minutes] + list(self.derived))}min"
+        cutoff = pd.Timestamp(now - self.span).floor(rule)
+        if self.covered_from is not None and cutoff > self.covered_from:
+            self.frame = self.frame[self.frame.index >= cutoff]
+            self.derived = {m: d[d.index >= cutoff] for m, d in self.derived.items()}
+            self.covered_from = cutoff.to_pydatetime()
+
+    def candles(self, minutes: int) -> pd.DataFrame:
+        if minutes == self.base_minutes:
+            return self.frame
+        if minutes not in self.derived:
+            self.derived[minutes] = resample_candles(self.frame, minutes)
+        return self.derived[minutes]
+
 
 class SupabaseDataProvider:
     """
     Custom data provider that fetches OHLC data from Supabase
     instead of downloading from exchange
+
+    Keeps an LRU cache of up to max_pairs pairs. A pair's cached series is
+    topped up with the candles newer than its tail at most once per
+    refresh_interval, so Freqtrade's per-pair, per-candle calls cost a small
+    tail query (or none) instead of re-reading the whole window.
     """
 
-    def __init__(self):
-        """Initialize Supabase client"""
-        self.supabase_url = os.getenv("SUPABASE_URL")
-        self.supabase_key = os.getenv("SUPABASE_KEY")
+    def __init__(
+        self,
+        client: Optional[Client] = None,
+        max_pairs: int = 64,
+        refresh_interval: float = 30.0,
+        page_size: int = 1000,
+    ):
+        """
+        Initialize Supabase client
 
-        if not self.supabase_url or not self.supabase_key:
-            raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in environment")
+        Args:
+            client: Supabase client (created from SUPABASE_URL/SUPABASE_KEY
+                if not given)
+            max_pairs: Pairs kept in the candle cache
+            refresh_interval: Minimum seconds between tail fetches of a pair
+            page_size: Rows per Supabase request
+        """
+        if client is None:
+            self.supabase_url = os.getenv("SUPABASE_URL")
+            self.supabase_key = os.getenv("SUPABASE_KEY")
+
+            if not self.supabase_url or not self.supabase_key:
+                raise ValueError(
+                    "SUPABASE_URL and SUPABASE_KEY must be set in environment"
+                )
 
-        self.client: Client = create_client(self.supabase_url, self.supabase_key)
+            client = create_client(self.supabase_url, self.supabase_key)
+        self.client: Client = client
 
         # Cache for market cap data
         self._market_cap_cache: Dict[str, float] = {}
         self._cache_timestamp = None
         self._cache_ttl = 3600  # 1 hour cache
 
+        # Candle cache: symbol -> {ohlc_data timeframe: series}, LRU order
+        self.max_pairs = max_pairs
+        self.refresh_interval = refresh_interval
+        self.page_size = page_size
+        self._candles: "OrderedDict[str, Dict[str, _CandleSeries]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.cache_hits = 0
+        self.db_queries = 0
+        self.rows_fetched = 0
+        self.evictions = 0
+
     def get_pair_dataframe(
-        self, pair: str, timeframe: str = "1h", candle_count: int = 500
+        self,
+        pair: str,
+        timeframe: str = "1h",
+        candle_count: int = 500,
+        now: Optional[datetime] = None,
     ) -> pd.DataFrame:
         """
         Fetch OHLC data for a pair from Supabase
@@ -44,6 +173,7 @@ class SupabaseDataProvider:
             pair: Trading pair (e.g., "BTC/USDT")
             timeframe: Timeframe (e.g., '5m', '15m', '1h')
             candle_count: Number of candles to fetch
+            now: End of the window (default: current time)
 
         Returns:
             DataFrame with OHLC data in Freqtrade format
@@ -52,69 +182,37 @@ class SupabaseDataProvider:
         # Convert pair format (BTC/USDT -> BTC)
         symbol = pair.split("/")[0]
 
-        # Map timeframe to minutes
-        timeframe_minutes = {
-            '1m': 1,
-            '5m': 5,
-            '15m': 15,
-            '30m': 30,
-            '1h': 60,
-            '4h': 240,
-            '1d': 1440
-        }
-        
-        minutes = timeframe_minutes.get(timeframe, 60)
-        
-        # Calculate date range
-        end_time = datetime.now(timezone.utc)
-        start_time = end_time - timedelta(minutes=candle_count * minutes)
+        if timeframe not in TIMEFRAME_MINUTES:
+            logger.warning(f"Unsupported timeframe {timeframe}, using 1h")
+            timeframe = "1h"
+        minutes = TIMEFRAME_MINUTES[timeframe]
+        base = BASE_TIMEFRAMES[timeframe]
 
-        try:
-            # Determine which table to query based on timeframe
-            # Assuming you have 1m data in ohlc_data table
-            # We'll aggregate it for larger timeframes
-            
-            # For now, we'll use the 1h data from ohlc_data table
-            # In production, you might want to create separate tables for different timeframes
-            # or aggregate 1m data on the fly
-            
-            # Query OHLC data from Supabase
-            response = (
-                self.client.table("ohlc_data")
-                .select("timestamp, open, high, low, close, volume")
-                .eq("symbol", symbol)
-                .gte("timestamp", start_time.isoformat())
-                .lte("timestamp", end_time.isoformat())
-                .order("timestamp")
-                .execute()
-            )
+        # Calculate date range, starting on a candle boundary
+        end_time = now or datetime.now(timezone.utc)
+        span = timedelta(minutes=candle_count * minutes)
+        start_time = pd.Timestamp(end_time - span).ceil(f"{minutes}min").to_pydatetime()
 
-            if not response.data:
+        try:
+            with self._lock:
+                series = self._series(symbol, base)
+                series.span = max(series.span, span)
+                self._update(symbol, base, series, start_time, end_time)
+                candles = series.candles(minutes)
+                df = candles[candles.index >= start_time].tail(candle_count).copy()
+                series.trim(end_time)
+
+            if df.empty:
                 logger.warning(f"No data found for {symbol}")
                 return pd.DataFrame()
 
-            # Convert to DataFrame
-            df = pd.DataFrame(response.data)
-
-            # Convert timestamp to datetime
-            df["date"] = pd.to_datetime(df["timestamp"])
-            df.set_index("date", inplace=True)
-
-            # Ensure numeric types
-            for col in ["open", "high", "low", "close", "volume"]:
-                df[col] = pd.to_numeric(df[col], errors="coerce")
-
-            # Drop the original timestamp column
-            df.drop("timestamp", axis=1, inplace=True)
-
-            # Sort by date
-            df.sort_index(inplace=True)
+            df.index.name = "date"
 
             # Add market cap data
             market_cap = self.get_market_cap(symbol)
             df["market_cap"] = market_cap
 
-            logger.info(f"Fetched {len(df)} candles for {symbol}")
+            logger.debug(f"Serving {len(df)} {timeframe} candles for {symbol}")
 
             return df
 
@@ -122,6 +220,104 @@ class SupabaseDataProvider:
             logger.error(f"Error fetching data for {symbol}: {e}")
             return pd.DataFrame()
 
+    def _series(self, symbol: str, base: str) -> _CandleSeries:
+        """Cached series of a pair, evicting the least recently used pairs"""
+        if symbol in self._candles:
+            self._candles.move_to_end(symbol)
+        else:
+            self._candles[symbol] = {}
+            while len(self._candles) > self.max_pairs:
+                self._candles.popitem(last=False)
+                self.evictions += 1
+
+        pair_cache = self._candles[symbol]
+        if base not in pair_cache:
+            pair_cache[base] = _CandleSeries(TIMEFRAME_MINUTES[base])
+        return pair_cache[base]
+
+    def _update(
+        self,
+        symbol: str,
+        base: str,
+        series: _CandleSeries,
+        start_time: datetime,
+        end_time: datetime,
+    ):
+        """Fetch whatever the cached series lacks for [start_time, end_time]"""
+        if series.covered_from is None or start_time < series.covered_from:
+            # Cold pair, or a longer window than cached: (re)load the window
+            series.frame = self._fetch(symbol, base, start_time, end_time)
+            series.derived = {}
+            series.covered_from = start_time
+            series.fetched_at = time.monotonic()
+        elif time.monotonic() - series.fetched_at >= self.refresh_interval:
+            # Candles from the cached tail on (the tail candle may have been
+            # rewritten since)
+            since = series.frame.index[-1] if not series.frame.empty else start_time
+            series.append(self._fetch(symbol, base, since, end_time))
+            series.fetched_at = time.monotonic()
+        else:
+            self.cache_hits += 1
+
+    def _fetch(
+        self, symbol: str, base: str, start_time: datetime, end_time: datetime
+    ) -> pd.DataFrame:
+        """Candles of one ohlc_data timeframe in [start_time, end_time], paged"""
+        pages = []
+        since, inclusive = start_time.isoformat(), True
+        while True:
+            query = (
+                self.client.table("ohlc_data")
+                .select("timestamp, open, high, low, close, volume")
+                .eq("symbol", symbol)
+                .eq("timeframe", base)
+            )
+            query = (
+                query.gte("timestamp", since)
+                if inclusive
+                else query.gt("timestamp", since)
+            )
+            response = (
+                query.lte("timestamp", end_time.isoformat())
+                .order("timestamp")
+                .limit(self.page_size)
+                .execute()
+            )
+            self.db_queries += 1
+            rows = response.data or []
+            if rows:
+                pages.append(pd.DataFrame.from_records(rows))
+            if len(rows) < self.page_size:
+                break
+            since, inclusive = rows[-1]["timestamp"], False
+
+        if not pages:
+            return pd.DataFrame(columns=list(OHLCV_AGG), dtype=float)
+
+        df = pd.concat(pages, ignore_index=True)
+        self.rows_fetched += len(df)
+        df.index = pd.to_datetime(df.pop("timestamp"), utc=True, format="ISO8601")
+        df = df[list(OHLCV_AGG)].astype(float)
+        return df[~df.index.duplicated(keep="last")].sort_index()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Candle cache counters for monitoring"""
+        with self._lock:
+            pairs = len(self._candles)
+            rows = sum(
+                len(series.frame)
+                for pair_cache in self._candles.values()
+                for series in pair_cache.values()
+            )
+        return {
+            "pairs": pairs,
+            "cached_rows": rows,
+            "cache_hits": self.cache_hits,
+            "db_queries": self.db_queries,
+            "rows_fetched": self.rows_fetched,
+            "evictions": self.evictions,
+        }
+
     def get_market_cap(self, symbol: str) -> float:
         """
         Get market cap for a symbol from cache or database
@@ -218,6 +414,7 @@ class SupabaseDataProvider:
                 self.client.table("ohlc_data")
                 .select("timestamp")
                 .eq("symbol", symbol)
+                .eq("timeframe", "1m")
                 .order("timestamp", desc=True)
                 .limit(1)
                 .execute()
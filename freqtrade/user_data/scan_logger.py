@@ -1,57 +1,151 @@
 """
 Scan Logger for Freqtrade
 Captures trading decisions for ML training pipeline
+
+Strategies call the log_* methods from the bot loop, so they only append a
+compact tuple to a bounded ring buffer. A background writer thread turns
+the tuples into scan_history records (encoding features with one shared
+JSON encoder per batch) and inserts them in batches.
 """
 
 import os
 import json
 import logging
 from datetime import datetime, timezone, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from supabase import create_client, Client
 from collections import deque
+import math
 import threading
 import time
 
 logger = logging.getLogger(__name__)
 
+# Record kinds in the ring buffer
+SCAN, ENTRY, EXIT = 0, 1, 2
+
+# Features taken from a dataframe row, with their defaults
+ENTRY_FEATURES = (
+    ("channel_position", 0),
+    ("rsi", 50),
+    ("volume_ratio", 1),
+    ("volatility", 0),
+    ("price_drop_pct", 0),
+    ("bb_upper", 0),
+    ("bb_lower", 0),
+    ("close", 0),
+    ("volume", 0),
+)
+EXIT_FEATURES = (
+    ("channel_position", 0),
+    ("rsi", 50),
+    ("current_profit", 0),
+    ("position_duration_hours", 0),
+)
+
+
+def _json_default(value):
+    """numpy scalars and timestamps in feature dicts"""
+    if hasattr(value, "item"):
+        return value.item()
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def _row_features(row, spec) -> Dict[str, Any]:
+    """Feature dict from a dataframe row (Series or dict); NaN -> default"""
+    features = {}
+    for name, default in spec:
+        value = row.get(name, default)
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            value = default
+        features[name] = value
+    return features
+
 
 class ScanLogger:
     """
     Logs Freqtrade scanning decisions to Supabase for ML training
     Implements batching for efficient database writes
+
+    The log_* methods never block on the database: a full buffer drops the
+    new record and counts it (see get_metrics) instead of stalling the bot.
     """
 
-    def __init__(self, batch_size: int = 500, flush_interval: int = 300):
+    def __init__(
+        self,
+        batch_size: int = 500,
+        flush_interval: int = 300,
+        capacity: int = 10000,
+        client: Optional[Client] = None,
+    ):
         """
         Initialize the scan logger
 
         Args:
             batch_size: Number of records to batch before writing
             flush_interval: Seconds between forced flushes
+            capacity: Records buffered before new ones are dropped
+            client: Supabase client (created from SUPABASE_URL/SUPABASE_KEY
+                if not given)
         """
-        self.supabase_url = os.getenv("SUPABASE_URL")
-        self.supabase_key = os.getenv("SUPABASE_KEY")
+        if client is None:
+            self.supabase_url = os.getenv("SUPABASE_URL")
+            self.supabase_key = os.getenv("SUPABASE_KEY")
 
-        if not self.supabase_url or not self.supabase_key:
-            raise ValueError("SUPABASE_URL and SUPABASE_KEY must be set in environment")
+            if not self.supabase_url or not self.supabase_key:
+                raise ValueError(
+                    "SUPABASE_URL and SUPABASE_KEY must be set in environment"
+                )
 
-        self.client: Client = create_client(self.supabase_url, self.supabase_key)
+            client = create_client(self.supabase_url, self.supabase_key)
+        self.client: Client = client
 
         # Batching configuration
         self.batch_size = batch_size
         self.flush_interval = flush_interval
-        self.scan_buffer = deque()
-        self.buffer_lock = threading.Lock()
+        self.capacity = capacity
+
+        # deque append/popleft are atomic, so producers never take a lock;
+        # only the writer side (background thread or flush()) is serialized
+        self._ring = deque()
+        self._pending: List[Dict[str, Any]] = []  # Built batch awaiting retry
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._write_lock = threading.Lock()
+        self._encoder = json.JSONEncoder(default=_json_default)
+
+        # Metrics
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.failed_batches = 0
+        self.last_flush_seconds = 0.0
 
         # Start background flush thread
         self.flush_thread = threading.Thread(target=self._flush_worker, daemon=True)
         self.flush_thread.start()
 
         logger.info(
-            f"ScanLogger initialized with batch_size={batch_size}, flush_interval={flush_interval}s"
+            f"ScanLogger initialized with batch_size={batch_size}, "
+            f"flush_interval={flush_interval}s, capacity={capacity}"
         )
 
+    # ------------------------------------------------------------------
+    # Producers (bot loop)
+    # ------------------------------------------------------------------
+
+    def _enqueue(self, record: tuple):
+        ring = self._ring
+        if len(ring) >= self.capacity:
+            self.dropped += 1
+            return
+        ring.append(record)
+        self.enqueued += 1
+        if len(ring) == self.batch_size:
+            self._wake.set()
+
     def log_scan(
         self,
         symbol: str,
@@ -59,6 +153,7 @@ class ScanLogger:
         decision: str,
         features: Dict[str, Any],
         metadata: Dict[str, Any] = None,
+        timestamp: Optional[datetime] = None,
     ):
         """
         Log a scan decision
@@ -66,29 +161,23 @@ class ScanLogger:
         Args:
             symbol: Trading symbol (e.g., "BTC")
             strategy: Strategy name (e.g., "CHANNEL")
-            decision: Decision made ("TAKE", "SKIP", "EXIT")
+            decision: Decision made ("TAKE", "SKIP", "REJECTED", "EXIT")
             features: Feature values used in decision
             metadata: Additional metadata
+            timestamp: Decision time (default: now)
         """
-
-        # Create scan record
-        scan_record = {
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "symbol": symbol.replace("/USDT", ""),  # Remove pair suffix
-            "strategy_name": strategy,  # Use correct column name
-            "decision": decision,
-            "features": json.dumps(features),
-            "reason": metadata.get("reason", "") if metadata else "",  # Add reason field
-            "ml_confidence": features.get("ml_confidence", 0.0),  # Add ML confidence
-        }
-
-        # Add to buffer
-        with self.buffer_lock:
-            self.scan_buffer.append(scan_record)
-
-            # Flush if buffer is full
-            if len(self.scan_buffer) >= self.batch_size:
-                self._flush_buffer()
+        reason = metadata.get("reason", "") if metadata else ""
+        self._enqueue(
+            (
+                SCAN,
+                timestamp or time.time(),
+                symbol,
+                strategy,
+                decision,
+                features,
+                reason,
+            )
+        )
 
     def log_entry_analysis(
         self,
@@ -96,37 +185,46 @@ class ScanLogger:
         dataframe_row: Dict[str, Any],
         entry_signal: bool,
         strategy: str = "CHANNEL",
+        reason: str = "",
     ):
         """
         Log entry analysis from strategy
 
         Args:
             pair: Trading pair
-            dataframe_row: Row from strategy dataframe
+            dataframe_row: Row from strategy dataframe (Series or dict; the
+                features are read from it in the writer thread)
             entry_signal: Whether entry signal was generated
             strategy: Strategy name
+            reason: Why the entry was skipped, if known
         """
+        decision = "TAKE" if entry_signal else "SKIP"
+        self._enqueue(
+            (ENTRY, time.time(), pair, strategy, decision, dataframe_row, reason)
+        )
 
-        features = {
-            "channel_position": dataframe_row.get("channel_position", 0),
-            "rsi": dataframe_row.get("rsi", 50),
-            "volume_ratio": dataframe_row.get("volume_ratio", 1),
-            "volatility": dataframe_row.get("volatility", 0),
-            "price_drop_pct": dataframe_row.get("price_drop_pct", 0),
-            "bb_upper": dataframe_row.get("bb_upper", 0),
-            "bb_lower": dataframe_row.get("bb_lower", 0),
-            "close": dataframe_row.get("close", 0),
-            "volume": dataframe_row.get("volume", 0),
-        }
+    def log_entry_rejection(
+        self,
+        pair: str,
+        dataframe_row: Dict[str, Any],
+        reason: str,
+        strategy: str = "CHANNEL",
+    ):
+        """
+        Log an entry signal turned down after the fact (e.g. position limits)
 
-        decision = "TAKE" if entry_signal else "SKIP"
+        populate_entry_trend has already logged the candle as TAKE, so this
+        is recorded as a separate REJECTED decision rather than a SKIP that
+        would contradict it. Label queries select TAKE/SKIP and ignore it.
 
-        self.log_scan(
-            symbol=pair,
-            strategy=strategy,
-            decision=decision,
-            features=features,
-            metadata={"scan_type": "entry_analysis"},
+        Args:
+            pair: Trading pair
+            dataframe_row: Row the signal fired on (Series or dict)
+            reason: Why the entry was rejected
+            strategy: Strategy name
+        """
+        self._enqueue(
+            (ENTRY, time.time(), pair, strategy, "REJECTED", dataframe_row, reason)
         )
 
     def log_exit_analysis(
@@ -141,66 +239,109 @@ class ScanLogger:
 
         Args:
             pair: Trading pair
-            dataframe_row: Row from strategy dataframe
+            dataframe_row: Row from strategy dataframe (Series or dict)
             exit_signal: Whether exit signal was generated
             strategy: Strategy name
         """
-
-        features = {
-            "channel_position": dataframe_row.get("channel_position", 0),
-            "rsi": dataframe_row.get("rsi", 50),
-            "current_profit": dataframe_row.get("current_profit", 0),
-            "position_duration_hours": dataframe_row.get("position_duration_hours", 0),
-        }
-
         decision = "EXIT" if exit_signal else "HOLD"
-
-        self.log_scan(
-            symbol=pair,
-            strategy=strategy,
-            decision=decision,
-            features=features,
-            metadata={"scan_type": "exit_analysis"},
-        )
-
-    def _flush_buffer(self):
-        """Flush the scan buffer to database"""
-
-        if not self.scan_buffer:
-            return
-
-        # Copy buffer and clear
-        records_to_insert = list(self.scan_buffer)
-        self.scan_buffer.clear()
-
-        try:
-            # Insert batch to database
-            response = (
-                self.client.table("scan_history").insert(records_to_insert).execute()
+        self._enqueue((EXIT, time.time(), pair, strategy, decision, dataframe_row, ""))
+
+    # ------------------------------------------------------------------
+    # Writer
+    # ------------------------------------------------------------------
+
+    def _build_batch(self, entries: List[tuple]) -> List[Dict[str, Any]]:
+        """Ring tuples -> scan_history records"""
+        encode = self._encoder.encode
+        records = []
+        for kind, ts, symbol, strategy, decision, payload, reason in entries:
+            if kind == ENTRY:
+                features = _row_features(payload, ENTRY_FEATURES)
+            elif kind == EXIT:
+                features = _row_features(payload, EXIT_FEATURES)
+            else:
+                features = payload
+            if isinstance(ts, float):
+                ts = datetime.fromtimestamp(ts, tz=timezone.utc)
+            records.append(
+                {
+                    "timestamp": ts.isoformat(),
+                    "symbol": symbol.replace("/USDT", ""),  # Remove pair suffix
+                    "strategy_name": strategy,
+                    "decision": decision,
+                    "features": encode(features),
+                    "reason": reason,
+                    "ml_confidence": features.get("ml_confidence", 0.0),
+                }
             )
-            logger.info(f"Flushed {len(records_to_insert)} scan records to database")
-
-        except Exception as e:
-            logger.error(f"Error flushing scan buffer: {e}")
-            # Re-add records to buffer on failure
-            self.scan_buffer.extend(records_to_insert)
+        return records
+
+    def _drain(self) -> int:
+        """Write everything buffered, batch_size records at a time"""
+        written = 0
+        with self._write_lock:
+            while True:
+                if not self._pending:
+                    entries = []
+                    while self._ring and len(entries) < self.batch_size:
+                        entries.append(self._ring.popleft())
+                    if not entries:
+                        break
+                    self._pending = self._build_batch(entries)
+
+                started = time.monotonic()
+                try:
+                    self.client.table("scan_history").insert(self._pending).execute()
+                except Exception as e:
+                    # Keep the batch for the next cycle; new records keep
+                    # queueing (and dropping once the ring is full)
+                    self.failed_batches += 1
+                    logger.error(f"Error flushing scan buffer: {e}")
+                    break
+                self.last_flush_seconds = time.monotonic() - started
+                written += len(self._pending)
+                self.written += len(self._pending)
+                self._pending = []
+
+        if written:
+            logger.info(f"Flushed {written} scan records to database")
+        return written
 
     def _flush_worker(self):
-        """Background worker to periodically flush buffer"""
+        """Background worker: flush on a full batch or every flush_interval"""
 
-        while True:
-            time.sleep(self.flush_interval)
-
-            with self.buffer_lock:
-                if self.scan_buffer:
-                    logger.debug(f"Periodic flush: {len(self.scan_buffer)} records")
-                    self._flush_buffer()
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self._drain()
+            except Exception as e:
+                logger.error(f"Scan logger writer error: {e}")
 
     def flush(self):
         """Force flush the buffer"""
 
-        with self.buffer_lock:
-            self._flush_buffer()
+        self._drain()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the writer thread after a final flush"""
+        self._stop.set()
+        self._wake.set()
+        self.flush_thread.join(timeout)
+        self._drain()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Buffer counters for monitoring"""
+        return {
+            "queue_depth": len(self._ring),
+            "pending_batch": len(self._pending),
+            "capacity": self.capacity,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "failed_batches": self.failed_batches,
+            "last_flush_seconds": self.last_flush_seconds,
+        }
 
     def get_recent_scans(self, symbol: str = None, limit: int = 100) -> List[Dict]:
         """
@@ -267,6 +408,7 @@ class ScanLogger:
                 "skip_signals": decisions.count("SKIP"),
                 "exit_signals": decisions.count("EXIT"),
                 "hold_signals": decisions.count("HOLD"),
+                "rejected_signals": decisions.count("REJECTED"),
                 "take_rate": decisions.count("TAKE") / len(decisions)
                 if decisions
                 else 0,
@@ -292,18 +434,35 @@ def get_scan_logger() -> ScanLogger:
         try:
             # Use smaller batch size for more frequent database writes
             _scan_logger_instance = ScanLogger(batch_size=50, flush_interval=60)
-            logger.info("✅ Scan logger initialized successfully (batch_size=50, flush_interval=60s)")
+            logger.info(
+                "✅ Scan logger initialized successfully (batch_size=50, flush_interval=60s)"
+            )
         except Exception as e:
             logger.error(f"❌ Failed to initialize scan logger: {e}")
-            logger.warning("⚠️ Continuing without scan logging - ML training data will not be collected")
+            logger.warning(
+                "⚠️ Continuing without scan logging - ML training data will not be collected"
+            )
+
             # Return a dummy logger that does nothing
             class DummyScanLogger:
+                def log_scan(self, *args, **kwargs):
+                    pass
+
                 def log_entry_analysis(self, *args, **kwargs):
                     pass
+
+                def log_entry_rejection(self, *args, **kwargs):
+                    pass
+
                 def log_exit_analysis(self, *args, **kwargs):
                     pass
+
                 def flush(self):
                     pass
+
+                def get_metrics(self):
+                    return {}
+
             _scan_logger_instance = DummyScanLogger()
 
     return _scan_logger_instance
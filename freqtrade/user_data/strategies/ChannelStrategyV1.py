@@ -74,12 +74,21 @@ class ChannelStrategyV1(IStrategy):
             logger.info("✅ Scan logger initialized in ChannelStrategyV1")
         except Exception as e:
             logger.error(f"❌ Failed to initialize scan logger: {e}")
+
             # Create dummy logger
             class DummyScanLogger:
+                def log_scan(self, *args, **kwargs):
+                    pass
+
                 def log_entry_analysis(self, *args, **kwargs):
                     pass
+
+                def log_entry_rejection(self, *args, **kwargs):
+                    pass
+
                 def log_exit_analysis(self, *args, **kwargs):
                     pass
+
             self.scan_logger = DummyScanLogger()
 
         # Note: Data provider is now handled by Freqtrade using our custom provider
@@ -207,11 +216,13 @@ class ChannelStrategyV1(IStrategy):
         if len(dataframe) > 0:
             latest_row = dataframe.iloc[-1]
             try:
-                # Always log the scan, whether there's an entry signal or not
+                # Always log the scan, whether there's an entry signal or not.
+                # The row is queued as-is; features are read off it by the
+                # scan logger's writer thread
                 self.scan_logger.log_entry_analysis(
                     pair=metadata.get("pair", "UNKNOWN"),
-                    dataframe_row=latest_row.to_dict(),
-                    entry_signal=bool(latest_row.get("enter_long", 0)),
+                    dataframe_row=latest_row,
+                    entry_signal=latest_row.get("enter_long", 0) == 1,
                     strategy="CHANNEL",
                 )
                 # Log every 10th scan to confirm it's working
@@ -325,7 +336,7 @@ class ChannelStrategyV1(IStrategy):
     ) -> bool:
         """
         Called right before placing a buy order.
-        Enforces position limits and logs scan decisions for ML training.
+        Enforces position limits and logs rejected signals for ML training.
         """
         
         # Get position limits from config
@@ -334,77 +345,39 @@ class ChannelStrategyV1(IStrategy):
         max_per_strategy = position_mgmt.get('max_positions_per_strategy', 50)
         max_per_symbol = position_mgmt.get('max_positions_per_symbol', 3)
         
-        # Check per-strategy limit
-        # Count all open trades for this strategy
-        open_trades = Trade.get_open_trades()
-        strategy_trades = [t for t in open_trades if t.strategy == 'ChannelStrategyV1']
+        # Count open trades for this strategy and this pair in one pass
+        strategy_count = symbol_count = 0
+        for trade in Trade.get_open_trades():
+            if trade.strategy == 'ChannelStrategyV1':
+                strategy_count += 1
+            if trade.pair == pair:
+                symbol_count += 1
         
-        if len(strategy_trades) >= max_per_strategy:
+        # Check per-strategy limit
+        if strategy_count >= max_per_strategy:
             logger.info(
                 f"Rejecting {pair} entry: Strategy limit reached "
-                f"({len(strategy_trades)}/{max_per_strategy})"
-            )
-            # Log as SKIP for ML training
-            self._log_scan_decision(
-                symbol=pair,
-                strategy="CHANNEL",
-                decision="SKIP",
-                timestamp=current_time,
-                features={
-                    "channel_position": kwargs.get("channel_position", 0),
-                    "rsi": kwargs.get("rsi", 50),
-                    "volume_ratio": kwargs.get("volume_ratio", 1),
-                    "volatility": kwargs.get("volatility", 0),
-                    "price_drop_pct": kwargs.get("price_drop_pct", 0),
-                    "skip_reason": "strategy_limit",
-                },
+                f"({strategy_count}/{max_per_strategy})"
             )
+            # Log as REJECTED (the candle was already logged as TAKE)
+            self._log_rejection(pair, "strategy_limit")
             return False
         
         # Check per-symbol limit
-        symbol_trades = [t for t in open_trades if t.pair == pair]
-        
-        if len(symbol_trades) >= max_per_symbol:
+        if symbol_count >= max_per_symbol:
             logger.info(
                 f"Rejecting {pair} entry: Symbol limit reached "
-                f"({len(symbol_trades)}/{max_per_symbol})"
-            )
-            # Log as SKIP for ML training
-            self._log_scan_decision(
-                symbol=pair,
-                strategy="CHANNEL",
-                decision="SKIP",
-                timestamp=current_time,
-                features={
-                    "channel_position": kwargs.get("channel_position", 0),
-                    "rsi": kwargs.get("rsi", 50),
-                    "volume_ratio": kwargs.get("volume_ratio", 1),
-                    "volatility": kwargs.get("volatility", 0),
-                    "price_drop_pct": kwargs.get("price_drop_pct", 0),
-                    "skip_reason": "symbol_limit",
-                },
+                f"({symbol_count}/{max_per_symbol})"
             )
+            # Log as REJECTED (the candle was already logged as TAKE)
+            self._log_rejection(pair, "symbol_limit")
             return False
 
-        # All limits passed, log as TAKE
-        self._log_scan_decision(
-            symbol=pair,
-            strategy="CHANNEL",
-            decision="TAKE",
-            timestamp=current_time,
-            features={
-                "channel_position": kwargs.get("channel_position", 0),
-                "rsi": kwargs.get("rsi", 50),
-                "volume_ratio": kwargs.get("volume_ratio", 1),
-                "volatility": kwargs.get("volatility", 0),
-                "price_drop_pct": kwargs.get("price_drop_pct", 0),
-            },
-        )
-
+        # All limits passed; populate_entry_trend already logged the TAKE
         logger.info(
             f"Accepting {pair} entry: "
-            f"Strategy {len(strategy_trades)}/{max_per_strategy}, "
-            f"Symbol {len(symbol_trades)}/{max_per_symbol}"
+            f"Strategy {strategy_count}/{max_per_strategy}, "
+            f"Symbol {symbol_count}/{max_per_symbol}"
         )
         
         return True
@@ -425,22 +398,30 @@ class ChannelStrategyV1(IStrategy):
         # Default to small_cap if not found
         return "small_cap"
 
-    def _log_scan_decision(
-        self,
-        symbol: str,
-        strategy: str,
-        decision: str,
-        timestamp: datetime,
-        features: dict,
-    ):
+    def _log_rejection(self, pair: str, reason: str):
         """
-        Log scan decision to database for ML training.
-        This will be implemented to connect to Supabase.
+        Log a signal rejected by position limits.
+        populate_entry_trend already logged this candle as TAKE, so it is
+        recorded as REJECTED (not SKIP) to keep one verdict per candle for
+        ML labels. Features come from that same analyzed candle;
+        confirm_trade_entry's kwargs carry no indicators.
         """
-        # TODO: Implement Supabase logging
-        # For now, just print to console
-        print(f"[SCAN] {timestamp} - {symbol} - {strategy} - {decision}")
-        print(f"       Features: {features}")
+        try:
+            dataframe, _ = self.dp.get_analyzed_dataframe(pair, self.timeframe)
+        except Exception as e:
+            logger.error(f"❌ Failed to read analyzed candles for {pair}: {e}")
+            return
+
+        # Without real features, log nothing rather than placeholder defaults
+        if dataframe is None or dataframe.empty:
+            return
+
+        self.scan_logger.log_entry_rejection(
+            pair=pair,
+            dataframe_row=dataframe.iloc[-1],
+            reason=reason,
+            strategy="CHANNEL",
+        )
 
     def leverage(
         self,
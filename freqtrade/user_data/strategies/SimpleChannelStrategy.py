@@ -166,7 +166,7 @@ class SimpleChannelStrategy(IStrategy):
             try:
                 self.scan_logger.log_entry_analysis(
                     pair=metadata.get('pair', 'UNKNOWN'),
-                    dataframe_row=latest_row.to_dict(),
+                    dataframe_row=latest_row,
                     entry_signal=row_meets_conditions,  # Use actual condition check
                     strategy='SIMPLE_CHANNEL'
                 )
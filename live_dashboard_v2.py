@@ -15,6 +15,7 @@ sys.path.append(str(Path(__file__).parent))
 from src.data.supabase_client import SupabaseClient  # noqa: E402
 from loguru import logger  # noqa: E402
 from src.strategies.regime_detector import RegimeDetector  # noqa: E402
+from src.data.trade_read_model import get_trade_read_model  # noqa: E402
 from src.trading.trade_limiter import TradeLimiter  # noqa: E402
 
 app = Flask(__name__)
@@ -4947,7 +4948,11 @@ def get_market_summary():
 # Copy over the existing API endpoints from the original dashboard
 @app.route("/api/trades")
 def get_trades():
-    """API endpoint to get current trades data with PROPER pagination support"""
+    """API endpoint to get current trades data with PROPER pagination support
+
+    Served from the trade read model, which folds new trades into per-group
+    aggregates in the background, so a request makes no database queries.
+    """
 
     # Get pagination parameters from query string
     page = int(request.args.get("page", 1))
@@ -4955,307 +4960,11 @@ def get_trades():
     filter_type = request.args.get("filter", "all")  # 'all', 'open', 'closed'
 
     try:
-        db = SupabaseClient()
-
-        # For stats, we need all trades but we'll optimize this query
-        # For now, still fetch all trades for stats (we'll optimize this later)
-        # But limit to recent trades for display
-        all_trades = []
-        batch_limit = 1000
-        batch_offset = 0
-        max_trades_for_stats = 5000  # Limit stats calculation to recent 5000 trades
-
-        while batch_offset < max_trades_for_stats:
-            batch_result = (
-                db.client.table("paper_trades")
-                .select("*")
-                .order("created_at", desc=True)
-                .range(batch_offset, batch_offset + batch_limit - 1)
-                .execute()
-            )
-
-            if not batch_result.data:
-                break
-
-            all_trades.extend(batch_result.data)
-
-            if len(batch_result.data) < batch_limit:
-                break
-            batch_offset += batch_limit
-
-        trades_data = []
-        open_trades = []
-
-        # Initialize portfolio metrics
-        STARTING_CAPITAL = 10000.0  # Default starting capital for paper trading
-
-        stats = {
-            "open_count": 0,
-            "closed_count": 0,
-            "win_count": 0,
-            "loss_count": 0,
-            "win_rate": 0,
-            "total_pnl": 0,
-            "total_pnl_dollar": 0,
-            "starting_capital": STARTING_CAPITAL,
-        }
-
-        if all_trades:
-            # Get current prices
-            symbols = list(
-                set(trade["symbol"] for trade in all_trades if trade["symbol"])
-            )
-            current_prices = {}
-
-            for symbol in symbols:
-                try:
-                    price_result = (
-                        db.client.table("ohlc_data")
-                        .select("close")
-                        .eq("symbol", symbol)
-                        .order("timestamp", desc=True)
-                        .limit(1)
-                        .execute()
-                    )
+        read_model = get_trade_read_model()
+        if not read_model.loaded:
+            raise RuntimeError(read_model.last_error or "Trades not loaded yet")
 
-                    if price_result.data:
-                        current_prices[symbol] = float(price_result.data[0]["close"])
-                except Exception:
-                    pass
-
-            # Group trades by trade_group_id
-            trades_by_group = {}
-
-            for trade in all_trades:
-                group_id = trade.get("trade_group_id")
-
-                if group_id:
-                    if group_id not in trades_by_group:
-                        trades_by_group[group_id] = {
-                            "buys": [],
-                            "sells": [],
-                            "symbol": trade["symbol"],
-                            "strategy": trade.get("strategy_name", "N/A"),
-                        }
-
-                    if trade["side"] == "BUY":
-                        trades_by_group[group_id]["buys"].append(trade)
-                    else:
-                        trades_by_group[group_id]["sells"].append(trade)
-
-            # Process grouped trades
-            for group_id, group_data in trades_by_group.items():
-                symbol = group_data["symbol"]
-                strategy = group_data["strategy"]
-                current_price = current_prices.get(symbol)
-
-                # Sort trades by created_at
-                group_data["buys"].sort(key=lambda x: x["created_at"])
-                group_data["sells"].sort(key=lambda x: x["created_at"])
-
-                # Calculate aggregated entry data for multiple BUYs (DCA)
-                if group_data["buys"]:
-                    total_cost = 0
-                    total_amount = 0
-                    earliest_buy = None
-
-                    for buy in group_data["buys"]:
-                        # Calculate position size from price and amount
-                        price = float(buy.get("price", 0))
-                        amount = float(buy.get("amount", 0))
-                        cost = price * amount  # Calculate position size in USD
-                        total_cost += cost
-                        total_amount += amount
-                        if not earliest_buy:
-                            earliest_buy = buy
-
-                    avg_entry_price = (
-                        total_cost / total_amount if total_amount > 0 else 0
-                    )
-
-                    # Check if position is closed
-                    is_closed = len(group_data["sells"]) > 0
-
-                    if is_closed and group_data["sells"]:
-                        # Closed position
-                        exit_trade = group_data["sells"][-1]
-                        exit_price = float(exit_trade["price"])
-                        pnl = (exit_price - avg_entry_price) * total_amount
-                        pnl_pct = (
-                            ((exit_price - avg_entry_price) / avg_entry_price * 100)
-                            if avg_entry_price > 0
-                            else 0
-                        )
-
-                        stats["closed_count"] += 1
-                        stats["total_pnl_dollar"] += pnl
-
-                        if pnl > 0:
-                            stats["win_count"] += 1
-
-                        # Calculate hold time
-                        entry_time = datetime.fromisoformat(
-                            earliest_buy["created_at"].replace("Z", "+00:00")
-                        )
-                        exit_time = datetime.fromisoformat(
-                            exit_trade["created_at"].replace("Z", "+00:00")
-                        )
-                        hold_duration = exit_time - entry_time
-                        hours = int(hold_duration.total_seconds() / 3600)
-                        minutes = int((hold_duration.total_seconds() % 3600) / 60)
-                        hold_time = f"{hours}h {minutes}m"
-
-                        trades_data.append(
-                            {
-                                "symbol": symbol,
-                                "strategy": strategy,
-                                "status": "closed",
-                                "entry_price": avg_entry_price,
-                                "exit_price": exit_price,
-                                "entry_time": earliest_buy["created_at"],
-                                "exit_time": exit_trade["created_at"],
-                                "pnl": pnl,
-                                "pnl_pct": pnl_pct,
-                                "hold_time": hold_time,
-                                "exit_reason": exit_trade.get("exit_reason", "manual"),
-                            }
-                        )
-                    else:
-                        # Open position
-                        stats["open_count"] += 1
-
-                        if current_price:
-                            unrealized_pnl = (
-                                current_price - avg_entry_price
-                            ) * total_amount
-                            unrealized_pnl_pct = (
-                                (
-                                    (current_price - avg_entry_price)
-                                    / avg_entry_price
-                                    * 100
-                                )
-                                if avg_entry_price > 0
-                                else 0
-                            )
-                        else:
-                            unrealized_pnl = 0
-                            unrealized_pnl_pct = 0
-
-                        # Calculate hold time
-                        entry_time = datetime.fromisoformat(
-                            earliest_buy["created_at"].replace("Z", "+00:00")
-                        )
-                        hold_duration = datetime.now(timezone.utc) - entry_time
-                        hours = int(hold_duration.total_seconds() / 3600)
-                        minutes = int((hold_duration.total_seconds() % 3600) / 60)
-                        hold_time = f"{hours}h {minutes}m"
-
-                        # Get additional fields from the first buy trade
-                        stop_loss = earliest_buy.get("stop_loss")
-                        take_profit = earliest_buy.get("take_profit")
-                        trailing_stop = earliest_buy.get("trailing_stop_pct")
-
-                        # Calculate SL/TP/TS displays
-                        sl_display = None
-                        tp_display = None
-                        ts_display = None
-
-                        if stop_loss:
-                            sl_price = float(stop_loss)
-                            sl_pnl = (
-                                (sl_price - avg_entry_price) / avg_entry_price
-                            ) * 100
-                            sl_display = f"{unrealized_pnl_pct:.1f}% / {sl_pnl:.1f}%"
-
-                        if take_profit:
-                            tp_price = float(take_profit)
-                            tp_pnl = (
-                                (tp_price - avg_entry_price) / avg_entry_price
-                            ) * 100
-                            tp_display = f"{unrealized_pnl_pct:.1f}% / {tp_pnl:.1f}%"
-
-                        if trailing_stop:
-                            ts_pct = float(trailing_stop) * 100
-                            if take_profit:
-                                tp_price = float(take_profit)
-                                tp_pnl = (
-                                    (tp_price - avg_entry_price) / avg_entry_price
-                                ) * 100
-                                if unrealized_pnl_pct >= tp_pnl:
-                                    ts_display = f"🟢 Active: {unrealized_pnl_pct:.1f}% / -{ts_pct:.1f}%"
-                                else:
-                                    ts_display = (
-                                        f"⚪ Inactive (activates at TP: {tp_pnl:.1f}%)"
-                                    )
-
-                        # Determine DCA status
-                        dca_status = (
-                            "Single"
-                            if len(group_data["buys"]) == 1
-                            else f"DCA x{len(group_data['buys'])}"
-                        )
-
-                        open_trades.append(
-                            {
-                                "symbol": symbol,
-                                "strategy": strategy,
-                                "amount": total_amount,
-                                "entry_price": avg_entry_price,
-                                "entry_time": earliest_buy["created_at"],
-                                "dca_status": dca_status,
-                                "current_price": current_price,
-                                "unrealized_pnl": unrealized_pnl,
-                                "unrealized_pnl_pct": unrealized_pnl_pct,
-                                "hold_time": hold_time,
-                                "sl_display": sl_display,
-                                "tp_display": tp_display,
-                                "ts_display": ts_display,
-                                "position_size": total_cost,
-                                "exit_reason": "",  # Open positions don't have exit reason
-                            }
-                        )
-
-        # Calculate win rate
-        if stats["closed_count"] > 0:
-            stats["win_rate"] = (stats["win_count"] / stats["closed_count"]) * 100
-            stats["loss_count"] = stats["closed_count"] - stats["win_count"]
-
-        # Apply filtering
-        if filter_type == "open":
-            filtered_trades = open_trades
-        elif filter_type == "closed":
-            filtered_trades = trades_data
-        else:  # 'all'
-            filtered_trades = trades_data + open_trades
-
-        # Calculate pagination
-        total_trades = len(filtered_trades)
-        total_pages = (
-            (total_trades + per_page - 1) // per_page if total_trades > 0 else 1
-        )
-
-        # Ensure page is within valid range
-        page = max(1, min(page, total_pages))
-
-        # Slice for pagination
-        start_idx = (page - 1) * per_page
-        end_idx = start_idx + per_page
-        paginated_trades = filtered_trades[start_idx:end_idx]
-
-        # Return paginated data with metadata
-        return jsonify(
-            {
-                "trades": paginated_trades if filter_type != "open" else [],
-                "open_trades": paginated_trades if filter_type == "open" else [],
-                "stats": stats,
-                "pagination": {
-                    "page": page,
-                    "per_page": per_page,
-                    "total_trades": total_trades,
-                    "total_pages": total_pages,
-                },
-            }
-        )
+        return jsonify(read_model.page(filter_type, page, per_page))
 
     except Exception as e:
         logger.error(f"Error getting trades: {e}")
@@ -0,0 +1,18 @@
+-- Migration 053: Idempotency key for paper_trades
+-- Purpose: Let the write-behind queue upsert trade legs so rows replayed from
+--          its spill file (at-least-once delivery) are never stored twice
+-- Date: 2026-10-16
+
+-- Remove duplicate legs left by earlier replays, keeping the first row
+DELETE FROM paper_trades a
+USING paper_trades b
+WHERE a.trade_group_id = b.trade_group_id
+  AND a.side = b.side
+  AND a.created_at = b.created_at
+  AND a.trade_id > b.trade_id;
+
+-- One row per trade group, side and client-set timestamp
+CREATE UNIQUE INDEX IF NOT EXISTS idx_paper_trades_idempotency
+    ON paper_trades(trade_group_id, side, created_at);
+
+COMMENT ON INDEX idx_paper_trades_idempotency IS 'Conflict key for write-behind upserts (src/data/write_behind.py)';
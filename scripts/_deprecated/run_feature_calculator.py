@@ -187,8 +187,10 @@ async def main():
             if ready_symbols:
                 logger.info(f"Symbols ready for feature calculation: {ready_symbols}")
 
-                # Update features for ready symbols
-                results = await calculator.update_all_symbols(ready_symbols)
+                # Update features for ready symbols, new bars only
+                results = await calculator.update_all_symbols(
+                    ready_symbols, incremental=True
+                )
 
                 # Count successes and failures
                 successful = sum(1 for success in results.values() if success)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Benchmark the event-driven backtest engine on synthetic 1m bars.
+
+Writes random-walk bars for BTC plus N-1 alts into a temporary OHLC store,
+replays them through BacktestEngine and reports throughput along with the
+projected time for a year of 1m bars.
+
+Usage:
+    python scripts/benchmark_backtest_engine.py
+    python scripts/benchmark_backtest_engine.py --days 60 --symbols 90
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.data.ohlc_store import OHLC_DTYPE, OHLCStore, to_epoch  # noqa: E402
+from src.trading.backtest_engine import BacktestEngine  # noqa: E402
+
+START = datetime(2025, 1, 1)
+
+
+def write_bars(store, symbols, bars, seed=0):
+    rng = np.random.default_rng(seed)
+    t0 = to_epoch(START)
+    for symbol in symbols:
+        sigma = 0.0003 if symbol == "BTC" else 0.0008
+        close = 100 * np.exp(np.cumsum(rng.normal(0, sigma, bars)))
+
+        arr = np.zeros(bars, dtype=OHLC_DTYPE)
+        arr["timestamp"] = t0 + 60 * np.arange(bars)
+        arr["open"] = close
+        arr["high"] = close * (1 + np.abs(rng.normal(0, 0.0005, bars)))
+        arr["low"] = close * (1 - np.abs(rng.normal(0, 0.0005, bars)))
+        arr["close"] = close
+        arr["volume"] = rng.lognormal(3, 0.8, bars)
+        store.write_array(symbol, "1m", arr, START)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--symbols", type=int, default=90)
+    args = parser.parse_args()
+
+    bars = args.days * 1440
+    symbols = ["BTC"] + [f"ALT{i}" for i in range(args.symbols - 1)]
+
+    with tempfile.TemporaryDirectory() as root:
+        store = OHLCStore(root, max_rows=bars)
+        write_bars(store, symbols, bars)
+
+        engine = BacktestEngine(
+            symbols, START, START + timedelta(minutes=bars - 1), store=store
+        )
+        start = time.perf_counter()
+        result = engine.run()
+        elapsed = time.perf_counter() - start
+
+    symbol_bars = bars * len(symbols)
+    year = elapsed * 525_600 / bars
+    print(f"{'bars':>16} | {bars:,} x {len(symbols)} symbols")
+    print(f"{'elapsed':>16} | {elapsed:.1f}s")
+    print(f"{'symbol-bars/s':>16} | {symbol_bars / elapsed:,.0f}")
+    print(f"{'projected year':>16} | {year / 60:.1f} min")
+    print(f"{'trades':>16} | {len(result.trades):,}")
+    print(f"{'scans':>16} | {result.stats['scans']:,}")
+
+
+if __name__ == "__main__":
+    main()
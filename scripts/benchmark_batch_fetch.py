@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-symbol vs batched OHLC fetching for the scan loop.
+
+Compares the old `for symbol in symbols: get_recent_data(...)` loop against
+HybridDataFetcher.get_recent_data_batch() for increasing symbol counts.
+
+By default the database is simulated (fixed latency per round trip plus a
+small per-row cost) so the numbers are reproducible anywhere. Use --live to
+run against the configured Supabase project instead.
+
+Usage:
+    python scripts/benchmark_batch_fetch.py
+    python scripts/benchmark_batch_fetch.py --latency 0.12 --counts 10 45 90
+    python scripts/benchmark_batch_fetch.py --live
+"""
+
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.data.hybrid_fetcher import HybridDataFetcher  # noqa: E402
+from src.data.ohlc_store import OHLCStore, to_epoch  # noqa: E402
+
+
+class SimulatedResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class SimulatedQuery:
+    """Minimal PostgREST query builder over in-memory rows."""
+
+    def __init__(self, db, table):
+        self.db = db
+        self.symbols = None
+        self.bound = None
+        self.inclusive = True
+        self.offset = 0
+        self.limit = None
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, column, value):
+        if column == "symbol":
+            self.symbols = [value]
+        return self
+
+    def in_(self, column, values):
+        self.symbols = list(values)
+        return self
+
+    def gte(self, column, value):
+        self.bound, self.inclusive = to_epoch(value), True
+        return self
+
+    def gt(self, column, value):
+        self.bound, self.inclusive = to_epoch(value), False
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def range(self, start, end):
+        self.offset = start
+        self.limit = end - start + 1
+        return self
+
+    def execute(self):
+        rows = []
+        for symbol in self.symbols:
+            for row in self.db.rows[symbol]:
+                if row["_epoch"] > self.bound or (
+                    self.inclusive and row["_epoch"] == self.bound
+                ):
+                    rows.append(row)
+        rows.sort(key=lambda r: (r["_epoch"], r["symbol"]))
+
+        end = len(rows) if self.limit is None else self.offset + self.limit
+        # PostgREST caps responses at 1000 rows
+        page = rows[self.offset : min(end, self.offset + 1000)]
+
+        self.db.round_trips += 1
+        time.sleep(self.db.latency + self.db.row_cost * len(page))
+        return SimulatedResponse(page)
+
+
+class SimulatedDatabase:
+    """Fake Supabase client with per-request latency."""
+
+    def __init__(self, symbols, hours, latency, row_cost):
+        self.latency = latency
+        self.row_cost = row_cost
+        self.round_trips = 0
+        self.rows = {symbol: [] for symbol in symbols}
+
+        now = datetime.utcnow().replace(second=0, microsecond=0)
+        for symbol in symbols:
+            for i in range(hours * 60):
+                ts = now - timedelta(minutes=hours * 60 - i)
+                self.rows[symbol].append(
+                    {
+                        "symbol": symbol,
+                        "timeframe": "1m",
+                        "timestamp": ts.isoformat() + "+00:00",
+                        "_epoch": to_epoch(ts),
+                        "open": 100.0,
+                        "high": 101.0,
+                        "low": 99.0,
+                        "close": 100.5,
+                        "volume": 1000.0,
+                    }
+                )
+
+    def table(self, name):
+        return SimulatedQuery(self, name)
+
+
+def build_fetcher(client, use_store: bool) -> HybridDataFetcher:
+    """Create a HybridDataFetcher wired to the given client."""
+    settings = SimpleNamespace(ohlc_store_enabled=use_store)
+    store = OHLCStore(tempfile.mkdtemp(prefix="ohlc_bench_")) if use_store else None
+
+    with patch("src.data.hybrid_fetcher.get_settings", return_value=settings), patch(
+        "src.data.hybrid_fetcher.SupabaseClient",
+        return_value=SimpleNamespace(client=client),
+    ), patch("src.data.hybrid_fetcher.get_ohlc_store", return_value=store):
+        return HybridDataFetcher()
+
+
+async def time_sequential(fetcher, symbols, hours):
+    """Old scan loop: one uncached full-window query per symbol."""
+    start = time.perf_counter()
+    cutoff = datetime.utcnow() - timedelta(hours=hours)
+    for symbol in symbols:
+        (
+            fetcher.db.client.table("ohlc_data")
+            .select("*")
+            .eq("symbol", symbol)
+            .eq("timeframe", "1m")
+            .gte("timestamp", cutoff.isoformat())
+            .order("timestamp", desc=False)
+            .execute()
+        )
+    return time.perf_counter() - start
+
+
+async def time_batch(fetcher, symbols, hours):
+    start = time.perf_counter()
+    await fetcher.get_recent_data_batch(symbols=symbols, timeframe="1m", hours=hours)
+    return time.perf_counter() - start
+
+
+async def run_simulated(args):
+    print(
+        f"Simulated DB: {args.latency * 1000:.0f}ms per round trip, "
+        f"{args.row_cost * 1e6:.0f}us per row, {args.hours}h of 1m bars\n"
+    )
+    print(
+        f"{'symbols':>8} | {'sequential':>12} {'trips':>6} | "
+        f"{'batch (cold)':>12} {'trips':>6} | {'batch (warm)':>12} {'trips':>6}"
+    )
+    print("-" * 80)
+
+    for count in args.counts:
+        symbols = [f"SYM{i}" for i in range(count)]
+        db = SimulatedDatabase(symbols, args.hours, args.latency, args.row_cost)
+
+        # Old behaviour: one query per symbol, nothing cached
+        sequential = build_fetcher(db, use_store=False)
+        db.round_trips = 0
+        seq_time = await time_sequential(sequential, symbols, args.hours)
+        seq_trips = db.round_trips
+
+        # Batched fetch with the local store and ring buffers: first scan
+        # loads full windows, later scans only top up the newest bars
+        batched = build_fetcher(db, use_store=True)
+        db.round_trips = 0
+        cold_time = await time_batch(batched, symbols, args.hours)
+        cold_trips = db.round_trips
+
+        db.round_trips = 0
+        warm_time = await time_batch(batched, symbols, args.hours)
+        warm_trips = db.round_trips
+
+        print(
+            f"{count:>8} | {seq_time:>11.2f}s {seq_trips:>6} | "
+            f"{cold_time:>11.2f}s {cold_trips:>6} | "
+            f"{warm_time:>11.2f}s {warm_trips:>6}"
+        )
+
+
+async def run_live(args):
+    from src.data.polygon_client import PolygonWebSocketClient
+
+    all_symbols = PolygonWebSocketClient().symbols
+    fetcher = HybridDataFetcher()
+
+    print(f"Live Supabase, {args.hours}h of 1m bars\n")
+    print(f"{'symbols':>8} | {'sequential':>12} | {'batch':>12}")
+    print("-" * 40)
+
+    for count in args.counts:
+        symbols = all_symbols[:count]
+
+        seq_time = await time_sequential(fetcher, symbols, args.hours)
+
+        fetcher.store = OHLCStore(tempfile.mkdtemp(prefix="ohlc_bench_"))
+        fetcher.bar_cache.clear()
+        await time_batch(fetcher, symbols, args.hours)  # Warm the store
+        batch_time = await time_batch(fetcher, symbols, args.hours)
+
+        print(f"{count:>8} | {seq_time:>11.2f}s | {batch_time:>11.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched OHLC fetching")
+    parser.add_argument("--counts", type=int, nargs="+", default=[10, 30, 60, 90])
+    parser.add_argument("--hours", type=int, default=24)
+    parser.add_argument("--latency", type=float, default=0.08)
+    parser.add_argument("--row-cost", type=float, default=0.00002)
+    parser.add_argument("--live", action="store_true")
+    args = parser.parse_args()
+
+    if args.live:
+        asyncio.run(run_live(args))
+    else:
+        asyncio.run(run_simulated(args))
+
+
+if __name__ == "__main__":
+    main()
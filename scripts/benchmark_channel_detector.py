@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark ChannelDetector per call: original vs NumPy fast path.
+
+Compares the original DataFrame/linregress detect_channel (kept as
+LegacyChannelDetector in tests/test_channel_detector_fast_path.py) with the
+current detect_channel on a list of dicts and detect_channel_arrays on
+pre-built arrays. Windows are synthetic 100-bar oscillating series.
+
+Usage:
+    python scripts/benchmark_channel_detector.py
+    python scripts/benchmark_channel_detector.py --calls 2000 --lookback 50
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from loguru import logger
+
+# Add project root and tests (for the legacy reference) to path
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent.parent / "tests"))
+
+from src.strategies.channel.detector import ChannelDetector  # noqa: E402
+from test_channel_detector_fast_path import (  # noqa: E402
+    LegacyChannelDetector,
+    make_bars,
+)
+
+
+def time_calls(func, windows):
+    start = time.perf_counter()
+    for window in windows:
+        func(window)
+    return (time.perf_counter() - start) / len(windows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--calls", type=int, default=1000)
+    parser.add_argument("--lookback", type=int, default=100)
+    args = parser.parse_args()
+
+    logger.disable("src.strategies.channel.detector")
+    config = {"lookback_periods": args.lookback, "max_channel_width": 0.2}
+    detector = ChannelDetector(config)
+    legacy = LegacyChannelDetector(config)
+
+    bars = make_bars(0, args.calls + args.lookback)
+    windows = [bars[i : i + args.lookback] for i in range(args.calls)]
+    arrays = []
+    for window in windows:
+        chronological = window[::-1]
+        arrays.append(
+            tuple(
+                np.ascontiguousarray([b[k] for b in chronological], dtype=float)
+                for k in ("high", "low", "close")
+            )
+        )
+
+    results = {
+        "legacy detect_channel": time_calls(
+            lambda w: legacy.find_channel("BTC", w), windows
+        ),
+        "detect_channel (dicts)": time_calls(
+            lambda w: detector.find_channel("BTC", w), windows
+        ),
+        "detect_channel_arrays": time_calls(
+            lambda a: detector.find_channel_arrays("BTC", *a), arrays
+        ),
+    }
+
+    baseline = results["legacy detect_channel"]
+    print(f"{'implementation':>24} | {'us/call':>9} | {'speedup':>7}")
+    print("-" * 48)
+    for name, seconds in results.items():
+        print(f"{name:>24} | {seconds * 1e6:9.1f} | {baseline / seconds:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
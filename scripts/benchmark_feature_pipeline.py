@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Benchmark serial vs pipelined feature refresh in FeatureCalculator.
+
+Compares update_all_symbols(incremental=False), which fetches and computes
+one symbol at a time, against update_all_symbols_pipelined(), which fetches
+concurrently and runs the `ta` indicator work in a process pool.
+
+Data is synthetic: a real HybridDataFetcher queries an in-memory client
+whose every request blocks its thread for a fixed latency, the way the
+synchronous Supabase client does, and inserts are counted instead of sent
+anywhere.
+
+Usage:
+    python scripts/benchmark_feature_pipeline.py
+    python scripts/benchmark_feature_pipeline.py --symbols 90 --latency 0.1
+    python scripts/benchmark_feature_pipeline.py --workers 1 2 4 8
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import numpy as np
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.data.hybrid_fetcher import HybridDataFetcher  # noqa: E402
+from src.ml.feature_calculator import FeatureCalculator  # noqa: E402
+from tests.fakes import FakeClient  # noqa: E402
+
+
+def make_records(symbol: str, seed: int, bars: int):
+    """Synthetic 15m OHLC records shaped like Supabase rows."""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+    volume = rng.uniform(100, 10000, bars)
+    start = datetime.utcnow() - timedelta(minutes=15 * bars)
+    return [
+        {
+            "symbol": symbol,
+            "timeframe": "15m",
+            "timestamp": (start + timedelta(minutes=15 * i)).isoformat() + "+00:00",
+            "open": float(close[i]),
+            "high": float(close[i]) * 1.002,
+            "low": float(close[i]) * 0.998,
+            "close": float(close[i]),
+            "volume": float(volume[i]),
+        }
+        for i in range(bars)
+    ]
+
+
+class BlockingClient(FakeClient):
+    """In-memory Supabase client whose requests block like the real one."""
+
+    def __init__(self, rows, latency):
+        super().__init__(rows=rows)
+        self.latency = latency
+
+    def after_execute(self, query):
+        time.sleep(self.latency)
+
+
+def build_fetcher(client):
+    """A fresh HybridDataFetcher, so no run starts with warm bar buffers."""
+    settings = SimpleNamespace(ohlc_store_enabled=False)
+    with patch("src.data.hybrid_fetcher.get_settings", return_value=settings), patch(
+        "src.data.hybrid_fetcher.SupabaseClient", return_value=client
+    ):
+        return HybridDataFetcher()
+
+
+class CountingSupabase:
+    def __init__(self):
+        self.inserts = 0
+        self.rows = 0
+
+    def insert_ml_features(self, records):
+        self.inserts += 1
+        self.rows += len(records)
+
+
+def build_calculator(fetcher, supabase):
+    settings = SimpleNamespace(data_dir=tempfile.mkdtemp(prefix="features_bench_"))
+    with patch("src.ml.feature_calculator.get_settings", return_value=settings), patch(
+        "src.ml.feature_calculator.HybridDataFetcher", return_value=fetcher
+    ), patch("src.ml.feature_calculator.SupabaseClient", return_value=supabase):
+        return FeatureCalculator()
+
+
+async def run(args):
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    rows = [
+        record
+        for i, symbol in enumerate(symbols)
+        for record in make_records(symbol, i, args.bars)
+    ]
+    client = BlockingClient(rows, args.latency)
+
+    print(
+        f"{args.symbols} symbols x {args.bars} bars, "
+        f"{args.latency * 1000:.0f}ms per request, {os.cpu_count()} CPUs\n"
+    )
+    print(f"{'mode':>22} | {'time':>8} | {'symbols/s':>10} | {'inserts':>7}")
+    print("-" * 58)
+
+    supabase = CountingSupabase()
+    calculator = build_calculator(build_fetcher(client), supabase)
+    start = time.perf_counter()
+    await calculator.update_all_symbols(symbols, incremental=False)
+    serial = time.perf_counter() - start
+    print(
+        f"{'serial':>22} | {serial:>7.2f}s | {args.symbols / serial:>10.1f} | "
+        f"{supabase.inserts:>7}"
+    )
+
+    for workers in args.workers:
+        supabase = CountingSupabase()
+        calculator = build_calculator(build_fetcher(client), supabase)
+        calculator.max_workers = workers
+        calculator.max_concurrent_fetches = args.concurrency
+
+        start = time.perf_counter()
+        results = await calculator.update_all_symbols_pipelined(symbols)
+        elapsed = time.perf_counter() - start
+        assert all(results.values()), "pipelined refresh failed for some symbols"
+
+        label = f"pipelined ({workers} proc)"
+        print(
+            f"{label:>22} | {elapsed:>7.2f}s | {args.symbols / elapsed:>10.1f} | "
+            f"{supabase.inserts:>7}   {serial / elapsed:.1f}x"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark feature refresh")
+    parser.add_argument("--symbols", type=int, default=60)
+    parser.add_argument("--bars", type=int, default=288)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--workers", type=int, nargs="+", default=sorted({1, 2, os.cpu_count() or 4})
+    )
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
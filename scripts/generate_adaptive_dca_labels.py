@@ -4,10 +4,12 @@ Generate DCA labels with adaptive thresholds based on market cap tiers.
 Skips large caps (BTC, ETH) due to poor DCA performance in bull markets.
 """
 
+import argparse
 import sys
 from pathlib import Path
 from datetime import datetime, timedelta
 from dateutil import tz
+from functools import partial
 import pandas as pd
 from typing import List, Dict, Optional
 
@@ -15,6 +17,12 @@ from typing import List, Dict, Optional
 sys.path.append(str(Path(__file__).parent.parent))
 
 from src.data.supabase_client import SupabaseClient
+from src.ml.label_pipeline import (  # noqa: E402
+    DEFAULT_CHECKPOINT_DIR,
+    LabelJob,
+    LabelPipeline,
+    add_label_pipeline_arguments,
+)
 from src.strategies.dca.detector import DCADetector
 from src.strategies.dca.grid import GridCalculator
 from loguru import logger
@@ -335,9 +343,19 @@ class AdaptiveDCALabelGenerator:
 
         return labels
 
-    def generate_all_labels(self, lookback_days: int = 180) -> pd.DataFrame:
-        """Generate labels for all suitable symbols."""
-        all_labels = []
+    def generate_all_labels(
+        self,
+        lookback_days: int = 180,
+        max_workers: Optional[int] = None,
+        resume: bool = True,
+        checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR,
+    ) -> pd.DataFrame:
+        """
+        Generate labels for all suitable symbols.
+
+        Symbols are labelled in parallel by LabelPipeline, which checkpoints
+        each finished symbol.
+        """
 
         # Get all symbols to process (excluding skipped ones)
         symbols_to_process = []
@@ -347,18 +365,19 @@ class AdaptiveDCALabelGenerator:
 
         logger.info(f"Processing {len(symbols_to_process)} symbols (skipping BTC, ETH)")
 
-        # Process each symbol
-        for i, symbol in enumerate(symbols_to_process, 1):
-            logger.info(f"\n{'='*60}")
-            logger.info(f"[{i}/{len(symbols_to_process)}] {symbol}")
-            logger.info(f"{'='*60}")
-
-            try:
-                labels = self.process_symbol(symbol, lookback_days)
-                all_labels.extend(labels)
-            except Exception as e:
-                logger.error(f"Error processing {symbol}: {e}")
-                continue
+        job = LabelJob(
+            name="adaptive_dca",
+            make_generator=make_adaptive_dca_label_generator,
+            label_symbol=partial(
+                label_adaptive_dca_symbol, lookback_days=lookback_days
+            ),
+            config={"market_tiers": self.market_tiers, "lookback_days": lookback_days},
+        )
+        pipeline = LabelPipeline(
+            job, max_workers=max_workers, checkpoint_dir=checkpoint_dir
+        )
+        results = pipeline.run(symbols_to_process, resume=resume, generator=self)
+        all_labels = [label for labels in results.values() for label in labels]
 
         # Convert to DataFrame
         if all_labels:
@@ -385,7 +404,23 @@ class AdaptiveDCALabelGenerator:
         return pd.DataFrame()
 
 
+def make_adaptive_dca_label_generator() -> AdaptiveDCALabelGenerator:
+    """Generator with its own client (one per LabelPipeline worker)"""
+    return AdaptiveDCALabelGenerator(SupabaseClient())
+
+
+def label_adaptive_dca_symbol(
+    generator: AdaptiveDCALabelGenerator, symbol: str, lookback_days: int
+) -> List[Dict]:
+    """process_symbol, run in a LabelPipeline worker"""
+    return generator.process_symbol(symbol, lookback_days)
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Generate adaptive DCA labels")
+    add_label_pipeline_arguments(parser)
+    args = parser.parse_args()
+
     # Initialize
     logger.info("=" * 80)
     logger.info("ADAPTIVE DCA LABEL GENERATOR")
@@ -400,7 +435,12 @@ def main():
     logger.info("- Large/Mid caps: 5% threshold")
     logger.info("- Small caps/Memecoins: 3% threshold")
 
-    df = generator.generate_all_labels(lookback_days=180)
+    df = generator.generate_all_labels(
+        lookback_days=180,
+        max_workers=args.workers,
+        resume=not args.restart,
+        checkpoint_dir=args.checkpoint_dir,
+    )
 
     if not df.empty:
         # Save to CSV
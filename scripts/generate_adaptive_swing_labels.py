@@ -3,11 +3,12 @@ Generate adaptive training labels for Swing Trading ML model
 Uses more realistic targets based on market conditions
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import logging
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import json
 import sys
 import os
@@ -15,8 +16,19 @@ import os
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from src.analysis.forward_outcomes import (  # noqa: E402
+    TAKE_PROFIT,
+    STOP_LOSS,
+    forward_outcomes,
+)
 from src.data.supabase_client import SupabaseClient
 from src.config.settings import Settings
+from src.ml.label_pipeline import (  # noqa: E402
+    DEFAULT_CHECKPOINT_DIR,
+    LabelJob,
+    LabelPipeline,
+    add_label_pipeline_arguments,
+)
 from loguru import logger
 
 # Configure logging
@@ -222,6 +234,7 @@ class AdaptiveSwingLabelGenerator:
         """Detect swing trading setups with adaptive parameters"""
 
         setups = []
+        outcome_rows = []
 
         if len(df) < 100:
             return setups
@@ -260,14 +273,6 @@ class AdaptiveSwingLabelGenerator:
                         take_profit_price = entry_price * (1 + targets["take_profit"])
                         stop_loss_price = entry_price * (1 - targets["stop_loss"])
 
-                        # Track outcome
-                        outcome = self.track_outcome(
-                            df.iloc[i : i + 73],  # Next 72 hours
-                            entry_price,
-                            take_profit_price,
-                            stop_loss_price,
-                        )
-
                         # Calculate features
                         features = {
                             "breakout_strength": (
@@ -305,13 +310,14 @@ class AdaptiveSwingLabelGenerator:
                             "stop_loss_price": stop_loss_price,
                             "take_profit_pct": targets["take_profit"] * 100,
                             "stop_loss_pct": targets["stop_loss"] * 100,
-                            "outcome": outcome["result"],
-                            "exit_price": outcome["exit_price"],
-                            "exit_time": outcome["exit_time"],
-                            "pnl_percent": outcome["pnl_percent"],
-                            "hold_hours": outcome["hold_hours"],
-                            "max_profit": outcome["max_profit"],
-                            "max_loss": outcome["max_loss"],
+                            # Outcome fields are filled in below
+                            "outcome": None,
+                            "exit_price": None,
+                            "exit_time": None,
+                            "pnl_percent": None,
+                            "hold_hours": None,
+                            "max_profit": None,
+                            "max_loss": None,
                             "market_condition": market_condition,
                             "symbol_category": self.get_symbol_category(
                                 symbol, volatility
@@ -320,75 +326,81 @@ class AdaptiveSwingLabelGenerator:
                         }
 
                         setups.append(setup)
+                        outcome_rows.append(i)
+
+        # Track every setup for the next 72 hours at once
+        outcomes = self.track_outcomes(
+            df,
+            outcome_rows,
+            [s["entry_price"] for s in setups],
+            [s["take_profit_price"] for s in setups],
+            [s["stop_loss_price"] for s in setups],
+        )
+        for setup, outcome in zip(setups, outcomes):
+            setup["outcome"] = outcome["result"]
+            setup["exit_price"] = outcome["exit_price"]
+            setup["exit_time"] = outcome["exit_time"]
+            setup["pnl_percent"] = outcome["pnl_percent"]
+            setup["hold_hours"] = outcome["hold_hours"]
+            setup["max_profit"] = outcome["max_profit"]
+            setup["max_loss"] = outcome["max_loss"]
 
         return setups
 
-    def track_outcome(
+    def track_outcomes(
         self,
-        future_df: pd.DataFrame,
-        entry_price: float,
-        take_profit: float,
-        stop_loss: float,
-    ) -> Dict:
-        """Track the outcome of a swing setup"""
-
-        result = "TIMEOUT"
-        exit_price = entry_price
-        exit_time = None
-        hold_hours = 72
-        max_profit = 0
-        max_loss = 0
-
-        for j in range(min(len(future_df), 72)):
-            current_price = future_df.iloc[j]["close"]
-            high_price = future_df.iloc[j]["high"]
-            low_price = future_df.iloc[j]["low"]
-
-            # Track extremes
-            profit = (high_price - entry_price) / entry_price
-            loss = (low_price - entry_price) / entry_price
-            max_profit = max(max_profit, profit)
-            max_loss = min(max_loss, loss)
-
-            # Check exit conditions
-            if high_price >= take_profit:
-                result = "WIN"
-                exit_price = take_profit
-                exit_time = future_df.iloc[j]["timestamp"]
-                hold_hours = j + 1
-                break
-            elif low_price <= stop_loss:
-                result = "LOSS"
-                exit_price = stop_loss
-                exit_time = future_df.iloc[j]["timestamp"]
-                hold_hours = j + 1
-                break
-
-        # If no exit triggered, check final price
-        if result == "TIMEOUT":
-            final_idx = min(71, len(future_df) - 1)
-            exit_price = future_df.iloc[final_idx]["close"]
-            exit_time = future_df.iloc[final_idx]["timestamp"]
-
-            pnl = (exit_price - entry_price) / entry_price
-            if pnl > 0.02:
-                result = "SMALL_WIN"
-            elif pnl < -0.02:
-                result = "SMALL_LOSS"
+        df: pd.DataFrame,
+        entry_indices: List[int],
+        entry_prices: List[float],
+        take_profits: List[float],
+        stop_losses: List[float],
+        max_bars: int = 72,
+    ) -> List[Dict]:
+        """Track the outcome of swing setups entered at the given rows"""
+        found = forward_outcomes(
+            df["high"].to_numpy(),
+            df["low"].to_numpy(),
+            df["close"].to_numpy(),
+            entry_indices,
+            entry_prices,
+            take_profits,
+            stop_losses,
+            max_bars,
+        )
+
+        outcomes = []
+        for j, entry_price in enumerate(entry_prices):
+            reason = found["exit_reason"][j]
+            exit_price = found["exit_price"][j]
+
+            if reason == TAKE_PROFIT:
+                result, hold_hours = "WIN", int(found["bars_held"][j])
+            elif reason == STOP_LOSS:
+                result, hold_hours = "LOSS", int(found["bars_held"][j])
             else:
-                result = "BREAKEVEN"
-
-        pnl_percent = ((exit_price - entry_price) / entry_price) * 100
-
-        return {
-            "result": result,
-            "exit_price": exit_price,
-            "exit_time": exit_time,
-            "pnl_percent": pnl_percent,
-            "hold_hours": hold_hours,
-            "max_profit": max_profit * 100,
-            "max_loss": max_loss * 100,
-        }
+                # No exit triggered, check final price
+                hold_hours = max_bars
+                pnl = (exit_price - entry_price) / entry_price
+                if pnl > 0.02:
+                    result = "SMALL_WIN"
+                elif pnl < -0.02:
+                    result = "SMALL_LOSS"
+                else:
+                    result = "BREAKEVEN"
+
+            outcomes.append(
+                {
+                    "result": result,
+                    "exit_price": exit_price,
+                    "exit_time": df["timestamp"].iloc[found["exit_index"][j]],
+                    "pnl_percent": found["pnl_pct"][j],
+                    "hold_hours": hold_hours,
+                    "max_profit": found["max_favorable_pct"][j],
+                    "max_loss": found["max_adverse_pct"][j],
+                }
+            )
+
+        return outcomes
 
     def calculate_rsi(self, prices: pd.Series, period: int = 14) -> pd.Series:
         """Calculate RSI"""
@@ -445,8 +457,18 @@ class AdaptiveSwingLabelGenerator:
             logger.error(f"Error fetching data for {symbol}: {e}")
             return pd.DataFrame()
 
-    def generate_labels(self):
-        """Generate adaptive swing trading labels"""
+    def generate_labels(
+        self,
+        max_workers: Optional[int] = None,
+        resume: bool = True,
+        checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR,
+    ):
+        """
+        Generate adaptive swing trading labels
+
+        Symbols are labelled in parallel by LabelPipeline, which checkpoints
+        each finished symbol.
+        """
 
         all_setups = []
         summary = {
@@ -461,17 +483,18 @@ class AdaptiveSwingLabelGenerator:
             f"Generating adaptive swing labels for {len(self.symbols)} symbols..."
         )
 
-        for symbol in self.symbols:
-            logger.info(f"Processing {symbol}...")
-
-            df = self.fetch_ohlc_data(symbol)
-
-            if df.empty:
-                continue
-
-            df = self.calculate_indicators(df)
-            setups = self.detect_swing_setups(df, symbol)
+        job = LabelJob(
+            name="adaptive_swing",
+            make_generator=AdaptiveSwingLabelGenerator,
+            label_symbol=label_adaptive_swing_symbol,
+            config={"config": self.config, "symbol_categories": self.symbol_categories},
+        )
+        pipeline = LabelPipeline(
+            job, max_workers=max_workers, checkpoint_dir=checkpoint_dir
+        )
+        results = pipeline.run(self.symbols, resume=resume, generator=self)
 
+        for symbol, setups in results.items():
             if setups:
                 logger.info(f"  Found {len(setups)} setups for {symbol}")
 
@@ -559,10 +582,33 @@ class AdaptiveSwingLabelGenerator:
         return all_setups, summary
 
 
+def label_adaptive_swing_symbol(
+    generator: AdaptiveSwingLabelGenerator, symbol: str
+) -> List[Dict]:
+    """Adaptive swing setups for one symbol (runs in a LabelPipeline worker)"""
+    logger.info(f"Processing {symbol}...")
+
+    df = generator.fetch_ohlc_data(symbol)
+
+    if df.empty:
+        return []
+
+    df = generator.calculate_indicators(df)
+    return generator.detect_swing_setups(df, symbol)
+
+
 def main():
     """Main execution"""
+    parser = argparse.ArgumentParser(description="Generate adaptive swing labels")
+    add_label_pipeline_arguments(parser)
+    args = parser.parse_args()
+
     generator = AdaptiveSwingLabelGenerator()
-    labels, summary = generator.generate_labels()
+    labels, summary = generator.generate_labels(
+        max_workers=args.workers,
+        resume=not args.restart,
+        checkpoint_dir=args.checkpoint_dir,
+    )
 
     # Print category performance
     if summary["by_category"]:
@@ -4,6 +4,7 @@ Generate training labels for Channel Trading Strategy
 Identifies historical channel patterns and their outcomes
 """
 
+import argparse
 import json
 import numpy as np
 import pandas as pd
@@ -14,8 +15,22 @@ import sys
 
 sys.path.append(".")
 
+from src.analysis.forward_outcomes import (  # noqa: E402
+    EXPIRED,
+    LONG,
+    SHORT,
+    TAKE_PROFIT,
+    forward_outcomes,
+)
 from src.data.supabase_client import SupabaseClient
 from src.strategies.channel.detector import ChannelDetector, Channel
+from src.strategies.channel.sliding import SlidingChannelEngine  # noqa: E402
+from src.ml.label_pipeline import (  # noqa: E402
+    DEFAULT_CHECKPOINT_DIR,
+    LabelJob,
+    LabelPipeline,
+    add_label_pipeline_arguments,
+)
 
 # Configure logger
 logger.add("logs/channel_label_generation.log", rotation="10 MB")
@@ -37,6 +52,7 @@ class ChannelLabelGenerator:
                 "sell_zone": 0.70,  # Top 30%
             }
         )
+        self.channel_engine = SlidingChannelEngine(self.detector)
 
         # Outcome parameters
         self.min_hold_hours = 4
@@ -78,16 +94,18 @@ class ChannelLabelGenerator:
             logger.warning(f"Insufficient data for {symbol}")
             return setups
 
-        # Slide through history looking for channels
-        for i in range(self.detector.lookback_periods, len(ohlc_data) - 100):
-            # Get window of data
-            window_data = ohlc_data[i - self.detector.lookback_periods : i]
+        # Detect channels for every window in one pass; keys are the window
+        # end index i (window = ohlc_data[i - lookback_periods : i])
+        channels = self.channel_engine.channels(symbol, ohlc_data)
+        entry_rows = []
 
-            # Convert to format expected by detector (most recent first)
-            window_reversed = list(reversed(window_data))
+        # Slide through history looking for channels
+        for i in sorted(channels):
+            if i >= len(ohlc_data) - 100:
+                break
 
-            # Detect channel
-            channel = self.detector.detect_channel(symbol, window_reversed)
+            window_data = ohlc_data[i - self.detector.lookback_periods : i]
+            channel = channels[i]
 
             if channel and channel.is_valid:
                 # Get trading signal
@@ -120,13 +138,13 @@ class ChannelLabelGenerator:
                             "features": self._extract_features(window_data, channel),
                         }
 
-                        # Calculate outcome
-                        outcome = self._calculate_outcome(
-                            setup, ohlc_data[i : i + 100]
-                        )  # Look forward 100 bars
-                        setup.update(outcome)
-
                         setups.append(setup)
+                        entry_rows.append(i)
+
+        # Calculate outcomes, looking forward up to 100 bars
+        outcomes = self._calculate_outcomes(setups, ohlc_data, entry_rows)
+        for setup, outcome in zip(setups, outcomes):
+            setup.update(outcome)
 
         return setups
 
@@ -166,121 +184,117 @@ class ChannelLabelGenerator:
             "channel_age": channel_age,
         }
 
-    def _calculate_outcome(self, setup: Dict, future_data: List[Dict]) -> Dict:
-        """Calculate the outcome of a channel trade"""
-        entry_price = setup["entry_price"]
-        take_profit = setup["take_profit"]
-        stop_loss = setup["stop_loss"]
-        signal = setup["signal"]
-
-        outcome = {
-            "outcome": "EXPIRED",
-            "exit_price": entry_price,
-            "exit_bars": 0,
-            "max_profit": 0.0,
-            "max_loss": 0.0,
-            "actual_pnl": 0.0,
-            "channel_held": False,
-        }
-
-        if not future_data:
-            return outcome
-
-        max_profit = 0
-        max_loss = 0
-        channel_breaks = 0
-
-        for i, bar in enumerate(future_data[: self.max_hold_hours]):
-            high = bar["high"]
-            low = bar["low"]
-            close = bar["close"]
+    def _calculate_outcomes(
+        self,
+        setups: List[Dict],
+        ohlc_data: List[Dict],
+        entry_rows: List[int],
+        look_forward: int = 100,
+    ) -> List[Dict]:
+        """
+        Calculate the outcome of channel trades
+
+        Each trade is followed from ohlc_data[entry_row] for up to
+        max_hold_hours bars. A long stops being tracked once the close has
+        left the channel (by 2%) three times; it then expires.
+        """
+        high = np.array([float(bar["high"]) for bar in ohlc_data])
+        low = np.array([float(bar["low"]) for bar in ohlc_data])
+        close = np.array([float(bar["close"]) for bar in ohlc_data])
+
+        entries = np.asarray(entry_rows, dtype=np.int64)
+        horizon = np.clip(
+            np.minimum(min(self.max_hold_hours, look_forward), len(close) - entries),
+            0,
+            None,
+        )
 
-            if signal == "BUY":
-                # Long position
-                profit = (high - entry_price) / entry_price * 100
-                loss = (low - entry_price) / entry_price * 100
+        # Bars scanned for take profit / stop loss, cut short by channel breaks
+        scanned = horizon.copy()
+        broken = np.zeros(len(setups), dtype=bool)
+        for k, setup in enumerate(setups):
+            if setup["signal"] != "BUY":
+                continue
+            window = close[entries[k] : entries[k] + horizon[k]]
+            breaks = np.flatnonzero(
+                (window > setup["upper_line"] * 1.02)
+                | (window < setup["lower_line"] * 0.98)
+            )
+            if len(breaks) >= 3:
+                scanned[k] = breaks[2] + 1
+                broken[k] = True
+
+        found = forward_outcomes(
+            high,
+            low,
+            close,
+            entries,
+            [s["entry_price"] for s in setups],
+            [s["take_profit"] for s in setups],
+            [s["stop_loss"] for s in setups],
+            scanned,
+            side=[LONG if s["signal"] == "BUY" else SHORT for s in setups],
+        )
 
-                max_profit = max(max_profit, profit)
-                max_loss = min(max_loss, loss)
+        outcomes = []
+        for k, setup in enumerate(setups):
+            entry_price = setup["entry_price"]
+            outcome = {
+                "outcome": "EXPIRED",
+                "exit_price": entry_price,
+                "exit_bars": 0,
+                "max_profit": 0.0,
+                "max_loss": 0.0,
+                "actual_pnl": 0.0,
+                "channel_held": False,
+            }
+            if horizon[k] == 0:
+                outcomes.append(outcome)
+                continue
 
-                # Check take profit
-                if high >= take_profit:
-                    outcome["outcome"] = "WIN"
-                    outcome["exit_price"] = take_profit
-                    outcome["exit_bars"] = i + 1
-                    outcome["actual_pnl"] = (
-                        (take_profit - entry_price) / entry_price * 100
-                    )
-                    break
+            outcome["max_profit"] = found["max_favorable_pct"][k]
+            outcome["max_loss"] = found["max_adverse_pct"][k]
 
-                # Check stop loss
-                if low <= stop_loss:
-                    outcome["outcome"] = "LOSS"
-                    outcome["exit_price"] = stop_loss
-                    outcome["exit_bars"] = i + 1
-                    outcome["actual_pnl"] = (
-                        (stop_loss - entry_price) / entry_price * 100
-                    )
-                    break
-
-                # Check if price breaks channel
-                if (
-                    close > setup["upper_line"] * 1.02
-                    or close < setup["lower_line"] * 0.98
-                ):
-                    channel_breaks += 1
-                    if channel_breaks >= 3:  # Channel broken
-                        outcome["channel_held"] = False
-                        break
-
-            else:  # SELL signal (short)
-                # Short position
-                profit = (entry_price - low) / entry_price * 100
-                loss = (entry_price - high) / entry_price * 100
-
-                max_profit = max(max_profit, profit)
-                max_loss = min(max_loss, loss)
-
-                # Check take profit (price goes down)
-                if low <= take_profit:
-                    outcome["outcome"] = "WIN"
-                    outcome["exit_price"] = take_profit
-                    outcome["exit_bars"] = i + 1
+            reason = found["exit_reason"][k]
+            if reason != EXPIRED:
+                outcome["outcome"] = "WIN" if reason == TAKE_PROFIT else "LOSS"
+                outcome["exit_price"] = found["exit_price"][k]
+                outcome["exit_bars"] = int(found["bars_held"][k])
+                outcome["actual_pnl"] = found["pnl_pct"][k]
+                outcome["channel_held"] = True
+            else:
+                # Time exit at the last bar of the holding period
+                last_price = close[entries[k] + horizon[k] - 1]
+                if setup["signal"] == "BUY":
                     outcome["actual_pnl"] = (
-                        (entry_price - take_profit) / entry_price * 100
+                        (last_price - entry_price) / entry_price * 100
                     )
-                    break
-
-                # Check stop loss (price goes up)
-                if high >= stop_loss:
-                    outcome["outcome"] = "LOSS"
-                    outcome["exit_price"] = stop_loss
-                    outcome["exit_bars"] = i + 1
+                else:
                     outcome["actual_pnl"] = (
-                        (entry_price - stop_loss) / entry_price * 100
+                        (entry_price - last_price) / entry_price * 100
                     )
-                    break
-
-        outcome["max_profit"] = max_profit
-        outcome["max_loss"] = max_loss
-        outcome["channel_held"] = channel_breaks < 3
-
-        # If no exit triggered, calculate time exit
-        if outcome["outcome"] == "EXPIRED" and future_data:
-            last_price = future_data[
-                min(self.max_hold_hours - 1, len(future_data) - 1)
-            ]["close"]
-            if signal == "BUY":
-                outcome["actual_pnl"] = (last_price - entry_price) / entry_price * 100
-            else:
-                outcome["actual_pnl"] = (entry_price - last_price) / entry_price * 100
-            outcome["exit_price"] = last_price
-            outcome["exit_bars"] = min(self.max_hold_hours, len(future_data))
-
-        return outcome
-
-    def generate_labels(self, symbols: Optional[List[str]] = None):
-        """Generate labels for specified symbols"""
+                outcome["exit_price"] = last_price
+                outcome["exit_bars"] = int(horizon[k])
+                outcome["channel_held"] = not broken[k]
+
+            outcomes.append(outcome)
+
+        return outcomes
+
+    def generate_labels(
+        self,
+        symbols: Optional[List[str]] = None,
+        max_workers: Optional[int] = None,
+        resume: bool = True,
+        checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR,
+    ):
+        """
+        Generate labels for specified symbols
+
+        Symbols are labelled in parallel by LabelPipeline, which also
+        upserts the rows into strategy_channel_labels and checkpoints each
+        finished symbol.
+        """
         if symbols is None:
             # Use top liquid symbols
             symbols = [
@@ -313,18 +327,24 @@ class ChannelLabelGenerator:
 
         logger.info(f"Generating channel labels for {len(symbols)} symbols...")
 
-        for symbol in symbols:
-            logger.info(f"Processing {symbol}...")
-
-            # Fetch OHLC data
-            ohlc_data = self.fetch_ohlc_data(symbol)
-
-            if not ohlc_data:
-                continue
-
-            # Detect setups
-            setups = self.detect_channel_setups(symbol, ohlc_data)
+        job = LabelJob(
+            name="channel",
+            make_generator=ChannelLabelGenerator,
+            label_symbol=label_channel_symbol,
+            table="strategy_channel_labels",
+            to_row=channel_label_row,
+            config={
+                "detector": self.detector.config,
+                "max_hold_hours": self.max_hold_hours,
+                "min_risk_reward": self.min_risk_reward,
+            },
+        )
+        pipeline = LabelPipeline(
+            job, self.supabase, max_workers=max_workers, checkpoint_dir=checkpoint_dir
+        )
+        results = pipeline.run(symbols, resume=resume, generator=self)
 
+        for symbol, setups in results.items():
             if setups:
                 wins = sum(1 for s in setups if s["outcome"] == "WIN")
                 losses = sum(1 for s in setups if s["outcome"] == "LOSS")
@@ -369,59 +389,10 @@ class ChannelLabelGenerator:
 
         logger.info(f"\nSaved {len(all_labels)} channel labels to {output_file}")
 
-        # Save to database for ML training
         if all_labels:
-            logger.info("\nSaving labels to strategy_channel_labels table...")
-            saved_count = 0
-            skipped_count = 0
-
-            for setup in all_labels:
-                # Prepare data for strategy_channel_labels table
-                label_data = {
-                    "symbol": setup["symbol"],
-                    "timestamp": setup["timestamp"],
-                    "channel_position": setup[
-                        "position"
-                    ].upper(),  # TOP, BOTTOM, MIDDLE
-                    "channel_strength": float(setup.get("channel_strength", 50)),
-                    "channel_width": float(setup.get("channel_width_pct", 5.0)),
-                    "outcome": setup["outcome"],
-                    "optimal_entry": float(setup.get("entry_price", 0)),
-                    "optimal_exit": float(setup.get("target_price", 0)),
-                    "actual_return": float(setup.get("actual_return", 0)),
-                    "hold_time_hours": int(setup.get("hold_hours", 24)),
-                    "features": {
-                        "channel_type": setup.get("channel_type", "HORIZONTAL"),
-                        "touches_top": setup.get("touches_top", 0),
-                        "touches_bottom": setup.get("touches_bottom", 0),
-                        "risk_reward": setup.get("risk_reward", 1.5),
-                        "price": setup.get("price", 0),
-                        "stop_loss": setup.get("stop_loss", 0),
-                        "channel_top": setup.get("channel_top", 0),
-                        "channel_bottom": setup.get("channel_bottom", 0),
-                    },
-                }
-
-                try:
-                    # Use upsert to handle duplicates gracefully
-                    result = (
-                        self.supabase.client.table("strategy_channel_labels")
-                        .upsert(label_data, on_conflict="symbol,timestamp")
-                        .execute()
-                    )
-                    if result.data:
-                        saved_count += 1
-                except Exception as e:
-                    if "duplicate" in str(e).lower():
-                        skipped_count += 1
-                    else:
-                        logger.error(
-                            f"Error saving label for {setup['symbol']} at {setup['timestamp']}: {e}"
-                        )
-
-            logger.info(f"Saved {saved_count} labels to strategy_channel_labels table")
-            if skipped_count > 0:
-                logger.info(f"Skipped {skipped_count} duplicate labels")
+            logger.info(
+                f"Saved {pipeline.stats['rows_written']} labels to strategy_channel_labels table"
+            )
 
         # Overall statistics
         if all_labels:
@@ -449,9 +420,57 @@ class ChannelLabelGenerator:
                     )
 
 
+def label_channel_symbol(generator: ChannelLabelGenerator, symbol: str) -> List[Dict]:
+    """Channel setups for one symbol (runs in a LabelPipeline worker)"""
+    logger.info(f"Processing {symbol}...")
+
+    # Fetch OHLC data
+    ohlc_data = generator.fetch_ohlc_data(symbol)
+
+    if not ohlc_data:
+        return []
+
+    # Detect setups
+    return generator.detect_channel_setups(symbol, ohlc_data)
+
+
+def channel_label_row(setup: Dict) -> Dict:
+    """strategy_channel_labels row for a setup"""
+    return {
+        "symbol": setup["symbol"],
+        "timestamp": setup["timestamp"],
+        "channel_position": setup["position"].upper(),  # TOP, BOTTOM, MIDDLE
+        "channel_strength": float(setup.get("channel_strength", 50)),
+        "channel_width": float(setup.get("channel_width_pct", 5.0)),
+        "outcome": setup["outcome"],
+        "optimal_entry": float(setup.get("entry_price", 0)),
+        "optimal_exit": float(setup.get("target_price", 0)),
+        "actual_return": float(setup.get("actual_return", 0)),
+        "hold_time_hours": int(setup.get("hold_hours", 24)),
+        "features": {
+            "channel_type": setup.get("channel_type", "HORIZONTAL"),
+            "touches_top": setup.get("touches_top", 0),
+            "touches_bottom": setup.get("touches_bottom", 0),
+            "risk_reward": setup.get("risk_reward", 1.5),
+            "price": setup.get("price", 0),
+            "stop_loss": setup.get("stop_loss", 0),
+            "channel_top": setup.get("channel_top", 0),
+            "channel_bottom": setup.get("channel_bottom", 0),
+        },
+    }
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Generate channel trading labels")
+    add_label_pipeline_arguments(parser)
+    args = parser.parse_args()
+
     generator = ChannelLabelGenerator()
-    generator.generate_labels()
+    generator.generate_labels(
+        max_workers=args.workers,
+        resume=not args.restart,
+        checkpoint_dir=args.checkpoint_dir,
+    )
 
 
 if __name__ == "__main__":
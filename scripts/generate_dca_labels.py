@@ -9,13 +9,15 @@ This script:
 4. Saves labeled data for ML training
 """
 
+import argparse
 import os
 import sys
 import pandas as pd
 import numpy as np
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
+from functools import partial
+from typing import Dict, List, Optional, Tuple
 from dotenv import load_dotenv
 from loguru import logger
 
@@ -23,6 +25,12 @@ from loguru import logger
 sys.path.append(str(Path(__file__).parent.parent))
 
 from src.data.supabase_client import SupabaseClient
+from src.ml.label_pipeline import (  # noqa: E402
+    DEFAULT_CHECKPOINT_DIR,
+    LabelJob,
+    LabelPipeline,
+    add_label_pipeline_arguments,
+)
 from src.strategies.dca.detector import DCADetector
 from src.strategies.dca.grid import GridCalculator
 
@@ -41,31 +49,45 @@ class DCALabelGenerator:
         self.grid_calculator = GridCalculator(self.config)
 
     def generate_labels(
-        self, symbols: List[str], lookback_days: int = 180
+        self,
+        symbols: List[str],
+        lookback_days: int = 180,
+        max_workers: Optional[int] = None,
+        resume: bool = True,
+        checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR,
     ) -> pd.DataFrame:
         """
         Generate DCA labels from historical data.
 
+        Symbols are labelled in parallel by LabelPipeline, which also
+        upserts finished labels into strategy_dca_labels and checkpoints
+        each symbol.
+
         Args:
             symbols: List of symbols to process
             lookback_days: How many days of history to scan
+            max_workers: Worker processes (default: CPU count)
+            resume: Skip symbols finished by an earlier run
+            checkpoint_dir: Where per-symbol checkpoints are kept
 
         Returns:
             DataFrame with labeled setups
         """
-        all_setups = []
-
-        for symbol in symbols:
-            logger.info(f"Processing {symbol}...")
-            setups = self.find_historical_setups(symbol, lookback_days)
-
-            for setup in setups:
-                # Simulate outcome
-                outcome = self.simulate_dca_outcome(setup, symbol)
-                setup.update(outcome)
-                all_setups.append(setup)
-
-        df = pd.DataFrame(all_setups)
+        job = LabelJob(
+            name="dca",
+            make_generator=make_dca_label_generator,
+            label_symbol=partial(label_dca_symbol, lookback_days=lookback_days),
+            table="strategy_dca_labels",
+            to_row=dca_label_row,
+            config={"detector": self.config, "lookback_days": lookback_days},
+        )
+        pipeline = LabelPipeline(
+            job, self.supabase, max_workers=max_workers, checkpoint_dir=checkpoint_dir
+        )
+        results = pipeline.run(symbols, resume=resume, generator=self)
+        self.pipeline_stats = pipeline.stats
+
+        df = pd.DataFrame([setup for setups in results.values() for setup in setups])
         logger.info(f"Generated {len(df)} labeled setups")
 
         if len(df) > 0:
@@ -390,8 +412,61 @@ class DCALabelGenerator:
                     print(f"{key:20}: {value:.1f}")
 
 
+def make_dca_label_generator() -> DCALabelGenerator:
+    """Generator with its own client (one per LabelPipeline worker)"""
+    return DCALabelGenerator(SupabaseClient())
+
+
+def label_dca_symbol(
+    generator: DCALabelGenerator, symbol: str, lookback_days: int
+) -> List[Dict]:
+    """Setups with simulated outcomes for one symbol"""
+    logger.info(f"Processing {symbol}...")
+    setups = generator.find_historical_setups(symbol, lookback_days)
+
+    for setup in setups:
+        # Simulate outcome
+        outcome = generator.simulate_dca_outcome(setup, symbol)
+        setup.update(outcome)
+
+    return setups
+
+
+def dca_label_row(row: Dict) -> Optional[Dict]:
+    """strategy_dca_labels row for a labelled setup (None if not tradeable)"""
+    if row["label"] not in ["WIN", "LOSS", "BREAKEVEN", "TIMEOUT"]:
+        return None
+
+    return {
+        "symbol": row["symbol"],
+        "timestamp": row["setup_time"].isoformat(),
+        "setup_detected": True,
+        "drop_percentage": float(row["drop_pct"]),
+        "rsi": float(row["rsi"]),
+        "volume_ratio": float(row["volume_ratio"]),
+        "btc_regime": row.get("btc_regime", "NEUTRAL"),
+        "outcome": row["label"],
+        "optimal_take_profit": float(row.get("take_profit_target", 10.0)),
+        "optimal_stop_loss": float(row.get("stop_loss_target", -8.0)),
+        "actual_return": float(row["pnl_pct"]),
+        "hold_time_hours": int(row.get("hold_hours", 24)),
+        "features": {
+            "high_4h": float(row["high_4h"]),
+            "setup_price": float(row["setup_price"]),
+            "exit_price": float(row.get("exit_price", row["setup_price"])),
+            "volume": float(row.get("volume", 0)),
+            "macd": float(row.get("macd", 0)),
+            "bb_position": float(row.get("bb_position", 0.5)),
+        },
+    }
+
+
 def main():
     """Generate DCA training labels."""
+    parser = argparse.ArgumentParser(description="Generate DCA training labels")
+    add_label_pipeline_arguments(parser)
+    args = parser.parse_args()
+
     print("=" * 80)
     print("DCA TRAINING LABEL GENERATOR")
     print("=" * 80)
@@ -409,63 +484,21 @@ def main():
     print("-" * 40)
 
     # Generate labels
-    df = generator.generate_labels(symbols, lookback_days=180)
+    df = generator.generate_labels(
+        symbols,
+        lookback_days=180,
+        max_workers=args.workers,
+        resume=not args.restart,
+        checkpoint_dir=args.checkpoint_dir,
+    )
 
     # Save results
     if len(df) > 0:
         generator.save_labels(df)
 
-        # Save to database for ML training
-        print("\nSaving labels to strategy_dca_labels table...")
-        saved_count = 0
-        skipped_count = 0
-
-        for _, row in df.iterrows():
-            if row["label"] in ["WIN", "LOSS", "BREAKEVEN", "TIMEOUT"]:
-                # Prepare data for strategy_dca_labels table
-                label_data = {
-                    "symbol": row["symbol"],
-                    "timestamp": row["setup_time"].isoformat(),
-                    "setup_detected": True,
-                    "drop_percentage": float(row["drop_pct"]),
-                    "rsi": float(row["rsi"]),
-                    "volume_ratio": float(row["volume_ratio"]),
-                    "btc_regime": row.get("btc_regime", "NEUTRAL"),
-                    "outcome": row["label"],
-                    "optimal_take_profit": float(row.get("take_profit_target", 10.0)),
-                    "optimal_stop_loss": float(row.get("stop_loss_target", -8.0)),
-                    "actual_return": float(row["pnl_pct"]),
-                    "hold_time_hours": int(row.get("hold_hours", 24)),
-                    "features": {
-                        "high_4h": float(row["high_4h"]),
-                        "setup_price": float(row["setup_price"]),
-                        "exit_price": float(row.get("exit_price", row["setup_price"])),
-                        "volume": float(row.get("volume", 0)),
-                        "macd": float(row.get("macd", 0)),
-                        "bb_position": float(row.get("bb_position", 0.5)),
-                    },
-                }
-
-                try:
-                    # Use upsert to handle duplicates gracefully
-                    result = (
-                        supabase.client.table("strategy_dca_labels")
-                        .upsert(label_data, on_conflict="symbol,timestamp")
-                        .execute()
-                    )
-                    if result.data:
-                        saved_count += 1
-                except Exception as e:
-                    if "duplicate" in str(e).lower():
-                        skipped_count += 1
-                    else:
-                        logger.error(
-                            f"Error saving label for {row['symbol']} at {row['setup_time']}: {e}"
-                        )
-
-        print(f"Saved {saved_count} labels to strategy_dca_labels table")
-        if skipped_count > 0:
-            print(f"Skipped {skipped_count} duplicate labels")
+        print(
+            f"Saved {generator.pipeline_stats['rows_written']} labels to strategy_dca_labels table"
+        )
     else:
         print("No setups found!")
 
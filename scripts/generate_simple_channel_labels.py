@@ -14,6 +14,13 @@ import sys
 
 sys.path.append(".")
 
+from src.analysis.forward_outcomes import (  # noqa: E402
+    EXPIRED,
+    LONG,
+    SHORT,
+    TAKE_PROFIT,
+    forward_outcomes,
+)
 from src.data.supabase_client import SupabaseClient
 
 # Configure logger
@@ -62,6 +69,7 @@ class SimpleChannelLabelGenerator:
     def detect_range_patterns(self, symbol: str, df: pd.DataFrame) -> List[Dict]:
         """Detect simple range/consolidation patterns"""
         setups = []
+        entry_rows = []
 
         if len(df) < self.lookback_periods + 50:
             return setups
@@ -143,108 +151,57 @@ class SimpleChannelLabelGenerator:
                                 },
                             }
 
-                            # Calculate outcome
-                            outcome = self._calculate_outcome(
-                                setup, df.iloc[i : i + 50]
-                            )  # Look forward 50 bars
-                            setup.update(outcome)
-
                             setups.append(setup)
+                            entry_rows.append(i)
+
+        # Calculate outcomes, looking forward 50 bars
+        outcomes = self._calculate_outcomes(setups, df, entry_rows)
+        for setup, outcome in zip(setups, outcomes):
+            setup.update(outcome)
 
         return setups
 
-    def _calculate_outcome(self, setup: Dict, future_df: pd.DataFrame) -> Dict:
-        """Calculate the outcome of a range trade"""
-        entry_price = setup["entry_price"]
-        take_profit = setup["take_profit"]
-        stop_loss = setup["stop_loss"]
-        signal = setup["signal"]
-
-        outcome = {
-            "outcome": "EXPIRED",
-            "exit_price": entry_price,
-            "exit_bars": 0,
-            "max_profit_pct": 0.0,
-            "max_loss_pct": 0.0,
-            "actual_pnl_pct": 0.0,
-        }
-
-        if future_df.empty:
-            return outcome
-
-        for i, (_, row) in enumerate(future_df.iterrows()):
-            if i >= 72:  # Max 72 bars (hours)
-                break
-
-            if signal == "BUY":
-                # Check if hit take profit
-                if row["high"] >= take_profit:
-                    outcome["outcome"] = "WIN"
-                    outcome["exit_price"] = take_profit
-                    outcome["exit_bars"] = i + 1
-                    outcome["actual_pnl_pct"] = (
-                        (take_profit - entry_price) / entry_price * 100
-                    )
-                    break
-
-                # Check if hit stop loss
-                if row["low"] <= stop_loss:
-                    outcome["outcome"] = "LOSS"
-                    outcome["exit_price"] = stop_loss
-                    outcome["exit_bars"] = i + 1
-                    outcome["actual_pnl_pct"] = (
-                        (stop_loss - entry_price) / entry_price * 100
-                    )
-                    break
-
-                # Track max profit/loss
-                profit = (row["high"] - entry_price) / entry_price * 100
-                loss = (row["low"] - entry_price) / entry_price * 100
-                outcome["max_profit_pct"] = max(outcome["max_profit_pct"], profit)
-                outcome["max_loss_pct"] = min(outcome["max_loss_pct"], loss)
-
-            else:  # SELL signal
-                # Check if hit take profit (price goes down)
-                if row["low"] <= take_profit:
-                    outcome["outcome"] = "WIN"
-                    outcome["exit_price"] = take_profit
-                    outcome["exit_bars"] = i + 1
-                    outcome["actual_pnl_pct"] = (
-                        (entry_price - take_profit) / entry_price * 100
-                    )
-                    break
-
-                # Check if hit stop loss (price goes up)
-                if row["high"] >= stop_loss:
-                    outcome["outcome"] = "LOSS"
-                    outcome["exit_price"] = stop_loss
-                    outcome["exit_bars"] = i + 1
-                    outcome["actual_pnl_pct"] = (
-                        (entry_price - stop_loss) / entry_price * 100
-                    )
-                    break
-
-                # Track max profit/loss
-                profit = (entry_price - row["low"]) / entry_price * 100
-                loss = (entry_price - row["high"]) / entry_price * 100
-                outcome["max_profit_pct"] = max(outcome["max_profit_pct"], profit)
-                outcome["max_loss_pct"] = min(outcome["max_loss_pct"], loss)
-
-        # If expired, calculate final P&L
-        if outcome["outcome"] == "EXPIRED" and not future_df.empty:
-            last_price = future_df.iloc[min(71, len(future_df) - 1)]["close"]
-            if signal == "BUY":
-                outcome["actual_pnl_pct"] = (
-                    (last_price - entry_price) / entry_price * 100
-                )
+    def _calculate_outcomes(
+        self,
+        setups: List[Dict],
+        df: pd.DataFrame,
+        entry_rows: List[int],
+        look_forward: int = 50,
+    ) -> List[Dict]:
+        """Calculate the outcome of range trades entered at the given rows"""
+        found = forward_outcomes(
+            df["high"].to_numpy(),
+            df["low"].to_numpy(),
+            df["close"].to_numpy(),
+            entry_rows,
+            [s["entry_price"] for s in setups],
+            [s["take_profit"] for s in setups],
+            [s["stop_loss"] for s in setups],
+            min(72, look_forward),  # Max 72 bars (hours)
+            side=[LONG if s["signal"] == "BUY" else SHORT for s in setups],
+            include_exit_bar=False,  # Max profit/loss stop at the bar before exit
+        )
+
+        outcomes = []
+        for k, setup in enumerate(setups):
+            reason = found["exit_reason"][k]
+            if reason == EXPIRED:
+                outcome = "EXPIRED"
             else:
-                outcome["actual_pnl_pct"] = (
-                    (entry_price - last_price) / entry_price * 100
-                )
-            outcome["exit_price"] = last_price
-            outcome["exit_bars"] = min(72, len(future_df))
+                outcome = "WIN" if reason == TAKE_PROFIT else "LOSS"
+
+            outcomes.append(
+                {
+                    "outcome": outcome,
+                    "exit_price": found["exit_price"][k],
+                    "exit_bars": int(found["bars_held"][k]),
+                    "max_profit_pct": found["max_favorable_pct"][k],
+                    "max_loss_pct": found["max_adverse_pct"][k],
+                    "actual_pnl_pct": found["pnl_pct"][k],
+                }
+            )
 
-        return outcome
+        return outcomes
 
     def generate_labels(self, symbols: Optional[List[str]] = None):
         """Generate labels for specified symbols"""
@@ -3,11 +3,12 @@ Generate training labels for Swing Trading ML model
 Scans historical data for breakout patterns and their outcomes
 """
 
+import argparse
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import logging
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import json
 import sys
 import os
@@ -15,8 +16,19 @@ import os
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from src.analysis.forward_outcomes import (  # noqa: E402
+    TAKE_PROFIT,
+    STOP_LOSS,
+    forward_outcomes,
+)
 from src.data.supabase_client import SupabaseClient
 from src.config.settings import Settings
+from src.ml.label_pipeline import (  # noqa: E402
+    DEFAULT_CHECKPOINT_DIR,
+    LabelJob,
+    LabelPipeline,
+    add_label_pipeline_arguments,
+)
 from loguru import logger
 
 # Configure logging
@@ -149,6 +161,7 @@ class SwingLabelGenerator:
         """Detect swing trading setups in historical data"""
 
         setups = []
+        outcome_rows = []
 
         # Need enough data for indicators
         if len(df) < 100:
@@ -164,7 +177,7 @@ class SwingLabelGenerator:
                 and df.iloc[i]["rsi"] > self.config["min_rsi"]
                 and df.iloc[i]["uptrend"]
             ):
-                # Found a setup, now track outcome
+                # Found a setup, its outcome is tracked below
                 entry_price = df.iloc[i]["close"]
                 entry_time = df.iloc[i]["timestamp"]
 
@@ -172,14 +185,6 @@ class SwingLabelGenerator:
                 take_profit_price = entry_price * (1 + self.config["take_profit"])
                 stop_loss_price = entry_price * (1 - self.config["stop_loss"])
 
-                # Track for next 48 hours
-                outcome = self.track_outcome(
-                    df.iloc[i : i + 49],  # Next 48 hours
-                    entry_price,
-                    take_profit_price,
-                    stop_loss_price,
-                )
-
                 # Calculate features at setup time
                 features = {
                     "breakout_strength": (
@@ -207,86 +212,93 @@ class SwingLabelGenerator:
                     "entry_price": entry_price,
                     "take_profit_price": take_profit_price,
                     "stop_loss_price": stop_loss_price,
-                    "outcome": outcome["result"],
-                    "exit_price": outcome["exit_price"],
-                    "exit_time": outcome["exit_time"],
-                    "pnl_percent": outcome["pnl_percent"],
-                    "hold_hours": outcome["hold_hours"],
-                    "max_profit": outcome["max_profit"],
-                    "max_loss": outcome["max_loss"],
+                    # Outcome fields are filled in below
+                    "outcome": None,
+                    "exit_price": None,
+                    "exit_time": None,
+                    "pnl_percent": None,
+                    "hold_hours": None,
+                    "max_profit": None,
+                    "max_loss": None,
                     "features": features,
                 }
 
                 setups.append(setup)
+                outcome_rows.append(i)
+
+        # Track every setup for the next 48 hours at once
+        outcomes = self.track_outcomes(
+            df,
+            outcome_rows,
+            [s["entry_price"] for s in setups],
+            [s["take_profit_price"] for s in setups],
+            [s["stop_loss_price"] for s in setups],
+        )
+        for setup, outcome in zip(setups, outcomes):
+            setup["outcome"] = outcome["result"]
+            setup["exit_price"] = outcome["exit_price"]
+            setup["exit_time"] = outcome["exit_time"]
+            setup["pnl_percent"] = outcome["pnl_percent"]
+            setup["hold_hours"] = outcome["hold_hours"]
+            setup["max_profit"] = outcome["max_profit"]
+            setup["max_loss"] = outcome["max_loss"]
 
         return setups
 
-    def track_outcome(
+    def track_outcomes(
         self,
-        future_df: pd.DataFrame,
-        entry_price: float,
-        take_profit: float,
-        stop_loss: float,
-    ) -> Dict:
-        """Track the outcome of a swing setup"""
-
-        result = "TIMEOUT"
-        exit_price = entry_price
-        exit_time = None
-        hold_hours = 48
-        max_profit = 0
-        max_loss = 0
-
-        for j in range(len(future_df)):
-            current_price = future_df.iloc[j]["close"]
-            high_price = future_df.iloc[j]["high"]
-            low_price = future_df.iloc[j]["low"]
-
-            # Track extremes
-            profit = (high_price - entry_price) / entry_price
-            loss = (low_price - entry_price) / entry_price
-            max_profit = max(max_profit, profit)
-            max_loss = min(max_loss, loss)
-
-            # Check exit conditions
-            if high_price >= take_profit:
-                result = "WIN"
-                exit_price = take_profit
-                exit_time = future_df.iloc[j]["timestamp"]
-                hold_hours = j + 1
-                break
-            elif low_price <= stop_loss:
-                result = "LOSS"
-                exit_price = stop_loss
-                exit_time = future_df.iloc[j]["timestamp"]
-                hold_hours = j + 1
-                break
-
-        # If no exit triggered, use final price
-        if result == "TIMEOUT":
-            exit_price = future_df.iloc[-1]["close"]
-            exit_time = future_df.iloc[-1]["timestamp"]
-
-            # Determine if it was profitable
-            pnl = (exit_price - entry_price) / entry_price
-            if pnl > 0.02:  # 2% profit threshold
-                result = "SMALL_WIN"
-            elif pnl < -0.02:
-                result = "SMALL_LOSS"
+        df: pd.DataFrame,
+        entry_indices: List[int],
+        entry_prices: List[float],
+        take_profits: List[float],
+        stop_losses: List[float],
+        max_bars: int = 49,
+    ) -> List[Dict]:
+        """Track the outcome of swing setups entered at the given rows"""
+        found = forward_outcomes(
+            df["high"].to_numpy(),
+            df["low"].to_numpy(),
+            df["close"].to_numpy(),
+            entry_indices,
+            entry_prices,
+            take_profits,
+            stop_losses,
+            max_bars,
+        )
+
+        outcomes = []
+        for j, entry_price in enumerate(entry_prices):
+            reason = found["exit_reason"][j]
+            exit_price = found["exit_price"][j]
+
+            if reason == TAKE_PROFIT:
+                result, hold_hours = "WIN", int(found["bars_held"][j])
+            elif reason == STOP_LOSS:
+                result, hold_hours = "LOSS", int(found["bars_held"][j])
             else:
-                result = "BREAKEVEN"
-
-        pnl_percent = ((exit_price - entry_price) / entry_price) * 100
-
-        return {
-            "result": result,
-            "exit_price": exit_price,
-            "exit_time": exit_time,
-            "pnl_percent": pnl_percent,
-            "hold_hours": hold_hours,
-            "max_profit": max_profit * 100,
-            "max_loss": max_loss * 100,
-        }
+                # No exit triggered, use final price
+                hold_hours = max_bars - 1
+                pnl = (exit_price - entry_price) / entry_price
+                if pnl > 0.02:  # 2% profit threshold
+                    result = "SMALL_WIN"
+                elif pnl < -0.02:
+                    result = "SMALL_LOSS"
+                else:
+                    result = "BREAKEVEN"
+
+            outcomes.append(
+                {
+                    "result": result,
+                    "exit_price": exit_price,
+                    "exit_time": df["timestamp"].iloc[found["exit_index"][j]],
+                    "pnl_percent": found["pnl_pct"][j],
+                    "hold_hours": hold_hours,
+                    "max_profit": found["max_favorable_pct"][j],
+                    "max_loss": found["max_adverse_pct"][j],
+                }
+            )
+
+        return outcomes
 
     def count_resistance_tests(self, df: pd.DataFrame, resistance: float) -> int:
         """Count how many times price tested resistance level"""
@@ -343,8 +355,19 @@ class SwingLabelGenerator:
             logger.error(f"Error fetching data for {symbol}: {e}")
             return pd.DataFrame()
 
-    def generate_labels(self):
-        """Generate swing trading labels for all symbols"""
+    def generate_labels(
+        self,
+        max_workers: Optional[int] = None,
+        resume: bool = True,
+        checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR,
+    ):
+        """
+        Generate swing trading labels for all symbols
+
+        Symbols are labelled in parallel by LabelPipeline, which also
+        upserts the rows into strategy_swing_labels and checkpoints each
+        finished symbol.
+        """
 
         all_setups = []
         summary = {
@@ -357,21 +380,20 @@ class SwingLabelGenerator:
 
         logger.info(f"Generating swing labels for {len(self.symbols)} symbols...")
 
-        for symbol in self.symbols:
-            logger.info(f"Processing {symbol}...")
-
-            # Fetch data
-            df = self.fetch_ohlc_data(symbol)
-
-            if df.empty:
-                continue
-
-            # Calculate indicators
-            df = self.calculate_indicators(df)
-
-            # Detect setups
-            setups = self.detect_swing_setups(df)
+        job = LabelJob(
+            name="swing",
+            make_generator=SwingLabelGenerator,
+            label_symbol=label_swing_symbol,
+            table="strategy_swing_labels",
+            to_row=swing_label_row,
+            config=self.config,
+        )
+        pipeline = LabelPipeline(
+            job, self.supabase, max_workers=max_workers, checkpoint_dir=checkpoint_dir
+        )
+        results = pipeline.run(self.symbols, resume=resume, generator=self)
 
+        for symbol, setups in results.items():
             if setups:
                 logger.info(f"  Found {len(setups)} setups for {symbol}")
 
@@ -480,63 +502,63 @@ class SwingLabelGenerator:
             df_labels.to_csv(csv_file, index=False)
             logger.info(f"CSV saved to {csv_file}")
 
-            # Save to database for ML training
-            logger.info("\nSaving labels to strategy_swing_labels table...")
-            saved_count = 0
-            skipped_count = 0
-
-            for setup in all_setups:
-                # Prepare data for strategy_swing_labels table
-                label_data = {
-                    "symbol": setup["symbol"],
-                    "timestamp": setup["timestamp"],
-                    "breakout_detected": True,
-                    "breakout_strength": float(
-                        setup["features"].get("breakout_pct", 0) * 100
-                    ),
-                    "volume_surge": float(setup["features"].get("volume_ratio", 1.0)),
-                    "momentum_score": float(setup["features"].get("rsi", 50)),
-                    "trend_alignment": (
-                        "UPTREND"
-                        if setup["features"].get("sma_trend", 0) > 0
-                        else "DOWNTREND"
-                    ),
-                    "outcome": setup["outcome"],
-                    "optimal_take_profit": float(setup.get("take_profit", 15.0)),
-                    "optimal_stop_loss": float(setup.get("stop_loss", -5.0)),
-                    "actual_return": float(setup["actual_return"]) * 100,
-                    "hold_time_hours": int(setup["hold_hours"]),
-                    "features": setup["features"],
-                }
-
-                try:
-                    # Use upsert to handle duplicates gracefully
-                    result = (
-                        self.supabase.client.table("strategy_swing_labels")
-                        .upsert(label_data, on_conflict="symbol,timestamp")
-                        .execute()
-                    )
-                    if result.data:
-                        saved_count += 1
-                except Exception as e:
-                    if "duplicate" in str(e).lower():
-                        skipped_count += 1
-                    else:
-                        logger.error(
-                            f"Error saving label for {setup['symbol']} at {setup['timestamp']}: {e}"
-                        )
-
-            logger.info(f"Saved {saved_count} labels to strategy_swing_labels table")
-            if skipped_count > 0:
-                logger.info(f"Skipped {skipped_count} duplicate labels")
+            logger.info(
+                f"Saved {pipeline.stats['rows_written']} labels to strategy_swing_labels table"
+            )
 
         return all_setups, summary
 
 
+def label_swing_symbol(generator: SwingLabelGenerator, symbol: str) -> List[Dict]:
+    """Swing setups for one symbol (runs in a LabelPipeline worker)"""
+    logger.info(f"Processing {symbol}...")
+
+    # Fetch data
+    df = generator.fetch_ohlc_data(symbol)
+
+    if df.empty:
+        return []
+
+    # Calculate indicators
+    df = generator.calculate_indicators(df)
+
+    # Detect setups
+    return generator.detect_swing_setups(df)
+
+
+def swing_label_row(setup: Dict) -> Dict:
+    """strategy_swing_labels row for a setup"""
+    return {
+        "symbol": setup["symbol"],
+        "timestamp": setup["timestamp"],
+        "breakout_detected": True,
+        "breakout_strength": float(setup["features"].get("breakout_pct", 0) * 100),
+        "volume_surge": float(setup["features"].get("volume_ratio", 1.0)),
+        "momentum_score": float(setup["features"].get("rsi", 50)),
+        "trend_alignment": (
+            "UPTREND" if setup["features"].get("sma_trend", 0) > 0 else "DOWNTREND"
+        ),
+        "outcome": setup["outcome"],
+        "optimal_take_profit": float(setup.get("take_profit", 15.0)),
+        "optimal_stop_loss": float(setup.get("stop_loss", -5.0)),
+        "actual_return": float(setup["actual_return"]) * 100,
+        "hold_time_hours": int(setup["hold_hours"]),
+        "features": setup["features"],
+    }
+
+
 def main():
     """Main execution"""
+    parser = argparse.ArgumentParser(description="Generate swing trading labels")
+    add_label_pipeline_arguments(parser)
+    args = parser.parse_args()
+
     generator = SwingLabelGenerator()
-    labels, summary = generator.generate_labels()
+    labels, summary = generator.generate_labels(
+        max_workers=args.workers,
+        resume=not args.restart,
+        checkpoint_dir=args.checkpoint_dir,
+    )
 
     # Print top performing symbols
     if summary["by_symbol"]:
@@ -14,7 +14,7 @@ from loguru import logger
 sys.path.append(str(Path(__file__).parent.parent))
 
 from src.data.supabase_client import SupabaseClient
-from src.analysis.shadow_evaluator import ShadowEvaluator
+from src.analysis.batch_shadow_evaluator import BatchShadowEvaluator
 from src.analysis.shadow_logger import ShadowLogger
 from src.config.config_loader import ConfigLoader
 
@@ -25,7 +25,7 @@ class FreqtradeShadowTesting:
     def __init__(self):
         self.db = SupabaseClient()
         self.shadow_logger = ShadowLogger(self.db)
-        self.shadow_evaluator = ShadowEvaluator(self.db.client)
+        self.shadow_evaluator = BatchShadowEvaluator(self.db.client)
         self.config_loader = ConfigLoader()
         
         # Service intervals
@@ -14,9 +14,10 @@ os.environ["ML_ENABLED"] = "false"
 os.environ["SHADOW_ENABLED"] = "false"
 
 import sys  # noqa: E402
+import time  # noqa: E402
 from pathlib import Path  # noqa: E402
 from datetime import datetime, timezone  # noqa: E402
-from typing import Dict, List  # noqa: E402
+from typing import Callable, Dict, List, Optional, Tuple  # noqa: E402
 from loguru import logger  # noqa: E402
 import signal as sig_handler  # noqa: E402
 
@@ -27,9 +28,12 @@ sys.path.append(str(Path(__file__).parent.parent))
 from src.config.config_loader import ConfigLoader  # noqa: E402
 
 from src.data.hybrid_fetcher import HybridDataFetcher  # noqa: E402
+from src.data.latest_prices import get_latest_price_service  # noqa: E402
 from src.trading.simple_paper_trader_v2 import SimplePaperTraderV2  # noqa: E402
 from src.config.settings import Settings  # noqa: E402
 from src.data.supabase_client import SupabaseClient  # noqa: E402
+from src.data.spill_journal import SpillJournal  # noqa: E402
+from src.data.write_behind import get_write_behind_queue  # noqa: E402
 
 # Notification handled internally by SimplePaperTraderV2
 
@@ -43,10 +47,20 @@ from src.trading.trade_limiter import TradeLimiter  # noqa: E402
 
 
 class ScanBuffer:
-    """Buffer for batching scan_history logs to respect Railway limits"""
+    """Buffer for batching scan_history logs to respect Railway limits
+
+    Scans are appended to a local SpillJournal first and replayed to
+    scan_history in large batches, so an outage neither grows memory nor
+    loses scans across a restart.
+    """
 
     def __init__(
-        self, supabase_client, max_size: int = 500, max_age_seconds: int = 300
+        self,
+        supabase_client,
+        max_size: int = 500,
+        max_age_seconds: int = 300,
+        journal_dir: str = "data/scan_journal",
+        replay_batch_size: int = 2000,
     ):
         """
         Initialize scan buffer
@@ -55,16 +69,23 @@ class ScanBuffer:
             supabase_client: Supabase client for database writes
             max_size: Maximum buffer size before flush (default 500)
             max_age_seconds: Maximum age in seconds before flush (default 300 = 5 minutes)
+            journal_dir: Directory for the on-disk scan journal
+            replay_batch_size: Scans per insert when draining the journal
         """
         self.supabase = supabase_client
-        self.buffer = []
+        self.journal = SpillJournal(journal_dir)
         self.last_flush = datetime.now(timezone.utc)
         self.max_size = max_size
         self.max_age_seconds = max_age_seconds
+        self.replay_batch_size = replay_batch_size
         self.flush_in_progress = False
         self.total_scans_logged = 0
         self.total_batches_sent = 0
 
+        # Backoff between flush attempts while the database is failing
+        self.retry_delay = 0
+        self.max_retry_delay = 600
+
     async def add_scan(self, scan_data: Dict):
         """
         Add a scan to the buffer and flush if needed
@@ -72,73 +93,118 @@ class ScanBuffer:
         Args:
             scan_data: Scan data to log
         """
-        # Add to buffer (instant, non-blocking)
-        self.buffer.append(scan_data)
+        # Append to the local journal (no network round trip)
+        self.journal.append(scan_data)
 
         # Check if we should flush (non-blocking check)
         if self.should_flush() and not self.flush_in_progress:
             # Fire and forget - doesn't block trading
             asyncio.create_task(self.flush())
 
+    async def add_scans(self, scans: List[Dict]):
+        """Add a batch of scans, checking for a flush once at the end"""
+        for scan_data in scans:
+            self.journal.append(scan_data)
+
+        if self.should_flush() and not self.flush_in_progress:
+            asyncio.create_task(self.flush())
+
     def should_flush(self) -> bool:
         """Check if buffer should be flushed"""
-        if not self.buffer:
+        if not self.journal.pending:
+            return False
+
+        time_elapsed = (datetime.now(timezone.utc) - self.last_flush).total_seconds()
+
+        # Still backing off after a failed flush
+        if time_elapsed < self.retry_delay:
             return False
 
         # Flush if buffer is full
-        if len(self.buffer) >= self.max_size:
+        if self.journal.pending >= self.max_size:
             return True
 
         # Flush if time elapsed
-        time_elapsed = (datetime.now(timezone.utc) - self.last_flush).total_seconds()
         if time_elapsed >= self.max_age_seconds:
             return True
 
         return False
 
+    def _insert_batch(self, scans: List[Dict]):
+        """Insert one batch of journaled scans (runs in an executor thread)"""
+        self.supabase.client.table("scan_history").insert(scans).execute()
+        self.total_scans_logged += len(scans)
+        self.total_batches_sent += 1
+
     async def flush(self):
-        """Flush buffer to database (runs async in background)"""
-        if not self.buffer or self.flush_in_progress:
+        """Drain the journal to the database (runs async in background)"""
+        if not self.journal.pending or self.flush_in_progress:
             return
 
         try:
             self.flush_in_progress = True
 
-            # Copy buffer for sending (so we can continue adding)
-            buffer_to_send = self.buffer.copy()
-            self.buffer = []
-
-            # Batch insert to scan_history
-            if buffer_to_send:
-                await asyncio.get_event_loop().run_in_executor(
-                    None,
-                    lambda: self.supabase.client.table("scan_history")
-                    .insert(buffer_to_send)
-                    .execute(),
-                )
-
-                self.total_scans_logged += len(buffer_to_send)
-                self.total_batches_sent += 1
-
-                logger.debug(
-                    f"Flushed {len(buffer_to_send)} scans to database "
-                    f"(Total: {self.total_scans_logged} scans in {self.total_batches_sent} batches)"
-                )
+            # Seal the open segment so new scans go to a fresh one while we send
+            self.journal.seal()
+            sent = await asyncio.get_event_loop().run_in_executor(
+                None, self.journal.replay, self._insert_batch, self.replay_batch_size
+            )
+            self.retry_delay = 0
 
-            self.last_flush = datetime.now(timezone.utc)
+            logger.debug(
+                f"Flushed {sent} scans to database "
+                f"(Total: {self.total_scans_logged} scans in {self.total_batches_sent} batches)"
+            )
 
         except Exception as e:
-            logger.error(f"Error flushing scan buffer: {e}")
-            # Re-add failed scans to buffer for retry
-            self.buffer = buffer_to_send + self.buffer
+            # Unsent scans stay in the journal; resume from the last acked batch
+            self.retry_delay = min(max(self.retry_delay * 2, 30), self.max_retry_delay)
+            logger.error(
+                f"Error flushing scan buffer ({self.journal.pending} scans journaled, "
+                f"retrying in {self.retry_delay}s): {e}"
+            )
         finally:
+            self.last_flush = datetime.now(timezone.utc)
             self.flush_in_progress = False
 
     async def force_flush(self):
         """Force flush the buffer (e.g., on shutdown)"""
-        if self.buffer:
-            logger.info(f"Force flushing {len(self.buffer)} pending scans...")
+        if self.journal.pending:
+            logger.info(f"Force flushing {self.journal.pending} pending scans...")
             await self.flush()
+        self.journal.close()
+
+
+class MarketSnapshot:
+    """Latest prices shared by the scanner, exit monitor and position cleanup
+
+    Everything runs on one event loop, so no locking is needed. `version`
+    increments on every update so readers can tell whether anything changed.
+    """
+
+    def __init__(self):
+        self.prices: Dict[str, float] = {}
+        self.updated_at: Dict[str, float] = {}
+        self.version = 0
+
+    def update(self, prices: Dict[str, float]):
+        """Publish new prices"""
+        if not prices:
+            return
+        now = time.monotonic()
+        for symbol, price in prices.items():
+            self.prices[symbol] = price
+            self.updated_at[symbol] = now
+        self.version += 1
+
+    def get(self, symbols: List[str], max_age_seconds: float) -> Dict[str, float]:
+        """Prices for `symbols` that are no older than `max_age_seconds`"""
+        cutoff = time.monotonic() - max_age_seconds
+        return {
+            symbol: self.prices[symbol]
+            for symbol in symbols
+            if self.updated_at.get(symbol, float("-inf")) >= cutoff
+        }
 
 
 class SimplifiedPaperTradingSystem:
@@ -308,6 +374,16 @@ class SimplifiedPaperTradingSystem:
             ),  # Default 5 minutes
             "position_size": 50.0,
             "max_position_duration_hours": 72,
+            # Exit monitor runs on its own, faster cadence than the scan
+            "exit_check_interval": unified_config.get("global_settings", {}).get(
+                "exit_check_seconds", 15
+            ),
+            # Open our own Polygon stream so stops fire on the crossing tick.
+            # Off by default: the data collector may already hold the only
+            # connection the API key allows
+            "exit_price_stream": unified_config.get("global_settings", {}).get(
+                "exit_price_stream", False
+            ),
         }
 
         # Initialize ONLY rule-based components
@@ -330,8 +406,16 @@ class SimplifiedPaperTradingSystem:
         self.strategy_change_time = None
         self.position_timestamps = {}  # Track when each position was opened
 
+        # Prices shared between the concurrent loops
+        self.market_snapshot = MarketSnapshot()
+        self.price_stream = None  # Polygon client when exit_price_stream is on
+
+        # Per-loop latency metrics (see _run_loop)
+        self.loop_metrics: Dict[str, Dict] = {}
+
         # Shutdown flag
         self.shutdown = False
+        self.shutdown_event = asyncio.Event()
 
         logger.info("=" * 80)
         logger.info("🚀 MARKET-AWARE PAPER TRADING SYSTEM v2.3.2")
@@ -532,16 +616,9 @@ class SimplifiedPaperTradingSystem:
         ).total_seconds() / 3600  # hours
 
         # Get current prices for all positions
-        current_prices = {}
-        for symbol in list(self.active_positions.keys()):
-            try:
-                data = await self.data_fetcher.get_recent_data(
-                    symbol=symbol, timeframe="1m", hours=1
-                )
-                if data:
-                    current_prices[symbol] = data[-1]["close"]
-            except Exception:
-                pass
+        current_prices = await self.get_current_prices(
+            list(self.active_positions.keys())
+        )
 
         # Evaluate positions from old best strategy
         positions_to_close = []
@@ -621,16 +698,9 @@ class SimplifiedPaperTradingSystem:
                 return 0
 
             # Get current prices for all positions
-            current_prices = {}
-            for symbol, _ in strategy_positions:
-                try:
-                    data = await self.data_fetcher.get_recent_data(
-                        symbol=symbol, timeframe="1m", hours=1
-                    )
-                    if data:
-                        current_prices[symbol] = data[-1]["close"]
-                except Exception:
-                    pass
+            current_prices = await self.get_current_prices(
+                [symbol for symbol, _ in strategy_positions]
+            )
 
             # Calculate P&L for each position
             positions_with_pnl = []
@@ -695,23 +765,26 @@ class SimplifiedPaperTradingSystem:
         # Handle market transitions (Scenario 5)
         await self.handle_market_transition(best_strategy)
 
-        # Fetch market data
+        # Fetch market data (1-minute data for faster signals) in batched queries
         market_data = {}
-        for symbol in available_symbols:
-            try:
-                # Get 1-minute data for faster signals
-                data = await self.data_fetcher.get_recent_data(
-                    symbol=symbol, timeframe="1m", hours=24
-                )
+        try:
+            batch = await self.data_fetcher.get_recent_data_batch(
+                symbols=available_symbols, timeframe="1m", hours=24
+            )
+            for symbol, data in batch.items():
                 if data and len(data) > 100:
                     market_data[symbol] = data
-            except Exception as e:
-                logger.debug(f"Could not fetch data for {symbol}: {e}")
+        except Exception as e:
+            logger.error(f"Could not fetch market data: {e}")
 
         if not market_data:
             logger.warning("No market data available")
             return
 
+        self.market_snapshot.update(
+            {symbol: data[-1]["close"] for symbol, data in market_data.items()}
+        )
+
         # Update BTC price for regime detection
         if "BTC" in market_data and market_data["BTC"]:
             btc_price = market_data["BTC"][-1]["close"]
@@ -740,116 +813,23 @@ class SimplifiedPaperTradingSystem:
         else:
             self._btc_price = 0.0
 
-        # Collect signals by strategy
-        signals_by_strategy = {"DCA": [], "SWING": [], "CHANNEL": []}
-
-        for symbol, data in market_data.items():
-            try:
-                current_price = data[-1]["close"] if data else 0
-
-                # Check each strategy type and log ALL scans
-                # DCA - Check if disabled due to volatility
-                if not self.regime_detector.should_disable_strategy("DCA"):
-                    dca_signal = self.simple_rules.check_dca_setup(symbol, data)
-                    if dca_signal and dca_signal.get("signal"):
-                        dca_signal["should_trade"] = True
-                        dca_signal["strategy"] = "DCA"
-                        # Ensure we have current_price in all signals
-                        if "current_price" not in dca_signal:
-                            dca_signal["current_price"] = dca_signal.get(
-                                "price", current_price
-                            )
-                        signals_by_strategy["DCA"].append(dca_signal)
-                        # Log signal detection for ML learning
-                        await self.log_scan(
-                            symbol,
-                            "DCA",
-                            "BUY",
-                            "Signal detected",
-                            confidence=dca_signal["confidence"],
-                            metadata={"drop_pct": dca_signal.get("drop_pct", 0)},
-                            market_data=data,
-                        )
-                    else:
-                        # Log no signal for complete ML dataset
-                        await self.log_scan(
-                            symbol,
-                            "DCA",
-                            "SKIP",
-                            "No signal",
-                            confidence=0.0,
-                            market_data=data,
-                        )
-
-                # Swing - Check if disabled due to volatility
-                if not self.regime_detector.should_disable_strategy("SWING"):
-                    swing_signal = self.simple_rules.check_swing_setup(symbol, data)
-                    if swing_signal and swing_signal.get("signal"):
-                        swing_signal["should_trade"] = True
-                        swing_signal["strategy"] = "SWING"
-                        if "current_price" not in swing_signal:
-                            swing_signal["current_price"] = swing_signal.get(
-                                "price", current_price
-                            )
-                        signals_by_strategy["SWING"].append(swing_signal)
-                        # Log signal detection for ML learning
-                        await self.log_scan(
-                            symbol,
-                            "SWING",
-                            "BUY",
-                            "Signal detected",
-                            confidence=swing_signal["confidence"],
-                            metadata={
-                                "breakout_pct": swing_signal.get("breakout_pct", 0)
-                            },
-                            market_data=data,
-                        )
-                    else:
-                        # Log no signal for complete ML dataset
-                        await self.log_scan(
-                            symbol,
-                            "SWING",
-                            "SKIP",
-                            "No signal",
-                            confidence=0.0,
-                            market_data=data,
-                        )
-
-                # Channel - Check if disabled due to volatility
-                if not self.regime_detector.should_disable_strategy("CHANNEL"):
-                    channel_signal = self.simple_rules.check_channel_setup(symbol, data)
-                    if channel_signal and channel_signal.get("signal"):
-                        channel_signal["should_trade"] = True
-                        channel_signal["strategy"] = "CHANNEL"
-                        if "current_price" not in channel_signal:
-                            channel_signal["current_price"] = channel_signal.get(
-                                "price", current_price
-                            )
-                        signals_by_strategy["CHANNEL"].append(channel_signal)
-                        # Log signal detection for ML learning
-                        await self.log_scan(
-                            symbol,
-                            "CHANNEL",
-                            "BUY",
-                            "Signal detected",
-                            confidence=channel_signal["confidence"],
-                            metadata={"position": channel_signal.get("position", 0)},
-                            market_data=data,
-                        )
-                    else:
-                        # Log no signal for complete ML dataset
-                        await self.log_scan(
-                            symbol,
-                            "CHANNEL",
-                            "SKIP",
-                            "No signal",
-                            confidence=0.0,
-                            market_data=data,
-                        )
+        # Regime gating can re-enable strategies, so settle it on the loop
+        enabled = [
+            strategy
+            for strategy in ("DCA", "SWING", "CHANNEL")
+            if not self.regime_detector.should_disable_strategy(strategy)
+        ]
 
-            except Exception as e:
-                logger.error(f"Error evaluating {symbol}: {e}")
-                continue
+        # Strategy evaluation and scan features are pure CPU work; keep them
+        # off the event loop so exits and heartbeats aren't held up
+        try:
+            signals_by_strategy, scans = await asyncio.to_thread(
+                self.evaluate_signals, market_data, enabled
+            )
+        except Exception as e:
+            logger.error(f"Batch strategy evaluation failed: {e}")
+            return
+        await self.scan_buffer.add_scans(scans)
 
         # Log signal counts and scan completion
         total_signals = sum(len(s) for s in signals_by_strategy.values())
@@ -982,6 +962,76 @@ class SimplifiedPaperTradingSystem:
         else:
             logger.info("No trading opportunities found")
 
+    def evaluate_signals(
+        self, market_data: Dict[str, list], enabled: List[str]
+    ) -> Tuple[Dict[str, List[Dict]], List[Dict]]:
+        """
+        Evaluate every symbol for the enabled strategies (runs in a thread)
+
+        Returns:
+            Tradeable signals by strategy, and a scan_history record for
+            every symbol and strategy checked (signal or not)
+        """
+        signals_by_strategy = {"DCA": [], "SWING": [], "CHANNEL": []}
+        scans = []
+
+        # Evaluate every symbol for every strategy in one vectorized pass
+        batch_signals = self.simple_rules.check_all_batch(market_data)
+
+        # Extra context logged with each strategy's signals
+        metadata_keys = {
+            "DCA": "drop_pct",
+            "SWING": "breakout_pct",
+            "CHANNEL": "position",
+        }
+
+        for symbol, data in market_data.items():
+            try:
+                current_price = data[-1]["close"] if data else 0
+                features = self._calculate_features(symbol, data)
+
+                # Log ALL scans, with or without a signal, for ML learning
+                for strategy in enabled:
+                    signal = batch_signals[strategy].get(symbol)
+                    if signal and signal.get("signal"):
+                        signal["should_trade"] = True
+                        signal["strategy"] = strategy
+                        # Ensure we have current_price in all signals
+                        if "current_price" not in signal:
+                            signal["current_price"] = signal.get("price", current_price)
+                        signals_by_strategy[strategy].append(signal)
+                        key = metadata_keys[strategy]
+                        scans.append(
+                            self._scan_record(
+                                symbol,
+                                strategy,
+                                "BUY",
+                                "Signal detected",
+                                signal["confidence"],
+                                {key: signal.get(key, 0)},
+                                features,
+                            )
+                        )
+                    else:
+                        # Log no signal for complete ML dataset
+                        scans.append(
+                            self._scan_record(
+                                symbol,
+                                strategy,
+                                "SKIP",
+                                "No signal",
+                                0.0,
+                                None,
+                                features,
+                            )
+                        )
+
+            except Exception as e:
+                logger.error(f"Error evaluating {symbol}: {e}")
+                continue
+
+        return signals_by_strategy, scans
+
     def _calculate_features(self, symbol: str, market_data: list) -> dict:
         """Calculate technical features from market data"""
         try:
@@ -1109,10 +1159,19 @@ class SimplifiedPaperTradingSystem:
                 },
             }
 
-            # Upsert to ensure we update existing record or create new one
-            self.supabase.client.table("system_heartbeat").upsert(
-                heartbeat_data, on_conflict="service_name"
-            ).execute()
+            # Write-behind queue upserts on service_name and keeps only the newest
+            writer = get_write_behind_queue(self.supabase)
+            write_metrics = writer.get_metrics()
+            heartbeat_data["metadata"]["loops"] = {
+                name: {"last_ms": round(m["last_ms"]), "errors": m["errors"]}
+                for name, m in self.loop_metrics.items()
+            }
+            heartbeat_data["metadata"]["write_queue"] = {
+                "pending": write_metrics["pending"],
+                "spilled": write_metrics["spilled"],
+                "circuit": write_metrics["circuit"],
+            }
+            writer.enqueue("system_heartbeat", heartbeat_data)
 
             self.last_heartbeat_time = current_time
             logger.debug("Heartbeat updated successfully")
@@ -1121,60 +1180,36 @@ class SimplifiedPaperTradingSystem:
             # Silent fail - don't let heartbeat errors disrupt trading
             logger.debug(f"Failed to update heartbeat: {e}")
 
-    async def log_scan(
+    def _scan_record(
         self,
         symbol: str,
         strategy: str,
         decision: str,
         reason: str,
-        confidence: float = 0.0,
-        metadata: dict = None,
-        market_data: list = None,
-    ):
-        """Log scan attempt to scan_history table for ML/Shadow analysis"""
-        try:
-            # Calculate features from market data if provided
-            features = (
-                self._calculate_features(symbol, market_data)
-                if market_data
-                else {
-                    "price_drop": metadata.get("drop_pct", 0) if metadata else 0,
-                    "rsi": 50,
-                    "volume_ratio": 1,
-                    "distance_from_support": 0,
-                    "btc_correlation": 0,
-                    "market_regime": 1
-                    if self.current_regime == MarketRegime.NORMAL
-                    else 0,
-                }
-            )
-
-            # Get BTC price if available
-            btc_price = 0.0
-            if hasattr(self, "_btc_price"):
-                btc_price = self._btc_price
-
-            scan_data = {
-                "timestamp": datetime.now(timezone.utc).isoformat(),
-                "symbol": symbol,
-                "strategy_name": strategy,
-                "decision": decision,
-                "reason": reason,
-                "market_regime": self.current_regime.name
-                if self.current_regime
-                else "UNKNOWN",
-                "confidence_score": confidence,
-                "metadata": metadata or {},
-                "features": features,
-                "btc_price": btc_price,
-            }
-
-            # Add to buffer instead of direct insert - instant and non-blocking
-            await self.scan_buffer.add_scan(scan_data)
-
-        except Exception as e:
-            # Don't let logging errors stop trading
-            logger.error(f"Could not log scan for {symbol}: {e}")
+        confidence: float,
+        metadata: Optional[dict],
+        features: dict,
+    ) -> Dict:
+        """One scan_history row"""
+        # Get BTC price if available
+        btc_price = 0.0
+        if hasattr(self, "_btc_price"):
+            btc_price = self._btc_price
+
+        return {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "symbol": symbol,
+            "strategy_name": strategy,
+            "decision": decision,
+            "reason": reason,
+            "market_regime": self.current_regime.name
+            if self.current_regime
+            else "UNKNOWN",
+            "confidence_score": confidence,
+            "metadata": metadata or {},
+            "features": features,
+            "btc_price": btc_price,
+        }
 
     async def execute_trade(self, trading_signal: Dict) -> bool:
         """Execute a trade based on signal"""
@@ -1331,22 +1366,40 @@ class SimplifiedPaperTradingSystem:
             logger.error(f"Full traceback: {traceback.format_exc()}")
             return False
 
-    async def check_exits(self):
-        """Check if any positions should be closed"""
-        # Gather current prices for all positions
-        current_prices = {}
-        for symbol in list(self.active_positions.keys()):
+    async def get_current_prices(
+        self, symbols: List[str], max_age_seconds: Optional[float] = None
+    ) -> Dict[str, float]:
+        """Latest prices, from the shared snapshot when fresh, else one batch fetch"""
+        if max_age_seconds is None:
+            max_age_seconds = self.config["exit_check_interval"]
+        current_prices = self.market_snapshot.get(symbols, max_age_seconds)
+
+        missing = [s for s in symbols if s not in current_prices]
+        if missing:
+            fetched = {}
             try:
-                # Get current price
-                data = await self.data_fetcher.get_recent_data(
-                    symbol=symbol, timeframe="1m", hours=1
+                batch = await self.data_fetcher.get_recent_data_batch(
+                    symbols=missing, timeframe="1m", hours=1
                 )
-
-                if data:
-                    current_prices[symbol] = data[-1]["close"]
+                for symbol, data in batch.items():
+                    if data:
+                        fetched[symbol] = data[-1]["close"]
             except Exception as e:
-                logger.debug(f"Could not get price for {symbol}: {e}")
-                continue
+                logger.debug(f"Could not get prices for {len(missing)} symbols: {e}")
+            self.market_snapshot.update(fetched)
+            current_prices.update(fetched)
+
+        return current_prices
+
+    async def check_exits(self):
+        """Check if any positions should be closed"""
+        if not self.active_positions:
+            return
+
+        # Always fetch fresh prices: exits must not act on a stale snapshot
+        current_prices = await self.get_current_prices(
+            list(self.active_positions.keys()), max_age_seconds=0
+        )
 
         # Check and close positions with exit conditions
         if current_prices:
@@ -1360,86 +1413,181 @@ class SimplifiedPaperTradingSystem:
                     f"📊 Closed {trade.symbol}: {trade.exit_reason} "
                     f"P&L: ${trade.pnl_usd:.2f}"
                 )
+                self.record_exit(trade)
 
-                # Clean up position timestamp
-                if trade.symbol in self.position_timestamps:
-                    del self.position_timestamps[trade.symbol]
+    def record_exit(self, trade):
+        """Bookkeeping for a closed trade, whether a check or a tick closed it"""
+        # Clean up position timestamp
+        if trade.symbol in self.position_timestamps:
+            del self.position_timestamps[trade.symbol]
 
-                # Update trade limiter based on exit
-                if trade.exit_reason == "stop_loss":
-                    self.trade_limiter.record_stop_loss(trade.symbol)
-                else:
-                    # Record successful trade for potential reset
-                    # Get take profit target from position if available
-                    take_profit_target = 0.10  # Default 10%, could get from position
-                    self.trade_limiter.record_successful_trade(
-                        trade.symbol,
-                        trade.exit_reason,
-                        trade.pnl_percent if hasattr(trade, "pnl_percent") else None,
-                        take_profit_target,
-                    )
+        # Update trade limiter based on exit
+        if trade.exit_reason == "stop_loss":
+            self.trade_limiter.record_stop_loss(trade.symbol)
+        else:
+            # Record successful trade for potential reset
+            # Get take profit target from position if available
+            take_profit_target = 0.10  # Default 10%, could get from position
+            self.trade_limiter.record_successful_trade(
+                trade.symbol,
+                trade.exit_reason,
+                trade.pnl_percent if hasattr(trade, "pnl_percent") else None,
+                take_profit_target,
+            )
 
-                # Trade outcome is already logged to paper_trades table by SimplePaperTraderV2
-                # No need for duplicate logging to trade_logs (table doesn't exist)
+        # Trade outcome is already logged to paper_trades table by SimplePaperTraderV2
+        # No need for duplicate logging to trade_logs (table doesn't exist)
 
-                # Notification handled by SimplePaperTraderV2 based on config
+        # Notification handled by SimplePaperTraderV2 based on config
 
-    async def run(self):
-        """Main trading loop"""
-        logger.info("Starting simplified paper trading loop...")
+    def start_price_stream(self):
+        """Drive stop/trailing/take-profit exits from live ticks"""
+        price_service = get_latest_price_service(self.supabase)
+        self.paper_trader.attach_price_stream(price_service, on_close=self.record_exit)
+
+        if self.config["exit_price_stream"]:
+            from src.data.polygon_client import PolygonWebSocketClient
+
+            self.price_stream = PolygonWebSocketClient(
+                on_message_callback=price_service.on_message
+            )
+            self.price_stream.start()
+            logger.info("Exit monitor subscribed to the Polygon price stream")
+
+    async def log_portfolio_status(self):
+        """Log portfolio, trade limiter and loop latency stats"""
+        stats = self.paper_trader.get_portfolio_stats()
+        logger.info(
+            f"Portfolio: Balance ${stats['balance']:.2f}, "
+            f"Positions: {stats['positions']}, "
+            f"P&L: ${stats['total_pnl']:.2f}"
+        )
+
+        # Show trade limiter status if active
+        limiter_stats = self.trade_limiter.get_limiter_stats()
+        if limiter_stats["symbols_on_cooldown"] or limiter_stats["symbols_banned"]:
+            logger.warning(
+                f"Trade Limiter Active: "
+                f"{len(limiter_stats['symbols_on_cooldown'])} cooldowns, "
+                f"{len(limiter_stats['symbols_banned'])} bans"
+            )
+
+        logger.info(
+            "Loop latency: "
+            + ", ".join(
+                f"{name} {m['last_ms']:.0f}ms (avg {m['avg_ms']:.0f}, max {m['max_ms']:.0f})"
+                for name, m in self.loop_metrics.items()
+            )
+            + f" | snapshot v{self.market_snapshot.version}"
+        )
+
+    async def _sleep(self, seconds: float):
+        """Sleep that returns early on shutdown"""
+        try:
+            await asyncio.wait_for(self.shutdown_event.wait(), timeout=max(0, seconds))
+        except asyncio.TimeoutError:
+            pass
+
+    async def _run_loop(
+        self, name: str, func: Callable, interval: float, gated: bool = False
+    ):
+        """
+        Run `func` every `interval` seconds and record its latency
+
+        Args:
+            name: Loop name for logs and metrics
+            func: Coroutine function to run each cycle
+            interval: Target seconds between cycle starts
+            gated: Pause while the kill switch has trading disabled
+        """
+        metrics = self.loop_metrics[name] = {
+            "runs": 0,
+            "errors": 0,
+            "last_ms": 0.0,
+            "avg_ms": 0.0,
+            "max_ms": 0.0,
+        }
 
         while not self.shutdown:
-            try:
-                # Check kill switch
-                if not self.config_loader.is_trading_enabled():
+            if gated and not self.config_loader.is_trading_enabled():
+                if name == "scan":
                     logger.warning(
                         "Trading is globally disabled via kill switch. Waiting..."
                     )
-                    await asyncio.sleep(60)  # Check every minute
-                    continue
-                # Update heartbeat to show service is running
-                await self.update_heartbeat()
-
-                # Scan for new opportunities
-                await self.scan_for_opportunities()
-
-                # Check exits for existing positions
-                await self.check_exits()
+                await self._sleep(60)  # Check every minute
+                continue
 
-                # Show portfolio status
-                stats = self.paper_trader.get_portfolio_stats()
-                logger.info(
-                    f"Portfolio: Balance ${stats['balance']:.2f}, "
-                    f"Positions: {stats['positions']}, "
-                    f"P&L: ${stats['total_pnl']:.2f}"
+            start = time.perf_counter()
+            try:
+                await func()
+            except Exception as e:
+                metrics["errors"] += 1
+                logger.error(f"Error in {name} loop: {e}")
+
+            elapsed = time.perf_counter() - start
+            elapsed_ms = elapsed * 1000
+            metrics["runs"] += 1
+            metrics["last_ms"] = elapsed_ms
+            metrics["max_ms"] = max(metrics["max_ms"], elapsed_ms)
+            metrics["avg_ms"] += (elapsed_ms - metrics["avg_ms"]) / metrics["runs"]
+            if elapsed > interval:
+                logger.warning(
+                    f"{name} loop took {elapsed:.1f}s (interval {interval}s)"
                 )
 
-                # Show trade limiter status if active
-                limiter_stats = self.trade_limiter.get_limiter_stats()
-                if (
-                    limiter_stats["symbols_on_cooldown"]
-                    or limiter_stats["symbols_banned"]
-                ):
-                    logger.warning(
-                        f"Trade Limiter Active: "
-                        f"{len(limiter_stats['symbols_on_cooldown'])} cooldowns, "
-                        f"{len(limiter_stats['symbols_banned'])} bans"
-                    )
+            await self._sleep(interval - elapsed)
 
-                # Performance metrics are automatically saved by SimplePaperTraderV2
-                # when trades are closed, so no need to manually insert here
+    async def run(self):
+        """Main trading loop
 
-                # Wait before next scan
-                await asyncio.sleep(self.config["scan_interval"])
+        Exits, scanning, heartbeat and stats run as independent tasks, so a
+        slow scan over 90 symbols never delays stop-loss checks.
+        """
+        logger.info("Starting simplified paper trading loops...")
+
+        # Ticks close positions as they cross; the exits loop below still
+        # handles time exits and symbols the stream doesn't cover
+        self.start_price_stream()
+
+        tasks = [
+            asyncio.create_task(
+                self._run_loop(
+                    "exits",
+                    self.check_exits,
+                    self.config["exit_check_interval"],
+                    gated=True,
+                )
+            ),
+            asyncio.create_task(
+                self._run_loop(
+                    "scan",
+                    self.scan_for_opportunities,
+                    self.config["scan_interval"],
+                    gated=True,
+                )
+            ),
+            # Heartbeat throttles itself to once a minute
+            asyncio.create_task(self._run_loop("heartbeat", self.update_heartbeat, 60)),
+            asyncio.create_task(
+                self._run_loop(
+                    "stats", self.log_portfolio_status, self.config["scan_interval"]
+                )
+            ),
+        ]
 
-            except Exception as e:
-                logger.error(f"Error in trading loop: {e}")
-                await asyncio.sleep(60)
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            if self.price_stream:
+                self.price_stream.stop()
 
     def handle_shutdown(self, signum, frame):
         """Handle shutdown signal"""
         logger.info("Shutdown signal received, closing positions...")
         self.shutdown = True
+        self.shutdown_event.set()
 
         # Force flush any pending scans before shutdown
         if hasattr(self, "scan_buffer"):
@@ -1498,6 +1646,9 @@ async def main():
                 f"in {system.scan_buffer.total_batches_sent} batches"
             )
 
+        # Drain queued trades/heartbeats; anything unsent is spilled to disk
+        get_write_behind_queue(system.supabase).stop()
+
         # Save final state
         logger.info("Final portfolio state:")
         final_stats = system.paper_trader.get_portfolio_stats()
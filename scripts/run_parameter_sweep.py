@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Sweep unified-config parameters through the backtest engine and rank them.
+
+Each --param is a dotted path into paper_trading_config_unified.json with
+either a comma-separated list of values or a low:high range ("*" matches
+every key at one level). Ranges need --sampler random or bayes.
+
+Usage:
+    python scripts/run_parameter_sweep.py --days 30 \\
+        --param strategies.DCA.detection_thresholds.drop_threshold=-5,-4,-3 \\
+        --param strategies.DCA.exits_by_tier.*.take_profit=0.03,0.05,0.08
+    python scripts/run_parameter_sweep.py --sampler bayes --trials 60 \\
+        --param strategies.SWING.detection_thresholds.breakout_threshold=1.01:1.04 \\
+        --param strategies.SWING.exits_by_tier.*.stop_loss=0.02:0.10 \\
+        --objective sharpe --output data/swing_sweep.csv
+"""
+
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pandas as pd
+
+# Add project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.trading.parameter_sweep import (  # noqa: E402
+    DEFAULT_CACHE_DIR,
+    DEFAULT_OBJECTIVE,
+    ParameterSweep,
+    grid,
+    random_samples,
+)
+
+
+def parse_value(text):
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def parse_param(text):
+    """PATH=v1,v2,... -> (path, [values]); PATH=low:high -> (path, (low, high))"""
+    path, _, values = text.partition("=")
+    if not path or not values:
+        raise argparse.ArgumentTypeError(f"Expected PATH=VALUES, got {text!r}")
+    if ":" in values and "," not in values:
+        low, high = values.split(":", 1)
+        return path, (parse_value(low), parse_value(high))
+    return path, [parse_value(value) for value in values.split(",")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--param", type=parse_param, action="append", required=True)
+    parser.add_argument(
+        "--sampler", choices=["grid", "random", "bayes"], default="grid"
+    )
+    parser.add_argument("--trials", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--symbols", help="Comma-separated (default: all tiers)")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--end", help="Last day, YYYY-MM-DD (default: now)")
+    parser.add_argument("--timeframe", default="1m")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--objective", default=DEFAULT_OBJECTIVE)
+    parser.add_argument("--config", default="configs/paper_trading_config_unified.json")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--output", help="Write the ranked table to this CSV")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    space = dict(args.param)
+    with open(args.config) as f:
+        config = json.load(f)
+
+    if args.symbols:
+        symbols = args.symbols.split(",")
+    else:
+        symbols = sorted(
+            {s for tier in config.get("market_cap_tiers", {}).values() for s in tier}
+        )
+    if "BTC" not in symbols:
+        symbols.insert(0, "BTC")  # Regime detection
+
+    if args.end:
+        end = datetime.strptime(args.end, "%Y-%m-%d") + timedelta(days=1, minutes=-1)
+    else:
+        end = datetime.now(timezone.utc).replace(tzinfo=None, second=0, microsecond=0)
+    start = end - timedelta(days=args.days)
+
+    sweep = ParameterSweep(
+        symbols,
+        start,
+        end,
+        config=config,
+        max_workers=args.workers,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        objective=args.objective,
+        timeframe=args.timeframe,
+    )
+
+    if args.sampler == "bayes":
+        table = sweep.optimize(space, args.trials, seed=args.seed)
+    elif args.sampler == "random":
+        table = sweep.run(random_samples(space, args.trials, seed=args.seed))
+    else:
+        table = sweep.run(grid(space))
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        table.to_csv(args.output, index=False)
+        print(f"Saved {len(table)} results to {args.output}")
+
+    # Short column names for the printout
+    shown = table.rename(columns={path: path.split(".")[-1] for path in space})
+    if shown.columns.duplicated().any():
+        shown = table
+    with pd.option_context("display.width", 200, "display.max_columns", None):
+        print(f"\nTop {min(args.top, len(shown))} by {args.objective}:")
+        print(shown.head(args.top).to_string(index=False, float_format="%.3f"))
+
+
+if __name__ == "__main__":
+    main()
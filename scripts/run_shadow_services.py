@@ -15,7 +15,7 @@ import signal
 sys.path.append(".")
 
 from src.data.supabase_client import SupabaseClient
-from src.analysis.shadow_evaluator import ShadowEvaluator
+from src.analysis.batch_shadow_evaluator import BatchShadowEvaluator
 from src.analysis.shadow_analyzer import ShadowAnalyzer
 from src.trading.threshold_manager import ThresholdManager
 from src.ml.shadow_enhanced_retrainer import ShadowEnhancedRetrainer
@@ -29,7 +29,7 @@ class ShadowServicesRunner:
 
     def __init__(self):
         self.supabase = SupabaseClient()
-        self.evaluator = ShadowEvaluator(self.supabase.client)
+        self.evaluator = BatchShadowEvaluator(self.supabase.client)
         self.analyzer = ShadowAnalyzer(self.supabase.client)
         self.threshold_manager = ThresholdManager(self.supabase.client)
         self.retrainer = ShadowEnhancedRetrainer(self.supabase.client)
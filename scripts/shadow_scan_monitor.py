@@ -6,6 +6,7 @@ This is a temporary solution until full integration is complete
 """
 
 import asyncio
+import json
 import sys
 from datetime import datetime, timedelta
 from loguru import logger
@@ -72,51 +73,66 @@ class ShadowScanMonitor:
             logger.error(f"Error getting unprocessed scans: {e}")
             return []
 
+    def prepare_scan(self, scan):
+        """
+        Parse a scan_history row into shadow logger inputs
+
+        Returns:
+            (scan inputs, base parameters)
+
+        Raises:
+            KeyError, TypeError or ValueError for rows missing required
+            fields, so the caller can skip just that scan
+        """
+        # Handle both dict and string formats (database might return either)
+        features = scan.get("features", {})
+        if isinstance(features, str):
+            features = json.loads(features) if features else {}
+        elif features is None:
+            features = {}
+
+        ml_predictions = scan.get("ml_predictions", {})
+        if isinstance(ml_predictions, str):
+            ml_predictions = json.loads(ml_predictions) if ml_predictions else {}
+        elif ml_predictions is None:
+            ml_predictions = {}
+
+        # Base parameters (use defaults). Kept scan-independent so a poll's
+        # scans share one compiled decision matrix; per-scan take profits
+        # come from ml_predictions
+        base_parameters = {
+            "confidence_threshold": 0.60,
+            "position_size_multiplier": 1.0,
+            "stop_loss": 0.05,
+        }
+
+        # Ensure ml_confidence is never None
+        ml_confidence = scan.get("ml_confidence")
+        if ml_confidence is None:
+            ml_confidence = 0.0
+
+        # Get current price from features
+        current_price = features.get("close", 0)
+        if current_price is None:
+            raise ValueError("features.close is missing")
+
+        inputs = {
+            "scan_id": scan["scan_id"],
+            "symbol": scan["symbol"],
+            "strategy_name": scan["strategy_name"],
+            "features": features,
+            "ml_predictions": ml_predictions,
+            "ml_confidence": float(ml_confidence),
+            "current_price": float(current_price),
+        }
+        return inputs, base_parameters
+
     async def create_shadows_for_scan(self, scan):
         """Create shadow variations for a single scan"""
         try:
-            # Parse features and predictions
-            import json
-
-            # Handle both dict and string formats (database might return either)
-            features = scan.get("features", {})
-            if isinstance(features, str):
-                features = json.loads(features) if features else {}
-            elif features is None:
-                features = {}
-            
-            ml_predictions = scan.get("ml_predictions", {})
-            if isinstance(ml_predictions, str):
-                ml_predictions = json.loads(ml_predictions) if ml_predictions else {}
-            elif ml_predictions is None:
-                ml_predictions = {}
-
-            # Get current price from features
-            current_price = features.get("close", 0)
-
-            # Base parameters (use defaults)
-            base_parameters = {
-                "confidence_threshold": 0.60,
-                "position_size_multiplier": 1.0,
-                "stop_loss": 0.05,
-                "take_profit": ml_predictions.get("take_profit", 0.10),
-            }
-
-            # Log shadow decisions
-            # Ensure ml_confidence is never None
-            ml_confidence = scan.get("ml_confidence")
-            if ml_confidence is None:
-                ml_confidence = 0.0
-
+            inputs, base_parameters = self.prepare_scan(scan)
             await self.shadow_logger.log_shadow_decisions(
-                scan_id=scan["scan_id"],
-                symbol=scan["symbol"],
-                strategy_name=scan["strategy_name"],
-                features=features,
-                ml_predictions=ml_predictions,
-                ml_confidence=float(ml_confidence),
-                current_price=current_price,
-                base_parameters=base_parameters,
+                base_parameters=base_parameters, **inputs
             )
 
             logger.debug(
@@ -126,6 +142,25 @@ class ShadowScanMonitor:
         except Exception as e:
             logger.error(f"Error creating shadows for scan {scan['scan_id']}: {e}")
 
+    async def create_shadows_for_scans(self, scans):
+        """Create shadow variations for a batch of scans in one pass"""
+        groups = {}
+        for scan in scans:
+            try:
+                inputs, base_parameters = self.prepare_scan(scan)
+            except Exception as e:
+                logger.error(f"Error parsing scan {scan.get('scan_id')}: {e}")
+                continue
+            key = json.dumps(base_parameters, sort_keys=True, default=str)
+            groups.setdefault(key, (base_parameters, []))[1].append(inputs)
+
+        created = 0
+        for base_parameters, inputs in groups.values():
+            created += await self.shadow_logger.log_shadow_decisions_batch(
+                inputs, base_parameters
+            )
+        logger.info(f"Created {created} shadow variations for {len(scans)} scans")
+
     async def monitor_loop(self):
         """Main monitoring loop"""
         logger.info("Starting Shadow Scan Monitor")
@@ -137,9 +172,8 @@ class ShadowScanMonitor:
                 unprocessed = await self.get_unprocessed_scans()
 
                 # Create shadows for each
-                for scan in unprocessed:
-                    await self.create_shadows_for_scan(scan)
-                    await asyncio.sleep(0.1)  # Small delay between scans
+                if unprocessed:
+                    await self.create_shadows_for_scans(unprocessed)
 
                 # Flush any pending shadows
                 if self.shadow_logger.batch:
@@ -4,6 +4,7 @@ Analysis module for shadow testing and performance evaluation
 
 from .shadow_logger import ShadowLogger, ShadowDecision
 from .shadow_evaluator import ShadowEvaluator, ShadowOutcome
+from .batch_shadow_evaluator import BatchShadowEvaluator
 from .shadow_analyzer import (
     ShadowAnalyzer,
     PerformanceMetrics,
@@ -15,6 +16,7 @@ __all__ = [
     "ShadowDecision",
     "ShadowEvaluator",
     "ShadowOutcome",
+    "BatchShadowEvaluator",
     "ShadowAnalyzer",
     "PerformanceMetrics",
     "AdjustmentRecommendation",
@@ -0,0 +1,567 @@
+"""
+Batch Shadow Evaluator Module
+Evaluates every pending shadow for a symbol in one vectorized pass
+
+Shadows are grouped by symbol, each symbol's bars are fetched once and
+converted to NumPy arrays, and the first take-profit / stop-loss / timeout
+crossing is found for all shadows at once with range-extreme tables.
+Outcomes are written in batched inserts.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from src.analysis.shadow_evaluator import ShadowEvaluator, ShadowOutcome
+
+# Outcome codes returned by the kernels
+PENDING, TIMEOUT, WIN, LOSS = 0, 1, 2, 3
+STATUS = {
+    TIMEOUT: ("TIMEOUT", "timeout"),
+    WIN: ("WIN", "take_profit"),
+    LOSS: ("LOSS", "stop_loss"),
+}
+
+MICROS_PER_HOUR = 3600 * 1_000_000
+
+
+def to_micros(timestamps) -> np.ndarray:
+    """Parse ISO timestamps to int64 microseconds since the epoch (UTC)"""
+    parsed = pd.to_datetime(pd.Series(timestamps), utc=True, format="ISO8601")
+    return parsed.astype("int64").to_numpy() // 1000
+
+
+class RangeExtremes:
+    """
+    Sparse tables of range max(high) and min(low)
+
+    Answers "first bar at or after `start` whose high reaches `level`" for
+    many (start, level) pairs at once by binary lifting over power-of-two
+    blocks: O(n log n) to build, O(log n) vectorized steps per query batch.
+    """
+
+    def __init__(self, high: np.ndarray, low: np.ndarray):
+        self.n = len(high)
+        self.max_tables = [high]
+        self.min_tables = [low]
+        size = 1
+        while size * 2 <= self.n:
+            prev_max, prev_min = self.max_tables[-1], self.min_tables[-1]
+            self.max_tables.append(np.maximum(prev_max[:-size], prev_max[size:]))
+            self.min_tables.append(np.minimum(prev_min[:-size], prev_min[size:]))
+            size *= 2
+
+    def _first(self, tables, starts, blocked) -> np.ndarray:
+        pos = np.asarray(starts, dtype=np.int64).copy()
+        for k in range(len(tables) - 1, -1, -1):
+            size = 1 << k
+            fits = pos + size <= self.n
+            values = tables[k][np.where(fits, pos, 0)]
+            pos += np.where(fits & blocked(values), size, 0)
+        return pos
+
+    def first_high_at_or_above(self, starts, levels) -> np.ndarray:
+        """Index of the first bar >= start with high >= level (n if none)"""
+        return self._first(self.max_tables, starts, lambda block: block < levels)
+
+    def first_low_at_or_below(self, starts, levels) -> np.ndarray:
+        """Index of the first bar >= start with low <= level (n if none)"""
+        return self._first(self.min_tables, starts, lambda block: block > levels)
+
+
+def evaluate_single_entry(
+    times: np.ndarray,
+    extremes: RangeExtremes,
+    entry_times: np.ndarray,
+    tp_prices: np.ndarray,
+    sl_prices: np.ndarray,
+    hold_hours: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    First exit for single-entry shadows (Swing, Channel)
+
+    Same precedence as ShadowEvaluator._evaluate_single_entry_shadow: on the
+    exit bar a timeout wins over take profit, which wins over stop loss.
+
+    Returns:
+        (exit_index, status_code) arrays
+    """
+    n = len(times)
+    starts = np.searchsorted(times, entry_times, side="left")
+    timeouts = np.searchsorted(
+        times,
+        entry_times + np.round(hold_hours * MICROS_PER_HOUR).astype(np.int64),
+        side="left",
+    )
+    tp_idx = extremes.first_high_at_or_above(starts, tp_prices)
+    sl_idx = extremes.first_low_at_or_below(starts, sl_prices)
+
+    exit_idx = np.minimum(np.minimum(timeouts, tp_idx), sl_idx)
+    status = np.select(
+        [exit_idx >= n, exit_idx == timeouts, exit_idx == tp_idx],
+        [PENDING, TIMEOUT, WIN],
+        default=LOSS,
+    )
+    return exit_idx, status
+
+
+def evaluate_dca(
+    times: np.ndarray,
+    extremes: RangeExtremes,
+    entry_times: np.ndarray,
+    initial_prices: np.ndarray,
+    grid_levels: np.ndarray,
+    grid_spacing: np.ndarray,
+    take_profit_pct: np.ndarray,
+    stop_loss_pct: np.ndarray,
+    hold_hours: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """
+    First exit for DCA shadows with full grid simulation
+
+    Each grid level fills at the first bar whose low reaches it. Between
+    consecutive fill bars the average entry (and so TP/SL) is constant, so
+    each segment is searched with the range-extreme tables. As in
+    ShadowEvaluator._evaluate_dca_shadow, exits are only checked once at
+    least one level has filled, and fills on a bar count before its exit
+    checks.
+
+    Returns:
+        Dict of arrays: exit_index, status, fills, cost (per unit of
+        position size per level), average_entry
+    """
+    n = len(times)
+    m = len(entry_times)
+    max_levels = int(grid_levels.max()) if m else 0
+
+    starts = np.searchsorted(times, entry_times, side="left")
+    timeouts = np.searchsorted(
+        times,
+        entry_times + np.round(hold_hours * MICROS_PER_HOUR).astype(np.int64),
+        side="left",
+    )
+
+    level = np.arange(max_levels)
+    grid = initial_prices[:, None] * (1 - grid_spacing[:, None] * level[None, :])
+    active = level[None, :] < grid_levels[:, None]
+
+    fill_idx = extremes.first_low_at_or_below(
+        np.repeat(starts, max_levels), grid.ravel()
+    ).reshape(m, max_levels)
+    fill_idx = np.where(active, fill_idx, n)
+
+    # Fill order; cumulative cost of the first k+1 fills
+    order = np.argsort(fill_idx, axis=1, kind="stable")
+    fill_sorted = np.take_along_axis(fill_idx, order, axis=1)
+    cost = np.cumsum(np.take_along_axis(grid, order, axis=1), axis=1)
+
+    result = {
+        "exit_index": np.full(m, n, dtype=np.int64),
+        "status": np.full(m, PENDING),
+        "fills": np.zeros(m, dtype=np.int64),
+        "cost": np.zeros(m),
+        "average_entry": initial_prices.astype(float).copy(),
+    }
+    done = np.zeros(m, dtype=bool)
+
+    for k in range(max_levels):
+        seg_start = fill_sorted[:, k]
+        seg_end = fill_sorted[:, k + 1] if k + 1 < max_levels else np.full(m, n)
+        live = ~done & (seg_start < n) & (seg_start < seg_end)
+        if not live.any():
+            continue
+
+        average = cost[:, k] / (k + 1)
+        tp = extremes.first_high_at_or_above(seg_start, average * (1 + take_profit_pct))
+        sl = extremes.first_low_at_or_below(seg_start, average * (1 - stop_loss_pct))
+        timeout = np.maximum(timeouts, seg_start)
+
+        exit_idx = np.minimum(np.minimum(timeout, tp), sl)
+        hit = live & (exit_idx < seg_end)
+
+        result["exit_index"][hit] = exit_idx[hit]
+        result["status"][hit] = np.select(
+            [exit_idx == timeout, exit_idx == tp], [TIMEOUT, WIN], default=LOSS
+        )[hit]
+        result["fills"][hit] = k + 1
+        result["cost"][hit] = cost[hit, k]
+        result["average_entry"][hit] = average[hit]
+        done |= hit
+
+    return result
+
+
+class BatchShadowEvaluator(ShadowEvaluator):
+    """
+    Drop-in ShadowEvaluator that evaluates pending shadows in bulk
+
+    Pending shadows from the last `max_lookback_hours` are keyset-paged in,
+    up to `max_shadows_per_run` of them, bars are fetched once per symbol,
+    and outcomes and real-trade matches are resolved with batched queries.
+    """
+
+    def __init__(self, supabase_client):
+        super().__init__(supabase_client)
+        self.max_shadows_per_run = 20000
+        self.page_size = 1000  # PostgREST row limit per request
+        self.in_chunk_size = 300  # ids per .in_() filter (URL length)
+
+    async def evaluate_pending_shadows(self) -> List[ShadowOutcome]:
+        """
+        Evaluate all pending shadows, grouped by symbol
+
+        Returns:
+            List of evaluated (non-pending) shadow outcomes
+        """
+        outcomes = []
+
+        try:
+            shadows = self._get_pending_shadows_batch()
+            logger.info(f"Found {len(shadows)} shadow trades to evaluate")
+
+            by_symbol = defaultdict(list)
+            for shadow in shadows:
+                scan = shadow.get("scan_history") or {}
+                if scan.get("symbol"):
+                    by_symbol[scan["symbol"]].append(shadow)
+
+            for symbol, symbol_shadows in by_symbol.items():
+                try:
+                    outcomes.extend(self.evaluate_symbol(symbol, symbol_shadows))
+                except Exception as e:
+                    logger.error(f"Error evaluating {symbol} shadows: {e}")
+
+            self._save_outcomes(outcomes, shadows)
+            logger.info(
+                f"Evaluated {len(outcomes)} shadow trades across {len(by_symbol)} symbols"
+            )
+
+        except Exception as e:
+            logger.error(f"Error evaluating shadows: {e}")
+
+        return outcomes
+
+    def evaluate_symbol(self, symbol: str, shadows: List[Dict]) -> List[ShadowOutcome]:
+        """Evaluate every shadow for one symbol against a single bar fetch"""
+        entry_times = to_micros([s["created_at"] for s in shadows])
+        hold_hours = np.array([float(s.get("shadow_hold_hours", 72)) for s in shadows])
+
+        start = datetime.utcfromtimestamp(entry_times.min() / 1e6)
+        end = min(
+            datetime.utcnow(),
+            datetime.utcfromtimestamp(
+                (entry_times + hold_hours * MICROS_PER_HOUR).max() / 1e6
+            )
+            + timedelta(minutes=5),
+        )
+        bars = self._get_symbol_bars(symbol, start, end)
+        if not bars:
+            logger.debug(f"No price data yet for {symbol} ({len(shadows)} shadows)")
+            return []
+
+        return self.evaluate_with_bars(shadows, bars)
+
+    def evaluate_with_bars(
+        self, shadows: List[Dict], bars: List[Dict]
+    ) -> List[ShadowOutcome]:
+        """Evaluate one symbol's shadows against its bars (sorted by time)"""
+        times = to_micros([b["timestamp"] for b in bars])
+        close = np.array([float(b["close"]) for b in bars])
+        high = np.array(
+            [
+                float(b["high"]) if b.get("high") is not None else c
+                for b, c in zip(bars, close)
+            ]
+        )
+        low = np.array(
+            [
+                float(b["low"]) if b.get("low") is not None else c
+                for b, c in zip(bars, close)
+            ]
+        )
+        extremes = RangeExtremes(high, low)
+
+        is_dca = np.array(
+            [
+                (s.get("scan_history") or {}).get("strategy_name") == "DCA"
+                for s in shadows
+            ]
+        )
+        entry_times = to_micros([s["created_at"] for s in shadows])
+        entry_price = np.array([float(s["shadow_entry_price"]) for s in shadows])
+        tp_pct = np.array([float(s["shadow_take_profit"]) / 100 for s in shadows])
+        sl_pct = np.array([float(s["shadow_stop_loss"]) / 100 for s in shadows])
+        hold = np.array([float(s.get("shadow_hold_hours", 72)) for s in shadows])
+        size = np.array([float(s.get("shadow_position_size", 100)) for s in shadows])
+
+        outcomes = []
+
+        single = np.flatnonzero(~is_dca)
+        if len(single):
+            exit_idx, status = evaluate_single_entry(
+                times,
+                extremes,
+                entry_times[single],
+                entry_price[single] * (1 + tp_pct[single]),
+                entry_price[single] * (1 - sl_pct[single]),
+                hold[single],
+            )
+            for i, idx, code in zip(single, exit_idx, status):
+                if code == PENDING:
+                    continue
+                if code == TIMEOUT:
+                    exit_price = close[idx]
+                    pnl_pct = (exit_price - entry_price[i]) / entry_price[i]
+                elif code == WIN:
+                    exit_price = entry_price[i] * (1 + tp_pct[i])
+                    pnl_pct = tp_pct[i]
+                else:
+                    exit_price = entry_price[i] * (1 - sl_pct[i])
+                    pnl_pct = -sl_pct[i]
+                outcomes.append(
+                    self._outcome(
+                        shadows[i],
+                        code,
+                        idx,
+                        times,
+                        entry_times[i],
+                        exit_price,
+                        pnl_pct * 100,
+                        pnl_pct * size[i],
+                    )
+                )
+
+        dca = np.flatnonzero(is_dca)
+        if len(dca):
+            levels = np.array([int(shadows[i].get("dca_grid_levels", 5)) for i in dca])
+            spacing = np.array(
+                [float(shadows[i].get("dca_grid_spacing", 1.0)) / 100 for i in dca]
+            )
+            result = evaluate_dca(
+                times,
+                extremes,
+                entry_times[dca],
+                entry_price[dca],
+                levels,
+                spacing,
+                tp_pct[dca],
+                sl_pct[dca],
+                hold[dca],
+            )
+            for j, i in enumerate(dca):
+                code = result["status"][j]
+                if code == PENDING:
+                    continue
+                idx = result["exit_index"][j]
+                average = result["average_entry"][j]
+                per_level = size[i] / levels[j]
+                position = result["fills"][j] * per_level
+                total_cost = result["cost"][j] * per_level
+
+                if code == TIMEOUT:
+                    exit_price = close[idx]
+                    pnl_pct = (exit_price - average) / average
+                elif code == WIN:
+                    exit_price = average * (1 + tp_pct[i])
+                    pnl_pct = tp_pct[i]
+                else:
+                    exit_price = average * (1 - sl_pct[i])
+                    pnl_pct = -sl_pct[i]
+
+                outcome = self._outcome(
+                    shadows[i],
+                    code,
+                    idx,
+                    times,
+                    entry_times[i],
+                    exit_price,
+                    pnl_pct * 100,
+                    position * exit_price - total_cost,
+                )
+                outcome.grid_fills = int(result["fills"][j])
+                outcome.average_entry_price = float(average)
+                outcome.total_position_size = float(position)
+                outcomes.append(outcome)
+
+        return outcomes
+
+    @staticmethod
+    def _outcome(
+        shadow, code, idx, times, entry_time, exit_price, pnl_percentage, pnl_amount
+    ) -> ShadowOutcome:
+        status, trigger = STATUS[int(code)]
+        return ShadowOutcome(
+            shadow_id=shadow["shadow_id"],
+            outcome_status=status,
+            exit_trigger=trigger,
+            exit_price=float(exit_price),
+            pnl_percentage=float(pnl_percentage),
+            pnl_amount=float(pnl_amount),
+            actual_hold_hours=float((times[idx] - entry_time) / MICROS_PER_HOUR),
+        )
+
+    # ------------------------------------------------------------------
+    # Batched database access
+    # ------------------------------------------------------------------
+
+    def _get_pending_shadows_batch(self) -> List[Dict]:
+        """Keyset-page through shadows that would trade and have no outcome yet"""
+        now = datetime.utcnow()
+        cutoff_time = (now - timedelta(minutes=5)).isoformat()
+        # Shadows older than the lookback can't be evaluated any more, so the
+        # already-evaluated history behind them is never re-read
+        since = (now - timedelta(hours=self.max_lookback_hours)).isoformat()
+        pending = []
+        last_id = None
+
+        try:
+            while len(pending) < self.max_shadows_per_run:
+                query = (
+                    self.supabase.table("shadow_variations")
+                    .select("*, scan_history!inner(*)")
+                    .eq("would_take_trade", True)
+                    .gte("created_at", since)
+                    .lt("created_at", cutoff_time)
+                )
+                if last_id is not None:
+                    query = query.gt("shadow_id", last_id)
+                result = query.order("shadow_id").limit(self.page_size).execute()
+
+                page = result.data or []
+                if not page:
+                    break
+                last_id = page[-1]["shadow_id"]
+
+                # The cap counts pending shadows, not rows read
+                evaluated = self._evaluated_ids([s["shadow_id"] for s in page])
+                pending.extend(s for s in page if s["shadow_id"] not in evaluated)
+                if len(page) < self.page_size:
+                    break
+
+            return pending[: self.max_shadows_per_run]
+
+        except Exception as e:
+            logger.error(f"Error getting pending shadows: {e}")
+            return []
+
+    def _evaluated_ids(self, ids: List[int]) -> Set[int]:
+        """Shadow ids among `ids` that already have an outcome"""
+        evaluated = set()
+        for i in range(0, len(ids), self.in_chunk_size):
+            result = (
+                self.supabase.table("shadow_outcomes")
+                .select("shadow_id")
+                .in_("shadow_id", ids[i : i + self.in_chunk_size])
+                .execute()
+            )
+            evaluated.update(o["shadow_id"] for o in result.data or [])
+        return evaluated
+
+    def _get_symbol_bars(
+        self, symbol: str, start_time: datetime, end_time: datetime
+    ) -> List[Dict]:
+        """All 1m bars for the window (5m fallback), paginated"""
+        for timeframe in ("1m", "5m"):
+            bars = []
+            try:
+                while True:
+                    result = (
+                        self.supabase.table("ohlc_data")
+                        .select("timestamp, open, high, low, close, volume")
+                        .eq("symbol", symbol)
+                        .eq("timeframe", timeframe)
+                        .gte("timestamp", start_time.isoformat())
+                        .lte("timestamp", end_time.isoformat())
+                        .order("timestamp")
+                        .range(len(bars), len(bars) + self.page_size - 1)
+                        .execute()
+                    )
+                    bars.extend(result.data or [])
+                    if len(result.data or []) < self.page_size:
+                        break
+            except Exception as e:
+                logger.error(f"Error getting {timeframe} price data for {symbol}: {e}")
+                return []
+
+            if bars:
+                return bars
+        return []
+
+    def _match_real_trades(
+        self, outcomes: List[ShadowOutcome], shadows: Dict[int, Dict]
+    ) -> Dict[int, bool]:
+        """Batched equivalent of _check_real_trade_match"""
+        matched = {}
+        scan_ids = set()
+        for outcome in outcomes:
+            shadow = shadows.get(outcome.shadow_id, {})
+            if shadow.get("variation_name") == "CHAMPION":
+                matched[outcome.shadow_id] = True
+            elif shadow.get("scan_id") is not None:
+                scan_ids.add(shadow["scan_id"])
+
+        trades = {}
+        scan_ids = sorted(scan_ids)
+        for i in range(0, len(scan_ids), self.in_chunk_size):
+            try:
+                result = (
+                    self.supabase.table("trade_logs")
+                    .select("scan_id, status, pnl_percentage")
+                    .in_("scan_id", scan_ids[i : i + self.in_chunk_size])
+                    .execute()
+                )
+                for trade in result.data or []:
+                    trades.setdefault(trade["scan_id"], trade)
+            except Exception as e:
+                logger.error(f"Error checking real trade matches: {e}")
+
+        for outcome in outcomes:
+            if outcome.shadow_id in matched:
+                continue
+            trade = trades.get(shadows.get(outcome.shadow_id, {}).get("scan_id"))
+            status = (trade or {}).get("status") or ""
+            matched[outcome.shadow_id] = status.startswith("CLOSED_") and (
+                ("WIN" in status) == (outcome.outcome_status == "WIN")
+            )
+        return matched
+
+    def _save_outcomes(self, outcomes: List[ShadowOutcome], shadows: List[Dict]):
+        """Insert all outcomes in page-sized batches"""
+        if not outcomes:
+            return
+
+        matched = self._match_real_trades(
+            outcomes, {s["shadow_id"]: s for s in shadows}
+        )
+        now = datetime.utcnow().isoformat()
+        records = [
+            {
+                "shadow_id": o.shadow_id,
+                "evaluated_at": now,
+                "evaluation_delay_hours": o.actual_hold_hours,
+                "outcome_status": o.outcome_status,
+                "exit_trigger": o.exit_trigger,
+                "exit_price": o.exit_price,
+                "pnl_percentage": o.pnl_percentage,
+                "pnl_amount": o.pnl_amount,
+                "actual_hold_hours": o.actual_hold_hours,
+                "grid_fills": o.grid_fills,
+                "average_entry_price": o.average_entry_price,
+                "total_position_size": o.total_position_size,
+                "matched_real_trade": matched.get(o.shadow_id, False),
+                "prediction_accuracy": self._calculate_accuracy(o),
+                "created_at": now,
+            }
+            for o in outcomes
+        ]
+
+        for i in range(0, len(records), self.page_size):
+            chunk = records[i : i + self.page_size]
+            try:
+                self.supabase.table("shadow_outcomes").insert(chunk).execute()
+            except Exception as e:
+                logger.error(f"Error saving {len(chunk)} shadow outcomes: {e}")
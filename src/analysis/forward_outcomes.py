@@ -0,0 +1,181 @@
+"""
+Forward Outcome Labeling
+First take-profit / stop-loss / expiry for many setups at once
+
+Each setup looks forward from its entry bar for up to max_bars bars. The
+setups are gathered in chunks into (setups, bars) windows of highs and
+lows, and a masked argmax over the hit matrix finds the first bar where
+either level is crossed. Same-bar ties go to take profit, as in the label
+generators' loops.
+"""
+
+from typing import Dict, Union
+
+import numpy as np
+
+# Exit reasons
+EXPIRED, TAKE_PROFIT, STOP_LOSS = 0, 1, 2
+EXIT_REASONS = {EXPIRED: "expired", TAKE_PROFIT: "take_profit", STOP_LOSS: "stop_loss"}
+
+# Position sides
+LONG, SHORT = 1, -1
+
+CHUNK_ELEMENTS = 2_000_000  # Window cells gathered per NumPy pass
+
+
+def forward_outcomes(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    entry_index: np.ndarray,
+    entry_price: np.ndarray,
+    take_profit: np.ndarray,
+    stop_loss: np.ndarray,
+    max_bars: Union[int, np.ndarray],
+    side: Union[int, np.ndarray] = LONG,
+    include_exit_bar: bool = True,
+    chunk_elements: int = CHUNK_ELEMENTS,
+) -> Dict[str, np.ndarray]:
+    """
+    Outcome of every setup
+
+    Bars entry_index .. entry_index + max_bars - 1 (clipped to the series)
+    are scanned. A long takes profit when high >= take_profit and stops
+    out when low <= stop_loss; a short the other way round. Without a
+    crossing the setup expires at the close of its last bar.
+
+    Args:
+        high, low, close: Price arrays of one chronological series
+        entry_index: First bar each setup scans
+        entry_price: Price PnL is measured from
+        take_profit, stop_loss: Exit price levels
+        max_bars: Bars scanned per setup (scalar or array)
+        side: LONG or SHORT (scalar or array)
+        include_exit_bar: Count the take-profit / stop-loss bar in the
+            excursions (expired setups always count every bar)
+        chunk_elements: Bound on the window cells gathered at once
+
+    Returns:
+        Dict of arrays, one entry per setup:
+            exit_index: Bar of the exit (-1 when there are no bars to scan)
+            exit_reason: EXPIRED, TAKE_PROFIT or STOP_LOSS
+            exit_price: Take profit, stop loss, or the last close
+            pnl_pct: Signed return at exit, in percent
+            bars_held: Bars up to and including the exit bar
+            max_favorable_pct: Best intrabar excursion (>= 0), in percent
+            max_adverse_pct: Worst intrabar excursion (<= 0), in percent
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    n = len(close)
+
+    entry_index = np.asarray(entry_index, dtype=np.int64)
+    m = len(entry_index)
+    entry_price = np.broadcast_to(np.asarray(entry_price, dtype=float), (m,))
+    take_profit = np.broadcast_to(np.asarray(take_profit, dtype=float), (m,))
+    stop_loss = np.broadcast_to(np.asarray(stop_loss, dtype=float), (m,))
+    max_bars = np.broadcast_to(np.asarray(max_bars, dtype=np.int64), (m,))
+    side = np.broadcast_to(np.asarray(side), (m,))
+
+    horizon = np.clip(np.minimum(max_bars, n - entry_index), 0, None)
+
+    result = {
+        "exit_index": np.full(m, -1, dtype=np.int64),
+        "exit_reason": np.full(m, EXPIRED),
+        "exit_price": entry_price.copy(),
+        "pnl_pct": np.zeros(m),
+        "bars_held": np.zeros(m, dtype=np.int64),
+        "max_favorable_pct": np.zeros(m),
+        "max_adverse_pct": np.zeros(m),
+    }
+    if m == 0 or horizon.max() == 0:
+        return result
+
+    per_chunk = max(1, chunk_elements // int(horizon.max()))
+    for start in range(0, m, per_chunk):
+        rows = np.arange(start, min(m, start + per_chunk))
+        rows = rows[horizon[rows] > 0]
+        if len(rows):
+            _evaluate_chunk(
+                rows,
+                high,
+                low,
+                close,
+                entry_index,
+                entry_price,
+                take_profit,
+                stop_loss,
+                side,
+                horizon,
+                include_exit_bar,
+                result,
+            )
+
+    return result
+
+
+def _evaluate_chunk(
+    rows,
+    high,
+    low,
+    close,
+    entry_index,
+    entry_price,
+    take_profit,
+    stop_loss,
+    side,
+    horizon,
+    include_exit_bar,
+    result,
+):
+    bars = horizon[rows]
+    offsets = np.arange(bars.max())
+    in_window = offsets < bars[:, None]
+    index = np.minimum(entry_index[rows, None] + offsets, len(close) - 1)
+    window_high = high[index]
+    window_low = low[index]
+
+    is_long = side[rows] > 0
+    tp = take_profit[rows, None]
+    sl = stop_loss[rows, None]
+    tp_hit = in_window & np.where(is_long[:, None], window_high >= tp, window_low <= tp)
+    sl_hit = in_window & np.where(is_long[:, None], window_low <= sl, window_high >= sl)
+
+    hit = tp_hit | sl_hit
+    exited = hit.any(axis=1)
+    first = np.where(exited, hit.argmax(axis=1), bars - 1)
+    took_profit = tp_hit[np.arange(len(rows)), first]
+    reason = np.where(exited, np.where(took_profit, TAKE_PROFIT, STOP_LOSS), EXPIRED)
+
+    exit_index = entry_index[rows] + first
+    exit_price = np.select(
+        [reason == TAKE_PROFIT, reason == STOP_LOSS],
+        [take_profit[rows], stop_loss[rows]],
+        close[exit_index],
+    )
+    entry = entry_price[rows]
+    sign = np.where(is_long, 1.0, -1.0)
+
+    # Excursions over the bars up to the exit
+    counted = first + np.where(exited & ~include_exit_bar, 0, 1)
+    tracked = offsets < counted[:, None]
+    e = entry[:, None]
+    favorable = np.where(
+        is_long[:, None], (window_high - e) / e * 100, (e - window_low) / e * 100
+    )
+    adverse = np.where(
+        is_long[:, None], (window_low - e) / e * 100, (e - window_high) / e * 100
+    )
+
+    result["exit_index"][rows] = exit_index
+    result["exit_reason"][rows] = reason
+    result["exit_price"][rows] = exit_price
+    result["pnl_pct"][rows] = sign * (exit_price - entry) / entry * 100
+    result["bars_held"][rows] = first + 1
+    result["max_favorable_pct"][rows] = np.maximum(
+        0.0, np.where(tracked, favorable, -np.inf).max(axis=1)
+    )
+    result["max_adverse_pct"][rows] = np.minimum(
+        0.0, np.where(tracked, adverse, np.inf).min(axis=1)
+    )
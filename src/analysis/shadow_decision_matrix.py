@@ -0,0 +1,346 @@
+"""
+Shadow Decision Matrix
+Evaluates a batch of scans against every shadow variation in one pass
+
+Variation parameters are compiled once per set of base parameters into
+arrays with one column per decision (isolated variations expand to one
+column per test value). A batch of scans then becomes a few NumPy
+broadcasts of shape (scans, columns) instead of a Python call per
+variation per scan.
+"""
+
+import math
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from loguru import logger
+
+from src.analysis.shadow_logger import ShadowDecision
+
+
+def _number(source: Dict, key: str, default: float) -> float:
+    value = source.get(key, default)
+    return default if value is None else float(value)
+
+
+def scan_inputs(scan: Dict) -> Tuple[float, float, float, float, float, float]:
+    """
+    Numeric decision inputs of one scan
+
+    Returns:
+        (ml_confidence, take_profit_pct, stop_loss_pct, hold_hours,
+        volatility_24h, current_price)
+
+    Raises:
+        KeyError, TypeError or ValueError if the scan can't be evaluated
+    """
+    if scan.get("scan_id") is None:
+        raise KeyError("scan_id")
+    price = float(scan["current_price"])
+    if not math.isfinite(price):
+        raise ValueError(f"current_price {price}")
+
+    confidence = scan.get("ml_confidence")
+    predictions = scan.get("ml_predictions") or {}
+    return (
+        0.0 if confidence is None else float(confidence),
+        _number(predictions, "take_profit_pct", 10.0),
+        _number(predictions, "stop_loss_pct", 5.0),
+        _number(predictions, "hold_hours", 24),
+        _number(scan.get("features") or {}, "volatility_24h", 0.03),
+        price,
+    )
+
+
+class DecisionMatrix:
+    """
+    Compiled shadow variations for one set of base parameters
+
+    Produces the same decisions as ShadowLogger's per-variation methods;
+    parameter merging is delegated to the logger so both paths share it.
+    """
+
+    def __init__(self, shadow_logger, variations: List[Dict], base_parameters: Dict):
+        """
+        Compile the variations
+
+        Args:
+            shadow_logger: ShadowLogger providing parameter merging and
+                record preparation
+            variations: Active variations (database or config format)
+            base_parameters: Current production parameters
+        """
+        self.shadow_logger = shadow_logger
+        self.base_parameters = base_parameters
+        self.base_size = _number(base_parameters, "position_size", 100)
+
+        self.names: List[str] = []
+        self.columns: List[Dict[str, Any]] = []  # Per-column compile inputs
+
+        threshold, size_mult, tp_mult = [], [], []
+        sl_const, sl_from_ml, hold_const = [], [], []
+        vol_low, vol_high, mult_low, mult_high = [], [], [], []
+
+        for variation in variations:
+            var_config = variation.get("variation_config", {})
+            var_type = var_config.get("type", "scenario")
+            var_params = var_config.get("parameters", {})
+            name = variation["variation_name"]
+
+            if var_type == "isolated":
+                test_parameter = var_params.get("test_parameter")
+                for test_value in var_params.get("test_values", []):
+                    params, min_conf = shadow_logger._isolated_parameters(
+                        test_parameter, test_value, base_parameters
+                    )
+                    self._add_column(f"{name}_{test_value}", "isolated", params)
+                    threshold.append(min_conf)
+                    size_mult.append(1.0)
+                    tp_mult.append(1.0)
+                    sl_const.append(np.nan)
+                    sl_from_ml.append(True)
+                    hold_const.append(np.nan)
+                    vol_low.append(-np.inf)
+                    vol_high.append(np.inf)
+                    mult_low.append(1.0)
+                    mult_high.append(1.0)
+                continue
+
+            if var_type == "champion":
+                params = base_parameters.copy()
+                self._add_column(name, "champion", params)
+                threshold.append(base_parameters.get("min_confidence", 0.60))
+                size_mult.append(1.0)
+                tp_mult.append(1.0)
+                sl_const.append(np.nan)
+                sl_from_ml.append(True)
+                hold_const.append(np.nan)
+
+            elif var_type == "scenario":
+                params = shadow_logger._scenario_parameters(
+                    variation_name=name,
+                    scenario_params=var_params,
+                    base_parameters=base_parameters,
+                    features={},
+                    strategy_name=None,
+                )
+                self._add_column(name, "scenario", params, var_params)
+                threshold.append(params.get("confidence_threshold", 0.60))
+                size_mult.append(params.get("position_size_multiplier", 1.0))
+                tp_mult.append(params.get("take_profit_multiplier", 1.0))
+                raw = bool(params.get("use_ml_predictions_raw"))
+                sl_const.append(params.get("stop_loss_percent", 0.05) * 100)
+                sl_from_ml.append(raw)
+                hold_const.append(params.get("max_hold_hours", np.nan))
+
+            else:
+                logger.warning(f"Skipping variation {name} of unknown type {var_type}")
+                continue
+
+            # Volatility-sized scenarios pick their multiplier per scan
+            if (
+                name == "VOLATILITY_SIZED"
+                and var_type == "scenario"
+                and "position_size_multiplier" not in var_params
+            ):
+                vol_low.append(var_params.get("vol_threshold_low", 0.02))
+                vol_high.append(var_params.get("vol_threshold_high", 0.05))
+                mult_low.append(var_params.get("low_vol_multiplier", 1.5))
+                mult_high.append(var_params.get("high_vol_multiplier", 0.5))
+                size_mult[-1] = 1.0
+                self.columns[-1]["volatility_sized"] = True
+            else:
+                vol_low.append(-np.inf)
+                vol_high.append(np.inf)
+                mult_low.append(size_mult[-1])
+                mult_high.append(size_mult[-1])
+
+        self.threshold = np.array(threshold, dtype=float)
+        self.size_mult = np.array(size_mult, dtype=float)
+        self.tp_mult = np.array(tp_mult, dtype=float)
+        self.sl_const = np.array(sl_const, dtype=float)
+        self.sl_from_ml = np.array(sl_from_ml, dtype=bool)
+        self.hold_const = np.array(hold_const, dtype=float)
+        self.vol_low = np.array(vol_low, dtype=float)
+        self.vol_high = np.array(vol_high, dtype=float)
+        self.mult_low = np.array(mult_low, dtype=float)
+        self.mult_high = np.array(mult_high, dtype=float)
+        self.vol_columns = np.array(
+            [c.get("volatility_sized", False) for c in self.columns], dtype=bool
+        )
+
+        self._strategy_params: Dict[Optional[str], List[Dict]] = {}
+        self._templates: Dict[Optional[str], List[Dict]] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _add_column(self, name: str, kind: str, params: Dict, var_params=None):
+        self.names.append(name)
+        self.columns.append({"kind": kind, "params": params, "var_params": var_params})
+
+    # ------------------------------------------------------------------
+    # Evaluation
+    # ------------------------------------------------------------------
+
+    def evaluate(self, scans: List[Dict]) -> Dict[str, np.ndarray]:
+        """
+        Decide every variation for every scan
+
+        Args:
+            scans: Dicts with the log_shadow_decisions arguments
+                (ml_confidence, ml_predictions, features, current_price);
+                every scan must pass scan_inputs
+
+        Returns:
+            Dict of (scans, columns) arrays: would_take_trade, confidence,
+            position_size, size_multiplier, entry_price, take_profit,
+            stop_loss, hold_hours
+        """
+        inputs = np.array([scan_inputs(s) for s in scans], dtype=float).reshape(-1, 6)
+        confidence = inputs[:, 0:1]
+        ml_tp, ml_sl, ml_hold = inputs[:, 1], inputs[:, 2], inputs[:, 3]
+        volatility = inputs[:, 4:5]
+        price = inputs[:, 5:6]
+
+        size_mult = np.where(
+            volatility < self.vol_low,
+            self.mult_low,
+            np.where(volatility > self.vol_high, self.mult_high, self.size_mult),
+        )
+        shape = (len(scans), len(self))
+
+        return {
+            "would_take_trade": confidence >= self.threshold,
+            "confidence": np.broadcast_to(confidence, shape),
+            "position_size": self.base_size * size_mult,
+            "size_multiplier": size_mult,
+            "entry_price": np.broadcast_to(price, shape),
+            "take_profit": ml_tp[:, None] * self.tp_mult,
+            "stop_loss": np.where(self.sl_from_ml, ml_sl[:, None], self.sl_const),
+            "hold_hours": np.where(
+                np.isnan(self.hold_const), ml_hold[:, None], self.hold_const
+            ),
+        }
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+
+    def parameters(self, strategy_name: Optional[str]) -> List[Dict]:
+        """Per-column parameters_used for a strategy (cached)"""
+        if strategy_name not in self._strategy_params:
+            params = []
+            for name, column in zip(self.names, self.columns):
+                if column["kind"] == "scenario":
+                    params.append(
+                        self.shadow_logger._scenario_parameters(
+                            variation_name=name,
+                            scenario_params=column["var_params"],
+                            base_parameters=self.base_parameters,
+                            features={},
+                            strategy_name=strategy_name,
+                        )
+                    )
+                else:
+                    params.append(column["params"])
+            self._strategy_params[strategy_name] = params
+        return self._strategy_params[strategy_name]
+
+    def _record_templates(self, strategy_name: Optional[str]) -> List[Dict]:
+        """Scan-independent part of each column's shadow_variations row"""
+        if strategy_name not in self._templates:
+            templates = []
+            for name, params in zip(self.names, self.parameters(strategy_name)):
+                placeholder = ShadowDecision(
+                    variation_name=name,
+                    would_take_trade=False,
+                    shadow_confidence=0.0,
+                    shadow_position_size=0.0,
+                    shadow_entry_price=0.0,
+                    shadow_take_profit=0.0,
+                    shadow_stop_loss=0.0,
+                    shadow_hold_hours=0.0,
+                    parameters_used=params,
+                )
+                templates.append(
+                    self.shadow_logger._prepare_shadow_record(
+                        scan_id=None,
+                        decision=placeholder,
+                        strategy_name=strategy_name,
+                        current_price=0.0,
+                    )
+                )
+            self._templates[strategy_name] = templates
+        return self._templates[strategy_name]
+
+    def records(self, scans: List[Dict], result: Dict[str, np.ndarray]) -> List[Dict]:
+        """Database rows for every (scan, column) decision"""
+        rows = []
+        created_at = datetime.utcnow().isoformat()
+        values = {key: array.tolist() for key, array in result.items()}
+        vol_columns = np.flatnonzero(self.vol_columns).tolist()
+
+        for i, scan in enumerate(scans):
+            templates = self._record_templates(scan.get("strategy_name"))
+            take = values["would_take_trade"][i]
+            size = values["position_size"][i]
+            tp = values["take_profit"][i]
+            sl = values["stop_loss"][i]
+            hold = values["hold_hours"][i]
+            confidence = values["confidence"][i]
+            price = values["entry_price"][i]
+
+            scan_rows = [
+                {
+                    **template,
+                    "scan_id": scan["scan_id"],
+                    "would_take_trade": take[j],
+                    "shadow_confidence": confidence[j],
+                    "shadow_position_size": size[j],
+                    "shadow_entry_price": price[j],
+                    "shadow_take_profit": tp[j],
+                    "shadow_stop_loss": sl[j],
+                    "shadow_hold_hours": hold[j],
+                    "created_at": created_at,
+                }
+                for j, template in enumerate(templates)
+            ]
+            for j in vol_columns:
+                scan_rows[j]["position_size_multiplier"] = values["size_multiplier"][i][
+                    j
+                ]
+            rows.extend(scan_rows)
+
+        return rows
+
+    def decisions(
+        self, result: Dict[str, np.ndarray], index: int, strategy_name: Optional[str]
+    ) -> List[ShadowDecision]:
+        """ShadowDecision objects for one scan of an evaluated batch"""
+        decisions = []
+        for j, (name, params) in enumerate(
+            zip(self.names, self.parameters(strategy_name))
+        ):
+            if self.vol_columns[j]:
+                params = {
+                    **params,
+                    "position_size_multiplier": float(
+                        result["size_multiplier"][index, j]
+                    ),
+                }
+            decisions.append(
+                ShadowDecision(
+                    variation_name=name,
+                    would_take_trade=bool(result["would_take_trade"][index, j]),
+                    shadow_confidence=float(result["confidence"][index, j]),
+                    shadow_position_size=float(result["position_size"][index, j]),
+                    shadow_entry_price=float(result["entry_price"][index, j]),
+                    shadow_take_profit=float(result["take_profit"][index, j]),
+                    shadow_stop_loss=float(result["stop_loss"][index, j]),
+                    shadow_hold_hours=float(result["hold_hours"][index, j]),
+                    parameters_used=params,
+                )
+            )
+        return decisions
@@ -13,6 +13,7 @@ import asyncio
 from dataclasses import dataclass
 
 from src.config.shadow_config import ShadowConfig
+from src.data.write_behind import get_write_behind_queue
 
 
 @dataclass
@@ -49,6 +50,7 @@ class ShadowLogger:
         self.batch = []  # For batch inserts
         self.batch_size = 50  # Insert in batches
         self.active_variations = self._load_active_variations()
+        self._matrices = {}  # Compiled DecisionMatrix per base_parameters
 
     def _load_active_variations(self) -> List[Dict]:
         """Load active shadow variations from configuration"""
@@ -115,73 +117,19 @@ class ShadowLogger:
         decisions = []
 
         try:
-            for variation in self.active_variations:
-                var_config = variation.get("variation_config", {})
-                var_type = var_config.get("type", "scenario")
-
-                # Handle isolated variations specially - they create multiple decisions
-                if var_type == "isolated":
-                    test_parameter = var_config.get("parameters", {}).get(
-                        "test_parameter"
-                    )
-                    test_values = var_config.get("parameters", {}).get(
-                        "test_values", []
-                    )
-
-                    # Create a decision for each test value
-                    for test_value in test_values:
-                        decision = self._evaluate_isolated_single(
-                            variation_name=variation["variation_name"],
-                            test_parameter=test_parameter,
-                            test_value=test_value,
-                            ml_predictions=ml_predictions,
-                            ml_confidence=ml_confidence,
-                            current_price=current_price,
-                            base_parameters=base_parameters,
-                            strategy_name=strategy_name,
-                        )
-
-                        if decision:
-                            decisions.append(decision)
-
-                            # Prepare database record
-                            record = self._prepare_shadow_record(
-                                scan_id=scan_id,
-                                decision=decision,
-                                strategy_name=strategy_name,
-                                current_price=current_price,
-                            )
-
-                            self.batch.append(record)
-                else:
-                    # Calculate what this variation would do
-                    decision = await self._evaluate_variation(
-                        variation=variation,
-                        symbol=symbol,
-                        strategy_name=strategy_name,
-                        features=features,
-                        ml_predictions=ml_predictions,
-                        ml_confidence=ml_confidence,
-                        current_price=current_price,
-                        base_parameters=base_parameters,
-                    )
-
-                    if decision:
-                        decisions.append(decision)
-
-                        # Prepare database record
-                        record = self._prepare_shadow_record(
-                            scan_id=scan_id,
-                            decision=decision,
-                            strategy_name=strategy_name,
-                            current_price=current_price,
-                        )
-
-                        self.batch.append(record)
-
-            # Insert if batch is full
-            if len(self.batch) >= self.batch_size:
-                await self.flush()
+            scan = {
+                "scan_id": scan_id,
+                "symbol": symbol,
+                "strategy_name": strategy_name,
+                "features": features,
+                "ml_predictions": ml_predictions,
+                "ml_confidence": ml_confidence,
+                "current_price": current_price,
+            }
+            matrix = self._decision_matrix(base_parameters)
+            result = matrix.evaluate([scan])
+            decisions = matrix.decisions(result, 0, strategy_name)
+            self.batch.extend(matrix.records([scan], result))
 
             # Always flush after processing a scan to ensure data is saved
             # (since we only generate 3-8 variations per scan, batch may never fill)
@@ -193,6 +141,67 @@ class ShadowLogger:
 
         return decisions
 
+    async def log_shadow_decisions_batch(
+        self, scans: List[Dict], base_parameters: Dict
+    ) -> int:
+        """
+        Log every variation's decision for a batch of scans
+
+        All scans are evaluated against all variations in one pass of the
+        compiled decision matrix and the rows are handed to the
+        write-behind queue in a single flush. Scans missing the inputs the
+        matrix needs (e.g. a None current_price) are skipped individually.
+
+        Args:
+            scans: Dicts with scan_id, strategy_name, features,
+                ml_predictions, ml_confidence and current_price
+            base_parameters: Current production parameters
+
+        Returns:
+            Number of shadow rows queued
+        """
+        from src.analysis.shadow_decision_matrix import scan_inputs
+
+        # One malformed scan must not cost the rest of the batch
+        usable = []
+        for scan in scans:
+            try:
+                scan_inputs(scan)
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning(
+                    f"Skipping shadow decisions for scan {scan.get('scan_id')}: {e}"
+                )
+                continue
+            usable.append(scan)
+        scans = usable
+
+        if not scans:
+            return 0
+
+        try:
+            matrix = self._decision_matrix(base_parameters)
+            records = matrix.records(scans, matrix.evaluate(scans))
+            self.batch.extend(records)
+            await self.flush()
+            return len(records)
+
+        except Exception as e:
+            logger.error(f"Error logging shadow decisions for {len(scans)} scans: {e}")
+            return 0
+
+    def _decision_matrix(self, base_parameters: Dict):
+        """Compiled variations for these base parameters (cached)"""
+        from src.analysis.shadow_decision_matrix import DecisionMatrix
+
+        key = json.dumps(base_parameters, sort_keys=True, default=str)
+        matrix = self._matrices.get(key)
+        if matrix is None:
+            if len(self._matrices) >= 32:
+                self._matrices.clear()
+            matrix = DecisionMatrix(self, self.active_variations, base_parameters)
+            self._matrices[key] = matrix
+        return matrix
+
     async def _evaluate_variation(
         self,
         variation: Dict,
@@ -297,6 +306,55 @@ class ShadowLogger:
     ) -> ShadowDecision:
         """Evaluate a scenario variation"""
 
+        params = self._scenario_parameters(
+            variation_name=variation_name,
+            scenario_params=scenario_params,
+            base_parameters=base_parameters,
+            features=features,
+            strategy_name=strategy_name,
+        )
+
+        # Calculate decision with scenario parameters
+        confidence_threshold = params.get("confidence_threshold", 0.60)
+        would_take = ml_confidence >= confidence_threshold
+
+        # Calculate position size
+        base_size = base_parameters.get("position_size", 100)
+        size_mult = params.get("position_size_multiplier", 1.0)
+        position_size = base_size * size_mult
+
+        # Calculate targets
+        tp_mult = params.get("take_profit_multiplier", 1.0)
+        take_profit = ml_predictions.get("take_profit_pct", 10.0) * tp_mult
+
+        stop_loss = params.get("stop_loss_percent", 0.05) * 100  # Convert to percentage
+        if params.get("use_ml_predictions_raw"):
+            stop_loss = ml_predictions.get("stop_loss_pct", 5.0)
+
+        return ShadowDecision(
+            variation_name=variation_name,
+            would_take_trade=would_take,
+            shadow_confidence=ml_confidence,
+            shadow_position_size=position_size,
+            shadow_entry_price=current_price,
+            shadow_take_profit=take_profit,
+            shadow_stop_loss=stop_loss,
+            shadow_hold_hours=params.get(
+                "max_hold_hours", ml_predictions.get("hold_hours", 24)
+            ),
+            parameters_used=params,
+        )
+
+    def _scenario_parameters(
+        self,
+        variation_name: str,
+        scenario_params: Dict,
+        base_parameters: Dict,
+        features: Dict,
+        strategy_name: str,
+    ) -> Dict:
+        """Merge a scenario variation's parameters with the base parameters"""
+
         # Merge scenario parameters with base
         params = base_parameters.copy()
 
@@ -353,40 +411,11 @@ class ShadowLogger:
         # Apply scenario parameters
         params.update(scenario_params)
 
-        # Calculate decision with scenario parameters
-        confidence_threshold = params.get("confidence_threshold", 0.60)
-        would_take = ml_confidence >= confidence_threshold
-
-        # Calculate position size
-        base_size = base_parameters.get("position_size", 100)
-        size_mult = params.get("position_size_multiplier", 1.0)
-        position_size = base_size * size_mult
-
-        # Calculate targets
-        tp_mult = params.get("take_profit_multiplier", 1.0)
-        take_profit = ml_predictions.get("take_profit_pct", 10.0) * tp_mult
-
-        stop_loss = params.get("stop_loss_percent", 0.05) * 100  # Convert to percentage
-        if params.get("use_ml_predictions_raw"):
-            stop_loss = ml_predictions.get("stop_loss_pct", 5.0)
-
         # Handle strategy-specific parameters
         if strategy_name == "DCA" and "dca_drop_threshold" in params:
             params["entry_threshold"] = params["dca_drop_threshold"]
 
-        return ShadowDecision(
-            variation_name=variation_name,
-            would_take_trade=would_take,
-            shadow_confidence=ml_confidence,
-            shadow_position_size=position_size,
-            shadow_entry_price=current_price,
-            shadow_take_profit=take_profit,
-            shadow_stop_loss=stop_loss,
-            shadow_hold_hours=params.get(
-                "max_hold_hours", ml_predictions.get("hold_hours", 24)
-            ),
-            parameters_used=params,
-        )
+        return params
 
     def _evaluate_isolated_single(
         self,
@@ -402,22 +431,10 @@ class ShadowLogger:
         """
         Evaluate a single test value for an isolated parameter variation
         """
-        params = base_parameters.copy()
-
-        # Apply the test parameter
-        if test_parameter == "confidence_threshold":
-            params["confidence_threshold"] = test_value
-            would_take = ml_confidence >= test_value
-
-        elif test_parameter == "dca_drop_threshold":
-            params["dca_drop_threshold"] = test_value
-            # For DCA drops, we'd need the actual price drop calculation
-            # For now, using standard confidence check
-            would_take = ml_confidence >= base_parameters.get("min_confidence", 0.60)
-
-        else:
-            params[test_parameter] = test_value
-            would_take = ml_confidence >= base_parameters.get("min_confidence", 0.60)
+        params, confidence_threshold = self._isolated_parameters(
+            test_parameter, test_value, base_parameters
+        )
+        would_take = ml_confidence >= confidence_threshold
 
         return ShadowDecision(
             variation_name=f"{variation_name}_{test_value}",
@@ -431,6 +448,20 @@ class ShadowLogger:
             parameters_used=params,
         )
 
+    def _isolated_parameters(
+        self, test_parameter: str, test_value: float, base_parameters: Dict
+    ) -> Tuple[Dict, float]:
+        """Apply one isolated test value; returns (params, confidence threshold)"""
+        params = base_parameters.copy()
+        params[test_parameter] = test_value
+
+        if test_parameter == "confidence_threshold":
+            return params, test_value
+
+        # For DCA drops, we'd need the actual price drop calculation
+        # For now, using standard confidence check
+        return params, base_parameters.get("min_confidence", 0.60)
+
     def _evaluate_isolated(
         self,
         variation_name: str,
@@ -531,15 +562,14 @@ class ShadowLogger:
             return
 
         try:
-            result = (
-                self.supabase.client.table("shadow_variations")
-                .insert(self.batch)
-                .execute()
+            # Hand off to the write-behind queue so scans never wait on the insert
+            get_write_behind_queue(self.supabase).enqueue(
+                "shadow_variations", self.batch
             )
-            logger.debug(f"Flushed {len(self.batch)} shadow variations to database")
-            self.batch = []
+            logger.debug(f"Queued {len(self.batch)} shadow variations for database")
         except Exception as e:
             logger.error(f"Error flushing shadow variations: {e}")
+        finally:
             self.batch = []  # Clear anyway to prevent memory issues
 
     def get_shadow_consensus(self, decisions: List[ShadowDecision]) -> Dict:
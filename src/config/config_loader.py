@@ -716,6 +716,36 @@ class ConfigLoader:
             return []
 
 
+class StaticConfigLoader(ConfigLoader):
+    """ConfigLoader over a fixed configuration dict.
+
+    Not the shared singleton: it never reads the config file, never talks to
+    Supabase and never writes anywhere, so a run can use its own variant of
+    the config (backtests, parameter sweeps).
+    """
+
+    def __new__(cls, config: Dict[str, Any]):
+        return object.__new__(cls)
+
+    def __init__(self, config: Dict[str, Any]):
+        """Initialize with the configuration to serve.
+
+        Args:
+            config: Configuration dictionary (used as is, not copied)
+        """
+        self._config = config
+        self._config_path = None
+
+    def load(self, force_reload: bool = False) -> Dict[str, Any]:
+        """Return the fixed configuration."""
+        return self._config
+
+    def save(self, config: Dict[str, Any]) -> bool:
+        """Replace the configuration in memory only."""
+        self._config = config
+        return True
+
+
 # Convenience functions for backward compatibility
 def load_config(config_path: Optional[str] = None) -> Dict[str, Any]:
     """Load configuration (backward compatible function).
@@ -53,6 +53,10 @@ class Settings(BaseSettings):
     db_flush_interval: float = Field(5.0, env="DB_FLUSH_INTERVAL")
     price_change_threshold: float = Field(0.0001, env="PRICE_CHANGE_THRESHOLD")
 
+    # Local OHLC store (on-disk cache in front of ohlc_data)
+    ohlc_store_enabled: bool = Field(True, env="OHLC_STORE_ENABLED")
+    ohlc_store_max_rows: int = Field(20000, env="OHLC_STORE_MAX_ROWS")
+
     # Database Performance
     db_pool_min_size: int = Field(5, env="DB_POOL_MIN_SIZE")
     db_pool_max_size: int = Field(20, env="DB_POOL_MAX_SIZE")
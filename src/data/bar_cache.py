@@ -0,0 +1,198 @@
+"""
+In-memory ring buffers of recent OHLC bars.
+Lets the fetchers remember what they've already seen so each scan only asks
+the database for bars newer than the last one.
+"""
+
+import time
+import threading
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from src.data.ohlc_store import OHLC_DTYPE, TIMEFRAME_SECONDS
+
+
+class BarRingBuffer:
+    """
+    Fixed-capacity ring buffer of bars for one symbol/timeframe.
+
+    Bars are kept as a structured NumPy array (one column per OHLCV field)
+    ordered by timestamp. Once full, new bars overwrite the oldest ones.
+    """
+
+    def __init__(self, capacity: int, interval_seconds: int):
+        """
+        Initialize the buffer.
+
+        Args:
+            capacity: Maximum number of bars held
+            interval_seconds: Bar interval, used for gap detection
+        """
+        self.capacity = capacity
+        self.interval = interval_seconds
+        self.bars = np.zeros(capacity, dtype=OHLC_DTYPE)
+        self.head = 0  # Index of the oldest bar
+        self.size = 0
+
+        # Earliest time the buffer holds completely (epoch seconds)
+        self.covered_from: Optional[int] = None
+        self.last_reload = 0.0
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        """Timestamp of the newest bar (epoch seconds)."""
+        if self.size == 0:
+            return None
+        return int(self.bars["timestamp"][(self.head + self.size - 1) % self.capacity])
+
+    def covers(self, since: int) -> bool:
+        """Check whether every bar from `since` onwards is in the buffer."""
+        if self.covered_from is None or self.size == 0:
+            return False
+        return self.covered_from <= since <= self.last_timestamp
+
+    def load(self, bars: np.ndarray, covered_from: int):
+        """Replace the buffer contents with a freshly loaded window."""
+        if len(bars) > self.capacity:
+            bars = bars[-self.capacity :]
+            covered_from = max(covered_from, int(bars["timestamp"][0]))
+
+        self.bars[: len(bars)] = bars
+        self.head = 0
+        self.size = len(bars)
+        self.covered_from = covered_from
+        self.last_reload = time.time()
+
+    def has_gap(self, bars: np.ndarray, tolerance_bars: int = 0) -> bool:
+        """
+        Check whether new bars leave a hole after the newest buffered bar.
+
+        Args:
+            bars: Sorted bars about to be appended
+            tolerance_bars: Number of missing bars tolerated
+
+        Returns:
+            True if bars are missing between the buffer and the new bars
+        """
+        last = self.last_timestamp
+        if last is None or len(bars) == 0:
+            return False
+        return int(bars["timestamp"][0]) - last > self.interval * (tolerance_bars + 1)
+
+    def append(self, bars: np.ndarray) -> int:
+        """
+        Append bars newer than the newest buffered bar.
+
+        Args:
+            bars: Sorted structured array of bars
+
+        Returns:
+            Number of bars appended
+        """
+        last = self.last_timestamp
+        if last is not None:
+            bars = bars[bars["timestamp"] > last]
+        if len(bars) == 0:
+            return 0
+
+        if len(bars) >= self.capacity:
+            last_reload = self.last_reload
+            self.load(bars, int(bars["timestamp"][-self.capacity]))
+            self.last_reload = last_reload
+            return self.capacity
+
+        tail = (self.head + self.size) % self.capacity
+        first = min(len(bars), self.capacity - tail)
+        self.bars[tail : tail + first] = bars[:first]
+        self.bars[: len(bars) - first] = bars[first:]
+
+        overflow = self.size + len(bars) - self.capacity
+        if overflow > 0:
+            self.head = (self.head + overflow) % self.capacity
+            self.size = self.capacity
+            self.covered_from = max(
+                self.covered_from or 0, int(self.bars["timestamp"][self.head])
+            )
+        else:
+            self.size += len(bars)
+
+        return len(bars)
+
+    def view(self, since: Optional[int] = None) -> np.ndarray:
+        """
+        Get buffered bars in timestamp order.
+
+        Args:
+            since: Only return bars at or after this epoch time
+
+        Returns:
+            Structured array (a copy)
+        """
+        end = self.head + self.size
+        if end <= self.capacity:
+            ordered = self.bars[self.head : end]
+        else:
+            ordered = np.concatenate(
+                [self.bars[self.head :], self.bars[: end - self.capacity]]
+            )
+
+        if since is not None:
+            ordered = ordered[ordered["timestamp"].searchsorted(since) :]
+        return np.array(ordered)
+
+
+class BarCache:
+    """Ring buffers for every symbol/timeframe a fetcher has seen."""
+
+    def __init__(self, default_capacity: int = 2880, gap_reload_cooldown: int = 900):
+        """
+        Initialize the cache.
+
+        Args:
+            default_capacity: Bars per buffer (2880 = 48h of 1m bars)
+            gap_reload_cooldown: Seconds before the same buffer may be
+                reloaded again because of a gap (illiquid symbols have
+                genuine missing bars)
+        """
+        self.default_capacity = default_capacity
+        self.gap_reload_cooldown = gap_reload_cooldown
+        self._buffers: Dict[Tuple[str, str], BarRingBuffer] = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str, timeframe: str) -> Optional[BarRingBuffer]:
+        """Get the buffer for a symbol/timeframe if one exists."""
+        return self._buffers.get((symbol, timeframe))
+
+    def covering(
+        self, symbol: str, timeframe: str, since: int
+    ) -> Optional[BarRingBuffer]:
+        """Get the buffer for a symbol/timeframe if it covers `since`."""
+        buffer = self._buffers.get((symbol, timeframe))
+        if buffer is not None and buffer.covers(since):
+            return buffer
+        return None
+
+    def load(
+        self, symbol: str, timeframe: str, bars: np.ndarray, covered_from: int
+    ) -> BarRingBuffer:
+        """Create or replace the buffer for a symbol/timeframe."""
+        interval = TIMEFRAME_SECONDS.get(timeframe, 60)
+        capacity = max(self.default_capacity, len(bars) * 2)
+
+        with self._lock:
+            buffer = self._buffers.get((symbol, timeframe))
+            if buffer is None or buffer.capacity < capacity:
+                buffer = BarRingBuffer(capacity, interval)
+                self._buffers[(symbol, timeframe)] = buffer
+            buffer.load(bars, covered_from)
+            return buffer
+
+    def can_reload(self, buffer: BarRingBuffer) -> bool:
+        """Check whether a gap may trigger a reload of this buffer."""
+        return time.time() - buffer.last_reload >= self.gap_reload_cooldown
+
+    def clear(self):
+        """Drop all buffers."""
+        with self._lock:
+            self._buffers.clear()
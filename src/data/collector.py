@@ -6,11 +6,12 @@ Manages Polygon WebSocket connection and saves data to Supabase.
 import asyncio
 import time
 from datetime import datetime, timezone
-from typing import Dict
+from typing import Callable, Dict, List
 from loguru import logger
 from collections import defaultdict, deque
 
 from src.config import get_settings
+from src.data.latest_prices import get_latest_price_service
 from src.data.polygon_client import PolygonWebSocketClient
 from src.data.supabase_client import SupabaseClient
 from src.utils.retry import with_retry, RetryPolicy
@@ -41,16 +42,38 @@ class DataCollector:
         self.last_prices = {}  # symbol -> (price, timestamp)
         self.price_change_threshold = self.settings.price_change_threshold
 
+        # Called with (symbol, price, timestamp) on every tick, e.g. by the
+        # latest-price service below
+        self.price_listeners: List[Callable] = []
+
+        # Every tick also refreshes the process-wide latest-price service
+        self.price_service = get_latest_price_service(self.db_client).attach(self)
+
         # Stats
         self.stats = defaultdict(int)
         self.start_time = None
 
+    def add_price_listener(self, callback: Callable):
+        """
+        Register a callback for every price update.
+
+        Callbacks run on the WebSocket thread and must be quick; async
+        consumers should hand off with loop.call_soon_threadsafe.
+        """
+        self.price_listeners.append(callback)
+
     def _on_price_update(self, data: Dict):
         """Handle incoming price updates from Polygon."""
         symbol = data["symbol"]
         price = data["price"]
         timestamp = data["timestamp"]
 
+        for listener in self.price_listeners:
+            try:
+                listener(symbol, price, timestamp)
+            except Exception as e:
+                logger.error(f"Price listener failed for {symbol}: {e}")
+
         # Check if price changed significantly
         if self._should_store_price(symbol, price, timestamp):
             # Add to buffer (deque automatically handles overflow)
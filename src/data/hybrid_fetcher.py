@@ -3,12 +3,21 @@ Hybrid data fetcher that uses materialized views for recent data.
 This provides massive performance improvements by avoiding the unindexed main table.
 """
 
-from typing import List, Dict, Optional
+import asyncio
+from typing import List, Dict, Optional, Set, Tuple, Union
 from datetime import datetime, timedelta
 from loguru import logger
 
 from src.config.settings import get_settings
 from src.data.supabase_client import SupabaseClient
+from src.data.ohlc_store import (
+    get_ohlc_store,
+    to_epoch,
+    from_epoch,
+    records_to_array,
+    array_to_records,
+)
+from src.data.bar_cache import BarCache, BarRingBuffer
 
 
 class HybridDataFetcher:
@@ -32,6 +41,19 @@ class HybridDataFetcher:
         self.price_cache = {}
         self.cache_ttl = 5  # seconds
 
+        # Local columnar store - recent bars are read from disk and only the
+        # newest bars are fetched from Supabase
+        self.store = get_ohlc_store() if self.settings.ohlc_store_enabled else None
+        self.page_size = 1000  # PostgREST default max rows per request
+
+        # In-memory ring buffers - scans only query bars newer than the last seen
+        self.bar_cache = BarCache()
+
+        # Batched multi-symbol fetches
+        self.batch_chunk_size = 50  # Symbols per in_() query when topping up
+        self.full_load_chunk_size = 5  # Symbols per in_() query for full windows
+        self.max_concurrent_queries = 4  # Chunk queries in flight at once
+
     def _select_table(self, start_date: datetime) -> str:
         """
         Select the optimal table based on date range.
@@ -133,22 +155,284 @@ class HybridDataFetcher:
             # Commented to reduce Railway log spam (hits 500 logs/sec limit with 90 symbols)
             # logger.debug(f"Fetching {symbol} from {table} (last {hours} hours)")
 
-            result = (
-                self.db.client.table(table)
-                .select("*")
-                .eq("symbol", symbol)
-                .eq("timeframe", timeframe)
-                .gte("timestamp", cutoff.isoformat())
-                .order("timestamp", desc=False)
-                .execute()
+            buffer = self._warm_buffer(symbol, timeframe, cutoff)
+
+            if buffer is not None:
+                try:
+                    newer = self._fetch_bars(
+                        table,
+                        symbol,
+                        timeframe,
+                        from_epoch(buffer.last_timestamp),
+                        inclusive=False,
+                    )
+                except Exception as e:
+                    # Serve what we have locally rather than nothing
+                    logger.warning(
+                        f"Using cached bars for {symbol}, top-up failed: {e}"
+                    )
+                    newer = []
+
+                if not self._apply_top_up(symbol, timeframe, buffer, newer):
+                    buffer = None
+
+            if buffer is None:
+                rows = self._fetch_bars(table, symbol, timeframe, cutoff)
+                buffer = self._load_window(symbol, timeframe, rows, cutoff)
+
+            return array_to_records(
+                buffer.view(since=to_epoch(cutoff)), symbol, timeframe
             )
 
-            return result.data
-
         except Exception as e:
             logger.error(f"Error fetching recent data for {symbol}: {e}")
             return []
 
+    async def get_recent_data_batch(
+        self, symbols: List[str], hours: int = 24, timeframe: str = "15m"
+    ) -> Dict[str, List[Dict]]:
+        """
+        Get recent data for many symbols with a handful of batched queries.
+
+        Symbols are grouped into in_() filtered queries which run on a bounded
+        pool of executor threads, so a scan costs a few round trips instead of
+        one per symbol.
+
+        Args:
+            symbols: Trading symbols
+            hours: Number of hours to look back
+            timeframe: Timeframe to query
+
+        Returns:
+            Dictionary mapping each symbol to its list of OHLC records
+        """
+        cutoff = datetime.utcnow() - timedelta(hours=hours)
+        table = self._select_table(cutoff)
+
+        # Symbols with a warm buffer only need bars after their last one
+        buffers = {}
+        full_load = []
+        for symbol in symbols:
+            try:
+                buffer = self._warm_buffer(symbol, timeframe, cutoff)
+            except Exception as e:
+                logger.warning(f"Could not read cached bars for {symbol}: {e}")
+                buffer = None
+            if buffer is not None:
+                buffers[symbol] = buffer
+            else:
+                full_load.append(symbol)
+
+        jobs = []
+        top_up_symbols = list(buffers)
+        for i in range(0, len(top_up_symbols), self.batch_chunk_size):
+            chunk = top_up_symbols[i : i + self.batch_chunk_size]
+            since = from_epoch(min(buffers[s].last_timestamp for s in chunk))
+            jobs.append((chunk, since, False))
+        jobs.extend(self._full_load_jobs(full_load, cutoff))
+
+        rows_by_symbol, failed = await self._run_batches(table, timeframe, jobs)
+
+        reload = []
+        for symbol in symbols:
+            if symbol in failed:
+                continue
+            try:
+                if symbol in buffers:
+                    if not self._apply_top_up(
+                        symbol, timeframe, buffers[symbol], rows_by_symbol[symbol]
+                    ):
+                        reload.append(symbol)
+                else:
+                    self._load_window(symbol, timeframe, rows_by_symbol[symbol], cutoff)
+            except Exception as e:
+                logger.error(f"Error caching recent data for {symbol}: {e}")
+
+        # Buffers with missing bars get their whole window reloaded once
+        if reload:
+            reloaded, _ = await self._run_batches(
+                table, timeframe, self._full_load_jobs(reload, cutoff)
+            )
+            for symbol, rows in reloaded.items():
+                if symbol in reload and rows:
+                    self._load_window(symbol, timeframe, rows, cutoff)
+
+        data = {}
+        since = to_epoch(cutoff)
+        for symbol in symbols:
+            buffer = self.bar_cache.get(symbol, timeframe)
+            data[symbol] = (
+                array_to_records(buffer.view(since=since), symbol, timeframe)
+                if buffer is not None
+                else []
+            )
+
+        return data
+
+    def _full_load_jobs(self, symbols: List[str], cutoff: datetime) -> List[tuple]:
+        """Split symbols that need a whole window into in_() query jobs."""
+        return [
+            (symbols[i : i + self.full_load_chunk_size], cutoff, True)
+            for i in range(0, len(symbols), self.full_load_chunk_size)
+        ]
+
+    async def _run_batches(
+        self, table: str, timeframe: str, jobs: List[tuple]
+    ) -> Tuple[Dict[str, List[Dict]], Set[str]]:
+        """
+        Run (symbols, since, inclusive) query jobs on a bounded executor pool.
+
+        Returns:
+            Rows grouped by symbol, and the symbols whose query failed
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrent_queries)
+        loop = asyncio.get_event_loop()
+
+        async def run_job(chunk: List[str], since: datetime, inclusive: bool):
+            async with semaphore:
+                return await loop.run_in_executor(
+                    None,
+                    self._fetch_bars,
+                    table,
+                    chunk,
+                    timeframe,
+                    since,
+                    inclusive,
+                )
+
+        results = await asyncio.gather(
+            *(run_job(*job) for job in jobs), return_exceptions=True
+        )
+
+        rows_by_symbol = {symbol: [] for chunk, _, _ in jobs for symbol in chunk}
+        failed = set()
+        for (chunk, _, _), rows in zip(jobs, results):
+            if isinstance(rows, Exception):
+                logger.error(f"Error fetching batch of {len(chunk)} symbols: {rows}")
+                failed.update(chunk)
+                continue
+            for row in rows:
+                if row["symbol"] in rows_by_symbol:
+                    rows_by_symbol[row["symbol"]].append(row)
+
+        return rows_by_symbol, failed
+
+    def _warm_buffer(
+        self, symbol: str, timeframe: str, cutoff: datetime
+    ) -> Optional[BarRingBuffer]:
+        """
+        Get a ring buffer covering cutoff, loading it from the local store if
+        needed.
+
+        Returns:
+            The buffer, or None if the window has to be fetched in full
+        """
+        buffer = self.bar_cache.covering(symbol, timeframe, to_epoch(cutoff))
+        if buffer is not None or self.store is None:
+            return buffer
+
+        coverage = self.store.coverage(symbol, timeframe)
+        if coverage and coverage[0] <= cutoff <= coverage[1]:
+            bars = self.store.read(symbol, timeframe, start=cutoff)
+            return self.bar_cache.load(symbol, timeframe, bars, to_epoch(cutoff))
+
+        return None
+
+    def _load_window(
+        self, symbol: str, timeframe: str, rows: List[Dict], cutoff: datetime
+    ) -> BarRingBuffer:
+        """Replace a symbol's buffer with a fully fetched window."""
+        bars = records_to_array(rows)
+
+        if self.store is not None:
+            try:
+                self.store.write_array(symbol, timeframe, bars, start=cutoff)
+            except Exception as e:
+                logger.warning(f"Could not store bars for {symbol}: {e}")
+
+        return self.bar_cache.load(symbol, timeframe, bars, to_epoch(cutoff))
+
+    def _apply_top_up(
+        self,
+        symbol: str,
+        timeframe: str,
+        buffer: BarRingBuffer,
+        rows: List[Dict],
+    ) -> bool:
+        """
+        Append newly fetched bars to a symbol's buffer.
+
+        Returns:
+            False if bars are missing between the buffer and the new bars
+            (e.g. rows inserted late) and the window should be reloaded
+        """
+        last = buffer.last_timestamp
+        bars = records_to_array(rows)
+        bars = bars[bars["timestamp"] > last]
+
+        if buffer.has_gap(bars) and self.bar_cache.can_reload(buffer):
+            return False
+
+        buffer.append(bars)
+
+        if self.store is not None and len(bars):
+            try:
+                self.store.write_array(symbol, timeframe, bars, start=from_epoch(last))
+            except Exception as e:
+                logger.warning(f"Could not store bars for {symbol}: {e}")
+
+        return True
+
+    def _fetch_bars(
+        self,
+        table: str,
+        symbols: Union[str, List[str]],
+        timeframe: str,
+        since: datetime,
+        inclusive: bool = True,
+    ) -> List[Dict]:
+        """
+        Fetch all bars newer than a timestamp, paging past the row limit.
+
+        Args:
+            table: Table to query
+            symbols: Trading symbol, or list of symbols for an in_() query
+            timeframe: Timeframe to query
+            since: Lower timestamp bound
+            inclusive: Use >= (True) or > (False) for the bound
+
+        Returns:
+            List of OHLC records ordered by timestamp ascending
+        """
+        rows = []
+        offset = 0
+
+        while True:
+            query = self.db.client.table(table).select("*")
+            if isinstance(symbols, str):
+                query = query.eq("symbol", symbols)
+            else:
+                query = query.in_("symbol", symbols)
+            query = query.eq("timeframe", timeframe)
+
+            if inclusive:
+                query = query.gte("timestamp", since.isoformat())
+            else:
+                query = query.gt("timestamp", since.isoformat())
+
+            # Order on the full key so pages don't overlap
+            result = (
+                query.order("timestamp", desc=False)
+                .order("symbol", desc=False)
+                .range(offset, offset + self.page_size - 1)
+                .execute()
+            )
+
+            rows.extend(result.data)
+            if len(result.data) < self.page_size:
+                return rows
+            offset += self.page_size
+
     async def get_ml_features_data(self, symbol: str) -> Dict[str, List]:
         """
         Get data for ML feature calculation - uses ohlc_recent.
@@ -323,4 +607,7 @@ class HybridDataFetcher:
     def clear_cache(self):
         """Clear the price cache."""
         self.price_cache.clear()
+        self.bar_cache.clear()
+        if self.store is not None:
+            self.store.clear()
         logger.info("Cache cleared")
@@ -0,0 +1,361 @@
+"""
+Shared latest-price service.
+
+One in-process table of the newest price per symbol. It is fed by the
+DataCollector's tick stream (or any PolygonWebSocketClient callback), and
+symbols the stream hasn't covered recently are filled in from the database
+with a single batched query. Consumers call get(symbols) instead of issuing
+an "order by timestamp desc limit 1" query per symbol.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+DEFAULT_MAX_AGE = 120.0  # Seconds before a price counts as stale
+DEFAULT_FALLBACK_INTERVAL = 5.0  # Minimum seconds between DB lookups of a symbol
+DEFAULT_MISS_TTL = 300.0  # Seconds a symbol with no bar at all isn't re-queried
+
+
+@dataclass(frozen=True)
+class PriceQuote:
+    """Latest price of a symbol with its staleness"""
+
+    symbol: str
+    price: float
+    timestamp: datetime  # Tick or bar time (UTC)
+    source: str  # "stream" or "database"
+    age_seconds: float
+    stale: bool
+
+
+def _parse_timestamp(value: Any) -> Optional[datetime]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+class SupabasePriceSource:
+    """Batched latest closes from the ohlc_data table"""
+
+    def __init__(
+        self,
+        supabase_client,
+        table: str = "ohlc_data",
+        timeframe: Optional[str] = "1m",
+        window_minutes: int = 5,
+        wide_window_minutes: int = 24 * 60,
+        max_rows: int = 1000,
+        miss_ttl: float = DEFAULT_MISS_TTL,
+    ):
+        """
+        Args:
+            supabase_client: SupabaseClient (anything with a `.client`)
+            table: OHLC table to read closes from
+            timeframe: Timeframe filter (None: any timeframe)
+            window_minutes: How far back the multi-symbol query looks
+            wide_window_minutes: Window of a second multi-symbol query for
+                the symbols the first one missed; any still missing are
+                then queried singly
+            max_rows: Row cap of the multi-symbol queries
+            miss_ttl: Seconds to remember that a symbol has no bars at all,
+                instead of querying it singly on every lookup
+        """
+        self.supabase = supabase_client
+        self.table = table
+        self.timeframe = timeframe
+        self.window_minutes = window_minutes
+        self.wide_window_minutes = wide_window_minutes
+        self.max_rows = max_rows
+        self.miss_ttl = miss_ttl
+        self._misses: Dict[str, float] = {}  # symbol -> monotonic time
+
+    def _query(self):
+        query = self.supabase.client.table(self.table).select(
+            "symbol, close, timestamp"
+        )
+        if self.timeframe:
+            query = query.eq("timeframe", self.timeframe)
+        return query
+
+    def _latest(self, symbol: str) -> Optional[Tuple[float, Any]]:
+        result = (
+            self._query()
+            .eq("symbol", symbol)
+            .order("timestamp", desc=True)
+            .limit(1)
+            .execute()
+        )
+        if result.data and result.data[0].get("close") is not None:
+            row = result.data[0]
+            return float(row["close"]), row.get("timestamp")
+        return None
+
+    def _latest_batch(
+        self, symbols: List[str], minutes: int, prices: Dict[str, Tuple[float, Any]]
+    ):
+        """Newest close per symbol within the last `minutes`, into prices"""
+        since = datetime.now(timezone.utc) - timedelta(minutes=minutes)
+        result = (
+            self._query()
+            .in_("symbol", symbols)
+            .gte("timestamp", since.isoformat())
+            .order("timestamp", desc=True)
+            .limit(self.max_rows)
+            .execute()
+        )
+        for row in result.data or []:  # Newest first
+            if row["symbol"] not in prices and row.get("close") is not None:
+                prices[row["symbol"]] = (float(row["close"]), row.get("timestamp"))
+
+    def __call__(self, symbols: List[str]) -> Dict[str, Tuple[float, Any]]:
+        """symbols -> {symbol: (close, timestamp)} for the symbols found"""
+        prices = {}
+        if len(symbols) > 1:
+            self._latest_batch(symbols, self.window_minutes, prices)
+            quiet = [s for s in symbols if s not in prices]
+            if len(quiet) > 1:
+                self._latest_batch(quiet, self.wide_window_minutes, prices)
+
+        # Symbols without a bar in either window (or a lone symbol), unless
+        # they recently turned out to have none at all
+        clock = time.monotonic()
+        for symbol in symbols:
+            if symbol in prices:
+                continue
+            if clock - self._misses.get(symbol, -float("inf")) < self.miss_ttl:
+                continue
+            latest = self._latest(symbol)
+            if latest is not None:
+                prices[symbol] = latest
+                self._misses.pop(symbol, None)
+            else:
+                self._misses[symbol] = clock
+        return prices
+
+
+class LatestPriceService:
+    """
+    Newest price per symbol from the tick stream, with a database fallback
+
+    Every consumer in the process shares one service (see
+    get_latest_price_service). Stream ticks replace a symbol's price as
+    they arrive. get() returns quotes for the requested symbols; those that
+    are missing or older than max_age are looked up in one batched query,
+    at most once per fallback_interval per symbol, so many consumers asking
+    for the same stale symbol cost one round trip.
+    """
+
+    def __init__(
+        self,
+        fallback: Optional[Callable[[List[str]], Dict[str, Tuple[float, Any]]]] = None,
+        max_age: float = DEFAULT_MAX_AGE,
+        fallback_interval: float = DEFAULT_FALLBACK_INTERVAL,
+    ):
+        """
+        Initialize the service.
+
+        Args:
+            fallback: symbols -> {symbol: (price, timestamp)}, e.g. a
+                SupabasePriceSource (None: stream prices only)
+            max_age: Seconds before a price is stale and worth a lookup
+            fallback_interval: Minimum seconds between lookups of a symbol
+        """
+        self.fallback = fallback
+        self.max_age = max_age
+        self.fallback_interval = fallback_interval
+
+        self._lock = threading.Lock()
+        self._prices: Dict[str, Tuple[float, datetime, str]] = {}
+        self._looked_up: Dict[str, float] = {}  # symbol -> monotonic time
+        self._listeners: List[Callable[[str, float, datetime], None]] = []
+
+        # Metrics
+        self.stream_updates = 0
+        self.db_queries = 0
+        self.db_prices = 0
+        self.db_errors = 0
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------------
+    # Feeding
+    # ------------------------------------------------------------------
+
+    def update(
+        self,
+        symbol: str,
+        price: float,
+        timestamp: Optional[datetime] = None,
+        source: str = "stream",
+    ) -> bool:
+        """Record a price; older than the one held, it is ignored"""
+        if price is None:
+            return False
+        timestamp = _parse_timestamp(timestamp) or datetime.now(timezone.utc)
+        with self._lock:
+            current = self._prices.get(symbol)
+            if current is not None and current[1] > timestamp:
+                return False
+            self._prices[symbol] = (float(price), timestamp, source)
+
+        for listener in self._listeners:
+            try:
+                listener(symbol, float(price), timestamp)
+            except Exception as e:
+                logger.error(f"Price listener failed for {symbol}: {e}")
+        return True
+
+    def add_listener(self, callback: Callable[[str, float, datetime], None]):
+        """
+        Call `callback(symbol, price, timestamp)` on every accepted price
+
+        Callbacks run on the updating thread (the WebSocket's, for stream
+        ticks) and must be quick; async consumers should hand off with
+        loop.call_soon_threadsafe.
+        """
+        self._listeners.append(callback)
+
+    def on_tick(self, symbol: str, price: float, timestamp: datetime):
+        """DataCollector price listener"""
+        if self.update(symbol, price, timestamp):
+            self.stream_updates += 1
+
+    def on_message(self, data: Dict[str, Any]):
+        """PolygonWebSocketClient on_message_callback"""
+        self.on_tick(data["symbol"], data["price"], data["timestamp"])
+
+    def attach(self, collector) -> "LatestPriceService":
+        """Subscribe to a DataCollector's tick stream"""
+        collector.add_price_listener(self.on_tick)
+        return self
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def _quote(
+        self, symbol: str, now: datetime, max_age: float
+    ) -> Optional[PriceQuote]:
+        entry = self._prices.get(symbol)
+        if entry is None:
+            return None
+        price, timestamp, source = entry
+        age = max(0.0, (now - timestamp).total_seconds())
+        return PriceQuote(symbol, price, timestamp, source, age, age > max_age)
+
+    def get(
+        self, symbols: Iterable[str], max_age: Optional[float] = None
+    ) -> Dict[str, PriceQuote]:
+        """
+        Quotes for the symbols that have a price
+
+        Missing and stale symbols are refreshed from the fallback first
+        (subject to fallback_interval); a stale quote is still returned,
+        flagged, when the lookup finds nothing newer.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        max_age = self.max_age if max_age is None else max_age
+        now = datetime.now(timezone.utc)
+
+        with self._lock:
+            quotes = {s: self._quote(s, now, max_age) for s in symbols}
+            wanted = [s for s, q in quotes.items() if q is None or q.stale]
+            self.hits += len(symbols) - len(wanted)
+            self.misses += len(wanted)
+
+            clock = time.monotonic()
+            lookup = [
+                s
+                for s in wanted
+                if clock - self._looked_up.get(s, -float("inf"))
+                >= self.fallback_interval
+            ]
+            for symbol in lookup:
+                self._looked_up[symbol] = clock
+
+        if lookup and self.fallback is not None:
+            self._lookup(lookup)
+            now = datetime.now(timezone.utc)
+            with self._lock:
+                for symbol in wanted:
+                    quotes[symbol] = self._quote(symbol, now, max_age)
+
+        return {s: q for s, q in quotes.items() if q is not None}
+
+    def _lookup(self, symbols: List[str]):
+        self.db_queries += 1
+        try:
+            found = self.fallback(symbols)
+        except Exception as e:
+            self.db_errors += 1
+            logger.error(f"Latest price lookup failed for {len(symbols)} symbols: {e}")
+            return
+        for symbol, (price, timestamp) in found.items():
+            if self.update(symbol, price, timestamp, source="database"):
+                self.db_prices += 1
+
+    def prices(
+        self, symbols: Iterable[str], max_age: Optional[float] = None
+    ) -> Dict[str, float]:
+        """get() reduced to {symbol: price}"""
+        return {s: q.price for s, q in self.get(symbols, max_age).items()}
+
+    def price(self, symbol: str, max_age: Optional[float] = None) -> Optional[float]:
+        """Latest price of one symbol, or None"""
+        quote = self.get([symbol], max_age).get(symbol)
+        return quote.price if quote else None
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Counters for monitoring"""
+        with self._lock:
+            symbols = len(self._prices)
+        return {
+            "symbols": symbols,
+            "stream_updates": self.stream_updates,
+            "db_queries": self.db_queries,
+            "db_prices": self.db_prices,
+            "db_errors": self.db_errors,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+_latest_price_service: Optional[LatestPriceService] = None
+_latest_price_lock = threading.Lock()
+
+
+def get_latest_price_service(supabase_client=None) -> LatestPriceService:
+    """
+    Process-wide latest-price service.
+
+    Args:
+        supabase_client: Client for the database fallback (a new
+            SupabaseClient is created if the service doesn't exist yet and
+            none is given)
+    """
+    global _latest_price_service
+
+    with _latest_price_lock:
+        if _latest_price_service is None:
+            if supabase_client is None:
+                from src.data.supabase_client import SupabaseClient
+
+                supabase_client = SupabaseClient()
+            _latest_price_service = LatestPriceService(
+                SupabasePriceSource(supabase_client)
+            )
+        return _latest_price_service
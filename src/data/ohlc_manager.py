@@ -10,8 +10,10 @@ import json
 from loguru import logger
 
 from src.config.settings import get_settings
+from src.data.latest_prices import get_latest_price_service
 from src.data.supabase_client import SupabaseClient
 from src.data.optimized_fetcher import OptimizedDataFetcher
+from src.data.ohlc_store import get_ohlc_store
 
 
 class OHLCDataManager:
@@ -39,6 +41,11 @@ class OHLCDataManager:
             "historical": 3600,
         }  # 5 minutes for recent data  # 1 hour for historical data
 
+        # Local columnar store shared with HybridDataFetcher
+        self.store = get_ohlc_store() if self.settings.ohlc_store_enabled else None
+        self.store_window = timedelta(hours=1)  # Only store ranges ending this recently
+        self.page_size = 1000  # PostgREST default max rows per request
+
     async def get_ohlc_data(
         self, symbol: str, timeframe: str, start_date: datetime, end_date: datetime
     ) -> List[Dict]:
@@ -102,14 +109,22 @@ class OHLCDataManager:
         Returns:
             List of OHLC records
         """
+        # Serve from the local store when it already covers the range
+        if self.store is not None:
+            stored = self._query_store(symbol, timeframe, start_date, end_date)
+            if stored is not None:
+                return stored
+
         # Check if we can use optimized fetcher for recent data
         days_ago = (datetime.utcnow() - start_date).days
 
         if days_ago <= 30:
             # Use optimized fetcher for recent data
-            return await self.optimized_fetcher.get_price_range(
+            data = await self.optimized_fetcher.get_price_range(
                 symbol, start_date, end_date, timeframe
             )
+            self._remember(symbol, timeframe, data, start_date, end_date)
+            return data
 
         # Fallback to standard query for older data
         result = (
@@ -123,8 +138,82 @@ class OHLCDataManager:
             .execute()
         )
 
+        self._remember(symbol, timeframe, result.data, start_date, end_date)
         return result.data
 
+    def _query_store(
+        self, symbol: str, timeframe: str, start_date: datetime, end_date: datetime
+    ) -> Optional[List[Dict]]:
+        """
+        Read a range from the local store, topping up bars newer than it holds.
+
+        Returns:
+            List of OHLC records, or None if the store doesn't cover start_date
+        """
+        coverage = self.store.coverage(symbol, timeframe)
+        if not coverage or coverage[0] > start_date:
+            return None
+
+        if end_date > coverage[1]:
+            try:
+                rows = self._fetch_range(symbol, timeframe, coverage[1], end_date)
+                self.store.write(
+                    symbol, timeframe, rows, start=coverage[1], end=end_date
+                )
+            except Exception as e:
+                logger.warning(f"Using stored bars for {symbol}, top-up failed: {e}")
+
+        return self.store.read_records(symbol, timeframe, start_date, end_date)
+
+    def _fetch_range(
+        self, symbol: str, timeframe: str, after: datetime, end_date: datetime
+    ) -> List[Dict]:
+        """
+        Fetch all main-table bars in (after, end_date], paging past the row limit.
+
+        Returns:
+            List of OHLC records ordered by timestamp ascending
+        """
+        rows = []
+        offset = 0
+
+        while True:
+            result = (
+                self.db.client.table("ohlc_data")
+                .select("*")
+                .eq("symbol", symbol)
+                .eq("timeframe", timeframe)
+                .gt("timestamp", after.isoformat())
+                .lte("timestamp", end_date.isoformat())
+                .order("timestamp")
+                .range(offset, offset + self.page_size - 1)
+                .execute()
+            )
+
+            rows.extend(result.data)
+            if len(result.data) < self.page_size:
+                return rows
+            offset += self.page_size
+
+    def _remember(
+        self,
+        symbol: str,
+        timeframe: str,
+        data: List[Dict],
+        start_date: datetime,
+        end_date: datetime,
+    ):
+        """Keep recent query results in the local store for the next call."""
+        if self.store is None or not data:
+            return
+        if end_date < datetime.utcnow() - self.store_window:
+            return
+
+        try:
+            self.store.write(symbol, timeframe, data, start=start_date, end=end_date)
+        except Exception as e:
+            logger.warning(f"Could not store OHLC data for {symbol}: {e}")
+
     async def query_archive(
         self, symbol: str, timeframe: str, start_date: datetime, end_date: datetime
     ) -> List[Dict]:
@@ -218,28 +307,14 @@ class OHLCDataManager:
             symbols: List of trading symbols
 
         Returns:
-            Dictionary mapping symbols to their latest prices
+            Dictionary mapping symbols to their latest prices (None if unknown)
         """
-        prices = {}
-
-        # Use optimized fetcher for recent prices
-        tasks = []
-        for symbol in symbols:
-            task = self.optimized_fetcher.get_latest_price(symbol, "1m")
-            tasks.append(task)
-
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-
-        for symbol, result in zip(symbols, results):
-            if isinstance(result, Exception):
-                logger.error(f"Failed to get price for {symbol}: {result}")
-                prices[symbol] = None
-            elif result:
-                prices[symbol] = result.get("close")
-            else:
-                prices[symbol] = None
-
-        return prices
+        # Shared service: streamed ticks, then one batched query for the rest.
+        # The lookup can block on the database, so keep it off the loop
+        found = await asyncio.to_thread(
+            get_latest_price_service(self.db).prices, symbols
+        )
+        return {symbol: found.get(symbol) for symbol in symbols}
 
     async def get_ml_training_data(
         self, symbol: str, days: int = 180
@@ -310,4 +385,6 @@ class OHLCDataManager:
         """Clear all cached data."""
         self.cache.clear()
         self.optimized_fetcher.clear_cache()
+        if self.store is not None:
+            self.store.clear()
         logger.info("All caches cleared")
@@ -0,0 +1,402 @@
+"""
+Local columnar OHLC store.
+Keeps recent bars on disk as memory-mapped NumPy segments (one per
+symbol/timeframe) so fetchers only have to ask Supabase for the newest bars.
+"""
+
+import os
+import threading
+from functools import lru_cache
+from typing import List, Dict, Optional, Tuple, Any
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from src.config.settings import get_settings
+
+
+# One row per bar. Timestamps are UTC epoch seconds.
+OHLC_DTYPE = np.dtype(
+    [
+        ("timestamp", "<i8"),
+        ("open", "<f8"),
+        ("high", "<f8"),
+        ("low", "<f8"),
+        ("close", "<f8"),
+        ("volume", "<f8"),
+        ("vwap", "<f8"),
+        ("trades", "<f8"),
+    ]
+)
+
+PRICE_FIELDS = ("open", "high", "low", "close", "volume", "vwap", "trades")
+
+TIMEFRAME_SECONDS = {
+    "1m": 60,
+    "5m": 300,
+    "15m": 900,
+    "30m": 1800,
+    "1h": 3600,
+    "4h": 14400,
+    "1d": 86400,
+}
+
+
+def to_epoch(value: Any) -> int:
+    """Convert a datetime or ISO string to UTC epoch seconds (naive = UTC)."""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
+def from_epoch(value: int) -> datetime:
+    """Convert UTC epoch seconds to a naive UTC datetime (matches utcnow())."""
+    return datetime.fromtimestamp(int(value), tz=timezone.utc).replace(tzinfo=None)
+
+
+def records_to_array(records: List[Dict]) -> np.ndarray:
+    """
+    Convert Supabase OHLC rows into a sorted, de-duplicated structured array.
+
+    Args:
+        records: List of OHLC dicts (timestamp as ISO string or datetime)
+
+    Returns:
+        Structured array with OHLC_DTYPE
+    """
+    if not records:
+        return np.empty(0, dtype=OHLC_DTYPE)
+
+    arr = np.empty(len(records), dtype=OHLC_DTYPE)
+    timestamps = pd.to_datetime(
+        [r["timestamp"] for r in records], utc=True, format="ISO8601"
+    )
+    arr["timestamp"] = timestamps.asi8 // 1_000_000_000
+
+    for field in PRICE_FIELDS:
+        values = [r.get(field) for r in records]
+        arr[field] = np.array(
+            [np.nan if v is None else v for v in values], dtype=np.float64
+        )
+
+    # Keep the last occurrence of each timestamp, sorted ascending
+    arr = arr[::-1]
+    _, idx = np.unique(arr["timestamp"], return_index=True)
+    return arr[idx]
+
+
+def array_to_records(arr: np.ndarray, symbol: str, timeframe: str) -> List[Dict]:
+    """
+    Convert a structured OHLC array back into the row format Supabase returns.
+
+    Args:
+        arr: Structured array with OHLC_DTYPE
+        symbol: Trading symbol
+        timeframe: Timeframe of the bars
+
+    Returns:
+        List of OHLC dicts ordered by timestamp ascending
+    """
+    if len(arr) == 0:
+        return []
+
+    timestamps = np.char.add(
+        np.datetime_as_string(arr["timestamp"].astype("datetime64[s]"), unit="s"),
+        "+00:00",
+    ).tolist()
+
+    columns = {}
+    for field in PRICE_FIELDS:
+        values = arr[field]
+        if np.isnan(values).any():
+            columns[field] = [None if v != v else v for v in values.tolist()]
+        else:
+            columns[field] = values.tolist()
+
+    trades = [None if t is None else int(t) for t in columns["trades"]]
+
+    return [
+        {
+            "symbol": symbol,
+            "timeframe": timeframe,
+            "timestamp": ts,
+            "open": o,
+            "high": h,
+            "low": lo,
+            "close": c,
+            "volume": v,
+            "vwap": vw,
+            "trades": tr,
+        }
+        for ts, o, h, lo, c, v, vw, tr in zip(
+            timestamps,
+            columns["open"],
+            columns["high"],
+            columns["low"],
+            columns["close"],
+            columns["volume"],
+            columns["vwap"],
+            trades,
+        )
+    ]
+
+
+class OHLCStore:
+    """
+    On-disk columnar cache of OHLC bars.
+
+    Each symbol/timeframe is a flat binary file of OHLC_DTYPE rows sorted by
+    timestamp. Reads memory-map the file and slice by timestamp with
+    searchsorted; appends of newer bars are a single write to the end of the
+    file. The store tracks which time range it fully covers so callers know
+    when they can skip the database and only top up the newest bars.
+    """
+
+    def __init__(self, root: str, max_rows: int = 20000):
+        """
+        Initialize the store.
+
+        Args:
+            root: Directory holding the segment files
+            max_rows: Rows kept per symbol/timeframe (20000 = ~14 days of 1m)
+        """
+        self.root = root
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+
+        # (symbol, timeframe) -> (covered_from, covered_to) in epoch seconds
+        self._coverage: Dict[Tuple[str, str], Tuple[int, int]] = {}
+
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, symbol: str, timeframe: str) -> str:
+        """Get the segment file path for a symbol/timeframe."""
+        directory = os.path.join(self.root, timeframe)
+        os.makedirs(directory, exist_ok=True)
+        return os.path.join(directory, f"{symbol.replace('/', '_')}.bin")
+
+    def _load(self, symbol: str, timeframe: str) -> np.ndarray:
+        """Memory-map the segment for a symbol/timeframe (read-only)."""
+        path = self._path(symbol, timeframe)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=OHLC_DTYPE)
+
+        size = os.path.getsize(path)
+        rows = size // OHLC_DTYPE.itemsize
+        if size % OHLC_DTYPE.itemsize:
+            # Torn append from a crash - drop the partial row
+            logger.warning(f"Truncating partial row in OHLC segment {path}")
+            with open(path, "r+b") as f:
+                f.truncate(rows * OHLC_DTYPE.itemsize)
+
+        if rows == 0:
+            return np.empty(0, dtype=OHLC_DTYPE)
+
+        return np.memmap(path, dtype=OHLC_DTYPE, mode="r", shape=(rows,))
+
+    def _save(self, symbol: str, timeframe: str, arr: np.ndarray):
+        """Atomically replace the segment for a symbol/timeframe."""
+        path = self._path(symbol, timeframe)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(np.ascontiguousarray(arr, dtype=OHLC_DTYPE).tobytes())
+        os.replace(tmp_path, path)
+
+    def coverage(
+        self, symbol: str, timeframe: str
+    ) -> Optional[Tuple[datetime, datetime]]:
+        """
+        Get the time range the store holds completely for a symbol/timeframe.
+
+        Returns:
+            (covered_from, last_bar_time) as naive UTC datetimes, or None
+        """
+        key = (symbol, timeframe)
+        with self._lock:
+            if key not in self._coverage:
+                arr = self._load(symbol, timeframe)
+                if len(arr) == 0:
+                    return None
+                self._coverage[key] = (
+                    int(arr["timestamp"][0]),
+                    int(arr["timestamp"][-1]),
+                )
+            start, end = self._coverage[key]
+
+        return from_epoch(start), from_epoch(end)
+
+    def read(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> np.ndarray:
+        """
+        Read bars for a symbol/timeframe as a structured array.
+
+        Args:
+            symbol: Trading symbol
+            timeframe: Timeframe
+            start: Inclusive lower bound (optional)
+            end: Inclusive upper bound (optional)
+
+        Returns:
+            Structured array with OHLC_DTYPE (a copy, safe to keep)
+        """
+        with self._lock:
+            arr = self._load(symbol, timeframe)
+            if len(arr) == 0:
+                return arr
+
+            timestamps = arr["timestamp"]
+            lo = 0 if start is None else timestamps.searchsorted(to_epoch(start))
+            hi = (
+                len(arr)
+                if end is None
+                else timestamps.searchsorted(to_epoch(end), side="right")
+            )
+            return np.array(arr[lo:hi])
+
+    def read_records(
+        self,
+        symbol: str,
+        timeframe: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> List[Dict]:
+        """Read bars in the same dict format Supabase returns."""
+        return array_to_records(
+            self.read(symbol, timeframe, start, end), symbol, timeframe
+        )
+
+    def write(
+        self,
+        symbol: str,
+        timeframe: str,
+        records: List[Dict],
+        start: datetime,
+        end: Optional[datetime] = None,
+    ) -> int:
+        """
+        Store the result of a database query over [start, end].
+
+        If the queried range touches the range already covered, the rows are
+        merged (appended when they are all newer, which is the common top-up
+        case). Otherwise the segment is replaced so coverage stays contiguous.
+
+        Args:
+            symbol: Trading symbol
+            timeframe: Timeframe
+            records: Rows returned by the query
+            start: Lower bound of the query
+            end: Upper bound of the query (defaults to the last row)
+
+        Returns:
+            Number of rows now stored for this symbol/timeframe
+        """
+        return self.write_array(
+            symbol, timeframe, records_to_array(records), start, end
+        )
+
+    def write_array(
+        self,
+        symbol: str,
+        timeframe: str,
+        new: np.ndarray,
+        start: datetime,
+        end: Optional[datetime] = None,
+    ) -> int:
+        """Same as write() for bars already converted with records_to_array()."""
+        key = (symbol, timeframe)
+        query_start = to_epoch(start)
+        query_end = to_epoch(end) if end is not None else None
+        if len(new) and (query_end is None or query_end < new["timestamp"][-1]):
+            query_end = int(new["timestamp"][-1])
+
+        # Make sure coverage is initialized from disk
+        self.coverage(symbol, timeframe)
+
+        with self._lock:
+            existing = self._load(symbol, timeframe)
+            covered = self._coverage.get(key)
+
+            touches = (
+                covered is not None
+                and query_end is not None
+                and query_start <= covered[1]
+                and query_end >= covered[0]
+            )
+
+            if not touches:
+                if len(new) == 0:
+                    return len(existing)
+                merged = new
+                cov_start = query_start
+            elif len(new) == 0:
+                return len(existing)
+            elif new["timestamp"][0] > existing["timestamp"][-1]:
+                # Fast path: pure append of newer bars
+                with open(self._path(symbol, timeframe), "ab") as f:
+                    f.write(new.tobytes())
+                merged = None
+                cov_start = min(covered[0], query_start)
+            else:
+                combined = np.concatenate([np.array(existing), new])[::-1]
+                _, idx = np.unique(combined["timestamp"], return_index=True)
+                merged = combined[idx]
+                cov_start = min(covered[0], query_start)
+
+            rows = len(existing) + len(new) if merged is None else len(merged)
+
+            # Compact once the segment grows well past the retention limit
+            if rows > self.max_rows * 1.25 or (
+                merged is not None and rows > self.max_rows
+            ):
+                if merged is None:
+                    merged = np.array(self._load(symbol, timeframe))
+                merged = merged[-self.max_rows :]
+                cov_start = max(cov_start, int(merged["timestamp"][0]))
+                rows = len(merged)
+
+            if merged is not None:
+                self._save(symbol, timeframe, merged)
+
+            last = (
+                int(merged["timestamp"][-1])
+                if merged is not None
+                else int(new["timestamp"][-1])
+            )
+            self._coverage[key] = (cov_start, last)
+
+            return rows
+
+    def clear(self, symbol: Optional[str] = None, timeframe: Optional[str] = None):
+        """Delete stored segments (all, or one symbol/timeframe)."""
+        with self._lock:
+            if symbol and timeframe:
+                path = self._path(symbol, timeframe)
+                if os.path.exists(path):
+                    os.remove(path)
+                self._coverage.pop((symbol, timeframe), None)
+                return
+
+            for directory, _, files in os.walk(self.root):
+                for name in files:
+                    if name.endswith(".bin"):
+                        os.remove(os.path.join(directory, name))
+            self._coverage.clear()
+
+
+@lru_cache()
+def get_ohlc_store() -> OHLCStore:
+    """Get the shared OHLC store instance for this process."""
+    settings = get_settings()
+    return OHLCStore(
+        os.path.join(settings.data_dir, "ohlc_store"),
+        max_rows=settings.ohlc_store_max_rows,
+    )
@@ -0,0 +1,210 @@
+"""
+Append-only segmented journal for records awaiting a database write.
+
+Records are stored as length-prefixed, CRC-checked JSON frames in numbered
+segment files. Writers append to the open segment; a replayer seals it,
+reads sealed segments back in order, and acknowledges progress with a byte
+offset so a partially replayed segment resumes where it stopped instead of
+re-sending from the start. Fully acknowledged segments are deleted.
+"""
+
+import json
+import os
+import struct
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from loguru import logger
+
+# Frame header: payload length and CRC32, big-endian
+FRAME_HEADER = struct.Struct(">II")
+
+
+class SpillJournal:
+    """Durable FIFO of JSON records split into segment files."""
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        segment_max_bytes: int = 4 * 1024 * 1024,
+        fsync: bool = False,
+    ):
+        """
+        Open (or create) a journal.
+
+        A segment left open by a previous run is sealed, so everything
+        written before a restart is immediately replayable.
+
+        Args:
+            directory: Directory holding segment files
+            segment_max_bytes: Size at which the open segment is rotated
+            fsync: fsync after every append (otherwise only on seal)
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes
+        self.fsync = fsync
+
+        segments = self._segment_paths()
+        self.next_index = int(segments[-1].stem.split("-")[1]) + 1 if segments else 1
+        self._file = None
+        self._current: Optional[Path] = None
+        self._lock = threading.Lock()  # pending is updated from the replay thread
+
+        self.pending = sum(self._count(path) for path in segments)
+        if self.pending:
+            logger.info(
+                f"Journal {self.directory} has {self.pending} unsent records "
+                f"in {len(segments)} segments"
+            )
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def append(self, record: Dict[str, Any]):
+        """Append one record to the open segment."""
+        payload = json.dumps(record, default=str).encode()
+        if self._file is None:
+            self._open_segment()
+
+        self._file.write(FRAME_HEADER.pack(len(payload), zlib.crc32(payload)))
+        self._file.write(payload)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        with self._lock:
+            self.pending += 1
+
+        if self._file.tell() >= self.segment_max_bytes:
+            self.seal()
+
+    def seal(self):
+        """Close the open segment so it can be replayed."""
+        if self._file is None:
+            return
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        self._current = None
+
+    def close(self):
+        self.seal()
+
+    def _open_segment(self):
+        self._current = self.directory / f"segment-{self.next_index:08d}.log"
+        self.next_index += 1
+        self._file = open(self._current, "ab")
+
+    # ------------------------------------------------------------------
+    # Replay
+    # ------------------------------------------------------------------
+
+    def _segment_paths(self) -> List[Path]:
+        return sorted(self.directory.glob("segment-*.log"))
+
+    def sealed_segments(self) -> List[Path]:
+        """Segments ready for replay, oldest first."""
+        return [path for path in self._segment_paths() if path != self._current]
+
+    @staticmethod
+    def _ack_path(segment: Path) -> Path:
+        return segment.with_suffix(".ack")
+
+    def acked_offset(self, segment: Path) -> int:
+        """Byte offset up to which the segment has been written to the DB."""
+        try:
+            return int(self._ack_path(segment).read_text().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def read(
+        self, segment: Path, batch_size: int
+    ) -> Iterator[Tuple[List[Dict[str, Any]], int]]:
+        """
+        Yield unacknowledged records in batches.
+
+        Yields:
+            (records, end_offset) where end_offset is what to pass to ack()
+            once the batch has been written
+        """
+        batch: List[Dict[str, Any]] = []
+        offset = self.acked_offset(segment)
+
+        with open(segment, "rb") as f:
+            f.seek(offset)
+            for record, offset in self._frames(f, segment):
+                batch.append(record)
+                if len(batch) >= batch_size:
+                    yield batch, offset
+                    batch = []
+
+        if batch:
+            yield batch, offset
+
+    def ack(self, segment: Path, offset: int, count: int):
+        """Record that everything before `offset` has been written."""
+        tmp = self._ack_path(segment).with_suffix(".ack.tmp")
+        tmp.write_text(str(offset))
+        os.replace(tmp, self._ack_path(segment))
+        with self._lock:
+            self.pending = max(0, self.pending - count)
+
+    def remove(self, segment: Path):
+        """Delete a fully replayed segment and its checkpoint."""
+        segment.unlink(missing_ok=True)
+        self._ack_path(segment).unlink(missing_ok=True)
+
+    def replay(
+        self, write: Callable[[List[Dict[str, Any]]], Any], batch_size: int = 2000
+    ) -> int:
+        """
+        Write every sealed segment, oldest first, acknowledging each batch.
+
+        Stops at the first failed write and re-raises; the next replay
+        resumes from the last acknowledged batch.
+
+        Args:
+            write: Called with each batch; must raise if the write failed
+            batch_size: Records per write
+
+        Returns:
+            Number of records written
+        """
+        written = 0
+        for segment in self.sealed_segments():
+            for records, offset in self.read(segment, batch_size):
+                write(records)
+                self.ack(segment, offset, len(records))
+                written += len(records)
+            self.remove(segment)
+        return written
+
+    def _frames(self, f, segment: Path) -> Iterator[Tuple[Dict[str, Any], int]]:
+        """Decode frames, stopping at a torn or corrupt tail."""
+        while True:
+            header = f.read(FRAME_HEADER.size)
+            if len(header) < FRAME_HEADER.size:
+                return
+            length, crc = FRAME_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                logger.warning(f"Ignoring torn record at end of {segment.name}")
+                return
+            yield json.loads(payload), f.tell()
+
+    def _count(self, segment: Path) -> int:
+        """Count unacknowledged records without decoding payloads."""
+        count = 0
+        with open(segment, "rb") as f:
+            f.seek(self.acked_offset(segment))
+            while True:
+                header = f.read(FRAME_HEADER.size)
+                if len(header) < FRAME_HEADER.size:
+                    return count
+                length, _ = FRAME_HEADER.unpack(header)
+                if len(f.read(length)) < length:
+                    return count
+                count += 1
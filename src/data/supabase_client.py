@@ -3,13 +3,34 @@ Supabase client for database operations.
 Handles all database interactions for the crypto trading system.
 """
 
+import time
 from datetime import datetime, timezone
 from typing import List, Dict, Optional, Any
 from loguru import logger
+from postgrest.types import CountMethod, ReturnMethod
 from supabase import create_client, Client
 
 from src.config import get_settings
 
+# Conflict targets (primary keys) used by bulk_upsert
+UPSERT_CONFLICT_KEYS = {
+    "price_data": "symbol,timestamp",
+    "ml_features": "symbol,timestamp",
+    "ohlc_data": "symbol,timeframe,timestamp",
+}
+
+# Errors that mean the request was too large or slow, not that the data is bad
+GATEWAY_ERRORS = (
+    "502",
+    "503",
+    "504",
+    "Bad Gateway",
+    "Gateway Timeout",
+    "timed out",
+    "timeout",
+    "57014",  # Postgres statement timeout
+)
+
 
 class SupabaseClient:
     """Handles all Supabase database operations."""
@@ -20,82 +41,118 @@ class SupabaseClient:
         self.client: Client = create_client(
             self.settings.supabase_url, self.settings.supabase_key
         )
+
+        # Adaptive batch sizing for bulk_upsert (per table): halve on gateway
+        # errors, grow additively after each successful batch
+        self.upsert_batch_sizes: Dict[str, int] = {}
+        self.upsert_initial_batch = 1000
+        self.upsert_min_batch = 50
+        self.upsert_max_batch = 5000
+        self.upsert_max_retries = 5  # Failures at the minimum size before giving up
+        self.upsert_retry_delay = 0.5
+
         logger.info("Supabase client initialized")
 
-    def insert_price_data(self, data: List[Dict[str, Any]]) -> int:
-        """Insert price data into the database, skipping duplicates.
+    def bulk_upsert(
+        self,
+        table: str,
+        records: List[Dict[str, Any]],
+        on_conflict: Optional[str] = None,
+        ignore_duplicates: bool = True,
+    ) -> int:
+        """
+        Write records in batches with INSERT ... ON CONFLICT.
+
+        Never falls back to per-row inserts: duplicates are resolved by the
+        conflict clause, and gateway errors shrink the batch and retry it.
+
+        Args:
+            table: Table name
+            records: Rows to write
+            on_conflict: Comma-separated conflict columns (defaults to
+                UPSERT_CONFLICT_KEYS for the table)
+            ignore_duplicates: Skip rows that already exist (True) or
+                overwrite them (False)
 
         Returns:
-            Number of records successfully inserted
+            Number of rows written (existing rows skipped when ignoring duplicates)
         """
-        if not data:
+        if not records:
             return 0
 
-        # For large datasets, batch into smaller chunks to avoid 502 errors and timeouts
-        # Supabase has an 8-second timeout by default, so smaller batches are more reliable
-        BATCH_SIZE = 1000  # Conservative batch size to avoid timeouts
-        total_inserted = 0
+        on_conflict = on_conflict or UPSERT_CONFLICT_KEYS.get(table)
+        if not on_conflict:
+            raise ValueError(f"No conflict key configured for table {table}")
 
-        # Process data in chunks
-        for i in range(0, len(data), BATCH_SIZE):
-            chunk = data[i : i + BATCH_SIZE]
-            chunk_num = i // BATCH_SIZE + 1
-            total_chunks = (len(data) + BATCH_SIZE - 1) // BATCH_SIZE
+        # Postgres rejects a batch that hits the same key twice on update
+        keys = on_conflict.split(",")
+        records = list({tuple(r.get(k) for k in keys): r for r in records}.values())
 
-            if total_chunks > 1:
-                logger.debug(
-                    f"Processing batch {chunk_num}/{total_chunks} ({len(chunk)} records)"
-                )
+        written = 0
+        position = 0
+        failures = 0
+
+        while position < len(records):
+            size = self.upsert_batch_sizes.get(table, self.upsert_initial_batch)
+            chunk = records[position : position + size]
 
             try:
-                # Try batch insert for this chunk
-                _ = self.client.table("price_data").insert(chunk).execute()
-                logger.debug(f"Inserted batch {chunk_num}: {len(chunk)} price records")
-                total_inserted += len(chunk)
+                response = (
+                    self.client.table(table)
+                    .upsert(
+                        chunk,
+                        on_conflict=on_conflict,
+                        ignore_duplicates=ignore_duplicates,
+                        returning=ReturnMethod.minimal,
+                        count=CountMethod.exact,
+                    )
+                    .execute()
+                )
             except Exception as e:
-                # If batch fails due to duplicates or gateway errors, insert one by one
-                if (
-                    "duplicate key value" in str(e)
-                    or "502" in str(e)
-                    or "Bad Gateway" in str(e)
-                ):
-                    successful = 0
-                    failed = 0
-
-                    for record in chunk:
-                        try:
-                            # Try to insert individual record
-                            self.client.table("price_data").insert(record).execute()
-                            successful += 1
-                        except Exception as single_error:
-                            if "duplicate key value" in str(single_error):
-                                # This is expected for duplicates, just skip
-                                failed += 1
-                            else:
-                                # Log unexpected errors
-                                logger.warning(
-                                    f"Unexpected error inserting {record['symbol']}: {single_error}"
-                                )
-                                failed += 1
-
-                    if successful > 0:
-                        logger.debug(
-                            f"Batch {chunk_num}: Inserted {successful} new records, skipped {failed} duplicates"
-                        )
+                if not any(marker in str(e) for marker in GATEWAY_ERRORS):
+                    logger.error(
+                        f"Failed to upsert {len(chunk)} rows into {table}: {e}"
+                    )
+                    raise
 
-                    # Don't raise error for duplicates - this is normal operation
-                    if successful == 0 and failed == len(chunk):
-                        logger.debug(
-                            f"Batch {chunk_num}: All {failed} records were duplicates (this is normal)"
+                if size <= self.upsert_min_batch:
+                    failures += 1
+                    if failures > self.upsert_max_retries:
+                        logger.error(
+                            f"Giving up on {table} upsert after {failures} gateway errors: {e}"
                         )
+                        raise
+                    time.sleep(self.upsert_retry_delay * 2 ** (failures - 1))
 
-                    total_inserted += successful
-                else:
-                    # Re-raise if it's not a duplicate key error or gateway error
-                    logger.error(f"Failed to insert price data batch {chunk_num}: {e}")
-                    raise
+                self.upsert_batch_sizes[table] = max(self.upsert_min_batch, size // 2)
+                logger.warning(
+                    f"Gateway error upserting {len(chunk)} rows into {table}, "
+                    f"batch size now {self.upsert_batch_sizes[table]}: {e}"
+                )
+                continue
 
-        if len(data) > BATCH_SIZE:
+            failures = 0
+            position += len(chunk)
+            written += response.count if response.count is not None else len(chunk)
+            self.upsert_batch_sizes[table] = min(
+                self.upsert_max_batch, size + self.upsert_initial_batch // 4
+            )
+
+        return written
+
+    def insert_price_data(self, data: List[Dict[str, Any]]) -> int:
+        """Insert price data into the database, skipping duplicates.
+
+        Returns:
+            Number of records successfully inserted
+        """
+        if not data:
+            return 0
+
+        # Upsert with ON CONFLICT DO NOTHING so duplicates are skipped in bulk
+        total_inserted = self.bulk_upsert("price_data", data)
+
+        if len(data) > self.upsert_initial_batch:
             logger.info(
                 f"Total inserted across all batches: {total_inserted}/{len(data)} records"
             )
@@ -109,7 +166,9 @@ class SupabaseClient:
         value: float,
         details: Optional[Dict] = None,
     ) -> None:
-        """Save a health metric to the database."""
+        """Queue a health metric for the database (written in the background)."""
+        from src.data.write_behind import get_write_behind_queue
+
         try:
             data = {
                 "timestamp": datetime.now(timezone.utc).isoformat(),
@@ -120,7 +179,7 @@ class SupabaseClient:
                 "alert_sent": False,
             }
 
-            _ = self.client.table("health_metrics").insert(data).execute()
+            get_write_behind_queue(self).enqueue("health_metrics", data)
 
             # If critical, we might want to send an alert
             if status == "critical":
@@ -130,24 +189,15 @@ class SupabaseClient:
             logger.error(f"Failed to save health metric: {e}")
 
     def get_latest_prices(self, symbols: List[str], limit: int = 1) -> Dict[str, float]:
-        """Get latest prices for given symbols."""
-        try:
-            prices = {}
-
-            for symbol in symbols:
-                response = (
-                    self.client.table("price_data")
-                    .select("price")
-                    .eq("symbol", symbol)
-                    .order("timestamp", desc=True)
-                    .limit(limit)
-                    .execute()
-                )
+        """Get latest prices for given symbols (`limit` is ignored).
 
-                if response.data:
-                    prices[symbol] = float(response.data[0]["price"])
+        Served by the shared latest-price service: streamed ticks, with one
+        batched ohlc_data query for symbols it has no fresh price for.
+        """
+        from src.data.latest_prices import get_latest_price_service
 
-            return prices
+        try:
+            return get_latest_price_service(self).prices(symbols)
 
         except Exception as e:
             logger.error(f"Failed to get latest prices: {e}")
@@ -176,40 +226,13 @@ class SupabaseClient:
             return []
 
     def save_ml_features(self, features: List[Dict[str, Any]]) -> None:
-        """Save calculated ML features to the database."""
+        """Save calculated ML features to the database, skipping duplicates."""
         try:
-            _ = self.client.table("ml_features").insert(features).execute()
-            logger.debug(f"Saved {len(features)} ML feature records")
+            saved = self.bulk_upsert("ml_features", features)
+            logger.debug(f"Saved {saved} ML feature records")
         except Exception as e:
-            # Handle duplicates like we do for price data
-            if "duplicate key value" in str(e):
-                successful = 0
-                failed = 0
-
-                for record in features:
-                    try:
-                        self.client.table("ml_features").insert(record).execute()
-                        successful += 1
-                    except Exception as single_error:
-                        if "duplicate key value" in str(single_error):
-                            failed += 1
-                        else:
-                            logger.warning(
-                                f"Unexpected error inserting feature for {record['symbol']}: {single_error}"
-                            )
-                            failed += 1
-
-                if successful > 0:
-                    logger.debug(
-                        f"Inserted {successful} new ML feature records, skipped {failed} duplicates"
-                    )
-                elif failed == len(features):
-                    logger.debug(
-                        f"All {failed} ML feature records were duplicates (this is normal)"
-                    )
-            else:
-                logger.error(f"Failed to save ML features: {e}")
-                raise
+            logger.error(f"Failed to save ML features: {e}")
+            raise
 
     def insert_ml_features(self, data: list):
         """Insert ML features into database (alias for save_ml_features)"""
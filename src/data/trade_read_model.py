@@ -0,0 +1,599 @@
+"""
+Read model of paper trades for the dashboards.
+
+A background thread folds new paper_trades rows into per-trade-group
+aggregates (BUYs averaged into one entry, the latest SELL as the exit) and
+keeps the portfolio totals and the open/closed orderings up to date as it
+goes. New rows are found by the table's server-assigned id rather than
+the client-set created_at, so rows inserted late (e.g. replayed from the
+write-behind spill) are picked up on the next refresh. The state is
+snapshotted to a local JSON file, so a restart only fetches rows written
+since the snapshot. Requests are served from memory:
+a page costs O(page size), with no database queries.
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+from loguru import logger
+
+from src.data.latest_prices import get_latest_price_service
+
+SNAPSHOT_VERSION = 2
+STARTING_CAPITAL = 10000.0  # Default starting capital for paper trading
+
+
+def parse_time(value: Any) -> Optional[datetime]:
+    """created_at as an aware datetime (naive values are UTC)"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def format_hold_time(delta: timedelta) -> str:
+    seconds = delta.total_seconds()
+    return f"{int(seconds / 3600)}h {int((seconds % 3600) / 60)}m"
+
+
+@dataclass
+class TradeGroup:
+    """Aggregate of the BUY and SELL rows sharing a trade_group_id"""
+
+    group_id: str
+    symbol: str
+    strategy: str
+    buys: int = 0
+    total_cost: float = 0.0
+    total_amount: float = 0.0
+    # Earliest BUY: entry time and the SL/TP/trailing stop shown while open
+    entry_time: Optional[str] = None
+    entry_ts: float = 0.0
+    stop_loss: Any = None
+    take_profit: Any = None
+    trailing_stop_pct: Any = None
+    # Latest SELL
+    exit_price: Optional[float] = None
+    exit_time: Optional[str] = None
+    exit_ts: float = 0.0
+    exit_reason: Optional[str] = None
+    last_activity: float = 0.0
+
+    @property
+    def is_closed(self) -> bool:
+        return self.exit_time is not None
+
+    @property
+    def avg_entry_price(self) -> float:
+        return self.total_cost / self.total_amount if self.total_amount > 0 else 0
+
+    @property
+    def realized_pnl(self) -> float:
+        return (self.exit_price - self.avg_entry_price) * self.total_amount
+
+    def fold(self, row: Dict[str, Any], ts: float):
+        """Add one BUY or SELL row"""
+        self.last_activity = max(self.last_activity, ts)
+        if row.get("side") == "BUY":
+            price = float(row.get("price", 0) or 0)
+            amount = float(row.get("amount", 0) or 0)
+            self.buys += 1
+            self.total_cost += price * amount
+            self.total_amount += amount
+            if self.entry_time is None or ts < self.entry_ts:
+                self.entry_time = row["created_at"]
+                self.entry_ts = ts
+                self.stop_loss = row.get("stop_loss")
+                self.take_profit = row.get("take_profit")
+                self.trailing_stop_pct = row.get("trailing_stop_pct")
+        elif self.exit_time is None or ts >= self.exit_ts:
+            self.exit_price = float(row["price"])
+            self.exit_time = row["created_at"]
+            self.exit_ts = ts
+            self.exit_reason = row.get("exit_reason", "manual")
+
+    def closed_view(self) -> Dict[str, Any]:
+        """Row of the dashboard's closed trades table"""
+        entry = self.avg_entry_price
+        return {
+            "symbol": self.symbol,
+            "strategy": self.strategy,
+            "status": "closed",
+            "entry_price": entry,
+            "exit_price": self.exit_price,
+            "entry_time": self.entry_time,
+            "exit_time": self.exit_time,
+            "pnl": self.realized_pnl,
+            "pnl_pct": (self.exit_price - entry) / entry * 100 if entry > 0 else 0,
+            "hold_time": format_hold_time(
+                timedelta(seconds=self.exit_ts - self.entry_ts)
+            ),
+            "exit_reason": self.exit_reason,
+        }
+
+    def open_view(self, current_price: Optional[float], now: datetime) -> Dict:
+        """Row of the dashboard's open positions table"""
+        entry = self.avg_entry_price
+        if current_price:
+            unrealized_pnl = (current_price - entry) * self.total_amount
+            unrealized_pnl_pct = (current_price - entry) / entry * 100 if entry else 0
+        else:
+            unrealized_pnl = 0
+            unrealized_pnl_pct = 0
+
+        sl_display = tp_display = ts_display = None
+        if self.stop_loss:
+            sl_pnl = (float(self.stop_loss) - entry) / entry * 100
+            sl_display = f"{unrealized_pnl_pct:.1f}% / {sl_pnl:.1f}%"
+        if self.take_profit:
+            tp_pnl = (float(self.take_profit) - entry) / entry * 100
+            tp_display = f"{unrealized_pnl_pct:.1f}% / {tp_pnl:.1f}%"
+            if self.trailing_stop_pct:
+                ts_pct = float(self.trailing_stop_pct) * 100
+                if unrealized_pnl_pct >= tp_pnl:
+                    ts_display = f"🟢 Active: {unrealized_pnl_pct:.1f}% / -{ts_pct:.1f}%"
+                else:
+                    ts_display = f"⚪ Inactive (activates at TP: {tp_pnl:.1f}%)"
+
+        return {
+            "symbol": self.symbol,
+            "strategy": self.strategy,
+            "amount": self.total_amount,
+            "entry_price": entry,
+            "entry_time": self.entry_time,
+            "dca_status": "Single" if self.buys == 1 else f"DCA x{self.buys}",
+            "current_price": current_price,
+            "unrealized_pnl": unrealized_pnl,
+            "unrealized_pnl_pct": unrealized_pnl_pct,
+            "hold_time": format_hold_time(
+                now - datetime.fromtimestamp(self.entry_ts, tz=timezone.utc)
+            ),
+            "sl_display": sl_display,
+            "tp_display": tp_display,
+            "ts_display": ts_display,
+            "position_size": self.total_cost,
+            "exit_reason": "",  # Open positions don't have exit reason
+        }
+
+
+class SupabaseTradeSource:
+    """Where the read model gets paper_trades rows"""
+
+    def __init__(
+        self,
+        client,
+        table: str = "paper_trades",
+        schema: Optional[str] = None,
+        page_size: int = 1000,
+        id_column: str = "trade_id",
+    ):
+        """
+        Args:
+            client: Supabase client (SupabaseClient().client)
+            table: Trades table
+            schema: Schema of the trades table (None: the default schema)
+            page_size: Rows per request
+            id_column: Server-assigned, increasing row id
+        """
+        self.client = client
+        self.table = table
+        self.schema = schema
+        self.page_size = page_size
+        self.id_column = id_column
+
+    def _trades(self):
+        if self.schema:
+            return self.client.schema(self.schema).table(self.table)
+        return self.client.table(self.table)
+
+    def rows_after(self, last_id: Optional[int]) -> List[Dict[str, Any]]:
+        """Rows with an id above last_id (all rows when None), in id order"""
+        rows = []
+        while True:
+            query = self._trades().select("*")
+            if last_id is not None:
+                query = query.gt(self.id_column, last_id)
+            result = (
+                query.order(self.id_column, desc=False).limit(self.page_size).execute()
+            )
+            page = result.data or []
+            rows.extend(page)
+            if len(page) < self.page_size:
+                break
+            last_id = page[-1][self.id_column]  # Keyset paging
+        return rows
+
+
+class TradeReadModel:
+    """
+    Trade groups and portfolio totals, kept current by a background thread
+
+    Each refresh fetches the rows whose id is above the highest id folded
+    so far. created_at is set by the writer and can be hours old when a
+    row lands (write-behind replay), so it can't serve as the cursor. A
+    full rebuild every `rebuild_seconds` picks up edits and deletions.
+    """
+
+    def __init__(
+        self,
+        source: SupabaseTradeSource,
+        snapshot_path: Optional[Union[str, Path]] = None,
+        refresh_interval: float = 10.0,
+        rebuild_seconds: float = 6 * 3600.0,
+        price_source: Optional[Callable[[List[str]], Dict[str, float]]] = None,
+    ):
+        """
+        Initialize the model (call start() to load and launch the refresher).
+
+        Args:
+            source: Trades to read
+            snapshot_path: JSON snapshot of the folded state (None: memory only)
+            refresh_interval: Seconds between refreshes
+            rebuild_seconds: Seconds between full rebuilds (0: never)
+            price_source: symbols -> latest prices, used for the open
+                positions (e.g. LatestPriceService.prices; None: no prices)
+        """
+        self.source = source
+        self.snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self.refresh_interval = refresh_interval
+        self.id_column = source.id_column
+        self.rebuild_seconds = rebuild_seconds
+        self.price_source = price_source
+
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._reset()
+
+        self.prices: Dict[str, float] = {}
+        self.loaded = False
+        self.updated_at: Optional[datetime] = None
+        self.last_rebuild: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.rows_folded = 0
+
+    def _reset(self):
+        self.groups: Dict[str, TradeGroup] = {}
+        # (-last_activity, group_id), i.e. most recent activity first
+        self.closed_order: List[Tuple[float, str]] = []
+        self.open_order: List[Tuple[float, str]] = []
+        self.totals = {"open": 0, "closed": 0, "wins": 0, "pnl": 0.0}
+        self.cursor: Optional[int] = None  # Highest row id folded
+
+    # ------------------------------------------------------------------
+    # Folding
+    # ------------------------------------------------------------------
+
+    def _detach(self, group: TradeGroup):
+        """Take a group out of the orderings and totals"""
+        if group.buys == 0:
+            return
+        order = self.closed_order if group.is_closed else self.open_order
+        entry = (-group.last_activity, group.group_id)
+        del order[bisect.bisect_left(order, entry)]
+        if group.is_closed:
+            pnl = group.realized_pnl
+            self.totals["closed"] -= 1
+            self.totals["wins"] -= pnl > 0
+            self.totals["pnl"] -= pnl
+        else:
+            self.totals["open"] -= 1
+
+    def _attach(self, group: TradeGroup):
+        """Put a group into the orderings and totals"""
+        if group.buys == 0:
+            return  # Only groups with a BUY are shown
+        order = self.closed_order if group.is_closed else self.open_order
+        bisect.insort(order, (-group.last_activity, group.group_id))
+        if group.is_closed:
+            pnl = group.realized_pnl
+            self.totals["closed"] += 1
+            self.totals["wins"] += pnl > 0
+            self.totals["pnl"] += pnl
+        else:
+            self.totals["open"] += 1
+
+    def apply(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Fold rows into the model, skipping ones already folded"""
+        folded = 0
+        with self._lock:
+            for row in rows:
+                row_id = row.get(self.id_column)
+                if row_id is not None:
+                    if self.cursor is not None and row_id <= self.cursor:
+                        continue
+                    self.cursor = row_id
+                group_id = row.get("trade_group_id")
+                created = parse_time(row.get("created_at"))
+                if not group_id or created is None:
+                    continue
+                ts = created.timestamp()
+
+                group = self.groups.get(group_id)
+                if group is None:
+                    group = self.groups[group_id] = TradeGroup(
+                        group_id=group_id,
+                        symbol=row["symbol"],
+                        strategy=row.get("strategy_name", "N/A"),
+                    )
+                self._detach(group)
+                group.fold(row, ts)
+                self._attach(group)
+                folded += 1
+            self.rows_folded += folded
+        return folded
+
+    # ------------------------------------------------------------------
+    # Refreshing
+    # ------------------------------------------------------------------
+
+    def refresh(self) -> int:
+        """Fold rows written since the last refresh, then update prices"""
+        if self.last_rebuild is None or (
+            self.rebuild_seconds
+            and time.monotonic() - self.last_rebuild > self.rebuild_seconds
+        ):
+            return self.rebuild()
+
+        folded = self.apply(self.source.rows_after(self.cursor))
+        self._refresh_prices()
+        self._mark_updated(save=folded > 0)
+        return folded
+
+    def rebuild(self) -> int:
+        """Refold every row from scratch"""
+        rows = self.source.rows_after(None)
+        with self._lock:
+            self._reset()
+        folded = self.apply(rows)
+        self.last_rebuild = time.monotonic()
+        self._refresh_prices()
+        self._mark_updated(save=True)
+        logger.info(
+            f"Trade read model rebuilt: {folded} rows, {len(self.groups)} groups"
+        )
+        return folded
+
+    def _mark_updated(self, save: bool):
+        self.loaded = True
+        self.updated_at = datetime.now(timezone.utc)
+        self.last_error = None
+        if save:
+            self.save_snapshot()
+
+    def _refresh_prices(self):
+        with self._lock:
+            symbols = sorted({self.groups[gid].symbol for _, gid in self.open_order})
+        if not symbols or self.price_source is None:
+            return
+        prices = self.price_source(symbols)  # Symbols it misses keep their price
+        with self._lock:
+            self.prices.update(prices)
+
+    # ------------------------------------------------------------------
+    # Snapshot
+    # ------------------------------------------------------------------
+
+    def save_snapshot(self):
+        """Write the folded state to snapshot_path (atomically)"""
+        if not self.snapshot_path:
+            return
+        with self._lock:
+            payload = {
+                "version": SNAPSHOT_VERSION,
+                "cursor": self.cursor,
+                "prices": self.prices,
+                "groups": [asdict(group) for group in self.groups.values()],
+            }
+        try:
+            self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.snapshot_path.with_suffix(".tmp")
+            with open(tmp_path, "w") as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, self.snapshot_path)
+        except OSError as e:
+            logger.warning(f"Could not save trade read model snapshot: {e}")
+
+    def load_snapshot(self) -> bool:
+        """Restore the folded state; False if there is no usable snapshot"""
+        if not self.snapshot_path or not self.snapshot_path.exists():
+            return False
+        try:
+            payload = json.loads(self.snapshot_path.read_text())
+            if payload.get("version") != SNAPSHOT_VERSION:
+                return False
+            groups = [TradeGroup(**group) for group in payload["groups"]]
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable snapshot {self.snapshot_path}: {e}")
+            return False
+
+        with self._lock:
+            self._reset()
+            for group in groups:
+                self.groups[group.group_id] = group
+                self._attach(group)
+            self.cursor = payload.get("cursor")
+            self.prices = payload.get("prices", {})
+        self.loaded = True
+        # Edits and deletions since the snapshot are unknown: rebuild on
+        # the usual schedule, counted from now
+        self.last_rebuild = time.monotonic()
+        logger.info(
+            f"Trade read model loaded {len(groups)} groups from {self.snapshot_path}"
+        )
+        return True
+
+    # ------------------------------------------------------------------
+    # Refresher lifecycle
+    # ------------------------------------------------------------------
+
+    @property
+    def running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self):
+        """Load the snapshot, catch up once, then refresh in the background"""
+        if self.running:
+            return
+        self.load_snapshot()
+        try:
+            self.refresh()
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Trade read model refresh failed: {e}")
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="trade-read-model", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the refresher thread"""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stop.wait(self.refresh_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error(f"Trade read model refresh failed: {e}")
+
+    # ------------------------------------------------------------------
+    # Serving
+    # ------------------------------------------------------------------
+
+    def stats(self) -> Dict[str, Any]:
+        """Portfolio totals in the dashboard's /api/trades format"""
+        with self._lock:
+            return self._stats()
+
+    def _stats(self) -> Dict[str, Any]:
+        closed = self.totals["closed"]
+        wins = self.totals["wins"]
+        return {
+            "open_count": self.totals["open"],
+            "closed_count": closed,
+            "win_count": wins,
+            "loss_count": closed - wins if closed else 0,
+            "win_rate": wins / closed * 100 if closed else 0,
+            "total_pnl": 0,
+            "total_pnl_dollar": self.totals["pnl"],
+            "starting_capital": STARTING_CAPITAL,
+        }
+
+    def page(
+        self,
+        filter_type: str = "all",
+        page: int = 1,
+        per_page: int = 100,
+        now: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        """
+        One page of /api/trades: closed trades then open positions, each
+        most recent activity first ('open' and 'closed' filter to one list)
+        """
+        now = now or datetime.now(timezone.utc)
+        with self._lock:
+            if filter_type == "open":
+                lists = [self.open_order]
+            elif filter_type == "closed":
+                lists = [self.closed_order]
+            else:
+                lists = [self.closed_order, self.open_order]
+
+            total_trades = sum(len(order) for order in lists)
+            total_pages = (
+                (total_trades + per_page - 1) // per_page if total_trades > 0 else 1
+            )
+            page = max(1, min(page, total_pages))
+            start = (page - 1) * per_page
+
+            rows = []
+            for order in lists:
+                for _, group_id in order[start : start + per_page - len(rows)]:
+                    group = self.groups[group_id]
+                    if group.is_closed:
+                        rows.append(group.closed_view())
+                    else:
+                        rows.append(group.open_view(self.prices.get(group.symbol), now))
+                start = max(0, start - len(order))
+                if len(rows) >= per_page:
+                    break
+            stats = self._stats()
+
+        return {
+            "trades": rows if filter_type != "open" else [],
+            "open_trades": rows if filter_type == "open" else [],
+            "stats": stats,
+            "pagination": {
+                "page": page,
+                "per_page": per_page,
+                "total_trades": total_trades,
+                "total_pages": total_pages,
+            },
+            "as_of": self.updated_at.isoformat() if self.updated_at else None,
+        }
+
+
+_read_models: Dict[Tuple[Optional[str], str], TradeReadModel] = {}
+_read_models_lock = threading.Lock()
+
+
+def get_trade_read_model(
+    table: str = "paper_trades",
+    schema: Optional[str] = None,
+    supabase_client=None,
+    snapshot_dir: Union[str, Path] = "data/dashboard_read_model",
+    id_column: str = "trade_id",
+) -> TradeReadModel:
+    """
+    Process-wide read model of one trades table, started on first use.
+
+    Args:
+        table: Trades table
+        schema: Schema of the trades table
+        supabase_client: SupabaseClient to read with (a new one is created
+            if the model doesn't exist yet and none is given)
+        snapshot_dir: Directory for the snapshot file
+        id_column: Server-assigned row id of the table
+    """
+    key = (schema, table)
+    with _read_models_lock:
+        if key not in _read_models:
+            if supabase_client is None:
+                from src.data.supabase_client import SupabaseClient
+
+                supabase_client = SupabaseClient()
+            name = f"{schema}.{table}" if schema else table
+            model = TradeReadModel(
+                SupabaseTradeSource(
+                    supabase_client.client,
+                    table=table,
+                    schema=schema,
+                    id_column=id_column,
+                ),
+                snapshot_path=Path(snapshot_dir) / f"{name}.json",
+                price_source=get_latest_price_service(supabase_client).prices,
+            )
+            model.start()
+            _read_models[key] = model
+        return _read_models[key]
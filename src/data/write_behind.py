@@ -0,0 +1,532 @@
+"""
+Write-behind queue for hot-path database writes.
+
+Callers enqueue rows and return immediately. A background thread drains
+per-table queues in batches, retries transient failures through a circuit
+breaker, and spills rows to a local JSONL file while Supabase is
+unreachable. Spilled rows are replayed once writes succeed again, so
+delivery is at-least-once; tables that may be replayed write with upsert
+on an idempotency key so a replayed row can't be stored twice.
+
+A batch rejected for bad data is split in half until the offending rows
+are isolated. Those rows go to a separate rejects file for inspection
+instead of being retried.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+import httpx
+from loguru import logger
+
+from src.data.supabase_client import GATEWAY_ERRORS, SupabaseClient
+from src.utils.retry import CircuitBreaker, RetryPolicy
+
+# Tables written with upsert; rows sharing a conflict key are coalesced so
+# only the newest one is sent. paper_trades has no natural key, so a trade
+# leg is identified by its group, side and client-set timestamp
+# (unique index added in migrations/053_paper_trades_idempotency_key.sql)
+DEFAULT_UPSERT_TABLES = {
+    "system_heartbeat": "service_name",
+    "paper_trades": "trade_group_id,side,created_at",
+}
+
+
+class TableQueue:
+    """Bounded queue of pending rows for one table."""
+
+    def __init__(self, name: str, max_size: int, on_conflict: Optional[str] = None):
+        self.name = name
+        self.max_size = max_size
+        self.on_conflict = on_conflict
+        self.keys = on_conflict.split(",") if on_conflict else None
+        self.rows: Union[deque, OrderedDict] = OrderedDict() if self.keys else deque()
+
+        # Metrics
+        self.enqueued = 0
+        self.coalesced = 0
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self.rejected = 0
+        self.spilled = 0
+        self.high_water = 0
+        self.last_latency_ms = 0.0
+        self.pressure_warned = False
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def push(self, row: Dict[str, Any]) -> bool:
+        """Add a row. Returns False if the queue is full."""
+        if self.keys:
+            key = tuple(row.get(k) for k in self.keys)
+            if key in self.rows:
+                self.rows[key] = row  # Keeps its place in line, newest value
+                self.coalesced += 1
+                return True
+            if len(self.rows) >= self.max_size:
+                return False
+            self.rows[key] = row
+        else:
+            if len(self.rows) >= self.max_size:
+                return False
+            self.rows.append(row)
+
+        self.enqueued += 1
+        self.high_water = max(self.high_water, len(self.rows))
+        return True
+
+    def take(self, count: int) -> List[Dict[str, Any]]:
+        """Remove and return up to `count` rows in arrival order."""
+        count = min(count, len(self.rows))
+        if self.keys:
+            return [self.rows.popitem(last=False)[1] for _ in range(count)]
+        return [self.rows.popleft() for _ in range(count)]
+
+    def metrics(self) -> Dict[str, Any]:
+        return {
+            "depth": len(self.rows),
+            "capacity": self.max_size,
+            "high_water": self.high_water,
+            "enqueued": self.enqueued,
+            "coalesced": self.coalesced,
+            "written": self.written,
+            "batches": self.batches,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "spilled": self.spilled,
+            "last_latency_ms": round(self.last_latency_ms, 1),
+        }
+
+
+class WriteBehindQueue:
+    """
+    Asynchronous, batched writer for Supabase tables.
+
+    `enqueue` only takes a lock and appends to a deque, so it is safe to
+    call from the trading loop (sync or async) without an executor.
+    """
+
+    def __init__(
+        self,
+        supabase_client,
+        spill_dir: Union[str, Path] = "data/write_behind",
+        max_queue_size: int = 10000,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        replay_interval: float = 30.0,
+        retry_policy: Optional[Dict[str, Any]] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        """
+        Initialize the queue (call start() to launch the worker).
+
+        Args:
+            supabase_client: SupabaseClient (anything with a `.client`)
+            spill_dir: Directory for the spill file
+            max_queue_size: Per-table capacity before rows overflow to disk
+            batch_size: Maximum rows per database request
+            flush_interval: Seconds between worker passes when idle
+            replay_interval: Minimum seconds between spill replay attempts
+            retry_policy: Dict with max_attempts/delay/backoff
+                (defaults to RetryPolicy.DATABASE)
+            circuit_breaker: Breaker wrapping every database request
+        """
+        self.supabase = supabase_client
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.replay_interval = replay_interval
+        self.retry_policy = retry_policy or RetryPolicy.DATABASE
+        self.circuit_breaker = circuit_breaker or CircuitBreaker(
+            failure_threshold=3, recovery_timeout=30.0
+        )
+
+        self.spill_dir = Path(spill_dir)
+        self.spill_path = self.spill_dir / "spill.jsonl"
+        self.replay_path = self.spill_dir / "spill.replay.jsonl"
+        self.reject_path = self.spill_dir / "rejected.jsonl"
+
+        self.tables: Dict[str, TableQueue] = {}
+        for table, on_conflict in DEFAULT_UPSERT_TABLES.items():
+            self.register_table(table, on_conflict=on_conflict)
+
+        self._lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._busy = False
+        self._last_replay = 0.0
+
+        self.replayed = 0
+
+    # ------------------------------------------------------------------
+    # Producer side
+    # ------------------------------------------------------------------
+
+    def register_table(
+        self, table: str, on_conflict: Optional[str] = None, max_size: int = None
+    ) -> TableQueue:
+        """Configure a table; upsert tables pass their conflict columns."""
+        queue = TableQueue(table, max_size or self.max_queue_size, on_conflict)
+        self.tables[table] = queue
+        return queue
+
+    def _table(self, table: str) -> TableQueue:
+        """Queue for a table, registering it as insert-only on first use."""
+        if table not in self.tables:
+            self.register_table(table)
+        return self.tables[table]
+
+    def enqueue(
+        self, table: str, rows: Union[Dict[str, Any], List[Dict[str, Any]]]
+    ) -> int:
+        """
+        Queue rows for writing without touching the network.
+
+        Rows that don't fit in a full queue are appended to the spill file
+        and replayed later.
+
+        Returns:
+            Number of rows queued in memory
+        """
+        if isinstance(rows, dict):
+            rows = [rows]
+
+        overflow = []
+        with self._lock:
+            queue = self._table(table)
+            for row in rows:
+                if not queue.push(row):
+                    overflow.append(row)
+            depth = len(queue)
+            self._check_pressure(queue)
+
+        if overflow:
+            self._spill(queue, overflow, sync=False)
+        if depth >= self.batch_size:
+            self._wake.set()
+
+        return len(rows) - len(overflow)
+
+    def _check_pressure(self, queue: TableQueue):
+        """Warn once when a queue crosses 80% of capacity."""
+        if not queue.pressure_warned and len(queue) >= 0.8 * queue.max_size:
+            queue.pressure_warned = True
+            logger.warning(
+                f"Write-behind queue for {queue.name} at {len(queue)}/{queue.max_size} "
+                f"rows (circuit {self.circuit_breaker.state})"
+            )
+        elif queue.pressure_warned and len(queue) < 0.5 * queue.max_size:
+            queue.pressure_warned = False
+
+    @property
+    def pending(self) -> int:
+        """Rows held in memory across all tables."""
+        with self._lock:
+            return sum(len(q) for q in self.tables.values())
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Queue depths, throughput and spill counters."""
+        with self._lock:
+            tables = {name: q.metrics() for name, q in self.tables.items()}
+        return {
+            "pending": sum(t["depth"] for t in tables.values()),
+            "written": sum(t["written"] for t in tables.values()),
+            "failed": sum(t["failed"] for t in tables.values()),
+            "rejected": sum(t["rejected"] for t in tables.values()),
+            "spilled": sum(t["spilled"] for t in tables.values()),
+            "replayed": self.replayed,
+            "spill_bytes": (
+                self.spill_path.stat().st_size if self.spill_path.exists() else 0
+            ),
+            "circuit": self.circuit_breaker.state,
+            "tables": tables,
+        }
+
+    # ------------------------------------------------------------------
+    # Worker lifecycle
+    # ------------------------------------------------------------------
+
+    def start(self):
+        """Start the background writer thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="write-behind", daemon=True
+        )
+        self._thread.start()
+        logger.info(
+            f"Write-behind queue started (batch {self.batch_size}, "
+            f"capacity {self.max_queue_size}/table)"
+        )
+
+    def stop(self, timeout: float = 10.0):
+        """Stop the worker after a final drain; unsent rows are spilled."""
+        if self._thread and self._thread.is_alive():
+            self._stop.set()
+            self._wake.set()
+            self._thread.join(timeout)
+        else:
+            self.drain()
+
+        # Anything still in memory (worker timed out) goes to disk
+        with self._lock:
+            leftovers = [(q, q.take(len(q))) for q in self.tables.values() if len(q)]
+        for queue, rows in leftovers:
+            self._spill(queue, rows)
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """
+        Block until every queue has been drained (written or spilled).
+
+        Returns:
+            True if the queues emptied before the timeout
+        """
+        if not (self._thread and self._thread.is_alive()):
+            self.drain()
+            return True
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.pending == 0 and not self._busy:
+                return True
+            self._wake.set()
+            time.sleep(0.01)
+        return False
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.drain()
+                self.replay_spill()
+            except Exception as e:
+                logger.error(f"Write-behind worker error: {e}")
+        self.drain()
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def drain(self):
+        """Write out everything currently queued."""
+        self._busy = True
+        try:
+            for queue in list(self.tables.values()):
+                while True:
+                    with self._lock:
+                        rows = queue.take(self.batch_size)
+                    if not rows:
+                        break
+                    self._write(queue, rows)
+        finally:
+            self._busy = False
+
+    def _send(
+        self, queue: TableQueue, rows: List[Dict[str, Any]]
+    ) -> Optional[Exception]:
+        """
+        Send one request.
+
+        Data errors are returned rather than raised: the database answered,
+        so they must not count against the circuit breaker.
+        """
+        table = self.supabase.client.table(queue.name)
+        try:
+            if queue.on_conflict:
+                table.upsert(rows, on_conflict=queue.on_conflict).execute()
+            else:
+                table.insert(rows).execute()
+        except Exception as e:
+            if self._is_transient(e):
+                raise
+            return e
+        return None
+
+    @staticmethod
+    def _is_transient(error: Exception) -> bool:
+        """Connectivity problems worth retrying (and spilling) vs bad data."""
+        if isinstance(
+            error, (ConnectionError, TimeoutError, OSError, httpx.TransportError)
+        ):
+            return True
+        message = str(error)
+        return message.startswith("Circuit breaker is open") or any(
+            marker in message for marker in GATEWAY_ERRORS
+        )
+
+    def _write(self, queue: TableQueue, rows: List[Dict[str, Any]]) -> bool:
+        """
+        Write one batch with retries.
+
+        A batch rejected for bad data is bisected so the good rows still
+        land; each row that fails on its own is moved to the rejects file.
+
+        Returns:
+            False if any rows were spilled because the database is unreachable
+        """
+        delay = self.retry_policy.get("delay", 0.5)
+        attempts = self.retry_policy.get("max_attempts", 3)
+
+        for attempt in range(1, attempts + 1):
+            start = time.perf_counter()
+            try:
+                error = self.circuit_breaker.call(self._send, queue, rows)
+            except Exception as e:
+                # Only connectivity errors get here (see _send)
+                if self.circuit_breaker.state == "open" or attempt == attempts:
+                    break
+                logger.warning(
+                    f"Write to {queue.name} failed (attempt {attempt}/{attempts}), "
+                    f"retrying in {delay:.1f}s: {e}"
+                )
+                time.sleep(delay)
+                delay *= self.retry_policy.get("backoff", 2.0)
+                continue
+
+            if error is not None:
+                if len(rows) == 1:
+                    self._reject(queue, rows, error)
+                    return True
+                middle = len(rows) // 2
+                first = self._write(queue, rows[:middle])
+                second = self._write(queue, rows[middle:])
+                return first and second
+
+            queue.last_latency_ms = (time.perf_counter() - start) * 1000
+            queue.written += len(rows)
+            queue.batches += 1
+            return True
+
+        self._spill(queue, rows)
+        return False
+
+    # ------------------------------------------------------------------
+    # Spill file
+    # ------------------------------------------------------------------
+
+    def _append(self, path: Path, entry: Dict[str, Any], sync: bool = True):
+        """Append one JSON line under the spill lock."""
+        line = json.dumps(entry, default=str)
+        with self._spill_lock:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            with open(path, "a") as f:
+                f.write(line + "\n")
+                f.flush()
+                if sync:
+                    os.fsync(f.fileno())
+
+    def _reject(self, queue: TableQueue, rows: List[Dict[str, Any]], error: Exception):
+        """Set aside rows the database refused; they are never replayed."""
+        queue.failed += len(rows)
+        entry = {"table": queue.name, "rows": rows, "error": str(error)}
+        try:
+            self._append(self.reject_path, entry)
+            queue.rejected += len(rows)
+            logger.error(
+                f"Rejected {len(rows)} {queue.name} rows, kept in "
+                f"{self.reject_path}: {error}"
+            )
+        except OSError as e:
+            logger.error(
+                f"Dropped {len(rows)} {queue.name} rows after error: {error} "
+                f"(could not write rejects file: {e})"
+            )
+
+    def _spill(self, queue: TableQueue, rows: List[Dict[str, Any]], sync: bool = True):
+        """Append rows to the spill file (fsync unless called from enqueue)."""
+        try:
+            self._append(self.spill_path, {"table": queue.name, "rows": rows}, sync)
+            queue.spilled += len(rows)
+            logger.warning(
+                f"Spilled {len(rows)} {queue.name} rows to {self.spill_path}"
+            )
+        except OSError as e:
+            queue.failed += len(rows)
+            logger.error(f"Failed to spill {len(rows)} {queue.name} rows: {e}")
+
+    def replay_spill(self, force: bool = False) -> int:
+        """
+        Re-send spilled rows once the circuit is closed.
+
+        The spill file is renamed before reading, so rows that fail again
+        are appended to a fresh spill file rather than re-read in a loop.
+
+        Returns:
+            Number of rows written from the spill
+        """
+        if not force and (
+            self.circuit_breaker.state == "open"
+            or time.monotonic() - self._last_replay < self.replay_interval
+        ):
+            return 0
+        self._last_replay = time.monotonic()
+
+        with self._spill_lock:
+            # A replay file left by a crash is finished before taking a new one
+            if not self.replay_path.exists():
+                if not self.spill_path.exists():
+                    return 0
+                os.replace(self.spill_path, self.replay_path)
+
+        pending: Dict[str, List[Dict[str, Any]]] = {}
+        with open(self.replay_path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning("Skipping truncated line in write-behind spill")
+                    continue
+                pending.setdefault(entry["table"], []).extend(entry["rows"])
+
+        written = 0
+        for table, rows in pending.items():
+            queue = self._table(table)
+            if queue.keys:
+                # A row spilled twice must not appear twice in one upsert
+                latest = {tuple(row.get(k) for k in queue.keys): row for row in rows}
+                rows = list(latest.values())
+            for i in range(0, len(rows), self.batch_size):
+                chunk = rows[i : i + self.batch_size]
+                before = queue.written
+                self._write(queue, chunk)
+                written += queue.written - before
+
+        self.replay_path.unlink()
+        self.replayed += written
+        if written:
+            logger.info(f"Replayed {written} spilled rows")
+        return written
+
+
+_write_behind_queue: Optional[WriteBehindQueue] = None
+_write_behind_lock = threading.Lock()
+
+
+def get_write_behind_queue(supabase_client=None) -> WriteBehindQueue:
+    """
+    Process-wide write-behind queue, started on first use.
+
+    Args:
+        supabase_client: Client to write with (a new SupabaseClient is
+            created if the queue doesn't exist yet and none is given)
+    """
+    global _write_behind_queue
+
+    with _write_behind_lock:
+        if _write_behind_queue is None:
+            _write_behind_queue = WriteBehindQueue(supabase_client or SupabaseClient())
+            _write_behind_queue.start()
+            atexit.register(_write_behind_queue.stop)
+        return _write_behind_queue
@@ -5,26 +5,79 @@ Calculates technical indicators and features for ML model
 
 import pandas as pd
 
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
+from pathlib import Path
 from typing import Dict, List, Optional
 import ta
 from loguru import logger
 from src.data.hybrid_fetcher import HybridDataFetcher
 from src.data.supabase_client import SupabaseClient
+from src.data.ohlc_store import to_epoch
+from src.ml.incremental_features import FEATURE_COLUMNS, IncrementalFeatureEngine
 from src.config import get_settings
 import asyncio
 
-settings = get_settings()
+
+def compute_features(
+    symbol: str, price_data: List[Dict], min_periods: int, tail: Optional[int] = None
+) -> Optional[pd.DataFrame]:
+    """
+    Build the feature frame for one symbol from raw OHLC records.
+
+    Module-level so it can run in a worker process.
+
+    Args:
+        symbol: Trading symbol
+        price_data: OHLC records as returned by HybridDataFetcher
+        min_periods: Minimum number of records needed
+        tail: Only return the last `tail` rows
+
+    Returns:
+        Features DataFrame, or None if there isn't enough data
+    """
+    if not price_data or len(price_data) < min_periods:
+        logger.warning(
+            f"Insufficient data for {symbol}: {len(price_data) if price_data else 0} records (need {min_periods})"
+        )
+        return None
+
+    # Convert to DataFrame and rename columns to match expected format
+    df = pd.DataFrame(price_data)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    df = df.sort_values("timestamp")
+    df.set_index("timestamp", inplace=True)
+
+    # Rename 'close' to 'price' for compatibility
+    if "close" in df.columns:
+        df["price"] = df["close"]
+
+    # Calculate features
+    features_df = FeatureCalculator._calculate_technical_indicators(df)
+    features_df["symbol"] = symbol
+
+    return features_df.tail(tail) if tail else features_df
 
 
 class FeatureCalculator:
     """Calculate ML features from price data"""
 
     def __init__(self):
+        self.settings = get_settings()
         self.fetcher = HybridDataFetcher()
         self.supabase = SupabaseClient()
         self.min_periods = 100  # Minimum data points needed for indicators
 
+        # Streaming indicator state per symbol, saved to disk for warm starts
+        self.engines: Dict[str, IncrementalFeatureEngine] = {}
+        self.state_dir = Path(self.settings.data_dir) / "feature_state"
+
+        # Pipelined updates: concurrent fetches and worker processes for `ta`
+        self.max_concurrent_fetches = 8  # Chunks in flight at once
+        self.fetch_chunk_size = 5  # Symbols per get_recent_data_batch call
+        self.max_workers = None  # Defaults to the number of CPUs
+        self.save_rows_per_symbol = 10
+
     async def calculate_features_for_symbol(
         self, symbol: str, lookback_hours: int = 48
     ) -> Optional[pd.DataFrame]:
@@ -40,33 +93,117 @@ class FeatureCalculator:
                 symbol, actual_lookback, "15m"
             )
 
-            if not price_data or len(price_data) < self.min_periods:
-                logger.warning(
-                    f"Insufficient data for {symbol}: {len(price_data) if price_data else 0} records (need {self.min_periods})"
-                )
-                return None
+            return compute_features(symbol, price_data, self.min_periods)
+
+        except Exception as e:
+            logger.error(f"Error calculating features for {symbol}: {e}")
+            return None
 
-            # Convert to DataFrame and rename columns to match expected format
-            df = pd.DataFrame(price_data)
-            df["timestamp"] = pd.to_datetime(df["timestamp"])
-            df = df.sort_values("timestamp")
-            df.set_index("timestamp", inplace=True)
+    async def calculate_features_incremental(
+        self, symbol: str, lookback_hours: int = 48
+    ) -> Optional[pd.DataFrame]:
+        """
+        Calculate features only for bars newer than the symbol's engine state.
 
-            # Rename 'close' to 'price' for compatibility
-            if "close" in df.columns:
-                df["price"] = df["close"]
+        Produces the same columns as calculate_features_for_symbol. The first
+        call (or one after the state falls out of the fetched window) replays
+        the whole window; later calls cost O(1) per new bar.
 
-            # Calculate features
-            features_df = self._calculate_technical_indicators(df)
-            features_df["symbol"] = symbol
+        Args:
+            symbol: Trading symbol
+            lookback_hours: Hours of data used when (re)building the state
+
+        Returns:
+            DataFrame of feature rows for new bars (may be empty), or None on error
+        """
+        try:
+            price_data = await self.fetcher.get_recent_data(
+                symbol, max(lookback_hours, 72), "15m"
+            )
+        except Exception as e:
+            logger.error(f"Error calculating incremental features for {symbol}: {e}")
+            return None
+
+        return self._incremental_features(symbol, price_data)
 
+    def _incremental_features(
+        self, symbol: str, price_data: List[Dict]
+    ) -> Optional[pd.DataFrame]:
+        """Feed bars newer than the symbol's engine state through its engine."""
+        try:
+            if not price_data:
+                logger.warning(f"No data for {symbol}")
+                return None
+
+            engine = self._get_engine(symbol)
+            if engine is not None and engine.last_timestamp is not None:
+                if engine.last_timestamp < to_epoch(price_data[0]["timestamp"]):
+                    engine = None  # State is older than the window, rebuild
+
+            if engine is None:
+                if len(price_data) < self.min_periods:
+                    logger.warning(
+                        f"Insufficient data for {symbol}: {len(price_data)} records (need {self.min_periods})"
+                    )
+                    return None
+                engine = IncrementalFeatureEngine(symbol)
+                new_bars = price_data
+            else:
+                # Walk back from the newest bar; usually only one or two are new
+                start = len(price_data)
+                while (
+                    start > 0
+                    and to_epoch(price_data[start - 1]["timestamp"])
+                    > engine.last_timestamp
+                ):
+                    start -= 1
+                new_bars = price_data[start:]
+
+            rows = [
+                engine.update(
+                    to_epoch(bar["timestamp"]),
+                    self._as_float(bar.get("close")),
+                    self._as_float(bar.get("volume")),
+                )
+                for bar in new_bars
+            ]
+            self.engines[symbol] = engine
+            if rows:
+                self._save_engine(engine)
+
+            features_df = pd.DataFrame(
+                rows,
+                index=pd.to_datetime([bar["timestamp"] for bar in new_bars]),
+                columns=FEATURE_COLUMNS,
+            )
+            features_df["symbol"] = symbol
             return features_df
 
         except Exception as e:
-            logger.error(f"Error calculating features for {symbol}: {e}")
+            logger.error(f"Error calculating incremental features for {symbol}: {e}")
             return None
 
-    def _calculate_technical_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
+    @staticmethod
+    def _as_float(value) -> float:
+        return float("nan") if value is None else float(value)
+
+    def _get_engine(self, symbol: str) -> Optional[IncrementalFeatureEngine]:
+        """Get the in-memory engine for a symbol, or warm-start it from disk."""
+        engine = self.engines.get(symbol)
+        if engine is None:
+            engine = IncrementalFeatureEngine.load(self.state_dir / f"{symbol}.json")
+            if engine is not None:
+                self.engines[symbol] = engine
+        return engine
+
+    def _save_engine(self, engine: IncrementalFeatureEngine):
+        try:
+            engine.save(self.state_dir / f"{engine.symbol}.json")
+        except Exception as e:
+            logger.warning(f"Could not save feature state for {engine.symbol}: {e}")
+
+    @staticmethod
+    def _calculate_technical_indicators(df: pd.DataFrame) -> pd.DataFrame:
         """Calculate all technical indicators"""
         features = pd.DataFrame(index=df.index)
 
@@ -116,12 +253,12 @@ class FeatureCalculator:
         ) * 100
 
         # Support/Resistance
-        features["distance_from_support"] = self._calculate_support_resistance(
-            df["price"], "support"
-        )
-        features["distance_from_resistance"] = self._calculate_support_resistance(
-            df["price"], "resistance"
-        )
+        features[
+            "distance_from_support"
+        ] = FeatureCalculator._calculate_support_resistance(df["price"], "support")
+        features[
+            "distance_from_resistance"
+        ] = FeatureCalculator._calculate_support_resistance(df["price"], "resistance")
 
         # Volatility
         features["volatility_1h"] = df["price"].pct_change().rolling(60).std() * 100
@@ -146,9 +283,8 @@ class FeatureCalculator:
 
         return features
 
-    def _calculate_support_resistance(
-        self, prices: pd.Series, level_type: str
-    ) -> pd.Series:
+    @staticmethod
+    def _calculate_support_resistance(prices: pd.Series, level_type: str) -> pd.Series:
         """Calculate distance from support/resistance levels"""
         window = 20
 
@@ -162,21 +298,28 @@ class FeatureCalculator:
 
     def save_features(self, features_df: pd.DataFrame) -> bool:
         """Save calculated features to database"""
+        return self._insert_feature_records(self._feature_records(features_df))
+
+    @staticmethod
+    def _feature_records(features_df: pd.DataFrame) -> List[Dict]:
+        """Convert feature rows to ml_features records"""
+        records = []
+        for timestamp, row in features_df.iterrows():
+            record = {
+                "timestamp": timestamp.isoformat(),
+                "symbol": row["symbol"],
+                "price_change_5m": float(row["price_change_5m"]),
+                "price_change_1h": float(row["price_change_1h"]),
+                "volume_ratio": float(row["volume_ratio"]),
+                "rsi_14": float(row["rsi_14"]),
+                "distance_from_support": float(row["distance_from_support"]),
+            }
+            records.append(record)
+        return records
+
+    def _insert_feature_records(self, records: List[Dict]) -> bool:
+        """Insert ml_features records in one request"""
         try:
-            # Prepare data for insertion
-            records = []
-            for timestamp, row in features_df.iterrows():
-                record = {
-                    "timestamp": timestamp.isoformat(),
-                    "symbol": row["symbol"],
-                    "price_change_5m": float(row["price_change_5m"]),
-                    "price_change_1h": float(row["price_change_1h"]),
-                    "volume_ratio": float(row["volume_ratio"]),
-                    "rsi_14": float(row["rsi_14"]),
-                    "distance_from_support": float(row["distance_from_support"]),
-                }
-                records.append(record)
-
             # Insert into database
             if records:
                 self.supabase.insert_ml_features(records)
@@ -192,20 +335,119 @@ class FeatureCalculator:
                 # Duplicates are handled in supabase client
                 return True
 
-    async def update_all_symbols(self, symbols: List[str]) -> Dict[str, bool]:
-        """Update features for all symbols"""
+    async def update_all_symbols(
+        self, symbols: List[str], incremental: bool = False
+    ) -> Dict[str, bool]:
+        """
+        Update features for all symbols
+
+        Args:
+            symbols: Symbols to update
+            incremental: Only compute rows for new bars using the streaming
+                engines instead of recomputing the full window with `ta`
+        """
         results = {}
 
         for symbol in symbols:
             logger.info(f"Calculating features for {symbol}")
-            features_df = await self.calculate_features_for_symbol(symbol)
+            if incremental:
+                features_df = await self.calculate_features_incremental(symbol)
+                if features_df is not None and features_df.empty:
+                    results[symbol] = True  # Already up to date
+                    continue
+            else:
+                features_df = await self.calculate_features_for_symbol(symbol)
 
             if features_df is not None and not features_df.empty:
                 # Only save the most recent features
-                recent_features = features_df.tail(10)  # Last 10 time periods
+                recent_features = features_df.tail(self.save_rows_per_symbol)
                 success = self.save_features(recent_features)
                 results[symbol] = success
             else:
                 results[symbol] = False
 
         return results
+
+    async def update_all_symbols_pipelined(
+        self, symbols: List[str], incremental: bool = False
+    ) -> Dict[str, bool]:
+        """
+        Update features for all symbols with fetches and compute overlapped
+
+        Symbols are fetched in chunks of fetch_chunk_size through the
+        fetcher's batched query path, at most max_concurrent_fetches chunks at
+        a time. Each symbol's `ta` computation is handed to a process pool as
+        soon as its chunk arrives, and all rows are written in a single insert.
+
+        Args:
+            symbols: Symbols to update
+            incremental: Use the streaming engines instead of the process
+                pool (their state lives in this process)
+
+        Returns:
+            Dict of symbol -> success
+        """
+        results = {}
+        frames = []
+        semaphore = asyncio.Semaphore(self.max_concurrent_fetches)
+        loop = asyncio.get_running_loop()
+        pool = None if incremental else ProcessPoolExecutor(self.max_workers)
+
+        async def compute(symbol: str, price_data: List[Dict]):
+            try:
+                if incremental:
+                    features_df = self._incremental_features(symbol, price_data)
+                else:
+                    features_df = await loop.run_in_executor(
+                        pool,
+                        compute_features,
+                        symbol,
+                        price_data,
+                        self.min_periods,
+                        self.save_rows_per_symbol,
+                    )
+            except Exception as e:
+                logger.error(f"Error calculating features for {symbol}: {e}")
+                features_df = None
+
+            if features_df is None:
+                results[symbol] = False
+            elif features_df.empty:
+                results[symbol] = True  # Already up to date
+            else:
+                frames.append(features_df.tail(self.save_rows_per_symbol))
+
+        async def process(chunk: List[str]):
+            # get_recent_data blocks the loop despite being async; the batch
+            # call runs its queries on executor threads, so chunks overlap
+            try:
+                async with semaphore:
+                    data = await self.fetcher.get_recent_data_batch(chunk, 72, "15m")
+            except Exception as e:
+                logger.error(f"Error fetching data for {', '.join(chunk)}: {e}")
+                data = {}
+
+            await asyncio.gather(
+                *(compute(symbol, data.get(symbol, [])) for symbol in chunk)
+            )
+
+        chunks = [
+            symbols[i : i + self.fetch_chunk_size]
+            for i in range(0, len(symbols), self.fetch_chunk_size)
+        ]
+
+        try:
+            await asyncio.gather(*(process(chunk) for chunk in chunks))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        if frames:
+            records = [
+                record for frame in frames for record in self._feature_records(frame)
+            ]
+            success = self._insert_feature_records(records)
+            for frame in frames:
+                results[frame["symbol"].iloc[0]] = success
+
+        return results
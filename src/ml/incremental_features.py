@@ -0,0 +1,444 @@
+"""
+Incremental Feature Engine
+Streaming versions of the FeatureCalculator indicators, updated in O(1) per bar
+"""
+
+import json
+import math
+from collections import deque
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+NAN = float("nan")
+
+# Same columns, in the same order, as FeatureCalculator._calculate_technical_indicators
+FEATURE_COLUMNS = [
+    "price_change_5m",
+    "price_change_15m",
+    "price_change_1h",
+    "price_change_4h",
+    "volume_ratio",
+    "rsi_14",
+    "rsi_30",
+    "macd",
+    "macd_signal",
+    "macd_diff",
+    "bb_high_band",
+    "bb_low_band",
+    "bb_middle_band",
+    "bb_width",
+    "bb_position",
+    "sma_20",
+    "sma_50",
+    "ema_12",
+    "ema_26",
+    "distance_from_sma20",
+    "distance_from_sma50",
+    "distance_from_support",
+    "distance_from_resistance",
+    "volatility_1h",
+    "volatility_4h",
+    "obv",
+    "volume_sma_ratio",
+    "roc_12",
+    "stoch_k",
+]
+
+# Columns the batch path fills with 0 directly instead of forward-filling
+ZERO_FILLED = {
+    "price_change_5m",
+    "price_change_15m",
+    "price_change_1h",
+    "price_change_4h",
+    "distance_from_support",
+    "distance_from_resistance",
+}
+
+STATE_VERSION = 1
+
+
+def _div(a: float, b: float) -> float:
+    """Divide with NumPy semantics (x/0 -> inf or nan instead of raising)."""
+    if b == 0:
+        if a == 0 or a != a:
+            return NAN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+class StreamingIndicator:
+    """Base class that can dump and restore its state as plain JSON types."""
+
+    def get_state(self) -> Dict:
+        return {
+            key: list(value) if isinstance(value, deque) else value
+            for key, value in vars(self).items()
+        }
+
+    def set_state(self, state: Dict):
+        for key, value in state.items():
+            current = getattr(self, key, None)
+            if isinstance(current, deque):
+                value = deque(value, maxlen=current.maxlen)
+            setattr(self, key, value)
+
+
+class EWMean(StreamingIndicator):
+    """Equivalent of Series.ewm(alpha=..., adjust=False, min_periods=...).mean()."""
+
+    def __init__(self, min_periods: int, span: float = None, alpha: float = None):
+        com = (span - 1) / 2.0 if span is not None else 1.0 / alpha - 1
+        self.alpha = 1.0 / (1.0 + com)
+        self.min_periods = min_periods
+        self.weighted = NAN
+        self.nobs = 0
+
+    def update(self, value: float) -> float:
+        if value == value:
+            self.nobs += 1
+            if self.weighted != self.weighted:
+                self.weighted = value
+            elif self.weighted != value:
+                old_wt = 1.0 - self.alpha
+                self.weighted = (old_wt * self.weighted + self.alpha * value) / (
+                    old_wt + self.alpha
+                )
+        return self.weighted if self.nobs >= self.min_periods else NAN
+
+
+class RollingMean(StreamingIndicator):
+    """Equivalent of Series.rolling(window).mean() using compensated sums."""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.nobs = 0
+        self.sum = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.same_count = 0
+        self.prev_value = NAN
+
+    def update(self, value: float) -> float:
+        if len(self.values) == self.window:
+            old = self.values[0]
+            if old == old:
+                self.nobs -= 1
+                y = -old - self.compensation_remove
+                t = self.sum + y
+                self.compensation_remove = t - self.sum - y
+                self.sum = t
+        self.values.append(value)
+
+        if value == value:
+            self.nobs += 1
+            y = value - self.compensation_add
+            t = self.sum + y
+            self.compensation_add = t - self.sum - y
+            self.sum = t
+            self.same_count = self.same_count + 1 if value == self.prev_value else 1
+            self.prev_value = value
+
+        if self.nobs < self.window:
+            return NAN
+        if self.same_count >= self.nobs:
+            return self.prev_value
+        return self.sum / self.nobs
+
+
+class RollingStd(StreamingIndicator):
+    """Equivalent of Series.rolling(window).std(ddof) using Welford updates."""
+
+    def __init__(self, window: int, ddof: int = 1):
+        self.window = window
+        self.ddof = ddof
+        self.values = deque(maxlen=window)
+        self.nobs = 0
+        self.mean = 0.0
+        self.ssqdm = 0.0
+        self.compensation = 0.0
+        self.same_count = 0
+        self.prev_value = NAN
+
+    def _add(self, value: float):
+        self.nobs += 1
+        self.same_count = self.same_count + 1 if value == self.prev_value else 1
+        self.prev_value = value
+
+        prev_mean = self.mean - self.compensation
+        y = value - self.compensation
+        t = y - self.mean
+        self.compensation = t + self.mean - y
+        self.mean = self.mean + t / self.nobs
+        self.ssqdm += (value - prev_mean) * (value - self.mean)
+
+    def _remove(self, value: float):
+        self.nobs -= 1
+        if self.nobs == 0:
+            self.mean = 0.0
+            self.ssqdm = 0.0
+            return
+
+        prev_mean = self.mean - self.compensation
+        y = value - self.compensation
+        t = y - self.mean
+        self.compensation = t + self.mean - y
+        self.mean = self.mean - t / self.nobs
+        self.ssqdm -= (value - prev_mean) * (value - self.mean)
+
+    def update(self, value: float) -> float:
+        if len(self.values) == self.window:
+            old = self.values[0]
+            if old == old:
+                self._remove(old)
+        self.values.append(value)
+        if value == value:
+            self._add(value)
+
+        if self.nobs < self.window or self.nobs <= self.ddof:
+            return NAN
+        if self.nobs == 1 or self.same_count >= self.nobs:
+            return 0.0
+        return math.sqrt(max(self.ssqdm / (self.nobs - self.ddof), 0.0))
+
+
+class RollingExtreme(StreamingIndicator):
+    """Rolling max or min over `window` bars using a monotonic deque."""
+
+    def __init__(self, window: int, mode: str = "max"):
+        self.window = window
+        self.sign = 1.0 if mode == "max" else -1.0
+        self.index = 0
+        self.candidates = deque()  # [index, value], best value first
+
+    def update(self, value: float) -> float:
+        keyed = self.sign * value
+        while self.candidates and self.sign * self.candidates[-1][1] <= keyed:
+            self.candidates.pop()
+        self.candidates.append([self.index, value])
+        while self.candidates[0][0] <= self.index - self.window:
+            self.candidates.popleft()
+        self.index += 1
+
+        if self.index < self.window:
+            return NAN
+        return self.candidates[0][1]
+
+
+class RSIState(StreamingIndicator):
+    """Equivalent of ta.momentum.RSIIndicator(close, window).rsi()."""
+
+    def __init__(self, window: int):
+        self.up = EWMean(min_periods=window, alpha=1.0 / window)
+        self.down = EWMean(min_periods=window, alpha=1.0 / window)
+
+    def get_state(self) -> Dict:
+        return {"up": self.up.get_state(), "down": self.down.get_state()}
+
+    def set_state(self, state: Dict):
+        self.up.set_state(state["up"])
+        self.down.set_state(state["down"])
+
+    def update(self, diff: float) -> float:
+        up = diff if diff > 0 else 0.0
+        down = -diff if diff < 0 else -0.0
+        ema_up = self.up.update(up)
+        ema_down = self.down.update(down)
+
+        if ema_down == 0:
+            return 100.0
+        return 100 - (100 / (1 + _div(ema_up, ema_down)))
+
+
+class IncrementalFeatureEngine:
+    """
+    Per-symbol streaming feature engine.
+
+    Produces the same columns as FeatureCalculator._calculate_technical_indicators
+    (including its forward-fill of missing values) one bar at a time, so a
+    refresh only costs work proportional to the number of new bars.
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.last_timestamp: Optional[int] = None  # Epoch seconds of last bar
+        self.bars_seen = 0
+
+        self.prices = deque(maxlen=241)  # Enough for the 4h price change
+        self.obv = 0.0
+        self.last_values = {column: 0.0 for column in FEATURE_COLUMNS}
+
+        self.indicators = {
+            "volume_mean_60": RollingMean(60),
+            "volume_mean_20": RollingMean(20),
+            "rsi_14": RSIState(14),
+            "rsi_30": RSIState(30),
+            "ema_12": EWMean(min_periods=12, span=12),
+            "ema_26": EWMean(min_periods=26, span=26),
+            "macd_signal": EWMean(min_periods=9, span=9),
+            "sma_20": RollingMean(20),
+            "sma_50": RollingMean(50),
+            "std_20": RollingStd(20, ddof=0),
+            "support": RollingExtreme(20, "min"),
+            "resistance": RollingExtreme(20, "max"),
+            "stoch_low": RollingExtreme(14, "min"),
+            "stoch_high": RollingExtreme(14, "max"),
+            "volatility_1h": RollingStd(60),
+            "volatility_4h": RollingStd(240),
+        }
+
+    def _price_change(self, periods: int) -> float:
+        if len(self.prices) <= periods:
+            return NAN
+        return (_div(self.prices[-1], self.prices[-1 - periods]) - 1) * 100
+
+    def update(self, timestamp: int, price: float, volume: float) -> Dict[str, float]:
+        """
+        Add one bar and return its feature row.
+
+        Args:
+            timestamp: Bar time (epoch seconds)
+            price: Close price
+            volume: Bar volume
+
+        Returns:
+            Dict of feature column -> value
+        """
+        ind = self.indicators
+        prev_price = self.prices[-1] if self.prices else NAN
+        self.prices.append(price)
+        self.bars_seen += 1
+        self.last_timestamp = timestamp
+
+        diff = price - prev_price
+        ret = _div(price, prev_price) - 1
+
+        f = {}
+        f["price_change_5m"] = self._price_change(5)
+        f["price_change_15m"] = self._price_change(15)
+        f["price_change_1h"] = self._price_change(60)
+        f["price_change_4h"] = self._price_change(240)
+
+        f["volume_ratio"] = _div(volume, ind["volume_mean_60"].update(volume))
+
+        f["rsi_14"] = ind["rsi_14"].update(diff)
+        f["rsi_30"] = ind["rsi_30"].update(diff)
+
+        ema_12 = ind["ema_12"].update(price)
+        ema_26 = ind["ema_26"].update(price)
+        macd = ema_12 - ema_26
+        macd_signal = ind["macd_signal"].update(macd)
+        f["macd"] = macd
+        f["macd_signal"] = macd_signal
+        f["macd_diff"] = macd - macd_signal
+
+        sma_20 = ind["sma_20"].update(price)
+        std_20 = ind["std_20"].update(price)
+        high_band = sma_20 + 2 * std_20
+        low_band = sma_20 - 2 * std_20
+        f["bb_high_band"] = high_band
+        f["bb_low_band"] = low_band
+        f["bb_middle_band"] = sma_20
+        f["bb_width"] = _div(high_band - low_band, sma_20)
+        f["bb_position"] = _div(price - low_band, high_band - low_band)
+
+        sma_50 = ind["sma_50"].update(price)
+        f["sma_20"] = sma_20
+        f["sma_50"] = sma_50
+        f["ema_12"] = ema_12
+        f["ema_26"] = ema_26
+        f["distance_from_sma20"] = _div(price - sma_20, sma_20) * 100
+        f["distance_from_sma50"] = _div(price - sma_50, sma_50) * 100
+
+        support = ind["support"].update(price)
+        resistance = ind["resistance"].update(price)
+        f["distance_from_support"] = _div(price - support, support) * 100
+        f["distance_from_resistance"] = _div(price - resistance, resistance) * 100
+
+        f["volatility_1h"] = ind["volatility_1h"].update(ret) * 100
+        f["volatility_4h"] = ind["volatility_4h"].update(ret) * 100
+
+        self.obv += -volume if price < prev_price else volume
+        f["obv"] = self.obv
+        f["volume_sma_ratio"] = _div(volume, ind["volume_mean_20"].update(volume))
+
+        f["roc_12"] = (
+            _div(price - self.prices[-13], self.prices[-13]) * 100
+            if len(self.prices) > 12
+            else NAN
+        )
+        low = ind["stoch_low"].update(price)
+        high = ind["stoch_high"].update(price)
+        f["stoch_k"] = _div(100 * (price - low), high - low)
+
+        # Match the batch path: zero-fill some columns, forward-fill the rest
+        row = {}
+        for column in FEATURE_COLUMNS:
+            value = f[column]
+            if value != value:
+                value = 0.0 if column in ZERO_FILLED else self.last_values[column]
+            self.last_values[column] = value
+            row[column] = value
+        return row
+
+    def update_many(
+        self, timestamps: List[int], prices: List[float], volumes: List[float]
+    ) -> List[Dict[str, float]]:
+        """Add several bars in order and return their feature rows."""
+        return [self.update(t, p, v) for t, p, v in zip(timestamps, prices, volumes)]
+
+    def get_state(self) -> Dict:
+        """Dump the engine state as JSON-serializable types."""
+        return {
+            "version": STATE_VERSION,
+            "symbol": self.symbol,
+            "last_timestamp": self.last_timestamp,
+            "bars_seen": self.bars_seen,
+            "prices": list(self.prices),
+            "obv": self.obv,
+            "last_values": self.last_values,
+            "indicators": {
+                name: indicator.get_state()
+                for name, indicator in self.indicators.items()
+            },
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict) -> "IncrementalFeatureEngine":
+        """Rebuild an engine from get_state() output."""
+        if state.get("version") != STATE_VERSION:
+            raise ValueError(
+                f"Unsupported feature state version {state.get('version')}"
+            )
+
+        engine = cls(state["symbol"])
+        engine.last_timestamp = state["last_timestamp"]
+        engine.bars_seen = state["bars_seen"]
+        engine.prices.extend(state["prices"])
+        engine.obv = state["obv"]
+        engine.last_values.update(state["last_values"])
+        for name, indicator_state in state["indicators"].items():
+            engine.indicators[name].set_state(indicator_state)
+        return engine
+
+    def save(self, path: Path):
+        """Write the engine state to a JSON file (atomically)."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.get_state(), f)
+        tmp_path.replace(path)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["IncrementalFeatureEngine"]:
+        """Load an engine saved with save(), or None if missing or unreadable."""
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r") as f:
+                return cls.from_state(json.load(f))
+        except Exception as e:
+            logger.warning(f"Could not load feature state from {path}: {e}")
+            return None
@@ -0,0 +1,403 @@
+"""
+Label Pipeline
+Shared runner for the generate_*_labels scripts
+
+Symbols are sharded across a process pool with one label generator per
+worker process. Finished symbols stream through a bounded queue to a
+single writer thread that batches their rows into bulk upserts, and each
+symbol is checkpointed once its rows are written, so an interrupted run
+resumes with the symbols it had not finished.
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import queue
+import threading
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+DEFAULT_CHECKPOINT_DIR = "data/label_checkpoints"
+
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, "item"):  # NumPy scalars
+        return value.item()
+    return str(value)
+
+
+def normalize_labels(labels: List[Dict]) -> List[Dict]:
+    """JSON round-trip: NumPy scalars become numbers, other objects strings"""
+    return json.loads(json.dumps(labels, default=_json_default))
+
+
+@dataclass
+class LabelJob:
+    """
+    What a label script runs for each symbol
+
+    The callables are sent to worker processes, so they must be
+    module-level functions or classes (functools.partial of one is fine).
+
+    Attributes:
+        name: Job name, used for the checkpoint directory
+        make_generator: Builds the label generator, once per worker process
+        label_symbol: (generator, symbol) -> labels for that symbol
+        table: Table the labels are upserted into (None keeps them local)
+        to_row: Label -> database row; None skips the label
+        on_conflict: Conflict columns for the upsert
+        config: Parameters the labels depend on. Checkpoints written with
+            a different config (or table) are discarded
+    """
+
+    name: str
+    make_generator: Callable[[], Any]
+    label_symbol: Callable[[Any, str], List[Dict]]
+    table: Optional[str] = None
+    to_row: Optional[Callable[[Dict], Optional[Dict]]] = None
+    on_conflict: str = "symbol,timestamp"
+    config: Optional[Dict] = None
+
+    @property
+    def fingerprint(self) -> str:
+        payload = json.dumps(
+            {"table": self.table, "config": self.config},
+            sort_keys=True,
+            default=_json_default,
+        )
+        return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+class LabelCheckpoint:
+    """
+    Per-symbol results of a job on disk
+
+    Each finished symbol's labels go to <directory>/<job>/<symbol>.json and
+    the symbol is then added to manifest.json. Both are replaced atomically,
+    so a crash never leaves a symbol marked done without its labels.
+    """
+
+    def __init__(self, directory: str, job: LabelJob):
+        self.directory = Path(directory) / job.name
+        self.manifest_path = self.directory / "manifest.json"
+        self.fingerprint = job.fingerprint
+        self.completed: Dict[str, int] = {}  # symbol -> label count
+
+    def load(self) -> Dict[str, int]:
+        """Read the manifest; a stale one (different fingerprint) is reset"""
+        self.completed = {}
+        if not self.manifest_path.exists():
+            return self.completed
+
+        try:
+            manifest = json.loads(self.manifest_path.read_text())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.manifest_path}: {e}")
+            self.reset()
+            return self.completed
+
+        if manifest.get("fingerprint") != self.fingerprint:
+            logger.info(
+                f"Label config changed since checkpoint {self.manifest_path}, "
+                "starting over"
+            )
+            self.reset()
+        else:
+            self.completed = manifest.get("completed", {})
+        return self.completed
+
+    def reset(self):
+        """Forget every finished symbol"""
+        self.completed = {}
+        if self.directory.exists():
+            for path in self.directory.glob("*.json"):
+                path.unlink()
+
+    def _symbol_path(self, symbol: str) -> Path:
+        return self.directory / f"{symbol.replace('/', '_')}.json"
+
+    def _write(self, path: Path, payload: Any):
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(payload, f, default=_json_default)
+        os.replace(tmp_path, path)
+
+    def labels(self, symbol: str) -> List[Dict]:
+        """Labels saved for a finished symbol"""
+        with open(self._symbol_path(symbol)) as f:
+            return json.load(f)
+
+    def mark_done(self, symbol: str, labels: List[Dict]):
+        """Save a symbol's labels, then record it as finished"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._write(self._symbol_path(symbol), labels)
+        self.completed[symbol] = len(labels)
+        self._write(
+            self.manifest_path,
+            {
+                "fingerprint": self.fingerprint,
+                "updated_at": datetime.now().isoformat(),
+                "completed": self.completed,
+            },
+        )
+
+
+# Worker-process state, set by the pool initializer
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(job: LabelJob):
+    _worker["job"] = job
+    _worker["generator"] = job.make_generator()
+
+
+def _label_symbol(
+    job: LabelJob, generator: Any, symbol: str
+) -> Tuple[str, List[Dict], Optional[str]]:
+    """Run one symbol, returning (symbol, labels, error)"""
+    try:
+        return symbol, job.label_symbol(generator, symbol) or [], None
+    except Exception as e:
+        return symbol, [], f"{type(e).__name__}: {e}"
+
+
+def _run_symbol(symbol: str) -> Tuple[str, List[Dict], Optional[str]]:
+    return _label_symbol(_worker["job"], _worker["generator"], symbol)
+
+
+class LabelPipeline:
+    """Runs a LabelJob over many symbols"""
+
+    def __init__(
+        self,
+        job: LabelJob,
+        supabase_client=None,
+        max_workers: Optional[int] = None,
+        checkpoint_dir: str = DEFAULT_CHECKPOINT_DIR,
+        queue_size: int = 16,
+        batch_size: int = 1000,
+    ):
+        """
+        Args:
+            job: What to run per symbol
+            supabase_client: SupabaseClient used by the writer (required
+                when the job has a table)
+            max_workers: Worker processes (default: CPU count); 1 labels
+                symbols in this process
+            checkpoint_dir: Where per-symbol checkpoints are kept
+            queue_size: Finished symbols waiting for the writer before the
+                workers' results are held back
+            batch_size: Rows collected before the writer upserts (it also
+                flushes whenever it has caught up with the queue)
+        """
+        if job.table and supabase_client is None:
+            raise ValueError(f"Job {job.name} writes to {job.table}: needs a client")
+
+        self.job = job
+        self.supabase = supabase_client
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.checkpoint_dir = checkpoint_dir
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.stats: Dict[str, int] = {}
+
+    def run(
+        self, symbols: List[str], resume: bool = True, generator: Any = None
+    ) -> Dict[str, List[Dict]]:
+        """
+        Label every symbol and write the rows
+
+        Args:
+            symbols: Symbols to label
+            resume: Reuse symbols finished by an earlier run with the same
+                config (False relabels everything)
+            generator: Generator to use when labelling in this process
+
+        Returns:
+            Dict of symbol -> labels (JSON-normalised, so symbols loaded from
+            the checkpoint look the same as new ones), in input order.
+            Symbols that failed are left out.
+        """
+        self.stats = {
+            "symbols": 0,
+            "resumed": 0,
+            "failed": 0,
+            "labels": 0,
+            "rows_written": 0,
+            "write_errors": 0,
+        }
+        checkpoint = LabelCheckpoint(self.checkpoint_dir, self.job)
+        if resume:
+            checkpoint.load()
+        else:
+            checkpoint.reset()
+
+        symbols = list(dict.fromkeys(symbols))
+        results = {
+            s: checkpoint.labels(s) for s in symbols if s in checkpoint.completed
+        }
+        pending = [s for s in symbols if s not in results]
+        self.stats["resumed"] = len(results)
+        if results:
+            logger.info(
+                f"Resuming {self.job.name} labels: {len(results)} symbols from "
+                f"checkpoint, {len(pending)} to go"
+            )
+
+        outbox: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        writer = threading.Thread(
+            target=self._write_loop,
+            args=(outbox, checkpoint, results),
+            name=f"{self.job.name}-label-writer",
+            daemon=True,
+        )
+        writer.start()
+
+        try:
+            for symbol, labels, error in self._label(pending, generator):
+                if error:
+                    logger.error(f"Error labelling {symbol}: {error}")
+                    self.stats["failed"] += 1
+                    continue
+                outbox.put((symbol, labels))  # Blocks while the writer is behind
+        finally:
+            outbox.put(None)
+            writer.join()
+
+        for labels in results.values():
+            self.stats["labels"] += len(labels)
+        self.stats["symbols"] = len(results)
+        logger.info(
+            f"{self.job.name} labels: {self.stats['labels']} for "
+            f"{self.stats['symbols']} symbols ({self.stats['resumed']} resumed, "
+            f"{self.stats['failed']} failed), {self.stats['rows_written']} rows written"
+        )
+        return {s: results[s] for s in symbols if s in results}
+
+    def _label(
+        self, symbols: List[str], generator: Any
+    ) -> Iterator[Tuple[str, List[Dict], Optional[str]]]:
+        """Yield (symbol, labels, error) as symbols finish"""
+        if not symbols:
+            return
+
+        if self.max_workers <= 1:
+            generator = (
+                generator if generator is not None else self.job.make_generator()
+            )
+            for symbol in symbols:
+                yield _label_symbol(self.job, generator, symbol)
+            return
+
+        workers = min(self.max_workers, len(symbols))
+        remaining = iter(symbols)
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(self.job,)
+        ) as pool:
+            # Keep a couple of symbols per worker in flight, no more, so
+            # finished labels don't pile up ahead of the writer
+            in_flight = {
+                pool.submit(_run_symbol, symbol)
+                for symbol in itertools.islice(remaining, workers * 2)
+            }
+            while in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+                    symbol = next(remaining, None)
+                    if symbol is not None:
+                        in_flight.add(pool.submit(_run_symbol, symbol))
+
+    def _rows(self, symbol: str, labels: List[Dict]) -> List[Dict]:
+        rows = []
+        for label in labels:
+            try:
+                row = self.job.to_row(label) if self.job.to_row else label
+            except Exception as e:
+                logger.error(
+                    f"Error preparing {symbol} label for {self.job.table}: {e}"
+                )
+                continue
+            if row is not None:
+                rows.append(row)
+        return rows
+
+    def _write_loop(
+        self,
+        outbox: queue.Queue,
+        checkpoint: LabelCheckpoint,
+        results: Dict[str, List[Dict]],
+    ):
+        buffered: List[Tuple[str, List[Dict]]] = []
+        rows: List[Dict] = []
+
+        while True:
+            item = outbox.get()
+            if item is not None:
+                symbol, labels = item
+                buffered.append((symbol, labels))
+                if self.job.table:
+                    rows.extend(self._rows(symbol, labels))
+
+            if buffered and (
+                item is None or len(rows) >= self.batch_size or outbox.empty()
+            ):
+                self._flush(buffered, rows, checkpoint, results)
+                buffered, rows = [], []
+
+            if item is None:
+                return
+
+    def _flush(
+        self,
+        buffered: List[Tuple[str, List[Dict]]],
+        rows: List[Dict],
+        checkpoint: LabelCheckpoint,
+        results: Dict[str, List[Dict]],
+    ):
+        """Upsert the buffered symbols' rows, then checkpoint them"""
+        written = True
+        if self.job.table and rows:
+            try:
+                self.stats["rows_written"] += self.supabase.bulk_upsert(
+                    self.job.table,
+                    normalize_labels(rows),
+                    on_conflict=self.job.on_conflict,
+                    ignore_duplicates=False,
+                )
+            except Exception as e:
+                logger.error(f"Error saving {len(rows)} rows to {self.job.table}: {e}")
+                self.stats["write_errors"] += len(buffered)
+                written = False
+
+        for symbol, labels in buffered:
+            results[symbol] = normalize_labels(labels)
+            if written:
+                checkpoint.mark_done(symbol, results[symbol])
+
+
+def add_label_pipeline_arguments(parser: argparse.ArgumentParser):
+    """--workers and --restart options shared by the label scripts"""
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes (default: CPU count, 1 runs in-process)",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore the checkpoint and relabel every symbol",
+    )
+    parser.add_argument(
+        "--checkpoint-dir",
+        default=DEFAULT_CHECKPOINT_DIR,
+        help=f"Checkpoint directory (default: {DEFAULT_CHECKPOINT_DIR})",
+    )
@@ -9,6 +9,7 @@ from typing import Dict, Optional, Any
 from loguru import logger
 
 from src.config import Settings
+from src.data.latest_prices import get_latest_price_service
 from src.data.supabase_client import SupabaseClient
 
 
@@ -124,13 +125,18 @@ class HealthChecker:
 
     async def _check_price_sanity(self):
         """Check for abnormal price movements."""
+        # Track price changes between checks
+        price_changes = {}
+
         while self.running:
             try:
-                # Track price changes
-                price_changes = {}
+                symbols = self.data_collector.get_active_symbols()[:10]
+                quotes = get_latest_price_service(self.db_client).get(symbols)
 
-                for symbol in self.data_collector.get_active_symbols()[:10]:
-                    current_price = self.data_collector.get_last_price(symbol)
+                for symbol, quote in quotes.items():
+                    if quote.stale:
+                        continue
+                    current_price = quote.price
 
                     if symbol in price_changes and current_price:
                         last_price = price_changes[symbol]
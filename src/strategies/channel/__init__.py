@@ -5,5 +5,6 @@ Identifies and trades price channels in all market conditions
 
 from .detector import ChannelDetector
 from .executor import ChannelExecutor
+from .sliding import SlidingChannelEngine
 
-__all__ = ["ChannelDetector", "ChannelExecutor"]
+__all__ = ["ChannelDetector", "ChannelExecutor", "SlidingChannelEngine"]
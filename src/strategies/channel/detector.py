@@ -9,7 +9,7 @@ import pandas as pd
 from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 from loguru import logger
-from scipy import stats
+from numpy.lib.stride_tricks import sliding_window_view
 from dataclasses import dataclass
 
 
@@ -99,23 +99,109 @@ class ChannelDetector:
         Returns:
             Channel object if found, None otherwise
         """
+        channel = self.find_channel(symbol, ohlc_data)
+
+        if channel and channel.is_valid:
+            logger.info(
+                f"Valid {channel.channel_type} channel detected for {symbol}: "
+                f"Width={channel.width:.2%}, Strength={channel.strength:.2f}, "
+                f"Position={channel.current_position:.2f}"
+            )
+            return channel
+
+        return None
+
+    def find_channel(self, symbol: str, ohlc_data: List[Dict]) -> Optional[Channel]:
+        """
+        Fit a channel to the most recent lookback_periods bars
+
+        Same as detect_channel without the final Channel.is_valid filter.
+
+        Args:
+            symbol: Trading symbol
+            ohlc_data: List of OHLC bars (most recent first)
+        """
         if len(ohlc_data) < self.lookback_periods:
             return None
 
-        # Convert to DataFrame for easier analysis
-        df = pd.DataFrame(ohlc_data[: self.lookback_periods])
-        df = df.sort_values("timestamp")  # Ensure chronological order
+        bars = ohlc_data[: self.lookback_periods]
+        timestamps = [bar["timestamp"] for bar in bars]
+
+        # Chronological order; row_labels keep each bar's input position,
+        # which channel strength is scored against
+        order = np.argsort(np.array(timestamps), kind="stable")
+        high = np.array([bar["high"] for bar in bars], dtype=float)[order]
+        low = np.array([bar["low"] for bar in bars], dtype=float)[order]
+        close = np.array([bar["close"] for bar in bars], dtype=float)[order]
+
+        return self.find_channel_arrays(
+            symbol,
+            high,
+            low,
+            close,
+            start_time=timestamps[order[0]],
+            end_time=timestamps[order[-1]],
+            row_labels=order,
+        )
+
+    def detect_channel_arrays(
+        self,
+        symbol: str,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        start_time=None,
+        end_time=None,
+        row_labels: Optional[np.ndarray] = None,
+    ) -> Optional[Channel]:
+        """
+        Detect a channel from pre-built arrays, skipping dict/DataFrame handling
+
+        Args:
+            symbol: Trading symbol
+            high, low, close: Float arrays of the last lookback_periods bars,
+                oldest first
+            start_time, end_time: Timestamps of the first and last bar
+            row_labels: Position of each bar in detect_channel's input;
+                defaults to most-recent-first order
+
+        Returns:
+            Channel object if found, None otherwise
+        """
+        channel = self.find_channel_arrays(
+            symbol, high, low, close, start_time, end_time, row_labels
+        )
+        return channel if channel and channel.is_valid else None
+
+    def find_channel_arrays(
+        self,
+        symbol: str,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        start_time=None,
+        end_time=None,
+        row_labels: Optional[np.ndarray] = None,
+    ) -> Optional[Channel]:
+        """Array version of find_channel (oldest bar first)"""
+        if len(close) < self.lookback_periods:
+            return None
+        if len(close) > self.lookback_periods:
+            recent = slice(len(close) - self.lookback_periods, None)
+            high, low, close = high[recent], low[recent], close[recent]
+            if row_labels is not None:
+                row_labels = row_labels[recent]
 
         # Find local highs and lows
-        highs = self._find_local_extremes(df["high"].values, is_high=True)
-        lows = self._find_local_extremes(df["low"].values, is_high=False)
+        highs = self._find_local_extremes(high, is_high=True)
+        lows = self._find_local_extremes(low, is_high=False)
 
         if len(highs) < self.min_touches or len(lows) < self.min_touches:
             return None
 
         # Fit lines to highs and lows
-        upper_line = self._fit_line(highs, df["high"].values)
-        lower_line = self._fit_line(lows, df["low"].values)
+        upper_line = self._fit_line(highs, high)
+        lower_line = self._fit_line(lows, low)
 
         if upper_line is None or lower_line is None:
             return None
@@ -124,18 +210,21 @@ class ChannelDetector:
         if not self._are_parallel(upper_line, lower_line):
             return None
 
-        # Calculate channel properties
-        channel = self._create_channel(symbol, df, upper_line, lower_line, highs, lows)
-
-        if channel and channel.is_valid:
-            logger.info(
-                f"Valid {channel.channel_type} channel detected for {symbol}: "
-                f"Width={channel.width:.2%}, Strength={channel.strength:.2f}, "
-                f"Position={channel.current_position:.2f}"
-            )
-            return channel
+        if row_labels is None:
+            row_labels = np.arange(len(close))[::-1]
 
-        return None
+        # Calculate channel properties
+        return self._create_channel(
+            symbol,
+            high,
+            low,
+            close,
+            upper_line,
+            lower_line,
+            start_time,
+            end_time,
+            row_labels,
+        )
 
     def _find_local_extremes(
         self, prices: np.ndarray, is_high: bool, window: int = 3
@@ -143,34 +232,37 @@ class ChannelDetector:
         """
         Find local highs or lows in price data
         """
-        extremes = []
-
-        for i in range(window, len(prices) - window):
-            window_prices = prices[i - window : i + window + 1]
-
+        prices = np.asarray(prices, dtype=float)
+        n = len(prices)
+        if n < 2 * window + 1:
+            extremes = []
+        else:
+            neighbourhood = sliding_window_view(prices, 2 * window + 1)
+            centre = prices[window : n - window]
             if is_high:
                 # More lenient: price is at or near max
-                if prices[i] >= np.max(window_prices) * 0.999:
-                    extremes.append(i)
+                near = centre >= neighbourhood.max(axis=1) * 0.999
             else:
                 # More lenient: price is at or near min
-                if prices[i] <= np.min(window_prices) * 1.001:
-                    extremes.append(i)
+                near = centre <= neighbourhood.min(axis=1) * 1.001
+            extremes = (np.flatnonzero(near) + window).tolist()
 
         # Ensure we have enough points
-        if len(extremes) < 2:
+        if len(extremes) < 2 and n >= 5:
             # Try to find more by being even more lenient
-            for i in range(2, len(prices) - 2):
-                if is_high and prices[i] > prices[i - 1] and prices[i] > prices[i + 1]:
-                    if i not in extremes:
-                        extremes.append(i)
-                elif (
-                    not is_high
-                    and prices[i] < prices[i - 1]
-                    and prices[i] < prices[i + 1]
-                ):
-                    if i not in extremes:
-                        extremes.append(i)
+            centre, before, after = (
+                prices[2 : n - 2],
+                prices[1 : n - 3],
+                prices[3 : n - 1],
+            )
+            if is_high:
+                turning = (centre > before) & (centre > after)
+            else:
+                turning = (centre < before) & (centre < after)
+            found = set(extremes)
+            extremes += [
+                i for i in (np.flatnonzero(turning) + 2).tolist() if i not in found
+            ]
 
         return extremes
 
@@ -184,20 +276,30 @@ class ChannelDetector:
         if len(indices) < 2:
             return None
 
-        x = np.array(indices)
-        y = np.array([prices[i] for i in indices])
+        x = np.asarray(indices, dtype=float)
+        y = np.asarray(prices, dtype=float)[np.asarray(indices)]
 
-        try:
-            slope, intercept, r_value, _, _ = stats.linregress(x, y)
+        # Closed-form least squares (same quantities as scipy.stats.linregress)
+        dx = x - x.mean()
+        dy = y - y.mean()
+        ssxm = np.mean(dx * dx)
+        ssym = np.mean(dy * dy)
+        ssxym = np.mean(dx * dy)
+        if ssxm == 0:
+            return None
 
-            # Check if fit is good enough (raised threshold for better quality)
-            if abs(r_value) < 0.6:  # R-squared threshold (was 0.5)
-                return None
+        if ssym == 0:
+            r_value = np.nan if ssxym == 0 else 0.0
+        else:
+            r_value = ssxym / np.sqrt(ssxm * ssym)
 
-            return (slope, intercept)
-        except Exception:
+        # Check if fit is good enough (raised threshold for better quality)
+        if abs(r_value) < 0.6:  # R-squared threshold (was 0.5)
             return None
 
+        slope = ssxym / ssxm
+        return (slope, y.mean() - slope * x.mean())
+
     def _are_parallel(
         self, line1: Tuple[float, float], line2: Tuple[float, float]
     ) -> bool:
@@ -225,11 +327,14 @@ class ChannelDetector:
     def _create_channel(
         self,
         symbol: str,
-        df: pd.DataFrame,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
         upper_line: Tuple[float, float],
         lower_line: Tuple[float, float],
-        highs: List[int],
-        lows: List[int],
+        start_time,
+        end_time,
+        row_labels: np.ndarray,
     ) -> Optional[Channel]:
         """
         Create Channel object from detected lines
@@ -238,12 +343,12 @@ class ChannelDetector:
         slope_lower, intercept_lower = lower_line
 
         # Calculate current channel boundaries
-        current_idx = len(df) - 1
+        current_idx = len(close) - 1
         upper_current = slope_upper * current_idx + intercept_upper
         lower_current = slope_lower * current_idx + intercept_lower
 
         # Channel width
-        avg_price = df["close"].mean()
+        avg_price = close.mean()
         width = (upper_current - lower_current) / avg_price
 
         # Check width constraints
@@ -251,16 +356,22 @@ class ChannelDetector:
             return None
 
         # Count touches
-        touches_upper = self._count_touches(df["high"].values, upper_line)
-        touches_lower = self._count_touches(df["low"].values, lower_line)
+        touches_upper = self._count_touches(high, upper_line)
+        touches_lower = self._count_touches(low, lower_line)
 
         # Calculate channel strength (based on touches and consistency)
         strength = self._calculate_strength(
-            df, upper_line, lower_line, touches_upper, touches_lower
+            high,
+            low,
+            upper_line,
+            lower_line,
+            touches_upper,
+            touches_lower,
+            row_labels,
         )
 
         # Current position in channel
-        current_price = df["close"].iloc[-1]
+        current_price = close[-1]
         position = (current_price - lower_current) / (upper_current - lower_current)
         position = max(0, min(1, position))  # Clamp to [0, 1]
 
@@ -276,8 +387,8 @@ class ChannelDetector:
             touches_upper=touches_upper,
             touches_lower=touches_lower,
             strength=strength,
-            start_time=pd.to_datetime(df["timestamp"].iloc[0]),
-            end_time=pd.to_datetime(df["timestamp"].iloc[-1]),
+            start_time=pd.to_datetime(start_time),
+            end_time=pd.to_datetime(end_time),
             current_position=position,
         )
 
@@ -286,24 +397,21 @@ class ChannelDetector:
         Count how many times price touches a line
         """
         slope, intercept = line
-        touches = 0
-
-        for i, price in enumerate(prices):
-            line_value = slope * i + intercept
-            distance = abs(price - line_value) / line_value
-
-            if distance <= self.touch_tolerance:
-                touches += 1
+        line_values = slope * np.arange(len(prices)) + intercept
+        with np.errstate(divide="ignore", invalid="ignore"):
+            distance = np.abs(prices - line_values) / line_values
 
-        return touches
+        return int(np.count_nonzero(distance <= self.touch_tolerance))
 
     def _calculate_strength(
         self,
-        df: pd.DataFrame,
+        high: np.ndarray,
+        low: np.ndarray,
         upper_line: Tuple[float, float],
         lower_line: Tuple[float, float],
         touches_upper: int,
         touches_lower: int,
+        row_labels: np.ndarray,
     ) -> float:
         """
         Calculate channel strength score (0-1)
@@ -311,31 +419,24 @@ class ChannelDetector:
         # Factor 1: Number of touches
         touch_score = min(1.0, (touches_upper + touches_lower) / 10)
 
-        # Factor 2: Price containment (how well price stays within channel)
-        contained = 0
-        total = len(df)
-
+        # Factor 2: Price containment (how well price stays within channel).
+        # Lines are evaluated at each bar's row label (its position in the
+        # most-recent-first input), as the DataFrame version did
         slope_upper, intercept_upper = upper_line
         slope_lower, intercept_lower = lower_line
 
-        for i, row in df.iterrows():
-            idx = i if isinstance(i, int) else list(df.index).index(i)
-            upper_value = slope_upper * idx + intercept_upper
-            lower_value = slope_lower * idx + intercept_lower
-
-            if lower_value <= row["low"] and row["high"] <= upper_value:
-                contained += 1
-
-        containment_score = contained / total
+        upper_values = slope_upper * row_labels + intercept_upper
+        lower_values = slope_lower * row_labels + intercept_lower
+        contained = np.count_nonzero((lower_values <= low) & (high <= upper_values))
+        containment_score = contained / len(high)
 
         # Factor 3: Channel consistency (low variance in width)
-        widths = []
-        for i in range(0, len(df), 10):  # Sample every 10 bars
-            upper_value = slope_upper * i + intercept_upper
-            lower_value = slope_lower * i + intercept_lower
-            widths.append(upper_value - lower_value)
+        sampled = np.arange(0, len(high), 10)  # Sample every 10 bars
+        widths = (slope_upper * sampled + intercept_upper) - (
+            slope_lower * sampled + intercept_lower
+        )
 
-        width_variance = np.std(widths) / np.mean(widths) if widths else 1
+        width_variance = np.std(widths) / np.mean(widths) if len(widths) else 1
         consistency_score = max(0, 1 - width_variance)
 
         # Weighted average
@@ -0,0 +1,297 @@
+"""
+Sliding-window channel engine
+Runs ChannelDetector's channel detection over every window of a series at once
+
+Label generation slides a lookback window one bar at a time. Instead of
+rebuilding a DataFrame and refitting per step, local extremes are flagged
+once for the whole series (their 7-bar neighbourhood never depends on
+where the window starts), and the least-squares fits, touch counts and
+strength scores are computed for chunks of windows with NumPy over
+sliding_window_view arrays.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .detector import Channel, ChannelDetector
+
+EXTREME_WINDOW = 3  # ChannelDetector._find_local_extremes default
+
+
+class SlidingChannelEngine:
+    """
+    Vectorized equivalent of ChannelDetector.detect_channel for every window
+
+    Window w covers bars [w, w + lookback_periods) of a chronological
+    series and gives the same channel as calling
+    detector.detect_channel(symbol, list(reversed(ohlc_data[w:w + lookback])))
+    """
+
+    def __init__(self, detector: ChannelDetector, chunk_size: int = 20000):
+        """
+        Args:
+            detector: Detector whose parameters are used
+            chunk_size: Windows evaluated per NumPy pass (bounds memory)
+        """
+        self.detector = detector
+        self.chunk_size = chunk_size
+
+    def _extreme_flags(self, prices: np.ndarray, is_high: bool):
+        """Per-bar flags for the two passes of _find_local_extremes"""
+        n = len(prices)
+        w = EXTREME_WINDOW
+        near = np.zeros(n, dtype=bool)
+        strict = np.zeros(n, dtype=bool)
+
+        if n >= 2 * w + 1:
+            neighbourhood = sliding_window_view(prices, 2 * w + 1)
+            centre = prices[w : n - w]
+            if is_high:
+                near[w : n - w] = centre >= neighbourhood.max(axis=1) * 0.999
+            else:
+                near[w : n - w] = centre <= neighbourhood.min(axis=1) * 1.001
+
+        if n >= 3:
+            centre, before, after = prices[1:-1], prices[:-2], prices[2:]
+            if is_high:
+                strict[1:-1] = (centre > before) & (centre > after)
+            else:
+                strict[1:-1] = (centre < before) & (centre < after)
+
+        return near, strict
+
+    def _extremes(self, near: np.ndarray, strict: np.ndarray) -> np.ndarray:
+        """(windows, lookback) mask of the extremes each window would find"""
+        lookback = near.shape[1]
+        w = EXTREME_WINDOW
+
+        mask = np.zeros(near.shape, dtype=bool)
+        mask[:, w : lookback - w] = near[:, w : lookback - w]
+
+        # Fewer than two extremes falls back to strict local turning points
+        fallback = mask.sum(axis=1) < 2
+        mask[fallback, 2 : lookback - 2] |= strict[fallback, 2 : lookback - 2]
+        return mask
+
+    @staticmethod
+    def _fit(mask: np.ndarray, values: np.ndarray):
+        """
+        Masked least-squares fits per window, as scipy.stats.linregress
+
+        Returns:
+            (slope, intercept, accepted) arrays; accepted is False where
+            _fit_line would return None
+        """
+        count = mask.sum(axis=1)
+        x = np.broadcast_to(np.arange(mask.shape[1], dtype=float), mask.shape)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            x_mean = np.where(mask, x, 0).sum(axis=1) / count
+            y_mean = np.where(mask, values, 0).sum(axis=1) / count
+            dx = np.where(mask, x - x_mean[:, None], 0)
+            dy = np.where(mask, values - y_mean[:, None], 0)
+            ssxm = (dx * dx).sum(axis=1) / count
+            ssym = (dy * dy).sum(axis=1) / count
+            ssxym = (dx * dy).sum(axis=1) / count
+
+            denominator = ssxm * ssym
+            r = np.where(
+                denominator == 0,
+                np.where(ssxym == 0, np.nan, 0.0),
+                ssxym / np.sqrt(denominator),
+            )
+            slope = ssxym / ssxm
+            intercept = y_mean - slope * x_mean
+
+        # abs(nan) < 0.6 is False, so a flat fit is kept like in _fit_line
+        accepted = (count >= 2) & ~(np.abs(np.clip(r, -1.0, 1.0)) < 0.6)
+        return slope, intercept, accepted
+
+    def _are_parallel(self, slope1: np.ndarray, slope2: np.ndarray) -> np.ndarray:
+        tolerance = self.detector.parallel_tolerance
+        horizontal = (np.abs(slope1) < 0.0001) & (np.abs(slope2) < 0.0001)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = np.abs(slope1 / slope2)
+        similar = (
+            (slope1 != 0)
+            & (slope2 != 0)
+            & ((1 - tolerance) <= ratio)
+            & (ratio <= (1 + tolerance))
+        )
+        return horizontal | similar
+
+    def scan(self, ohlc_data: List[Dict]) -> Dict[str, np.ndarray]:
+        """
+        Evaluate every window of a chronological OHLC series
+
+        Returns:
+            Dict of arrays indexed by window start: found (a channel was
+            created, before Channel.is_valid), upper_line, lower_line,
+            slope, width, touches_upper, touches_lower, strength,
+            current_position
+        """
+        lookback = self.detector.lookback_periods
+        n = len(ohlc_data)
+        windows = max(0, n - lookback + 1)
+
+        result = {
+            "found": np.zeros(windows, dtype=bool),
+            "upper_line": np.full(windows, np.nan),
+            "lower_line": np.full(windows, np.nan),
+            "slope": np.full(windows, np.nan),
+            "width": np.full(windows, np.nan),
+            "touches_upper": np.zeros(windows, dtype=int),
+            "touches_lower": np.zeros(windows, dtype=int),
+            "strength": np.full(windows, np.nan),
+            "current_position": np.full(windows, np.nan),
+        }
+        if windows == 0:
+            return result
+
+        high = np.array([float(bar["high"]) for bar in ohlc_data])
+        low = np.array([float(bar["low"]) for bar in ohlc_data])
+        close = np.array([float(bar["close"]) for bar in ohlc_data])
+
+        near_high, strict_high = self._extreme_flags(high, is_high=True)
+        near_low, strict_low = self._extreme_flags(low, is_high=False)
+
+        views = {
+            "high": sliding_window_view(high, lookback),
+            "low": sliding_window_view(low, lookback),
+            "close": sliding_window_view(close, lookback),
+            "near_high": sliding_window_view(near_high, lookback),
+            "strict_high": sliding_window_view(strict_high, lookback),
+            "near_low": sliding_window_view(near_low, lookback),
+            "strict_low": sliding_window_view(strict_low, lookback),
+        }
+
+        for start in range(0, windows, self.chunk_size):
+            chunk = slice(start, min(windows, start + self.chunk_size))
+            self._scan_chunk(chunk, views, result)
+
+        return result
+
+    def _scan_chunk(self, chunk: slice, views: Dict, result: Dict):
+        detector = self.detector
+        lookback = detector.lookback_periods
+        last = lookback - 1
+
+        highs = self._extremes(views["near_high"][chunk], views["strict_high"][chunk])
+        lows = self._extremes(views["near_low"][chunk], views["strict_low"][chunk])
+        high = views["high"][chunk]
+        low = views["low"][chunk]
+
+        enough = (highs.sum(axis=1) >= detector.min_touches) & (
+            lows.sum(axis=1) >= detector.min_touches
+        )
+        upper_slope, upper_intercept, upper_ok = self._fit(highs, high)
+        lower_slope, lower_intercept, lower_ok = self._fit(lows, low)
+        candidate = (
+            enough & upper_ok & lower_ok & self._are_parallel(upper_slope, lower_slope)
+        )
+
+        upper_current = upper_slope * last + upper_intercept
+        lower_current = lower_slope * last + lower_intercept
+        width = (upper_current - lower_current) / views["close"][chunk].mean(axis=1)
+        candidate &= ~(
+            (width < detector.min_channel_width) | (width > detector.max_channel_width)
+        )
+
+        rows = np.flatnonzero(candidate)
+        if len(rows) == 0:
+            return
+
+        su, iu = upper_slope[rows, None], upper_intercept[rows, None]
+        sl, il = lower_slope[rows, None], lower_intercept[rows, None]
+        x = np.arange(lookback)
+
+        # _count_touches (distance is relative to the line value, signed)
+        upper_values = su * x + iu
+        lower_values = sl * x + il
+        with np.errstate(divide="ignore", invalid="ignore"):
+            touches_upper = (
+                np.abs(high[rows] - upper_values) / upper_values
+                <= detector.touch_tolerance
+            ).sum(axis=1)
+            touches_lower = (
+                np.abs(low[rows] - lower_values) / lower_values
+                <= detector.touch_tolerance
+            ).sum(axis=1)
+
+        # _calculate_strength. Containment is evaluated at the bar's
+        # DataFrame row label, which for most-recent-first input is the
+        # reversed position
+        touch_score = np.minimum(1.0, (touches_upper + touches_lower) / 10)
+        label = x[::-1]
+        contained = (sl * label + il <= low[rows]) & (high[rows] <= su * label + iu)
+        containment_score = contained.sum(axis=1) / lookback
+
+        sampled = np.arange(0, lookback, 10)
+        widths = (su * sampled + iu) - (sl * sampled + il)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            width_variance = np.std(widths, axis=1) / np.mean(widths, axis=1)
+        consistency_score = np.maximum(0, 1 - width_variance)
+        strength = np.minimum(
+            1.0, touch_score * 0.3 + containment_score * 0.5 + consistency_score * 0.2
+        )
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            position = (views["close"][chunk][rows, last] - lower_current[rows]) / (
+                upper_current[rows] - lower_current[rows]
+            )
+
+        index = np.arange(chunk.start, chunk.stop)[rows]
+        result["found"][index] = True
+        result["upper_line"][index] = upper_current[rows]
+        result["lower_line"][index] = lower_current[rows]
+        result["slope"][index] = (upper_slope[rows] + lower_slope[rows]) / 2
+        result["width"][index] = width[rows]
+        result["touches_upper"][index] = touches_upper
+        result["touches_lower"][index] = touches_lower
+        result["strength"][index] = strength
+        result["current_position"][index] = [max(0, min(1, p)) for p in position]
+
+    def channels(
+        self,
+        symbol: str,
+        ohlc_data: List[Dict],
+        valid_only: bool = True,
+        scan: Optional[Dict[str, np.ndarray]] = None,
+    ) -> Dict[int, Channel]:
+        """
+        Channels for every window, keyed by the window's exclusive end index
+
+        The key i matches the loop in generate_channel_labels: the window is
+        ohlc_data[i - lookback_periods : i].
+
+        Args:
+            symbol: Trading symbol
+            ohlc_data: Chronological OHLC bars
+            valid_only: Only return channels passing Channel.is_valid (what
+                detect_channel returns)
+            scan: Precomputed result of scan(ohlc_data)
+        """
+        scan = scan if scan is not None else self.scan(ohlc_data)
+        lookback = self.detector.lookback_periods
+
+        channels = {}
+        for start in np.flatnonzero(scan["found"]):
+            channel = Channel(
+                symbol=symbol,
+                upper_line=float(scan["upper_line"][start]),
+                lower_line=float(scan["lower_line"][start]),
+                slope=float(scan["slope"][start]),
+                width=float(scan["width"][start]),
+                touches_upper=int(scan["touches_upper"][start]),
+                touches_lower=int(scan["touches_lower"][start]),
+                strength=float(scan["strength"][start]),
+                start_time=pd.to_datetime(ohlc_data[start]["timestamp"]),
+                end_time=pd.to_datetime(ohlc_data[start + lookback - 1]["timestamp"]),
+                current_position=float(scan["current_position"][start]),
+            )
+            if channel.is_valid or not valid_only:
+                channels[int(start) + lookback] = channel
+        return channels
@@ -17,6 +17,7 @@ from enum import Enum
 from loguru import logger
 import pandas as pd
 
+from src.data.latest_prices import get_latest_price_service
 from src.data.supabase_client import SupabaseClient
 from src.strategies.dca.grid import GridCalculator
 from src.trading.position_sizer import AdaptivePositionSizer
@@ -334,17 +335,7 @@ class DCAExecutor:
             if self.paper_trader:
                 return await self.paper_trader.get_price(symbol)
             else:
-                # Get from database (most recent price)
-                result = (
-                    self.supabase.client.table("unified_ohlc")
-                    .select("close")
-                    .eq("symbol", symbol)
-                    .order("timestamp", desc=True)
-                    .limit(1)
-                    .execute()
-                )
-                if result.data:
-                    return result.data[0]["close"]
+                return get_latest_price_service(self.supabase).price(symbol)
         except Exception as e:
             logger.error(f"Error getting price for {symbol}: {e}")
         return None
@@ -3,7 +3,7 @@ Market Regime Detector - MVP Circuit Breaker Version
 Provides fast protection against flash crashes and market panics
 """
 
-from typing import Dict, Optional, Tuple, List
+from typing import Callable, Deque, Dict, Optional, Tuple, List
 from datetime import datetime, timedelta
 from collections import deque
 from loguru import logger
@@ -26,6 +26,96 @@ class MarketRegime(Enum):
     NORMAL = "NORMAL"  # Business as usual
 
 
+class RollingPriceWindow:
+    """
+    Prices from the last `hours` hours with O(1) high/low/open/last
+
+    Keeps monotonic deques for the running max and min so each price is
+    pushed and expired at most once (amortized O(1) per update).
+    """
+
+    def __init__(self, hours: float):
+        self.span = timedelta(hours=hours)
+        self.prices: Deque[Tuple[datetime, float]] = deque()
+        self._max: Deque[Tuple[datetime, float]] = deque()  # Decreasing prices
+        self._min: Deque[Tuple[datetime, float]] = deque()  # Increasing prices
+
+    def push(self, timestamp: datetime, price: float):
+        """Add a price (timestamps must not go backwards)"""
+        self.prices.append((timestamp, price))
+        while self._max and self._max[-1][1] <= price:
+            self._max.pop()
+        self._max.append((timestamp, price))
+        while self._min and self._min[-1][1] >= price:
+            self._min.pop()
+        self._min.append((timestamp, price))
+
+    def expire(self, now: datetime):
+        """Drop prices older than the window relative to `now`"""
+        cutoff = now - self.span
+        while self.prices and self.prices[0][0] < cutoff:
+            self.prices.popleft()
+        while self._max and self._max[0][0] < cutoff:
+            self._max.popleft()
+        while self._min and self._min[0][0] < cutoff:
+            self._min.popleft()
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    @property
+    def high(self) -> float:
+        return self._max[0][1]
+
+    @property
+    def low(self) -> float:
+        return self._min[0][1]
+
+    @property
+    def open(self) -> float:
+        return self.prices[0][1]
+
+    @property
+    def last(self) -> float:
+        return self.prices[-1][1]
+
+    def clear(self):
+        self.prices.clear()
+        self._max.clear()
+        self._min.clear()
+
+
+class PriceLookback:
+    """
+    Tracks the price as of `hours` before the newest update
+
+    Prices wait in a queue until they are at least `hours` older than the
+    newest price, then become the anchor. Each update is amortized O(1).
+    """
+
+    def __init__(self, hours: float):
+        self.span = timedelta(hours=hours)
+        self.pending: Deque[Tuple[datetime, float]] = deque()
+        self.anchor: Optional[Tuple[datetime, float]] = None
+
+    def push(self, timestamp: datetime, price: float):
+        """Add a price (timestamps must not go backwards)"""
+        self.pending.append((timestamp, price))
+        target = timestamp - self.span
+        while self.pending and self.pending[0][0] <= target:
+            self.anchor = self.pending.popleft()
+
+    def past_price(self) -> Optional[float]:
+        """Price at the lookback time, or None until `hours` of history exist"""
+        if self.anchor is None:
+            return None
+        return self.anchor[1]
+
+    def clear(self):
+        self.pending.clear()
+        self.anchor = None
+
+
 class RegimeDetector:
     """
     MVP Circuit Breaker for flash crash protection
@@ -36,6 +126,8 @@ class RegimeDetector:
         self,
         enabled: bool = True,
         config_path: str = "configs/paper_trading_config_unified.json",
+        clock: Optional[Callable[..., datetime]] = None,
+        config_loader: Optional[ConfigLoader] = None,
     ):
         """
         Initialize the regime detector with enhanced market protection
@@ -43,14 +135,28 @@ class RegimeDetector:
         Args:
             enabled: Whether the circuit breaker is active (can disable for testing)
             config_path: Path to configuration file
+            clock: Replacement for datetime.now (e.g. a backtest's simulated clock)
+            config_loader: Use this loader instead of the shared one
         """
         self.enabled = enabled
+        self.clock = clock or datetime.now
         self.btc_prices = deque(
             maxlen=2880
         )  # Store 48 hours of minute data for cumulative decline
-        self.price_history = (
-            []
-        )  # List of (timestamp, price) tuples for volatility calculation
+
+        # Rolling windows keyed by hours (volatility, peak decline) and
+        # lookbacks keyed by hours (price change), all updated per tick
+        self.windows: Dict[float, RollingPriceWindow] = {
+            hours: RollingPriceWindow(hours) for hours in (1, 4, 24, 48)
+        }
+        self.lookbacks: Dict[float, PriceLookback] = {
+            hours: PriceLookback(hours) for hours in (1, 4, 24)
+        }
+        self.last_update_time: Optional[datetime] = None
+
+        # (timestamp, price) tuples from the last 48 hours
+        self.price_history = self.windows[48].prices
+
         self.last_regime = MarketRegime.NORMAL
         self.last_alert_time = None
         self.alert_cooldown = 300  # 5 minutes between alerts
@@ -62,7 +168,7 @@ class RegimeDetector:
         self.strategy_reenable_times = {}  # {strategy: datetime}
 
         # Load configuration using ConfigLoader
-        self.config_loader = ConfigLoader(config_path)
+        self.config_loader = config_loader or ConfigLoader(config_path)
         self.config = self.config_loader.load()
         self.market_protection = self.config.get("market_protection", {})
 
@@ -95,15 +201,43 @@ class RegimeDetector:
             return
 
         if timestamp is None:
-            timestamp = datetime.now()
+            timestamp = self.clock()
 
         self.btc_prices.append({"price": price, "timestamp": timestamp})
 
-        # Also maintain price history for volatility calculation
-        self.price_history.append((timestamp, price))
-        # Keep only last 48 hours
-        cutoff = datetime.now() - timedelta(hours=48)
-        self.price_history = [(t, p) for t, p in self.price_history if t >= cutoff]
+        # Windows need ordered timestamps; late ticks count as the latest one
+        if self.last_update_time is not None and timestamp < self.last_update_time:
+            timestamp = self.last_update_time
+        self.last_update_time = timestamp
+
+        now = self.clock()
+        for window in self.windows.values():
+            window.push(timestamp, price)
+            window.expire(now)
+        for lookback in self.lookbacks.values():
+            lookback.push(timestamp, price)
+
+    def _window(self, hours: float) -> RollingPriceWindow:
+        """Get the rolling window for a period, seeding new ones from history"""
+        window = self.windows.get(hours)
+        if window is None:
+            window = RollingPriceWindow(hours)
+            for timestamp, price in self.price_history:
+                window.push(timestamp, price)
+            self.windows[hours] = window
+
+        window.expire(self.clock())
+        return window
+
+    def _lookback(self, hours: float) -> PriceLookback:
+        """Get the lookback for a period, seeding new ones from history"""
+        lookback = self.lookbacks.get(hours)
+        if lookback is None:
+            lookback = PriceLookback(hours)
+            for timestamp, price in self.price_history:
+                lookback.push(timestamp, price)
+            self.lookbacks[hours] = lookback
+        return lookback
 
     def get_btc_change(self, hours: float = 1) -> Optional[float]:
         """
@@ -119,22 +253,11 @@ class RegimeDetector:
             return None
 
         current_price = self.btc_prices[-1]["price"]
-        current_time = self.btc_prices[-1]["timestamp"]
-        target_time = current_time - timedelta(hours=hours)
-
-        # Find price closest to target time
-        past_price = None
-        for price_data in self.btc_prices:
-            if price_data["timestamp"] <= target_time:
-                past_price = price_data["price"]
-                break  # Use first price that's old enough
 
+        # Latest price at least `hours` older than the newest one
+        past_price = self._lookback(hours).past_price()
         if past_price is None:
-            # Not enough history, use oldest available if we have some data
-            if len(self.btc_prices) >= 2:  # Need at least 2 prices
-                past_price = self.btc_prices[0]["price"]
-            else:
-                return None
+            return None
 
         # Calculate percentage change
         change = ((current_price - past_price) / past_price) * 100
@@ -299,7 +422,7 @@ class RegimeDetector:
         if self.last_alert_time is None:
             return True
 
-        time_since_alert = (datetime.now() - self.last_alert_time).total_seconds()
+        time_since_alert = (self.clock() - self.last_alert_time).total_seconds()
         return time_since_alert >= self.alert_cooldown
 
     def get_position_multiplier(self, regime: Optional[MarketRegime] = None) -> float:
@@ -354,7 +477,11 @@ class RegimeDetector:
     def reset(self):
         """Reset the detector (useful for testing)"""
         self.btc_prices.clear()
-        self.price_history.clear()
+        for window in self.windows.values():
+            window.clear()
+        for lookback in self.lookbacks.values():
+            lookback.clear()
+        self.last_update_time = None
         self.last_regime = MarketRegime.NORMAL
         self.last_alert_time = None
         self.disabled_strategies.clear()
@@ -384,16 +511,15 @@ class RegimeDetector:
         if len(self.price_history) < 2:
             return None
 
-        # Get prices from last N hours
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        recent_prices = [p for t, p in self.price_history if t >= cutoff_time]
+        # Prices from last N hours
+        window = self._window(hours)
 
-        if len(recent_prices) < 2:
+        if len(window) < 2:
             return None
 
-        high = max(recent_prices)
-        low = min(recent_prices)
-        open_price = recent_prices[0]
+        high = window.high
+        low = window.low
+        open_price = window.open
 
         if open_price == 0:
             return None
@@ -418,19 +544,21 @@ class RegimeDetector:
         if len(self.price_history) < 2:
             return None
 
-        cutoff_time = datetime.now() - timedelta(hours=hours)
-        recent_data = [(t, p) for t, p in self.price_history if t >= cutoff_time]
+        recent_data = self._window(hours).prices
 
         if len(recent_data) < smooth_minutes:
             return None
 
         # Group into 5-minute buckets and average
         smoothed_prices = []
-        for i in range(0, len(recent_data), smooth_minutes):
-            bucket = recent_data[i : i + smooth_minutes]
-            if bucket:
-                avg_price = sum(p for _, p in bucket) / len(bucket)
-                smoothed_prices.append(avg_price)
+        bucket = []
+        for _, p in recent_data:
+            bucket.append(p)
+            if len(bucket) == smooth_minutes:
+                smoothed_prices.append(sum(bucket) / len(bucket))
+                bucket = []
+        if bucket:
+            smoothed_prices.append(sum(bucket) / len(bucket))
 
         if len(smoothed_prices) < 2:
             return None
@@ -461,12 +589,11 @@ class RegimeDetector:
             return False
 
         # Check 24-hour decline from peak
-        cutoff_24h = datetime.now() - timedelta(hours=24)
-        prices_24h = [p for t, p in self.price_history if t >= cutoff_24h]
+        window_24h = self._window(24)
 
-        if prices_24h and len(prices_24h) >= 10:  # Need some data
-            peak_24h = max(prices_24h)
-            current = prices_24h[-1]
+        if len(window_24h) >= 10:  # Need some data
+            peak_24h = window_24h.high
+            current = window_24h.last
             decline_24h = ((current - peak_24h) / peak_24h) * 100
 
             threshold_24h = decline_config.get("24h_threshold", -3.0)
@@ -477,12 +604,11 @@ class RegimeDetector:
                 return True
 
         # Check 48-hour decline from peak
-        cutoff_48h = datetime.now() - timedelta(hours=48)
-        prices_48h = [p for t, p in self.price_history if t >= cutoff_48h]
+        window_48h = self._window(48)
 
-        if prices_48h and len(prices_48h) >= 10:
-            peak_48h = max(prices_48h)
-            current = prices_48h[-1]
+        if len(window_48h) >= 10:
+            peak_48h = window_48h.high
+            current = window_48h.last
             decline_48h = ((current - peak_48h) / peak_48h) * 100
 
             threshold_48h = decline_config.get("48h_threshold", -5.0)
@@ -513,7 +639,7 @@ class RegimeDetector:
 
         # Check if already disabled and in cooldown
         if strategy in self.strategy_reenable_times:
-            if datetime.now() < self.strategy_reenable_times[strategy]:
+            if self.clock() < self.strategy_reenable_times[strategy]:
                 return True  # Still in cooldown
             else:
                 # Check if volatility low enough to re-enable (hysteresis)
@@ -538,7 +664,7 @@ class RegimeDetector:
             if strategy not in self.disabled_strategies:
                 # First time disabling
                 self.disabled_strategies[strategy] = {
-                    "time": datetime.now(),
+                    "time": self.clock(),
                     "volatility": volatility,
                 }
 
@@ -546,7 +672,7 @@ class RegimeDetector:
                 cooldown_hours = self.market_protection.get("hysteresis", {}).get(
                     "reenable_cooldown_hours", 2
                 )
-                self.strategy_reenable_times[strategy] = datetime.now() + timedelta(
+                self.strategy_reenable_times[strategy] = self.clock() + timedelta(
                     hours=cooldown_hours
                 )
 
@@ -3,9 +3,15 @@ Simple rule-based strategy detection for Phase 1 recovery
 No ML, just basic technical rules with lowered thresholds
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
 from loguru import logger
 
+# Bars needed by the batch checks (DCA and Channel look back 20 bars)
+BATCH_LOOKBACK = 20
+BATCH_FIELDS = ("high", "close", "volume")
+
 
 class SimpleRules:
     """Simple rule-based strategy detection without ML"""
@@ -197,6 +203,282 @@ class SimpleRules:
 
         return None
 
+    # ------------------------------------------------------------------
+    # Batch mode: evaluate every symbol at once on (symbols x bars) arrays
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def to_bar_matrix(
+        market_data: Dict[str, List[Dict]], lookback: int = BATCH_LOOKBACK
+    ) -> Tuple[List[str], Dict[str, np.ndarray], np.ndarray]:
+        """
+        Stack the last `lookback` bars of every symbol into 2D arrays
+
+        Rows are right-aligned so column -1 is always the current bar.
+        Symbols with fewer bars are padded on the left with NaN.
+
+        Args:
+            market_data: Dict of symbol -> OHLC data
+            lookback: Number of bars kept per symbol
+
+        Returns:
+            (symbols, {field: symbols x lookback array}, bar count per symbol)
+        """
+        symbols = list(market_data.keys())
+        bars = {f: np.full((len(symbols), lookback), np.nan) for f in BATCH_FIELDS}
+        lengths = np.zeros(len(symbols), dtype=int)
+
+        for i, symbol in enumerate(symbols):
+            data = market_data[symbol] or []
+            lengths[i] = len(data)
+            window = data[-lookback:]
+            if not window:
+                continue
+            for field in BATCH_FIELDS:
+                bars[field][i, lookback - len(window) :] = [
+                    d.get(field) for d in window
+                ]
+
+        return symbols, bars, lengths
+
+    def _dca_batch(
+        self, bars: Dict[str, np.ndarray], lengths: np.ndarray
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Signal mask and setup values for check_dca_batch"""
+        high = bars["high"][:, -20:]
+        close = bars["close"][:, -1]
+
+        valid = (lengths >= 20) & np.isfinite(high).all(axis=1) & np.isfinite(close)
+        recent_high = np.where(valid[:, None], high, 0.0).max(axis=1)
+        valid &= recent_high != 0
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            drop_pct = ((close - recent_high) / recent_high) * 100
+
+        hits = valid & (drop_pct <= self.dca_drop_threshold)
+        return hits, {"drop_pct": drop_pct, "close": close, "recent_high": recent_high}
+
+    def check_dca_batch(
+        self, symbols: List[str], bars: Dict[str, np.ndarray], lengths: np.ndarray
+    ) -> Dict[str, Dict]:
+        """
+        Batch version of check_dca_setup
+
+        Args:
+            symbols: Symbol for each row
+            bars: Dict of field -> (symbols x bars) array, current bar last
+            lengths: Number of bars available per symbol
+
+        Returns:
+            Dict of symbol -> setup dict for symbols that signal
+        """
+        hits, values = self._dca_batch(bars, lengths)
+        drop_pct, close = values["drop_pct"], values["close"]
+        recent_high = values["recent_high"]
+
+        signals = {}
+        for i in np.flatnonzero(hits):
+            signals[symbols[i]] = {
+                "strategy": "DCA",
+                "symbol": symbols[i],
+                "signal": True,
+                "drop_pct": float(drop_pct[i]),
+                "current_price": float(close[i]),
+                "recent_high": float(recent_high[i]),
+                "confidence": self.fixed_confidence,
+                "ml_used": False,
+                "reason": f"Price dropped {drop_pct[i]:.1f}% (threshold: {self.dca_drop_threshold}%)",
+            }
+        return signals
+
+    def _swing_batch(
+        self, bars: Dict[str, np.ndarray], lengths: np.ndarray
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Signal mask and setup values for check_swing_batch"""
+        high = bars["high"][:, -10:-1]
+        volume = bars["volume"][:, -10:-1]
+        close = bars["close"][:, -1]
+        current_volume = bars["volume"][:, -1]
+
+        valid = (
+            (lengths >= 10)
+            & np.isfinite(high).all(axis=1)
+            & np.isfinite(volume).all(axis=1)
+            & np.isfinite(close)
+            & np.isfinite(current_volume)
+        )
+        recent_high = np.where(valid[:, None], high, 0.0).max(axis=1)
+        valid &= recent_high != 0
+
+        # Sum column by column so the result matches Python's sum() exactly
+        volume_sum = np.zeros(len(close))
+        for column in range(volume.shape[1]):
+            volume_sum += volume[:, column]
+        avg_volume = volume_sum / volume.shape[1]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            price_breakout = ((close - recent_high) / recent_high) * 100
+            volume_surge = np.where(avg_volume > 0, current_volume / avg_volume, 0.0)
+
+        breakout_threshold_pct = (self.swing_breakout_threshold - 1) * 100
+        hits = (
+            valid
+            & (price_breakout >= breakout_threshold_pct)
+            & (volume_surge > self.swing_volume_surge)
+        )
+        return hits, {
+            "breakout_pct": price_breakout,
+            "volume_surge": volume_surge,
+            "close": close,
+        }
+
+    def check_swing_batch(
+        self, symbols: List[str], bars: Dict[str, np.ndarray], lengths: np.ndarray
+    ) -> Dict[str, Dict]:
+        """
+        Batch version of check_swing_setup
+
+        Args:
+            symbols: Symbol for each row
+            bars: Dict of field -> (symbols x bars) array, current bar last
+            lengths: Number of bars available per symbol
+
+        Returns:
+            Dict of symbol -> setup dict for symbols that signal
+        """
+        hits, values = self._swing_batch(bars, lengths)
+        price_breakout, volume_surge = values["breakout_pct"], values["volume_surge"]
+        close = values["close"]
+
+        signals = {}
+        for i in np.flatnonzero(hits):
+            signals[symbols[i]] = {
+                "strategy": "SWING",
+                "symbol": symbols[i],
+                "signal": True,
+                "breakout_pct": float(price_breakout[i]),
+                "volume_surge": float(volume_surge[i]),
+                "entry_price": float(close[i]),
+                "confidence": self.fixed_confidence,
+                "ml_used": False,
+                "reason": f"Breakout {price_breakout[i]:.1f}% with {volume_surge[i]:.1f}x volume",
+            }
+        return signals
+
+    def _channel_batch(
+        self, bars: Dict[str, np.ndarray], lengths: np.ndarray
+    ) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Signal mask (BUY or SELL) and setup values for check_channel_batch"""
+        prices = bars["close"][:, -20:]
+
+        valid = (lengths >= 20) & np.isfinite(prices).all(axis=1)
+        prices = np.where(valid[:, None], prices, 0.0)
+        high = prices.max(axis=1)
+        low = prices.min(axis=1)
+        current = prices[:, -1]
+        valid &= high != low
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            position = (current - low) / (high - low)
+
+        buy = valid & (position <= self.channel_position_threshold)
+        sell = valid & ~buy & (position >= (1 - self.channel_position_threshold))
+        return buy | sell, {
+            "buy": buy,
+            "position": position,
+            "high": high,
+            "low": low,
+            "close": current,
+        }
+
+    def check_channel_batch(
+        self, symbols: List[str], bars: Dict[str, np.ndarray], lengths: np.ndarray
+    ) -> Dict[str, Dict]:
+        """
+        Batch version of check_channel_setup
+
+        Args:
+            symbols: Symbol for each row
+            bars: Dict of field -> (symbols x bars) array, current bar last
+            lengths: Number of bars available per symbol
+
+        Returns:
+            Dict of symbol -> setup dict for symbols that signal
+        """
+        hits, values = self._channel_batch(bars, lengths)
+        buy, position = values["buy"], values["position"]
+        high, low, current = values["high"], values["low"], values["close"]
+
+        signals = {}
+        for i in np.flatnonzero(hits):
+            if buy[i]:
+                signal_type = "BUY"
+                reason = f"Near channel bottom ({position[i]:.1%} position)"
+            else:
+                signal_type = "SELL"
+                reason = f"Near channel top ({position[i]:.1%} position)"
+
+            signals[symbols[i]] = {
+                "strategy": "CHANNEL",
+                "symbol": symbols[i],
+                "signal": True,
+                "signal_type": signal_type,
+                "position": float(position[i]),
+                "channel_high": float(high[i]),
+                "channel_low": float(low[i]),
+                "entry_price": float(current[i]),
+                "confidence": self.fixed_confidence,
+                "ml_used": False,
+                "reason": reason,
+            }
+        return signals
+
+    def batch_signal_masks(
+        self, bars: Dict[str, np.ndarray], lengths: np.ndarray
+    ) -> Dict[str, np.ndarray]:
+        """
+        Which rows signal for each strategy, without building setup dicts
+
+        Rows are independent, so callers can stack many (symbol, bar) windows
+        into one call, e.g. a backtest evaluating a block of bars at once.
+
+        Args:
+            bars: Dict of field -> (rows x bars) array, current bar last
+            lengths: Number of bars available per row
+
+        Returns:
+            Dict of strategy -> boolean mask over rows
+        """
+        return {
+            "DCA": self._dca_batch(bars, lengths)[0],
+            "SWING": self._swing_batch(bars, lengths)[0],
+            "CHANNEL": self._channel_batch(bars, lengths)[0],
+        }
+
+    def check_all_batch(
+        self, market_data: Dict[str, List[Dict]]
+    ) -> Dict[str, Dict[str, Dict]]:
+        """
+        Run the DCA, Swing and Channel checks for every symbol in one pass
+
+        Gives the same signals as calling the check_*_setup methods per symbol.
+
+        Args:
+            market_data: Dict of symbol -> OHLC data
+
+        Returns:
+            Dict of strategy -> {symbol: setup dict} for symbols that signal
+        """
+        if not market_data:
+            return {"DCA": {}, "SWING": {}, "CHANNEL": {}}
+
+        symbols, bars, lengths = self.to_bar_matrix(market_data)
+        return {
+            "DCA": self.check_dca_batch(symbols, bars, lengths),
+            "SWING": self.check_swing_batch(symbols, bars, lengths),
+            "CHANNEL": self.check_channel_batch(symbols, bars, lengths),
+        }
+
     def predict_dca(self, features: Dict) -> Dict:
         """
         Fake ML prediction for DCA - returns fixed confidence
@@ -0,0 +1,495 @@
+"""
+Deterministic event-driven backtest engine.
+
+Replays bars from the local OHLC store through the same decision path as
+run_paper_trading_simple.py: SimpleRules batch checks, RegimeDetector,
+TradeLimiter and SimplePaperTraderV2 (its ExitEngine and fee/slippage
+accounting), on a simulated clock and without database writes, state
+files or notifications.
+
+Bars never become per-bar dicts. The store is read in blocks onto a regular
+time grid of (symbols x bars) arrays, and the rule checks run once per
+block with one row per (scan, symbol) window, so the per-bar Python work
+is just the regime update, the exit ticks and the signals that fire.
+"""
+
+import asyncio
+import copy
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+from numpy.lib.stride_tricks import sliding_window_view
+
+from src.config.config_loader import ConfigLoader, StaticConfigLoader
+from src.data.ohlc_store import (
+    TIMEFRAME_SECONDS,
+    OHLCStore,
+    get_ohlc_store,
+    to_epoch,
+)
+from src.strategies.regime_detector import MarketRegime, RegimeDetector
+from src.strategies.simple_rules import BATCH_LOOKBACK, SimpleRules
+from src.trading.simple_paper_trader_v2 import SimplePaperTraderV2, Trade
+from src.trading.trade_limiter import TradeLimiter
+
+STRATEGIES = ("DCA", "SWING", "CHANNEL")
+FIELDS = ("high", "close", "volume")
+
+# The scan only trades symbols with more than MIN_BARS bars in the last
+# MARKET_DATA_HOURS hours (get_recent_data_batch(hours=24), len(data) > 100)
+MARKET_DATA_HOURS = 24
+MIN_BARS = 100
+
+BLOCK_BARS = 10080  # Grid bars read from the store at once (a week of 1m)
+CHUNK_ELEMENTS = 2_000_000  # Window cells per SimpleRules batch call
+
+# Loggers silenced while a quiet backtest runs (they log every trade)
+QUIET_MODULES = (
+    "src.strategies.regime_detector",
+    "src.strategies.simple_rules",
+    "src.trading.simple_paper_trader_v2",
+    "src.trading.trade_limiter",
+)
+
+
+class SimulatedClock:
+    """
+    Stand-in for datetime.now that only moves when the backtest advances it
+
+    Calls follow datetime.now: clock() is naive (UTC here) and
+    clock(timezone.utc) is aware.
+    """
+
+    def __init__(self, start: Optional[datetime] = None):
+        self.set(start or datetime(1970, 1, 1))
+
+    def set(self, value: datetime):
+        """Move the clock to `value` (naive = UTC)"""
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        self.naive = value
+        self.aware = value.replace(tzinfo=timezone.utc)
+
+    def __call__(self, tz=None) -> datetime:
+        if tz is None:
+            return self.naive
+        if tz is timezone.utc:
+            return self.aware
+        return self.aware.astimezone(tz)
+
+
+@dataclass
+class BacktestResult:
+    """Outcome of BacktestEngine.run"""
+
+    trades: List[Trade]
+    portfolio: Dict[str, Any]
+    stats: Dict[str, Any]
+    open_positions: List[Dict] = field(default_factory=list)
+
+
+def rules_config(config: Dict) -> Dict:
+    """SimpleRules thresholds from the unified config, as the paper trader reads them"""
+    strategies = config.get("strategies", {})
+
+    def threshold(strategy: str, key: str, default: float) -> float:
+        return (
+            strategies.get(strategy, {})
+            .get("detection_thresholds", {})
+            .get(key, default)
+        )
+
+    return {
+        "dca_drop_threshold": threshold("DCA", "drop_threshold", -4.0),
+        "swing_breakout_threshold": threshold("SWING", "breakout_threshold", 1.015),
+        "swing_volume_surge": threshold("SWING", "volume_surge", 1.5),
+        "channel_touches": threshold("CHANNEL", "channel_touches", 3),
+    }
+
+
+class BacktestEngine:
+    """
+    Replays stored bars through the paper trading decision path
+
+    Each grid bar first ticks the open positions with the latest closes
+    (check_exits), then, every `scan_every` bars, runs the scan: BTC feeds
+    the regime detector, PANIC skips the scan, volatile strategies are
+    disabled, and signals are opened in DCA/SWING/CHANNEL interleaved order
+    subject to the trade limiter and position limits.
+
+    Deliberate differences from the live loop: there is no market-summary
+    "best strategy" (equal allocation), a strategy at its position limit
+    skips the signal instead of closing its worst position, and a bar
+    missing from a symbol's last 20 invalidates its rule window.
+    """
+
+    def __init__(
+        self,
+        symbols: List[str],
+        start: datetime,
+        end: datetime,
+        store: Optional[OHLCStore] = None,
+        timeframe: str = "1m",
+        config_path: str = "configs/paper_trading_config_unified.json",
+        config: Optional[Dict] = None,
+        initial_balance: Optional[float] = None,
+        position_size: float = 50.0,
+        max_hold_hours: float = 72,
+        scan_every: Optional[int] = None,
+        rules: Optional[Dict] = None,
+        block_bars: int = BLOCK_BARS,
+        quiet: bool = True,
+    ):
+        """
+        Initialize the backtest
+
+        Args:
+            symbols: Symbols to trade (include BTC for regime detection)
+            start: First bar time (inclusive, naive = UTC)
+            end: Last bar time (inclusive, naive = UTC)
+            store: OHLC store to read from (defaults to the shared store)
+            timeframe: Bar timeframe, one exit check per bar
+            config_path: Unified config for the trader, limiter and detector
+            config: Unified config dict to use instead of loading config_path
+                (e.g. a parameter sweep's variant)
+            initial_balance: Starting balance (defaults to the config's)
+            position_size: USD per trade (halved in CAUTION)
+            max_hold_hours: Time exit passed to check_and_close_positions
+            scan_every: Bars between scans (defaults to trading_cycle_seconds)
+            rules: SimpleRules config (defaults to the unified config's thresholds)
+            block_bars: Bars read from the store per block
+            quiet: Silence the per-trade logging of the production components
+        """
+        if timeframe not in TIMEFRAME_SECONDS:
+            raise ValueError(f"Unsupported timeframe: {timeframe}")
+
+        self.symbols = list(symbols)
+        self.index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.store = store or get_ohlc_store()
+        self.timeframe = timeframe
+        self.step = TIMEFRAME_SECONDS[timeframe]
+        self.start = to_epoch(start)
+        self.bars = max(0, (to_epoch(end) - self.start) // self.step + 1)
+
+        # One private snapshot for every component, so a run never picks up
+        # a reload of the shared config
+        if config is None:
+            config = copy.deepcopy(ConfigLoader(config_path).load())
+        self.config = config
+        self.config_loader = StaticConfigLoader(config)
+        self.initial_balance = initial_balance
+        self.position_size = position_size
+        self.max_hold_hours = max_hold_hours
+        if scan_every is None:
+            cycle = self.config.get("global_settings", {}).get(
+                "trading_cycle_seconds", 300
+            )
+            scan_every = max(1, int(cycle) // self.step)
+        self.scan_every = scan_every
+        self.rules = SimpleRules(
+            rules if rules is not None else rules_config(self.config)
+        )
+        self.block_bars = block_bars
+        self.quiet = quiet
+
+        # Bars of history kept in front of each block (24h of market data)
+        self.market_bars = max(1, MARKET_DATA_HOURS * 3600 // self.step)
+        self.history = max(BATCH_LOOKBACK, self.market_bars)
+
+    # ------------------------------------------------------------------
+    # Running
+    # ------------------------------------------------------------------
+
+    def run(self) -> BacktestResult:
+        """Run the backtest from a fresh state"""
+        return asyncio.run(self.run_async())
+
+    async def run_async(self) -> BacktestResult:
+        """Same as run() for callers already inside an event loop"""
+        if self.quiet:
+            for module in QUIET_MODULES:
+                logger.disable(module)
+        try:
+            return await self._run()
+        finally:
+            if self.quiet:
+                for module in QUIET_MODULES:
+                    logger.enable(module)
+
+    def _build(self):
+        """Fresh components on a simulated clock, with all persistence off"""
+        self.clock = SimulatedClock()
+        self.trader = SimplePaperTraderV2(
+            initial_balance=self.initial_balance,
+            clock=self.clock,
+            persist=False,
+            config_loader=self.config_loader,
+        )
+        self.trader.regime_detector.slack_notifier = None
+        self.regime_detector = RegimeDetector(
+            enabled=True, clock=self.clock, config_loader=self.config_loader
+        )
+        self.regime_detector.slack_notifier = None
+        self.trade_limiter = TradeLimiter(
+            clock=self.clock, persist_state=False, config_loader=self.config_loader
+        )
+        self.stats = {
+            "bars": 0,
+            "scans": 0,
+            "panic_scans": 0,
+            "signals": {strategy: 0 for strategy in STRATEGIES},
+            "opened": 0,
+            "limiter_skips": 0,
+            "strategy_limit_skips": 0,
+            "errors": 0,
+        }
+
+    async def _run(self) -> BacktestResult:
+        self._build()
+        started = time.perf_counter()
+
+        tail = {f: np.full((len(self.symbols), self.history), np.nan) for f in FIELDS}
+        for lo in range(0, self.bars, self.block_bars):
+            hi = min(self.bars, lo + self.block_bars)
+            block = self._read_block(lo, hi)
+            arrays = {f: np.concatenate([tail[f], block[f]], axis=1) for f in FIELDS}
+            await self._replay_block(lo, hi, arrays)
+            tail = {f: arrays[f][:, -self.history :] for f in FIELDS}
+
+        self.stats["elapsed_seconds"] = time.perf_counter() - started
+        return BacktestResult(
+            trades=list(self.trader.trades),
+            portfolio=self.trader.get_portfolio_stats(),
+            stats=self.stats,
+            open_positions=self.trader.get_open_positions_summary(),
+        )
+
+    def _read_block(self, lo: int, hi: int) -> Dict[str, np.ndarray]:
+        """Grid bars lo..hi-1 of every symbol; missing bars are NaN"""
+        first = self.start + lo * self.step
+        last = self.start + (hi - 1) * self.step
+        block = {f: np.full((len(self.symbols), hi - lo), np.nan) for f in FIELDS}
+
+        for i, symbol in enumerate(self.symbols):
+            bars = self.store.read(
+                symbol,
+                self.timeframe,
+                datetime.fromtimestamp(first, tz=timezone.utc),
+                datetime.fromtimestamp(last, tz=timezone.utc),
+            )
+            if len(bars) == 0:
+                continue
+            offset = bars["timestamp"] - first
+            on_grid = offset % self.step == 0
+            columns = offset[on_grid] // self.step
+            for f in FIELDS:
+                block[f][i, columns] = bars[f][on_grid]
+
+        return block
+
+    async def _replay_block(self, lo: int, hi: int, arrays: Dict[str, np.ndarray]):
+        """Step through grid bars lo..hi-1 (arrays carry `history` bars in front)"""
+        h = self.history
+        close = arrays["close"]
+
+        # Bars per symbol in the trailing 24h, i.e. len(market_data[symbol])
+        present = np.isfinite(close)
+        seen = np.cumsum(present, axis=1)
+        w = self.market_bars
+        counts = seen[:, h:] - seen[:, h - w : close.shape[1] - w]
+
+        # Latest close at or before each bar, like data[-1]["close"]
+        last_seen = np.where(present, np.arange(close.shape[1]), 0)
+        np.maximum.accumulate(last_seen, axis=1, out=last_seen)
+        latest = np.take_along_axis(close, last_seen, axis=1)[:, h:]
+
+        # Rule signals for every scan bar in the block at once
+        scan_columns = np.array(
+            [j for j in range(hi - lo) if (lo + j) % self.scan_every == 0], dtype=int
+        )
+        masks = self._scan_signals(arrays, counts, scan_columns)
+
+        latest_rows = latest.T.tolist()
+        eligible = (counts > MIN_BARS).T
+        scan_row = 0
+        for j in range(hi - lo):
+            self.clock.set(
+                datetime(1970, 1, 1)
+                + timedelta(seconds=self.start + (lo + j) * self.step)
+            )
+            self.stats["bars"] += 1
+            prices = latest_rows[j]
+
+            # Like _run_loop, an error only costs the current cycle
+            try:
+                await self._check_exits(prices)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.error(f"Error in exits at {self.clock()}: {e}")
+
+            if scan_row < len(scan_columns) and scan_columns[scan_row] == j:
+                try:
+                    await self._scan(
+                        prices,
+                        eligible[j],
+                        {
+                            strategy: masks[strategy][scan_row]
+                            for strategy in STRATEGIES
+                        },
+                    )
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    logger.error(f"Error in scan at {self.clock()}: {e}")
+                scan_row += 1
+
+    def _scan_signals(
+        self,
+        arrays: Dict[str, np.ndarray],
+        counts: np.ndarray,
+        scan_columns: np.ndarray,
+    ) -> Dict[str, np.ndarray]:
+        """SimpleRules masks as (scan bars x symbols), rows stacked per call"""
+        symbols = len(self.symbols)
+        masks = {
+            strategy: np.zeros((len(scan_columns), symbols), dtype=bool)
+            for strategy in STRATEGIES
+        }
+        if len(scan_columns) == 0:
+            return masks
+
+        windows = {
+            f: sliding_window_view(arrays[f], BATCH_LOOKBACK, axis=1) for f in FIELDS
+        }
+        # Window w covers columns w..w+19, so bar j (column h + j) ends window
+        # h + j - 19
+        offset = self.history - BATCH_LOOKBACK + 1
+        per_call = max(1, CHUNK_ELEMENTS // (symbols * BATCH_LOOKBACK))
+
+        for start in range(0, len(scan_columns), per_call):
+            columns = scan_columns[start : start + per_call]
+            bars = {
+                f: windows[f][:, columns + offset]
+                .transpose(1, 0, 2)
+                .reshape(-1, BATCH_LOOKBACK)
+                for f in FIELDS
+            }
+            lengths = counts[:, columns].T.reshape(-1)
+            for strategy, mask in self.rules.batch_signal_masks(bars, lengths).items():
+                masks[strategy][start : start + len(columns)] = mask.reshape(
+                    len(columns), symbols
+                )
+
+        return masks
+
+    # ------------------------------------------------------------------
+    # Per-bar steps (mirror run_paper_trading_simple.py)
+    # ------------------------------------------------------------------
+
+    async def _check_exits(self, prices: List[float]):
+        """check_exits: tick open positions, then update the trade limiter"""
+        positions = self.trader.positions
+        if not positions:
+            return
+
+        current_prices = {}
+        for symbol in positions:
+            price = prices[self.index[symbol]]
+            if price == price:  # Not NaN
+                current_prices[symbol] = price
+        if not current_prices:
+            return
+
+        closed = await self.trader.check_and_close_positions(
+            current_prices=current_prices, max_hold_hours=self.max_hold_hours
+        )
+        for trade in closed:
+            if trade.exit_reason == "stop_loss":
+                self.trade_limiter.record_stop_loss(trade.symbol)
+            else:
+                self.trade_limiter.record_successful_trade(
+                    trade.symbol, trade.exit_reason, trade.pnl_percent, 0.10
+                )
+
+    async def _scan(
+        self,
+        prices: List[float],
+        eligible: np.ndarray,
+        signals: Dict[str, np.ndarray],
+    ):
+        """scan_for_opportunities for one bar"""
+        positions = self.trader.positions
+        available = [
+            i for i in np.flatnonzero(eligible) if self.symbols[i] not in positions
+        ]
+        if not available:
+            return
+        self.stats["scans"] += 1
+
+        # BTC only reaches the detector when it's among the scanned symbols
+        btc = self.index.get("BTC")
+        if btc is not None and eligible[btc] and "BTC" not in positions:
+            self.regime_detector.update_btc_price(prices[btc], self.clock())
+
+        regime = self.regime_detector.get_market_regime()
+        if regime == MarketRegime.PANIC:
+            self.stats["panic_scans"] += 1
+            return
+
+        by_strategy = {}
+        for strategy in STRATEGIES:
+            if self.regime_detector.should_disable_strategy(strategy):
+                by_strategy[strategy] = []
+                continue
+            hits = signals[strategy]
+            by_strategy[strategy] = [i for i in available if hits[i]]
+            self.stats["signals"][strategy] += len(by_strategy[strategy])
+
+        # Equal allocation: interleave the strategies (confidence is fixed)
+        prioritized = []
+        for k in range(max(len(found) for found in by_strategy.values())):
+            for strategy in STRATEGIES:
+                if k < len(by_strategy[strategy]):
+                    prioritized.append((strategy, by_strategy[strategy][k]))
+        if not prioritized:
+            return
+
+        strategy_counts = {strategy: 0 for strategy in STRATEGIES}
+        for position in positions.values():
+            strategy_counts[position.strategy] = (
+                strategy_counts.get(position.strategy, 0) + 1
+            )
+        available_slots = self.trader.max_positions - len(positions)
+
+        for strategy, i in prioritized:
+            if available_slots <= 0:
+                break
+            symbol = self.symbols[i]
+            if symbol in positions:
+                continue  # Opened by another strategy this scan
+            if strategy_counts[strategy] >= self.trader.max_positions_per_strategy:
+                self.stats["strategy_limit_skips"] += 1
+                continue
+
+            can_trade, _ = self.trade_limiter.can_trade_symbol(symbol)
+            if not can_trade:
+                self.stats["limiter_skips"] += 1
+                continue
+
+            position_size = self.position_size
+            if self.regime_detector.get_market_regime() == MarketRegime.CAUTION:
+                position_size *= 0.5
+
+            result = await self.trader.open_position(
+                symbol=symbol,
+                usd_amount=position_size,
+                market_price=prices[i],
+                strategy=strategy,
+            )
+            if result.get("success"):
+                self.stats["opened"] += 1
+                available_slots -= 1
+                strategy_counts[strategy] += 1
@@ -0,0 +1,223 @@
+"""
+Event-driven exit engine for paper trading positions.
+
+Keeps stop-loss, trailing-stop and take-profit levels in per-symbol heaps so
+a price tick only touches positions whose levels it actually crossed, and
+keeps entry times in a heap for time exits. Heap entries are invalidated
+lazily: each position carries a version that is bumped whenever its levels
+change, and stale entries are discarded when they reach the top.
+"""
+
+import heapq
+import itertools
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+# Trailing stops only arm once the position has been profitable
+# (0.1% buffer for fees), matching check_and_close_positions
+TRAILING_ACTIVATION = 1.001
+
+
+class SymbolLevels:
+    """Exit level heaps for the positions on one symbol."""
+
+    def __init__(self):
+        self.stops: List[Tuple[float, int, int, str]] = []  # max-heap (-level)
+        self.trailing: List[Tuple[float, int, int, str]] = []  # max-heap (-level)
+        self.take_profits: List[Tuple[float, int, int, str]] = []  # min-heap
+        self.highs: List[Tuple[float, int, int, str]] = []  # min-heap of highest
+        self.last_price: Optional[float] = None
+
+
+class ExitEngine:
+    """
+    Price-indexed exit triggers for open positions.
+
+    Positions are tracked by key (the symbol in SimplePaperTraderV2) and the
+    Position objects themselves are updated in place (highest_price), so the
+    trader's state stays consistent with the engine.
+    """
+
+    def __init__(self):
+        self.positions: Dict[str, Any] = {}
+        self.symbols: Dict[str, SymbolLevels] = {}
+        self.versions: Dict[str, int] = {}
+        self.trail_versions: Dict[str, int] = {}  # Bumped on every new high
+        self.entry_times: List[Tuple[datetime, int, int, str]] = []
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.positions
+
+    # ------------------------------------------------------------------
+    # Registration
+    # ------------------------------------------------------------------
+
+    def add(self, key: str, position):
+        """Track a position (re-adding replaces its previous levels)."""
+        version = self.versions.get(key, 0) + 1
+        self.versions[key] = version
+        self.positions[key] = position
+
+        levels = self.symbols.setdefault(position.symbol, SymbolLevels())
+        seq = next(self._sequence)
+        if position.stop_loss is not None:
+            heapq.heappush(
+                levels.stops, (-float(position.stop_loss), seq, version, key)
+            )
+        if position.take_profit is not None:
+            heapq.heappush(
+                levels.take_profits, (float(position.take_profit), seq, version, key)
+            )
+        if position.highest_price is None:
+            position.highest_price = position.entry_price
+        self._push_high(levels, key, position)
+
+        entry_time = position.entry_time
+        if entry_time.tzinfo is None:
+            entry_time = entry_time.replace(tzinfo=timezone.utc)
+        heapq.heappush(self.entry_times, (entry_time, seq, version, key))
+
+        # Closed positions leave their levels behind until a price crosses them
+        levels.stops = self._compact(levels.stops, self._valid)
+        levels.take_profits = self._compact(levels.take_profits, self._valid)
+        self.entry_times = self._compact(self.entry_times, self._valid)
+
+    def remove(self, key: str):
+        """Stop tracking a position; its heap entries become stale."""
+        if key in self.positions:
+            del self.positions[key]
+            self.versions[key] = self.versions.get(key, 0) + 1
+
+    def sync(self, positions: Dict[str, Any]):
+        """Rebuild from the trader's positions dict (after loading state)."""
+        for key in list(self.positions):
+            if positions.get(key) is not self.positions[key]:
+                self.remove(key)
+        for key, position in positions.items():
+            if key not in self.positions:
+                self.add(key, position)
+
+    def _valid(self, entry: Tuple[Any, int, int, str]) -> bool:
+        key = entry[3]
+        return key in self.positions and self.versions[key] == entry[2]
+
+    def _valid_trail(self, entry: Tuple[Any, int, int, str]) -> bool:
+        key = entry[3]
+        return key in self.positions and self.trail_versions[key] == entry[2]
+
+    def _compact(self, heap: List, valid) -> List:
+        """Drop stale entries once they outnumber the live positions."""
+        if len(heap) <= 2 * len(self.positions) + 16:
+            return heap
+        heap = [entry for entry in heap if valid(entry)]
+        heapq.heapify(heap)
+        return heap
+
+    def _push_high(self, levels: SymbolLevels, key: str, position):
+        """Index the current high-water mark and the trailing stop it implies."""
+        version = self.trail_versions.get(key, 0) + 1
+        self.trail_versions[key] = version
+        seq = next(self._sequence)
+
+        heapq.heappush(levels.highs, (position.highest_price, seq, version, key))
+        if (
+            position.trailing_stop_pct is not None
+            and position.highest_price > position.entry_price * TRAILING_ACTIVATION
+        ):
+            trail = position.highest_price * (1 - position.trailing_stop_pct)
+            heapq.heappush(levels.trailing, (-trail, seq, version, key))
+
+            # Superseded trailing levels sit below the live ones and are never
+            # popped in an uptrend
+            levels.trailing = self._compact(levels.trailing, self._valid_trail)
+
+    # ------------------------------------------------------------------
+    # Ticks
+    # ------------------------------------------------------------------
+
+    def on_price(self, symbol: str, price: float) -> List[Tuple[str, str]]:
+        """
+        Apply a price tick to one symbol.
+
+        Raises the high-water mark of positions below the new price, then
+        pops every position whose stop, trailing stop or take profit was
+        crossed. Triggered positions are removed from the engine.
+
+        Returns:
+            List of (key, exit_reason)
+        """
+        levels = self.symbols.get(symbol)
+        if levels is None:
+            return []
+        levels.last_price = price
+
+        # New highs move trailing stops up
+        raised = []
+        while levels.highs and levels.highs[0][0] < price:
+            entry = heapq.heappop(levels.highs)
+            if self._valid_trail(entry):
+                raised.append(entry[3])
+        for key in raised:
+            position = self.positions[key]
+            position.highest_price = price
+            self._push_high(levels, key, position)
+
+        triggered = set()
+        while levels.stops and -levels.stops[0][0] >= price:
+            entry = heapq.heappop(levels.stops)
+            if self._valid(entry):
+                triggered.add(entry[3])
+        while levels.trailing and -levels.trailing[0][0] >= price:
+            entry = heapq.heappop(levels.trailing)
+            if self._valid_trail(entry):
+                triggered.add(entry[3])
+        while levels.take_profits and levels.take_profits[0][0] <= price:
+            entry = heapq.heappop(levels.take_profits)
+            if self._valid(entry):
+                triggered.add(entry[3])
+
+        exits = []
+        for key in sorted(triggered):
+            exits.append((key, self._exit_reason(self.positions[key], price)))
+            self.remove(key)
+        return exits
+
+    @staticmethod
+    def _exit_reason(position, price: float) -> str:
+        """Same precedence as SimplePaperTraderV2.check_and_close_positions."""
+        if position.stop_loss is not None and price <= float(position.stop_loss):
+            return "stop_loss"
+        if (
+            position.trailing_stop_pct is not None
+            and price <= position.highest_price * (1 - position.trailing_stop_pct)
+            and position.highest_price > position.entry_price * TRAILING_ACTIVATION
+        ):
+            return "trailing_stop"
+        return "take_profit"
+
+    def expired(
+        self, max_hold_hours: float, now: Optional[datetime] = None
+    ) -> List[str]:
+        """
+        Pop positions held longer than max_hold_hours.
+
+        The engine's last tick may be old, so pricing the exit is left to the
+        caller, which can add() a position back if it has no fresh quote.
+
+        Returns:
+            Keys of the expired positions
+        """
+        now = now or datetime.now(timezone.utc)
+        cutoff = now - timedelta(hours=max_hold_hours)
+
+        keys = []
+        while self.entry_times and self.entry_times[0][0] <= cutoff:
+            entry = heapq.heappop(self.entry_times)
+            if self._valid(entry):
+                keys.append(entry[3])
+                self.remove(entry[3])
+        return keys
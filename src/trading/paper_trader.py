@@ -18,6 +18,7 @@ from dataclasses import dataclass, asdict
 from loguru import logger
 import pandas as pd
 
+from src.data.latest_prices import LatestPriceService, get_latest_price_service
 from src.data.supabase_client import SupabaseClient
 
 
@@ -105,6 +106,7 @@ class PaperTrader:
         supabase_client: SupabaseClient,
         initial_balance: float = 10000.0,
         config: Optional[Dict] = None,
+        price_service: Optional[LatestPriceService] = None,
     ):
         """
         Initialize Paper Trader.
@@ -113,8 +115,10 @@ class PaperTrader:
             supabase_client: Database client
             initial_balance: Starting virtual balance
             config: Trading configuration
+            price_service: Latest-price source (default: the shared service)
         """
         self.supabase = supabase_client
+        self.price_service = price_service or get_latest_price_service(supabase_client)
         self.config = config or self._default_config()
 
         # Portfolio state
@@ -417,34 +421,7 @@ class PaperTrader:
     async def get_price(self, symbol: str) -> Optional[float]:
         """Get current price for a symbol."""
         try:
-            # Get latest price from database
-            result = (
-                self.supabase.client.table("unified_ohlc")
-                .select("close")
-                .eq("symbol", symbol)
-                .eq("timeframe", "1min")
-                .order("timestamp", desc=True)
-                .limit(1)
-                .execute()
-            )
-
-            if result.data:
-                return result.data[0]["close"]
-
-            # Fallback to 15min if 1min not available
-            result = (
-                self.supabase.client.table("unified_ohlc")
-                .select("close")
-                .eq("symbol", symbol)
-                .eq("timeframe", "15min")
-                .order("timestamp", desc=True)
-                .limit(1)
-                .execute()
-            )
-
-            if result.data:
-                return result.data[0]["close"]
-
+            return self.price_service.price(symbol)
         except Exception as e:
             logger.error(f"Error getting price for {symbol}: {e}")
 
@@ -0,0 +1,505 @@
+"""
+Parameter Sweep
+Ranks variants of the unified config by backtesting each one
+
+A combination is a set of overrides on paper_trading_config_unified.json,
+keyed by dotted path (e.g. "strategies.DCA.detection_thresholds.drop_threshold";
+"*" matches every key at one level, so
+"strategies.DCA.exits_by_tier.*.take_profit" sets all tiers at once).
+Combinations come from a grid, random sampling or a Gaussian-process
+(Bayesian) sampler, and are evaluated with BacktestEngine in a process
+pool. Every worker opens the same OHLC store, whose memory-mapped segments
+are shared through the page cache rather than copied per process. Each
+combination's metrics are cached on disk, so repeated and extended sweeps
+only run what is new.
+"""
+
+import copy
+import hashlib
+import itertools
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from src.data.ohlc_store import OHLCStore, get_ohlc_store
+from src.trading.backtest_engine import BacktestEngine
+
+DEFAULT_CACHE_DIR = "data/sweep_cache"
+DEFAULT_OBJECTIVE = "total_pnl_usd"
+
+# Metrics where lower is better
+MINIMIZED = ("max_drawdown_pct",)
+
+# A space maps a dotted path to its values: a list of choices, or a
+# (low, high) tuple sampled uniformly (ints when both bounds are ints)
+Space = Dict[str, Union[List[Any], Tuple[float, float]]]
+
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, "item"):  # NumPy scalars
+        return value.item()
+    return str(value)
+
+
+# ----------------------------------------------------------------------
+# Overrides
+# ----------------------------------------------------------------------
+
+
+def apply_overrides(config: Dict, overrides: Dict[str, Any]) -> Dict:
+    """
+    Copy of `config` with the overrides applied
+
+    Raises:
+        ValueError: A path doesn't exist in the config (a typo would
+            otherwise sweep a parameter nothing reads)
+    """
+    config = copy.deepcopy(config)
+    for path, value in overrides.items():
+        keys = path.split(".")
+        if not _set_path(config, keys, value):
+            raise ValueError(f"Unknown config path: {path}")
+    return config
+
+
+def _set_path(node: Any, keys: List[str], value: Any) -> bool:
+    if not isinstance(node, dict):
+        return False
+    key, rest = keys[0], keys[1:]
+    targets = list(node) if key == "*" else [key] if key in node else []
+    if not rest:
+        for target in targets:
+            node[target] = copy.deepcopy(value)
+        return bool(targets)
+    found = [_set_path(node[target], rest, value) for target in targets]
+    return bool(found) and all(found)
+
+
+# ----------------------------------------------------------------------
+# Samplers
+# ----------------------------------------------------------------------
+
+
+def grid(space: Space) -> List[Dict[str, Any]]:
+    """Every combination of the listed values"""
+    for path, values in space.items():
+        if not isinstance(values, list):
+            raise ValueError(f"Grid needs a list of values for {path}")
+    paths = list(space)
+    return [
+        dict(zip(paths, values))
+        for values in itertools.product(*(space[path] for path in paths))
+    ]
+
+
+def _sample(values, rng: np.random.Generator) -> Any:
+    if isinstance(values, list):
+        return values[rng.integers(len(values))]
+    low, high = values
+    if isinstance(low, int) and isinstance(high, int):
+        return int(rng.integers(low, high + 1))
+    return float(rng.uniform(low, high))
+
+
+def random_samples(space: Space, n: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """`n` combinations drawn independently per parameter"""
+    rng = np.random.default_rng(seed)
+    return [
+        {path: _sample(values, rng) for path, values in space.items()} for _ in range(n)
+    ]
+
+
+class BayesianSampler:
+    """
+    Gaussian-process sampler with expected improvement
+
+    ask() proposes combinations and tell() reports their scores (higher is
+    better). Until `initial` scores are known the proposals are random;
+    after that each one maximises expected improvement over a batch of
+    random candidates, with earlier proposals in the same ask() counted at
+    the predicted mean so a batch spreads out.
+    """
+
+    def __init__(
+        self,
+        space: Space,
+        seed: int = 0,
+        initial: int = 8,
+        candidates: int = 2000,
+    ):
+        self.space = space
+        self.paths = list(space)
+        self.rng = np.random.default_rng(seed)
+        self.initial = initial
+        self.candidates = candidates
+        self.points: List[np.ndarray] = []
+        self.scores: List[float] = []
+
+    def _encode(self, combination: Dict[str, Any]) -> np.ndarray:
+        """Combination as a point in the unit cube"""
+        point = []
+        for path in self.paths:
+            values, value = self.space[path], combination[path]
+            if isinstance(values, list):
+                point.append(values.index(value) / max(1, len(values) - 1))
+            else:
+                low, high = values
+                point.append((value - low) / (high - low) if high != low else 0.0)
+        return np.array(point, dtype=float)
+
+    def tell(self, combination: Dict[str, Any], score: float):
+        """Record a combination's score (non-finite scores are skipped)"""
+        if math.isfinite(score):
+            self.points.append(self._encode(combination))
+            self.scores.append(float(score))
+
+    def ask(self, n: int = 1) -> List[Dict[str, Any]]:
+        """Next `n` combinations to evaluate"""
+        if len(self.scores) < self.initial:
+            return [
+                {path: _sample(values, self.rng) for path, values in self.space.items()}
+                for _ in range(n)
+            ]
+
+        from scipy.stats import norm
+        from sklearn.gaussian_process import GaussianProcessRegressor
+        from sklearn.gaussian_process.kernels import ConstantKernel, Matern, WhiteKernel
+
+        points, scores = list(self.points), list(self.scores)
+        proposals = []
+        for _ in range(n):
+            y = np.array(scores)
+            scale = y.std() or 1.0
+            model = GaussianProcessRegressor(
+                kernel=ConstantKernel() * Matern(nu=2.5) + WhiteKernel(),
+                normalize_y=True,
+                random_state=int(self.rng.integers(2**31)),
+            )
+            model.fit(np.array(points), (y - y.mean()) / scale)
+
+            candidates = [
+                {path: _sample(values, self.rng) for path, values in self.space.items()}
+                for _ in range(self.candidates)
+            ]
+            encoded = np.array([self._encode(c) for c in candidates])
+            mean, std = model.predict(encoded, return_std=True)
+            best = ((y - y.mean()) / scale).max()
+            z = (mean - best) / np.maximum(std, 1e-9)
+            improvement = (mean - best) * norm.cdf(z) + std * norm.pdf(z)
+
+            k = int(np.argmax(improvement))
+            proposals.append(candidates[k])
+            points.append(encoded[k])
+            scores.append(float(mean[k] * scale + y.mean()))
+
+        return proposals
+
+
+# ----------------------------------------------------------------------
+# Metrics
+# ----------------------------------------------------------------------
+
+
+def backtest_metrics(result, initial_balance: float) -> Dict[str, Any]:
+    """Ranking metrics of one BacktestResult"""
+    pnl = np.array([trade.pnl_usd for trade in result.trades], dtype=float)
+    pnl_pct = np.array([trade.pnl_percent for trade in result.trades], dtype=float)
+    wins, losses = pnl[pnl > 0].sum(), -pnl[pnl < 0].sum()
+
+    # Drawdown of the realized equity curve, in trade order
+    equity = initial_balance + np.concatenate([[0.0], np.cumsum(pnl)])
+    peak = np.maximum.accumulate(equity)
+    drawdown = ((peak - equity) / peak).max() * 100 if len(pnl) else 0.0
+
+    sharpe = 0.0
+    if len(pnl_pct) > 1 and pnl_pct.std(ddof=1) > 0:
+        sharpe = pnl_pct.mean() / pnl_pct.std(ddof=1) * math.sqrt(len(pnl_pct))
+
+    total = float(pnl.sum())
+    return {
+        "trades": len(pnl),
+        "win_rate": float((pnl > 0).mean()) if len(pnl) else 0.0,
+        "total_pnl_usd": total,
+        "return_pct": total / initial_balance * 100 if initial_balance else 0.0,
+        "avg_pnl_pct": float(pnl_pct.mean()) if len(pnl_pct) else 0.0,
+        "sharpe": float(sharpe),
+        "max_drawdown_pct": float(drawdown),
+        "profit_factor": float(wins / losses) if losses > 0 else math.inf,
+        "open_positions": len(result.open_positions),
+    }
+
+
+# ----------------------------------------------------------------------
+# Cache
+# ----------------------------------------------------------------------
+
+
+class SweepCache:
+    """
+    Metrics per combination on disk
+
+    Each combination is one <directory>/<key>.json, written atomically. The
+    key covers the base config, the backtest settings and the overrides, so
+    a changed config or date range never reuses stale results.
+    """
+
+    def __init__(self, directory: str, spec: Dict[str, Any]):
+        self.directory = Path(directory)
+        self.spec = json.dumps(spec, sort_keys=True, default=_json_default)
+
+    def key(self, overrides: Dict[str, Any]) -> str:
+        payload = json.dumps(
+            [self.spec, overrides], sort_keys=True, default=_json_default
+        )
+        return hashlib.sha1(payload.encode()).hexdigest()[:20]
+
+    def _path(self, overrides: Dict[str, Any]) -> Path:
+        return self.directory / f"{self.key(overrides)}.json"
+
+    def get(self, overrides: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        path = self._path(overrides)
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text())["metrics"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable sweep result {path}: {e}")
+            return None
+
+    def put(self, overrides: Dict[str, Any], metrics: Dict[str, Any]):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(overrides)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {"overrides": overrides, "metrics": metrics}, f, default=_json_default
+            )
+        os.replace(tmp_path, path)
+
+
+# ----------------------------------------------------------------------
+# Workers
+# ----------------------------------------------------------------------
+
+# Worker-process state, set by the pool initializer
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(job: Dict[str, Any]):
+    _worker.update(job)
+    _worker["store"] = OHLCStore(job["store_root"], max_rows=job["store_max_rows"])
+
+
+def _evaluate(
+    job: Dict[str, Any], store: OHLCStore, overrides: Dict[str, Any]
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]], Optional[str]]:
+    """Backtest one combination, returning (overrides, metrics, error)"""
+    try:
+        config = apply_overrides(job["config"], overrides)
+        engine = BacktestEngine(
+            job["symbols"],
+            job["start"],
+            job["end"],
+            store=store,
+            config=config,
+            **job["engine_kwargs"],
+        )
+        result = engine.run()
+        initial_balance = engine.trader.initial_balance
+        return overrides, backtest_metrics(result, initial_balance), None
+    except Exception as e:
+        return overrides, None, f"{type(e).__name__}: {e}"
+
+
+def _run_combination(overrides: Dict[str, Any]):
+    return _evaluate(_worker, _worker["store"], overrides)
+
+
+# ----------------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------------
+
+
+class ParameterSweep:
+    """Backtests config variants over one date range and ranks them"""
+
+    def __init__(
+        self,
+        symbols: Sequence[str],
+        start: datetime,
+        end: datetime,
+        config_path: str = "configs/paper_trading_config_unified.json",
+        config: Optional[Dict] = None,
+        store: Optional[OHLCStore] = None,
+        max_workers: Optional[int] = None,
+        cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+        objective: str = DEFAULT_OBJECTIVE,
+        **engine_kwargs,
+    ):
+        """
+        Args:
+            symbols: Symbols to trade (include BTC for regime detection)
+            start: First bar time (inclusive, naive = UTC)
+            end: Last bar time (inclusive, naive = UTC)
+            config_path: Base unified config, read from the file
+            config: Base config dict to use instead of config_path
+            store: OHLC store with the bars (defaults to the shared store)
+            max_workers: Worker processes (default: CPU count); 1 runs the
+                backtests in this process
+            cache_dir: Where per-combination results are kept (None: no cache)
+            objective: Metric the results are ranked by
+            **engine_kwargs: Passed to BacktestEngine (timeframe,
+                position_size, max_hold_hours, scan_every, ...)
+        """
+        if config is None:
+            with open(config_path) as f:
+                config = json.load(f)
+        self.config = config
+        self.store = store or get_ohlc_store()
+        self.symbols = list(symbols)
+        self.start = start
+        self.end = end
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.objective = objective
+        self.engine_kwargs = engine_kwargs
+
+        self.cache = None
+        if cache_dir is not None:
+            config_hash = hashlib.sha1(
+                json.dumps(config, sort_keys=True, default=_json_default).encode()
+            ).hexdigest()
+            self.cache = SweepCache(
+                cache_dir,
+                {
+                    "config": config_hash,
+                    "symbols": self.symbols,
+                    "start": start.isoformat(),
+                    "end": end.isoformat(),
+                    "engine": engine_kwargs,
+                },
+            )
+
+    def _job(self) -> Dict[str, Any]:
+        return {
+            "store_root": str(self.store.root),
+            "store_max_rows": self.store.max_rows,
+            "config": self.config,
+            "symbols": self.symbols,
+            "start": self.start,
+            "end": self.end,
+            "engine_kwargs": self.engine_kwargs,
+        }
+
+    def evaluate(self, combinations: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Metrics for each combination, in order
+
+        Cached combinations are not rerun. A combination whose backtest
+        fails gets an "error" entry instead of metrics.
+        """
+        combinations = list(combinations)
+        for overrides in combinations:
+            apply_overrides(self.config, overrides)  # Fail fast on bad paths
+
+        results: Dict[int, Dict[str, Any]] = {}
+        pending: Dict[str, List[int]] = {}  # One run per distinct combination
+        for k, overrides in enumerate(combinations):
+            cached = self.cache.get(overrides) if self.cache else None
+            if cached is not None:
+                results[k] = {**cached, "cached": True}
+            else:
+                key = json.dumps(overrides, sort_keys=True, default=_json_default)
+                pending.setdefault(key, []).append(k)
+
+        for overrides, metrics, error in self._execute(
+            [combinations[ks[0]] for ks in pending.values()]
+        ):
+            key = json.dumps(overrides, sort_keys=True, default=_json_default)
+            if error is not None:
+                logger.error(f"Backtest failed for {overrides}: {error}")
+                outcome = {"error": error}
+            else:
+                if self.cache:
+                    self.cache.put(overrides, metrics)
+                outcome = {**metrics, "cached": False}
+            for k in pending[key]:
+                results[k] = outcome
+
+        return [{**combinations[k], **results[k]} for k in range(len(combinations))]
+
+    def _execute(self, combinations: List[Dict[str, Any]]):
+        if not combinations:
+            return
+        job = self._job()
+        workers = min(self.max_workers, len(combinations))
+        logger.info(
+            f"Backtesting {len(combinations)} combinations with {workers} workers"
+        )
+
+        if workers <= 1:
+            for overrides in combinations:
+                yield _evaluate(job, self.store, overrides)
+            return
+
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(job,)
+        ) as pool:
+            futures = [pool.submit(_run_combination, c) for c in combinations]
+            for done, future in enumerate(as_completed(futures), 1):
+                yield future.result()
+                if done % 10 == 0 or done == len(futures):
+                    logger.info(f"Progress: {done}/{len(futures)} combinations")
+
+    def rank(self, rows: List[Dict[str, Any]]) -> pd.DataFrame:
+        """Rows as a table, best objective first (failed runs last)"""
+        table = pd.DataFrame(rows)
+        if self.objective not in table:
+            table[self.objective] = np.nan
+        table = table.sort_values(
+            self.objective,
+            ascending=self.objective in MINIMIZED,
+            na_position="last",
+            kind="stable",
+        )
+        return table.reset_index(drop=True)
+
+    def run(self, combinations: Iterable[Dict[str, Any]]) -> pd.DataFrame:
+        """Evaluate the combinations and rank them"""
+        return self.rank(self.evaluate(combinations))
+
+    def optimize(
+        self,
+        space: Space,
+        n_trials: int,
+        batch_size: Optional[int] = None,
+        seed: int = 0,
+        initial: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Bayesian search: `n_trials` combinations in batches of `batch_size`
+        (default: one per worker), each batch chosen from the scores so far
+        """
+        batch_size = batch_size or self.max_workers
+        sampler = BayesianSampler(
+            space, seed=seed, initial=initial or max(batch_size, 8)
+        )
+        sign = -1.0 if self.objective in MINIMIZED else 1.0
+
+        rows: List[Dict[str, Any]] = []
+        while len(rows) < n_trials:
+            batch = sampler.ask(min(batch_size, n_trials - len(rows)))
+            for row in self.evaluate(batch):
+                overrides = {path: row[path] for path in space}
+                score = row.get(self.objective, math.nan)
+                sampler.tell(overrides, sign * score if score == score else math.nan)
+                rows.append(row)
+
+        return self.rank(rows)
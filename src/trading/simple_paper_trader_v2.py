@@ -2,16 +2,20 @@
 Enhanced Paper Trading System with Adaptive Exit Rules and Database Persistence
 """
 
+import asyncio
 import json
 import os
 import random
 import string
 from datetime import datetime, timezone
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from dataclasses import dataclass, asdict
 from loguru import logger
 from pathlib import Path
+from src.data.latest_prices import LatestPriceService
 from src.data.supabase_client import SupabaseClient
+from src.data.write_behind import get_write_behind_queue
+from src.trading.exit_engine import ExitEngine
 from src.notifications.paper_trading_notifier import PaperTradingNotifier
 from src.strategies.regime_detector import RegimeDetector, MarketRegime
 from src.config.config_loader import ConfigLoader
@@ -79,9 +83,22 @@ class SimplePaperTraderV2:
         max_positions: int = None,
         max_positions_per_strategy: int = None,
         config_path: str = "configs/paper_trading_config_unified.json",
+        clock: Optional[Callable[..., datetime]] = None,
+        persist: bool = True,
+        config_loader: Optional[ConfigLoader] = None,
     ):
+        """
+        Args:
+            clock: Replacement for datetime.now (e.g. a backtest's simulated clock)
+            config_loader: Use this loader instead of the shared one
+            persist: Load and save state, write to the database and send
+                notifications; False keeps everything in memory (backtests)
+        """
+        self.clock = clock or datetime.now
+        self.persist = persist
+
         # Load configuration using the new unified config loader
-        self.config_loader = ConfigLoader(config_path)
+        self.config_loader = config_loader or ConfigLoader(config_path)
         self.config = self.config_loader.load()
 
         # Get values from config with fallbacks
@@ -118,13 +135,16 @@ class SimplePaperTraderV2:
         self.send_individual_notifications = self.config.get("notifications", {}).get(
             "individual_trades", True
         )
-        try:
-            self.notifier = PaperTradingNotifier()
-        except Exception as e:
-            logger.warning(f"Could not initialize Slack notifier: {e}")
+        if persist:
+            try:
+                self.notifier = PaperTradingNotifier()
+            except Exception as e:
+                logger.warning(f"Could not initialize Slack notifier: {e}")
 
         # Initialize regime detector for adaptive stop losses
-        self.regime_detector = RegimeDetector(enabled=True)
+        self.regime_detector = RegimeDetector(
+            enabled=True, clock=clock, config_loader=config_loader
+        )
 
         # Load market cap tiers from config
         market_cap_config = self.config.get("market_cap_tiers", {})
@@ -168,16 +188,31 @@ class SimplePaperTraderV2:
 
         # Database client for persistence
         self.db_client = None
-        try:
-            self.db_client = SupabaseClient()
-        except Exception as e:
-            logger.warning(f"Could not initialize Supabase client: {e}")
-            logger.info("Will use local file persistence only")
+        self.db_writer = None
+        if persist:
+            try:
+                self.db_client = SupabaseClient()
+                # Trade rows are written in the background so exits never wait on the DB
+                self.db_writer = get_write_behind_queue(self.db_client)
+            except Exception as e:
+                logger.warning(f"Could not initialize Supabase client: {e}")
+                logger.info("Will use local file persistence only")
+
+        # Price-indexed exit levels, so a tick only touches positions it
+        # crosses. Kept in step by open_position, close_position and load_state
+        self.exit_engine = ExitEngine()
+
+        # Stream of live prices (see attach_price_stream); also used to quote
+        # time exits for symbols the caller didn't price
+        self.price_service: Optional[LatestPriceService] = None
+        self.on_tick_close: Optional[Callable[[Trade], None]] = None
+        self._tick_tasks = set()
 
         # Persistence files
         self.state_file = Path("data/paper_trading_state.json")
         self.trades_file = Path("data/paper_trading_trades.json")
-        self.load_state()
+        if persist:
+            self.load_state()
 
     def _load_config(self, config_path: str) -> Dict:
         """Load configuration from JSON file"""
@@ -422,7 +457,7 @@ class SimplePaperTraderV2:
         Format: {strategy[:3]}_{symbol[:6]}_{timestamp}_{random}
         Example: DCA_MEME_240827162507_abc123 (30 chars)
         """
-        timestamp = datetime.now(timezone.utc).strftime(
+        timestamp = self.clock(timezone.utc).strftime(
             "%y%m%d%H%M%S"
         )  # Shorter year format
         random_suffix = "".join(
@@ -538,7 +573,7 @@ class SimplePaperTraderV2:
             entry_price=actual_price,
             amount=crypto_amount,
             usd_value=usd_amount,
-            entry_time=datetime.now(timezone.utc),
+            entry_time=self.clock(timezone.utc),
             strategy=strategy,
             stop_loss=actual_price * (1 - stop_loss_pct),
             take_profit=actual_price * (1 + take_profit_pct),
@@ -550,6 +585,7 @@ class SimplePaperTraderV2:
 
         # Update state
         self.positions[symbol] = position
+        self.exit_engine.add(symbol, position)
         self.balance -= total_cost
         self.total_fees += fees
         self.total_slippage += slippage_cost
@@ -602,7 +638,10 @@ class SimplePaperTraderV2:
         max_hold_hours: float = None,
     ) -> List[Trade]:
         """
-        Check all positions for exit conditions including trailing stops
+        Check positions for exit conditions including trailing stops
+
+        Levels live in the ExitEngine, so each price only costs a heap lookup
+        instead of a pass over every open position.
 
         Exit conditions checked in order:
         1. Stop loss
@@ -616,51 +655,111 @@ class SimplePaperTraderV2:
                 "max_hold_hours", 72
             )
 
+        # Only positions whose levels were crossed come back from the engine
+        exits = []
+        for symbol, current_price in current_prices.items():
+            for key, exit_reason in self.exit_engine.on_price(symbol, current_price):
+                exits.append((key, current_price, exit_reason))
+
+        expired = self.exit_engine.expired(max_hold_hours, self.clock(timezone.utc))
+        if expired:
+            quotes = await self._fresh_prices(expired, current_prices)
+            for key in expired:
+                if key in quotes:
+                    exits.append((key, quotes[key], "time_exit"))
+                else:
+                    # No fresh price to close at yet; try again next check
+                    self.exit_engine.add(key, self.positions[key])
+
+        return await self._close_exits(exits)
+
+    async def _fresh_prices(
+        self, symbols: List[str], current_prices: Dict[str, float]
+    ) -> Dict[str, float]:
+        """Prices from the caller, else non-stale quotes from the price service"""
+        prices = {s: current_prices[s] for s in symbols if s in current_prices}
+        missing = [s for s in symbols if s not in prices]
+        if missing and self.price_service is not None:
+            # A stale symbol costs a database lookup, so keep it off the loop
+            quotes = await asyncio.to_thread(self.price_service.get, missing)
+            prices.update({s: q.price for s, q in quotes.items() if not q.stale})
+        return prices
+
+    async def _close_exits(self, exits: List[tuple]) -> List[Trade]:
         closed_trades = []
+        for symbol, current_price, exit_reason in exits:
+            trade = await self.close_position(symbol, current_price, exit_reason)
+            if trade:
+                closed_trades.append(trade)
+        return closed_trades
 
-        for symbol, position in list(self.positions.items()):
-            if symbol not in current_prices:
-                continue
+    async def on_price_tick(self, symbol: str, price: float) -> List[Trade]:
+        """
+        Event-driven exit check for a single price update
+
+        Costs O(log n) in open positions and never touches the database
+        unless a position actually closes. Time exits stay with
+        check_and_close_positions. Must be awaited on the trader's event loop.
+        """
+        if symbol not in self.exit_engine.symbols:
+            return []
+        exits = [
+            (key, price, exit_reason)
+            for key, exit_reason in self.exit_engine.on_price(symbol, price)
+        ]
+        return await self._close_exits(exits)
 
-            current_price = current_prices[symbol]
-            hold_duration = (
-                datetime.now(timezone.utc) - position.entry_time
-            ).total_seconds() / 3600
+    def attach_price_stream(
+        self,
+        price_service: LatestPriceService,
+        on_close: Optional[Callable[[Trade], None]] = None,
+    ):
+        """
+        Close positions on the tick that crosses their levels
 
-            # Update highest price for trailing stop
-            if current_price > position.highest_price:
-                position.highest_price = current_price
-                logger.debug(f"{symbol} new high: ${current_price:.4f}")
+        Subscribes to the latest-price service, whose listeners run on the
+        feeding thread (e.g. the WebSocket); each tick is handed to this
+        event loop with call_soon_threadsafe. Call from the running loop.
 
-            # Calculate trailing stop price
-            trailing_stop_price = position.highest_price * (
-                1 - position.trailing_stop_pct
-            )
+        Args:
+            price_service: Service fed by a DataCollector or WebSocket client
+            on_close: Called with each trade a tick closes, for the caller's
+                own bookkeeping (check_and_close_positions callers get the
+                trades back instead)
+        """
+        loop = asyncio.get_running_loop()
+        self.price_service = price_service
+        self.on_tick_close = on_close
 
-            # Check exit conditions
-            exit_reason = None
-
-            # First check for stop loss
-            if current_price <= position.stop_loss:
-                exit_reason = "stop_loss"
-            # Only use trailing stop if position went profitable first
-            elif (
-                current_price <= trailing_stop_price
-                and position.highest_price
-                > position.entry_price * 1.001  # Was profitable (0.1% buffer for fees)
-            ):
-                exit_reason = "trailing_stop"
-            elif current_price >= position.take_profit:
-                exit_reason = "take_profit"
-            elif hold_duration >= max_hold_hours:
-                exit_reason = "time_exit"
-
-            if exit_reason:
-                trade = await self.close_position(symbol, current_price, exit_reason)
-                if trade:
-                    closed_trades.append(trade)
+        def listener(symbol: str, price: float, timestamp: datetime):
+            # Cheap filter on the feeding thread; the engine decides on the loop
+            if symbol in self.exit_engine.symbols:
+                loop.call_soon_threadsafe(self._dispatch_tick, symbol, price)
 
-        return closed_trades
+        price_service.add_listener(listener)
+
+    def _dispatch_tick(self, symbol: str, price: float):
+        task = asyncio.ensure_future(self.on_price_tick(symbol, price))
+        self._tick_tasks.add(task)
+        task.add_done_callback(self._tick_done)
+
+    def _tick_done(self, task: asyncio.Task):
+        self._tick_tasks.discard(task)
+        if task.cancelled():
+            return
+        if task.exception() is not None:
+            logger.error(f"Tick-driven exit failed: {task.exception()}")
+            return
+        for trade in task.result():
+            logger.info(
+                f"Tick exit {trade.symbol}: {trade.exit_reason} "
+                f"P&L: ${trade.pnl_usd:.2f}"
+            )
+            if self.on_tick_close:
+                try:
+                    self.on_tick_close(trade)
+                except Exception as e:
+                    logger.error(f"Tick close handler failed for {trade.symbol}: {e}")
 
     async def close_position(
         self, symbol: str, current_price: float, exit_reason: str = "manual"
@@ -695,7 +794,7 @@ class SimplePaperTraderV2:
             exit_price=exit_price,
             amount=position.amount,
             entry_time=position.entry_time,
-            exit_time=datetime.now(timezone.utc),
+            exit_time=self.clock(timezone.utc),
             pnl_usd=pnl_net,
             pnl_percent=pnl_percent,
             fees_paid=total_fees,
@@ -715,6 +814,7 @@ class SimplePaperTraderV2:
 
         # Remove position
         del self.positions[symbol]
+        self.exit_engine.remove(symbol)
         self.trades.append(trade)
 
         # Save to database if available
@@ -759,8 +859,8 @@ class SimplePaperTraderV2:
     async def save_position_to_db(
         self, position: Position, actual_price: float, market_price: float
     ):
-        """Save position opening to database"""
-        if not self.db_client:
+        """Queue position opening for the database"""
+        if not self.db_writer:
             return
 
         try:
@@ -785,14 +885,14 @@ class SimplePaperTraderV2:
                 "trade_group_id": position.trade_group_id,  # Link to trade group
             }
 
-            self.db_client.client.table("paper_trades").insert(data).execute()
-            logger.debug(f"Saved position to DB: {position.symbol}")
+            self.db_writer.enqueue("paper_trades", data)
+            logger.debug(f"Queued position for DB: {position.symbol}")
         except Exception as e:
             logger.error(f"Failed to save position to DB: {e}")
 
     async def save_trade_to_db(self, trade: Trade):
-        """Save completed trade to database"""
-        if not self.db_client:
+        """Queue completed trade for the database"""
+        if not self.db_writer:
             return
 
         try:
@@ -814,12 +914,12 @@ class SimplePaperTraderV2:
                 "trade_group_id": trade.trade_group_id,  # Link to same trade group
             }
 
-            self.db_client.client.table("paper_trades").insert(data).execute()
+            self.db_writer.enqueue("paper_trades", data)
 
             # Also update daily performance
             await self.update_daily_performance(trade)
 
-            logger.debug(f"Saved trade to DB: {trade.symbol}")
+            logger.debug(f"Queued trade for DB: {trade.symbol}")
         except Exception as e:
             logger.error(f"Failed to save trade to DB: {e}")
 
@@ -839,7 +939,7 @@ class SimplePaperTraderV2:
 
     def get_trades_today(self) -> List[Dict]:
         """Get trades closed today"""
-        today = datetime.now(timezone.utc).date()
+        today = self.clock(timezone.utc).date()
         trades_today = []
 
         for trade in self.trades:
@@ -907,6 +1007,9 @@ class SimplePaperTraderV2:
 
     def save_state(self):
         """Save current state to file"""
+        if not self.persist:
+            return
+
         state = {
             "balance": self.balance,
             "initial_balance": self.initial_balance,
@@ -943,12 +1046,14 @@ class SimplePaperTraderV2:
         try:
             # Try to sync from database first
             self.sync_from_database()
+            self.exit_engine.sync(self.positions)
             return
         except Exception as e:
             logger.warning(f"Failed to sync from database, falling back to file: {e}")
 
         # Fallback to file-based state
         if not self.state_file.exists():
+            self.exit_engine.sync(self.positions)
             return
 
         try:
@@ -991,6 +1096,8 @@ class SimplePaperTraderV2:
         except Exception as e:
             logger.error(f"Failed to load state from file: {e}")
 
+        self.exit_engine.sync(self.positions)
+
     def sync_from_database(self):
         """Sync balance and positions from database - same logic as dashboard"""
         if not self.db_client:
@@ -1109,6 +1216,9 @@ class SimplePaperTraderV2:
 
     def save_trades(self):
         """Save completed trades to file"""
+        if not self.persist:
+            return
+
         trades_data = [
             {
                 "symbol": t.symbol,
@@ -4,7 +4,7 @@ Part of the Market Protection System
 """
 
 from datetime import datetime, timedelta
-from typing import Dict, Optional, Tuple
+from typing import Callable, Dict, Optional, Tuple
 import json
 import os
 from pathlib import Path
@@ -22,6 +22,9 @@ class TradeLimiter:
         self,
         config_path: str = "configs/paper_trading_config_unified.json",
         state_file: str = "data/trade_limiter_state.json",
+        clock: Optional[Callable[..., datetime]] = None,
+        persist_state: Optional[bool] = None,
+        config_loader: Optional[ConfigLoader] = None,
     ):
         """
         Initialize the trade limiter with configuration
@@ -29,9 +32,15 @@ class TradeLimiter:
         Args:
             config_path: Path to configuration file
             state_file: Path to persistent state file
+            clock: Replacement for datetime.now (e.g. a backtest's simulated clock)
+            persist_state: Override the config's persist_state (False keeps
+                state in memory only, neither loading nor saving the file)
+            config_loader: Use this loader instead of the shared one
         """
+        self.clock = clock or datetime.now
+
         # Load configuration using ConfigLoader
-        self.config_loader = ConfigLoader(config_path)
+        self.config_loader = config_loader or ConfigLoader(config_path)
         self.config = self.config_loader.load()
         self.market_protection = self.config.get("market_protection", {})
         self.limiter_config = self.market_protection.get("trade_limiter", {})
@@ -62,7 +71,9 @@ class TradeLimiter:
 
         # State persistence
         self.state_file = Path(state_file)
-        self.persist_state = self.limiter_config.get("persist_state", True)
+        if persist_state is None:
+            persist_state = self.limiter_config.get("persist_state", True)
+        self.persist_state = persist_state
 
         # Load previous state if exists
         if self.persist_state:
@@ -110,7 +121,7 @@ class TradeLimiter:
         Args:
             symbol: Symbol that hit stop loss
         """
-        now = datetime.now()
+        now = self.clock()
         self.stop_loss_history[symbol] = now
 
         # Increment consecutive stops
@@ -210,8 +221,8 @@ class TradeLimiter:
             last_stop = self.stop_loss_history.get(symbol)
             if last_stop:
                 ban_until = last_stop + timedelta(hours=self.ban_duration_hours)
-                if datetime.now() < ban_until:
-                    time_left = (ban_until - datetime.now()).total_seconds() / 3600
+                if self.clock() < ban_until:
+                    time_left = (ban_until - self.clock()).total_seconds() / 3600
                     return (
                         False,
                         f"BANNED for {time_left:.1f}h after {consecutive} stops",
@@ -233,8 +244,8 @@ class TradeLimiter:
 
             cooldown_until = last_stop + timedelta(hours=cooldown_hours)
 
-            if datetime.now() < cooldown_until:
-                time_left = (cooldown_until - datetime.now()).total_seconds() / 3600
+            if self.clock() < cooldown_until:
+                time_left = (cooldown_until - self.clock()).total_seconds() / 3600
                 return (
                     False,
                     f"Cooldown for {time_left:.1f}h after stop loss ({tier}: {cooldown_hours}h cooldown)",
@@ -292,7 +303,7 @@ class TradeLimiter:
             },
             "consecutive_stops": self.consecutive_stops,
             "last_trade_outcomes": self.last_trade_outcomes,
-            "last_updated": datetime.now().isoformat(),
+            "last_updated": self.clock().isoformat(),
         }
 
         try:
@@ -337,7 +348,7 @@ class TradeLimiter:
 
     def _cleanup_old_entries(self):
         """Remove old entries that are no longer relevant"""
-        cutoff = datetime.now() - timedelta(hours=48)
+        cutoff = self.clock() - timedelta(hours=48)
 
         # Clean up old stop losses
         old_symbols = [
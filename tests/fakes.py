@@ -0,0 +1,166 @@
+"""
+Shared in-memory Supabase stand-in for tests
+FakeClient serves PostgREST-style builder chains over plain lists of rows and
+records every executed query, so tests can count round trips and rows moved
+"""
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+
+def comparable(value):
+    """ISO timestamp strings compare as aware datetimes, anything else as is"""
+    if isinstance(value, str):
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return value
+        return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class FakeQuery:
+    """PostgREST builder over one FakeClient table"""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.filters = []  # (op, column, value)
+        self.ordering = []  # (column, desc)
+        self.row_limit = None
+        self.row_range = None
+        self.records = None
+        self.returned = 0
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def _filter(self, op, column, value):
+        self.filters.append((op, column, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter("eq", column, value)
+
+    def neq(self, column, value):
+        return self._filter("neq", column, value)
+
+    def in_(self, column, values):
+        return self._filter("in", column, list(values))
+
+    def gt(self, column, value):
+        return self._filter("gt", column, value)
+
+    def gte(self, column, value):
+        return self._filter("gte", column, value)
+
+    def lt(self, column, value):
+        return self._filter("lt", column, value)
+
+    def lte(self, column, value):
+        return self._filter("lte", column, value)
+
+    def order(self, column, desc=False):
+        self.ordering.append((column, desc))
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    def range(self, start, end):
+        self.row_range = (start, end)
+        return self
+
+    def insert(self, records):
+        self.records = records if isinstance(records, list) else [records]
+        return self
+
+    def upsert(self, records, **kwargs):
+        return self.insert(records)
+
+    def has_filter(self, op, column=None):
+        return any(o == op and column in (None, c) for o, c, _ in self.filters)
+
+    def _matches(self, row):
+        for op, column, value in self.filters:
+            field = row.get(column)
+            if op == "eq" and field != value:
+                return False
+            if op == "neq" and field == value:
+                return False
+            if op == "in" and field not in value:
+                return False
+            if op in ("gt", "gte", "lt", "lte"):
+                if field is None:
+                    return False
+                field, value = comparable(field), comparable(value)
+                if op == "gt" and not field > value:
+                    return False
+                if op == "gte" and not field >= value:
+                    return False
+                if op == "lt" and not field < value:
+                    return False
+                if op == "lte" and not field <= value:
+                    return False
+        return True
+
+    def execute(self):
+        if self.records is not None:
+            self.client.writes.append((self.table, self.records))
+            rows = self.records
+        else:
+            rows = [r for r in self.client.rows_for(self.table) if self._matches(r)]
+            # Stable sorts, last key first, give a multi-column ORDER BY
+            for column, desc in reversed(self.ordering):
+                rows.sort(key=lambda r: comparable(r[column]), reverse=desc)
+            if self.row_range is not None:
+                rows = rows[self.row_range[0] : self.row_range[1] + 1]
+            if self.row_limit is not None:
+                rows = rows[: self.row_limit]
+
+        self.returned = len(rows)
+        self.client.queries.append(self)
+        self.client.after_execute(self)
+        return SimpleNamespace(data=rows)
+
+
+class FakeClient:
+    """
+    Supabase client stand-in
+
+    Tables named in `tables` serve their own rows; any other table serves
+    `rows` (empty by default). Also usable where a SupabaseClient wrapper is
+    expected, since `client` points back at itself.
+    """
+
+    def __init__(self, rows=None, tables=None):
+        self.client = self
+        self.rows = rows if rows is not None else []
+        self.tables = tables or {}
+        self.queries = []  # Executed FakeQuery objects, in order
+        self.writes = []  # (table, records) per insert/upsert
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rows_for(self, table):
+        return list(self.tables.get(table, self.rows))
+
+    def after_execute(self, query):
+        """Hook for tests simulating writes that race a query"""
+
+    @property
+    def pages(self):
+        """Rows returned per executed read"""
+        return [q.returned for q in self.queries if q.records is None]
+
+    @property
+    def returned(self):
+        return sum(self.pages)
+
+    def reset(self):
+        self.queries.clear()
+        self.writes.clear()
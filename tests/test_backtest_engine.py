@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Tests for the event-driven backtest engine
+Block-wise array replay must trade exactly like a bar-by-bar replay that
+builds market_data dicts and calls check_all_batch, as the live scan does
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np  # noqa: E402
+
+from src.data.ohlc_store import OHLC_DTYPE, OHLCStore, to_epoch  # noqa: E402
+from src.strategies.regime_detector import MarketRegime  # noqa: E402
+from src.trading.backtest_engine import (  # noqa: E402
+    STRATEGIES,
+    BacktestEngine,
+    SimulatedClock,
+)
+
+CONFIG = str(Path(__file__).parent.parent / "configs/paper_trading_config_unified.json")
+START = datetime(2025, 3, 1)
+SYMBOLS = ["BTC", "ETH", "SOL", "DOGE", "PEPE", "LINK"]
+
+
+def make_store(root, bars=4000, seed=5):
+    """Calm BTC, choppier alts with occasional dumps and volume spikes"""
+    rng = np.random.default_rng(seed)
+    store = OHLCStore(str(root), max_rows=10**6)
+    t0 = to_epoch(START)
+    for k, symbol in enumerate(SYMBOLS):
+        sigma = 0.0004 if symbol == "BTC" else 0.0015
+        steps = rng.normal(0, sigma, bars)
+        if symbol != "BTC":
+            # Dumps and pumps land on scan bars
+            dumps = rng.choice(bars // 5, 8, replace=False) * 5
+            steps[dumps] -= 0.05
+            pumps = rng.choice(bars // 5, 12, replace=False) * 5
+            steps[pumps] += 0.02
+        close = 10.0 * (k + 1) * np.exp(np.cumsum(steps))
+        volume = rng.lognormal(3, 0.5, bars)
+        if symbol != "BTC":
+            volume[pumps] *= 5
+
+        arr = np.zeros(bars, dtype=OHLC_DTYPE)
+        arr["timestamp"] = t0 + 60 * np.arange(bars)
+        arr["open"] = close
+        arr["high"] = close * (1 + np.abs(rng.normal(0, 0.0005, bars)))
+        arr["low"] = close * (1 - np.abs(rng.normal(0, 0.0005, bars)))
+        arr["close"] = close
+        arr["volume"] = volume
+        store.write_array(symbol, "1m", arr, START)
+    return store, bars
+
+
+def make_engine(store, bars, **kwargs):
+    kwargs.setdefault("block_bars", 1500)  # Several blocks
+    return BacktestEngine(
+        SYMBOLS,
+        START,
+        START + timedelta(minutes=bars - 1),
+        store=store,
+        config_path=CONFIG,
+        max_hold_hours=6,
+        scan_every=5,
+        **kwargs,
+    )
+
+
+async def reference_replay(engine, store, bars):
+    """The live loop, one bar at a time, with market_data as lists of dicts"""
+    engine._build()
+    records = {s: store.read_records(s, "1m") for s in SYMBOLS}
+    trader, limiter, detector = (
+        engine.trader,
+        engine.trade_limiter,
+        engine.regime_detector,
+    )
+
+    for j in range(bars):
+        engine.clock.set(START + timedelta(minutes=j))
+
+        if trader.positions:
+            prices = {s: records[s][j]["close"] for s in trader.positions}
+            for trade in await trader.check_and_close_positions(prices, 6):
+                if trade.exit_reason == "stop_loss":
+                    limiter.record_stop_loss(trade.symbol)
+                else:
+                    limiter.record_successful_trade(
+                        trade.symbol, trade.exit_reason, trade.pnl_percent, 0.10
+                    )
+
+        if j % 5:
+            continue
+        market_data = {}
+        for s in SYMBOLS:
+            data = records[s][max(0, j - 1439) : j + 1]
+            if s not in trader.positions and len(data) > 100:
+                market_data[s] = data
+        if not market_data:
+            continue
+        if "BTC" in market_data:
+            detector.update_btc_price(market_data["BTC"][-1]["close"], engine.clock())
+        if detector.get_market_regime() == MarketRegime.PANIC:
+            continue
+
+        batch = engine.rules.check_all_batch(market_data)
+        by_strategy = {
+            strategy: [s for s in market_data if s in batch[strategy]]
+            for strategy in STRATEGIES
+            if not detector.should_disable_strategy(strategy)
+        }
+        prioritized = []
+        for k in range(max(map(len, by_strategy.values()), default=0)):
+            for strategy in STRATEGIES:
+                if k < len(by_strategy.get(strategy, [])):
+                    prioritized.append((strategy, by_strategy[strategy][k]))
+
+        for strategy, symbol in prioritized:
+            counts = [p.strategy for p in trader.positions.values()].count(strategy)
+            if counts >= trader.max_positions_per_strategy:
+                continue
+            if symbol in trader.positions or not limiter.can_trade_symbol(symbol)[0]:
+                continue
+            size = 50.0
+            if detector.get_market_regime() == MarketRegime.CAUTION:
+                size *= 0.5
+            await trader.open_position(
+                symbol=symbol,
+                usd_amount=size,
+                market_price=market_data[symbol][-1]["close"],
+                strategy=strategy,
+            )
+
+    return trader.trades
+
+
+def trade_key(trade):
+    return (
+        trade.symbol,
+        trade.strategy,
+        trade.entry_time,
+        trade.exit_time,
+        trade.exit_reason,
+        trade.entry_price,
+        trade.exit_price,
+        trade.pnl_usd,
+    )
+
+
+def test_engine_matches_bar_by_bar_replay(tmp_path):
+    store, bars = make_store(tmp_path)
+    result = make_engine(store, bars).run()
+
+    reference = asyncio.run(reference_replay(make_engine(store, bars), store, bars))
+
+    assert len(result.trades) > 10
+    assert [trade_key(t) for t in result.trades] == [trade_key(t) for t in reference]
+    assert {t.strategy for t in result.trades} == set(STRATEGIES)
+    assert {t.exit_reason for t in result.trades} >= {"take_profit", "time_exit"}
+    assert result.stats["bars"] == bars
+    assert result.stats["errors"] == 0
+
+
+def test_runs_are_deterministic_and_write_nothing(tmp_path, monkeypatch):
+    store, bars = make_store(tmp_path / "store")
+    workdir = tmp_path / "work"
+    workdir.mkdir()
+    monkeypatch.chdir(workdir)
+
+    first = make_engine(store, bars, block_bars=bars).run()
+    second = make_engine(store, bars).run()
+
+    assert [trade_key(t) for t in first.trades] == [trade_key(t) for t in second.trades]
+    assert first.portfolio == second.portfolio
+    assert list(workdir.iterdir()) == []  # No state or trade files
+
+    # Entries and exits are stamped with simulated time, and time exits
+    # respect the hold limit in simulated hours
+    start = START.replace(tzinfo=timezone.utc)
+    end = start + timedelta(minutes=bars)
+    for trade in first.trades:
+        assert start <= trade.entry_time < end
+        held = (trade.exit_time - trade.entry_time).total_seconds() / 3600
+        assert held <= 6 + 1 / 60
+
+
+def test_simulated_clock_follows_datetime_now_signature():
+    clock = SimulatedClock(START)
+    assert clock() == START and clock().tzinfo is None
+    assert clock(timezone.utc) == START.replace(tzinfo=timezone.utc)
+
+    clock.set(datetime(2025, 3, 2, 12, tzinfo=timezone(timedelta(hours=2))))
+    assert clock() == datetime(2025, 3, 2, 10)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Tests for the in-memory bar ring buffers and incremental fetching
+"""
+
+import asyncio
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np  # noqa: E402
+
+from src.data.bar_cache import BarRingBuffer  # noqa: E402
+from src.data.hybrid_fetcher import HybridDataFetcher  # noqa: E402
+from src.data.ohlc_store import OHLC_DTYPE  # noqa: E402
+from tests.fakes import FakeClient  # noqa: E402
+
+START = 1_756_300_000 - 1_756_300_000 % 60
+
+
+def make_bars(first_minute: int, count: int) -> np.ndarray:
+    bars = np.zeros(count, dtype=OHLC_DTYPE)
+    bars["timestamp"] = START + 60 * np.arange(first_minute, first_minute + count)
+    bars["close"] = np.arange(first_minute, first_minute + count, dtype=float)
+    return bars
+
+
+def test_append_wraps_and_keeps_order():
+    """Appending past capacity overwrites the oldest bars"""
+    buffer = BarRingBuffer(capacity=100, interval_seconds=60)
+    buffer.load(make_bars(0, 80), covered_from=START)
+
+    for first in range(80, 200, 7):
+        buffer.append(make_bars(first, 7))
+
+    view = buffer.view()
+    assert len(view) == 100
+    assert (np.diff(view["timestamp"]) == 60).all()
+    assert view["close"][-1] == 205
+    assert buffer.covered_from == view["timestamp"][0]
+
+
+def test_append_skips_bars_already_seen():
+    """Bars at or before the newest buffered bar are ignored"""
+    buffer = BarRingBuffer(capacity=100, interval_seconds=60)
+    buffer.load(make_bars(0, 10), covered_from=START)
+
+    assert buffer.append(make_bars(5, 10)) == 5
+    assert len(buffer.view()) == 15
+
+
+def test_gap_detection():
+    """A hole between the buffer and new bars is reported"""
+    buffer = BarRingBuffer(capacity=100, interval_seconds=60)
+    buffer.load(make_bars(0, 10), covered_from=START)
+
+    assert not buffer.has_gap(make_bars(10, 5))
+    assert buffer.has_gap(make_bars(12, 5))
+    assert not buffer.has_gap(make_bars(12, 5), tolerance_bars=2)
+
+
+def test_view_since_and_covers():
+    """view(since) slices by time and covers() reflects the loaded window"""
+    buffer = BarRingBuffer(capacity=100, interval_seconds=60)
+    buffer.load(make_bars(0, 60), covered_from=START)
+
+    assert len(buffer.view(since=START + 60 * 50)) == 10
+    assert buffer.covers(START + 60 * 30)
+    assert not buffer.covers(START - 60)
+
+
+class LateWriteClient(FakeClient):
+    """FakeClient whose queued late writes land right after an incremental query"""
+
+    def __init__(self):
+        super().__init__(rows=[])
+        self.late_writes = []
+
+    def add(self, symbol, when):
+        self.rows.append(
+            {
+                "symbol": symbol,
+                "timeframe": "1m",
+                "timestamp": when.isoformat() + "+00:00",
+                "open": 1.0,
+                "high": 1.0,
+                "low": 1.0,
+                "close": 1.0,
+                "volume": 1.0,
+            }
+        )
+        self.rows.sort(key=lambda r: r["timestamp"])
+
+    def symbol_rows(self, symbol):
+        return [r for r in self.rows if r["symbol"] == symbol]
+
+    def after_execute(self, query):
+        if query.has_filter("gt"):
+            for symbol, when in self.late_writes:
+                self.add(symbol, when)
+            self.late_writes = []
+
+
+def build_fetcher(db):
+    settings = SimpleNamespace(ohlc_store_enabled=False)
+    with (
+        patch("src.data.hybrid_fetcher.get_settings", return_value=settings),
+        patch(
+            "src.data.hybrid_fetcher.SupabaseClient",
+            return_value=SimpleNamespace(client=db),
+        ),
+    ):
+        return HybridDataFetcher()
+
+
+def test_fetcher_only_queries_new_bars():
+    """Second scan transfers only the bars added since the first"""
+    db = LateWriteClient()
+    now = datetime.utcnow().replace(second=0, microsecond=0)
+    for i in range(1, 600):
+        db.add("BTC", now - timedelta(minutes=i))
+
+    fetcher = build_fetcher(db)
+    first = asyncio.run(fetcher.get_recent_data("BTC", hours=6, timeframe="1m"))
+    assert len(first) >= 359
+
+    db.reset()
+    db.add("BTC", now)
+    second = asyncio.run(fetcher.get_recent_data("BTC", hours=6, timeframe="1m"))
+    assert db.returned == 1
+    assert second[-1]["timestamp"] == db.symbol_rows("BTC")[-1]["timestamp"]
+
+
+def test_fetcher_reloads_window_on_gap():
+    """Bars inserted late behind the newest bar are picked up by a reload"""
+    db = LateWriteClient()
+    now = datetime.utcnow().replace(second=0, microsecond=0)
+    for i in range(3, 120):
+        db.add("ETH", now - timedelta(minutes=i))
+
+    fetcher = build_fetcher(db)
+    fetcher.bar_cache.gap_reload_cooldown = 0
+    asyncio.run(fetcher.get_recent_data_batch(["ETH"], hours=1, timeframe="1m"))
+
+    # Newest bar lands first, the one before it is written late
+    db.add("ETH", now - timedelta(minutes=1))
+    db.late_writes.append(("ETH", now - timedelta(minutes=2)))
+    batch = asyncio.run(fetcher.get_recent_data_batch(["ETH"], hours=1, timeframe="1m"))
+
+    timestamps = [r["timestamp"] for r in batch["ETH"]]
+    assert timestamps[-2:] == [r["timestamp"] for r in db.symbol_rows("ETH")[-2:]]
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Tests for the batch shadow evaluator
+Vectorized outcomes must match ShadowEvaluator's per-shadow bar loops
+"""
+
+import asyncio
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+
+from src.analysis.batch_shadow_evaluator import (  # noqa: E402
+    BatchShadowEvaluator,
+    RangeExtremes,
+)
+from tests.fakes import FakeClient  # noqa: E402
+
+START = datetime(2025, 1, 1, tzinfo=timezone.utc)
+
+
+def make_bars(rng, count, minutes=1):
+    bars, price = [], 100.0
+    for i in range(count):
+        close = price * (1 + rng.gauss(0, 0.004))
+        bars.append(
+            {
+                "timestamp": (START + timedelta(minutes=i * minutes)).isoformat(),
+                "open": price,
+                "high": max(price, close) * (1 + abs(rng.gauss(0, 0.002))),
+                "low": min(price, close) * (1 - abs(rng.gauss(0, 0.002))),
+                "close": close,
+            }
+        )
+        price = close
+    return bars
+
+
+def make_shadow(rng, shadow_id, bars, strategy):
+    entry = rng.randrange(len(bars) - 10)
+    entry_time = datetime.fromisoformat(bars[entry]["timestamp"])
+    if rng.random() < 0.5:  # Entries between bars
+        entry_time += timedelta(seconds=rng.randrange(1, 60))
+    return {
+        "shadow_id": shadow_id,
+        "scan_id": shadow_id,
+        "variation_name": "AGGRESSIVE",
+        "created_at": entry_time.isoformat().replace("+00:00", "Z"),
+        "shadow_entry_price": bars[entry]["close"] * rng.uniform(0.98, 1.02),
+        "shadow_take_profit": rng.uniform(0.5, 5),
+        "shadow_stop_loss": rng.uniform(0.5, 5),
+        "shadow_hold_hours": rng.choice([1, 2.5, 6, 24]),
+        "shadow_position_size": rng.choice([50, 100, 250]),
+        "dca_grid_levels": rng.randint(1, 6),
+        "dca_grid_spacing": rng.uniform(0.2, 2),
+        "scan_history": {"symbol": "BTC", "strategy_name": strategy},
+    }
+
+
+def reference_outcome(evaluator, shadow, bars):
+    """The original per-shadow loop over bars from the entry onwards"""
+    entry_time = datetime.fromisoformat(shadow["created_at"].replace("Z", "+00:00"))
+    price_data = [
+        b for b in bars if datetime.fromisoformat(b["timestamp"]) >= entry_time
+    ]
+    if shadow["scan_history"]["strategy_name"] == "DCA":
+        evaluate = evaluator._evaluate_dca_shadow
+    else:
+        evaluate = evaluator._evaluate_single_entry_shadow
+    return asyncio.run(evaluate(shadow, price_data, entry_time))
+
+
+@pytest.mark.parametrize("strategy", ["SWING", "DCA"])
+def test_batch_matches_per_shadow_loop(strategy):
+    """Random bars and shadows give the same outcome, trigger and P&L"""
+    rng = random.Random(7)
+    bars = make_bars(rng, 3000)
+    shadows = [make_shadow(rng, i, bars, strategy) for i in range(300)]
+    evaluator = BatchShadowEvaluator(supabase_client=None)
+
+    batch = {o.shadow_id: o for o in evaluator.evaluate_with_bars(shadows, bars)}
+
+    decided = 0
+    for shadow in shadows:
+        expected = reference_outcome(evaluator, shadow, bars)
+        if expected.outcome_status == "PENDING":
+            assert shadow["shadow_id"] not in batch
+            continue
+        decided += 1
+        actual = batch[shadow["shadow_id"]]
+        assert actual.outcome_status == expected.outcome_status
+        assert actual.exit_trigger == expected.exit_trigger
+        assert actual.exit_price == pytest.approx(expected.exit_price)
+        assert actual.pnl_amount == pytest.approx(expected.pnl_amount)
+        assert actual.actual_hold_hours == pytest.approx(expected.actual_hold_hours)
+        if strategy == "DCA":
+            assert actual.grid_fills == expected.grid_fills
+            assert actual.average_entry_price == pytest.approx(
+                expected.average_entry_price
+            )
+            assert actual.total_position_size == pytest.approx(
+                expected.total_position_size
+            )
+
+    assert decided > 200
+
+
+def test_range_extremes_first_crossing():
+    """Binary lifting finds the first crossing at or after each start"""
+    rng = np.random.default_rng(3)
+    high = rng.random(1000)
+    low = rng.random(1000)
+    extremes = RangeExtremes(high, low)
+
+    starts = rng.integers(0, 1000, 500)
+    levels = rng.uniform(0.9, 1.0, 500)
+
+    def brute(values, start, hit):
+        return next((j for j in range(start, len(values)) if hit(values[j])), 1000)
+
+    up = extremes.first_high_at_or_above(starts, levels)
+    down = extremes.first_low_at_or_below(starts, 1 - levels)
+    for s, v, u, d in zip(starts, levels, up, down):
+        assert u == brute(high, s, lambda x: x >= v)
+        assert d == brute(low, s, lambda x: x <= 1 - v)
+
+
+def test_real_trade_matches_are_batched():
+    """One trade_logs query resolves matches for many outcomes"""
+    trades = [
+        {"scan_id": 1, "status": "CLOSED_WIN"},
+        {"scan_id": 2, "status": "CLOSED_LOSS"},
+        {"scan_id": 3, "status": "OPEN"},
+    ]
+    client = FakeClient(tables={"trade_logs": trades})
+    evaluator = BatchShadowEvaluator(client)
+
+    rng = random.Random(1)
+    bars = make_bars(rng, 500)
+    shadows = [make_shadow(rng, i, bars, "SWING") for i in range(1, 5)]
+    shadows[3]["variation_name"] = "CHAMPION"
+    outcomes = evaluator.evaluate_with_bars(shadows, bars)
+
+    matched = evaluator._match_real_trades(
+        outcomes, {s["shadow_id"]: s for s in shadows}
+    )
+    assert [q.table for q in client.queries] == ["trade_logs"]
+    for outcome in outcomes:
+        trade_status = {1: "CLOSED_WIN", 2: "CLOSED_LOSS"}.get(outcome.shadow_id)
+        expected = outcome.shadow_id == 4 or (
+            trade_status is not None
+            and ("WIN" in trade_status) == (outcome.outcome_status == "WIN")
+        )
+        assert matched[outcome.shadow_id] == expected
+
+    evaluator._save_outcomes(outcomes, shadows)
+    assert [table for table, _ in client.writes] == ["shadow_outcomes"]
+    assert len(client.writes[0][1]) == len(outcomes)
+
+
+def test_pending_shadows_skip_evaluated_history():
+    """Pending shadows are reached however many older ones have outcomes"""
+    now = datetime.utcnow()
+    # One shadow every 6 minutes over 300 hours; ids below 1320 are outside
+    # the 168h lookback
+    shadows = [
+        {
+            "shadow_id": i,
+            "would_take_trade": True,
+            "created_at": (now - timedelta(hours=300 - i * 0.1)).isoformat(),
+        }
+        for i in range(3000)
+    ]
+    pending_ids = set(range(0, 10)) | set(range(1500, 1550))
+    outcomes = [{"shadow_id": i} for i in range(3000) if i not in pending_ids]
+    client = FakeClient(
+        tables={"shadow_variations": shadows, "shadow_outcomes": outcomes}
+    )
+    evaluator = BatchShadowEvaluator(client)
+    evaluator.page_size = 100
+    evaluator.max_shadows_per_run = 40
+
+    pending = evaluator._get_pending_shadows_batch()
+
+    # Too old to evaluate is skipped, and the cap counts pending shadows
+    assert [s["shadow_id"] for s in pending] == list(range(1500, 1540))
+    reads = [q for q in client.queries if q.table == "shadow_variations"]
+    assert sum(q.returned for q in reads) <= 300
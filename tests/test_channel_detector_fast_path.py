@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+Tests for the NumPy fast path in ChannelDetector
+Channels must match the original DataFrame/linregress implementation
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import pytest  # noqa: E402
+from loguru import logger  # noqa: E402
+from scipy import stats  # noqa: E402
+
+from src.strategies.channel.detector import Channel, ChannelDetector  # noqa: E402
+
+CONFIG = {
+    "min_touches": 2,
+    "lookback_periods": 50,
+    "touch_tolerance": 0.005,
+    "min_channel_width": 0.01,
+    "max_channel_width": 0.20,
+}
+
+
+class LegacyChannelDetector(ChannelDetector):
+    """The DataFrame/linregress implementation the fast path replaced"""
+
+    def find_channel(self, symbol, ohlc_data):
+        """detect_channel without the final is_valid filter"""
+        valid = Channel.is_valid
+        try:
+            Channel.is_valid = property(lambda channel: True)
+            return self.detect_channel(symbol, ohlc_data)
+        finally:
+            Channel.is_valid = valid
+
+    def detect_channel(self, symbol: str, ohlc_data: List[Dict]) -> Optional[Channel]:
+        """
+        Detect price channel from OHLC data
+
+        Args:
+            symbol: Trading symbol
+            ohlc_data: List of OHLC bars (most recent first)
+
+        Returns:
+            Channel object if found, None otherwise
+        """
+        if len(ohlc_data) < self.lookback_periods:
+            return None
+
+        # Convert to DataFrame for easier analysis
+        df = pd.DataFrame(ohlc_data[: self.lookback_periods])
+        df = df.sort_values("timestamp")  # Ensure chronological order
+
+        # Find local highs and lows
+        highs = self._find_local_extremes(df["high"].values, is_high=True)
+        lows = self._find_local_extremes(df["low"].values, is_high=False)
+
+        if len(highs) < self.min_touches or len(lows) < self.min_touches:
+            return None
+
+        # Fit lines to highs and lows
+        upper_line = self._fit_line(highs, df["high"].values)
+        lower_line = self._fit_line(lows, df["low"].values)
+
+        if upper_line is None or lower_line is None:
+            return None
+
+        # Check if lines are parallel
+        if not self._are_parallel(upper_line, lower_line):
+            return None
+
+        # Calculate channel properties
+        channel = self._create_channel(symbol, df, upper_line, lower_line, highs, lows)
+
+        if channel and channel.is_valid:
+            logger.info(
+                f"Valid {channel.channel_type} channel detected for {symbol}: "
+                f"Width={channel.width:.2%}, Strength={channel.strength:.2f}, "
+                f"Position={channel.current_position:.2f}"
+            )
+            return channel
+
+        return None
+
+    def _find_local_extremes(
+        self, prices: np.ndarray, is_high: bool, window: int = 3
+    ) -> List[int]:
+        """
+        Find local highs or lows in price data
+        """
+        extremes = []
+
+        for i in range(window, len(prices) - window):
+            window_prices = prices[i - window : i + window + 1]
+
+            if is_high:
+                # More lenient: price is at or near max
+                if prices[i] >= np.max(window_prices) * 0.999:
+                    extremes.append(i)
+            else:
+                # More lenient: price is at or near min
+                if prices[i] <= np.min(window_prices) * 1.001:
+                    extremes.append(i)
+
+        # Ensure we have enough points
+        if len(extremes) < 2:
+            # Try to find more by being even more lenient
+            for i in range(2, len(prices) - 2):
+                if is_high and prices[i] > prices[i - 1] and prices[i] > prices[i + 1]:
+                    if i not in extremes:
+                        extremes.append(i)
+                elif (
+                    not is_high
+                    and prices[i] < prices[i - 1]
+                    and prices[i] < prices[i + 1]
+                ):
+                    if i not in extremes:
+                        extremes.append(i)
+
+        return extremes
+
+    def _fit_line(
+        self, indices: List[int], prices: np.ndarray
+    ) -> Optional[Tuple[float, float]]:
+        """
+        Fit a line to price points using linear regression
+        Returns (slope, intercept)
+        """
+        if len(indices) < 2:
+            return None
+
+        x = np.array(indices)
+        y = np.array([prices[i] for i in indices])
+
+        try:
+            slope, intercept, r_value, _, _ = stats.linregress(x, y)
+
+            # Check if fit is good enough (raised threshold for better quality)
+            if abs(r_value) < 0.6:  # R-squared threshold (was 0.5)
+                return None
+
+            return (slope, intercept)
+        except Exception:
+            return None
+
+    def _are_parallel(
+        self, line1: Tuple[float, float], line2: Tuple[float, float]
+    ) -> bool:
+        """
+        Check if two lines are approximately parallel
+        """
+        slope1, _ = line1
+        slope2, _ = line2
+
+        # Handle horizontal lines
+        if abs(slope1) < 0.0001 and abs(slope2) < 0.0001:
+            return True
+
+        # Check if slopes are similar
+        if slope1 == 0 or slope2 == 0:
+            return False
+
+        slope_ratio = abs(slope1 / slope2)
+        return (
+            (1 - self.parallel_tolerance)
+            <= slope_ratio
+            <= (1 + self.parallel_tolerance)
+        )
+
+    def _create_channel(
+        self,
+        symbol: str,
+        df: pd.DataFrame,
+        upper_line: Tuple[float, float],
+        lower_line: Tuple[float, float],
+        highs: List[int],
+        lows: List[int],
+    ) -> Optional[Channel]:
+        """
+        Create Channel object from detected lines
+        """
+        slope_upper, intercept_upper = upper_line
+        slope_lower, intercept_lower = lower_line
+
+        # Calculate current channel boundaries
+        current_idx = len(df) - 1
+        upper_current = slope_upper * current_idx + intercept_upper
+        lower_current = slope_lower * current_idx + intercept_lower
+
+        # Channel width
+        avg_price = df["close"].mean()
+        width = (upper_current - lower_current) / avg_price
+
+        # Check width constraints
+        if width < self.min_channel_width or width > self.max_channel_width:
+            return None
+
+        # Count touches
+        touches_upper = self._count_touches(df["high"].values, upper_line)
+        touches_lower = self._count_touches(df["low"].values, lower_line)
+
+        # Calculate channel strength (based on touches and consistency)
+        strength = self._calculate_strength(
+            df, upper_line, lower_line, touches_upper, touches_lower
+        )
+
+        # Current position in channel
+        current_price = df["close"].iloc[-1]
+        position = (current_price - lower_current) / (upper_current - lower_current)
+        position = max(0, min(1, position))  # Clamp to [0, 1]
+
+        # Average slope for channel direction
+        avg_slope = (slope_upper + slope_lower) / 2
+
+        return Channel(
+            symbol=symbol,
+            upper_line=upper_current,
+            lower_line=lower_current,
+            slope=avg_slope,
+            width=width,
+            touches_upper=touches_upper,
+            touches_lower=touches_lower,
+            strength=strength,
+            start_time=pd.to_datetime(df["timestamp"].iloc[0]),
+            end_time=pd.to_datetime(df["timestamp"].iloc[-1]),
+            current_position=position,
+        )
+
+    def _count_touches(self, prices: np.ndarray, line: Tuple[float, float]) -> int:
+        """
+        Count how many times price touches a line
+        """
+        slope, intercept = line
+        touches = 0
+
+        for i, price in enumerate(prices):
+            line_value = slope * i + intercept
+            distance = abs(price - line_value) / line_value
+
+            if distance <= self.touch_tolerance:
+                touches += 1
+
+        return touches
+
+    def _calculate_strength(
+        self,
+        df: pd.DataFrame,
+        upper_line: Tuple[float, float],
+        lower_line: Tuple[float, float],
+        touches_upper: int,
+        touches_lower: int,
+    ) -> float:
+        """
+        Calculate channel strength score (0-1)
+        """
+        # Factor 1: Number of touches
+        touch_score = min(1.0, (touches_upper + touches_lower) / 10)
+
+        # Factor 2: Price containment (how well price stays within channel)
+        contained = 0
+        total = len(df)
+
+        slope_upper, intercept_upper = upper_line
+        slope_lower, intercept_lower = lower_line
+
+        for i, row in df.iterrows():
+            idx = i if isinstance(i, int) else list(df.index).index(i)
+            upper_value = slope_upper * idx + intercept_upper
+            lower_value = slope_lower * idx + intercept_lower
+
+            if lower_value <= row["low"] and row["high"] <= upper_value:
+                contained += 1
+
+        containment_score = contained / total
+
+        # Factor 3: Channel consistency (low variance in width)
+        widths = []
+        for i in range(0, len(df), 10):  # Sample every 10 bars
+            upper_value = slope_upper * i + intercept_upper
+            lower_value = slope_lower * i + intercept_lower
+            widths.append(upper_value - lower_value)
+
+        width_variance = np.std(widths) / np.mean(widths) if widths else 1
+        consistency_score = max(0, 1 - width_variance)
+
+        # Weighted average
+        strength = touch_score * 0.3 + containment_score * 0.5 + consistency_score * 0.2
+
+        return min(1.0, strength)
+
+
+def make_bars(seed, count=1500):
+    """Oscillating prices with drifting trend, most recent first"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(count)
+    trend = np.cumsum(rng.normal(0, 0.02, count)) + 0.01 * t * (t % 400 < 200)
+    close = 100 + trend + 3 * np.sin(t / 6) + rng.normal(0, 0.4, count)
+    start = datetime(2025, 1, 1)
+    bars = [
+        {
+            "timestamp": (start + timedelta(hours=i)).isoformat(),
+            "open": close[i],
+            "high": close[i] + abs(rng.normal(0, 0.3)),
+            "low": close[i] - abs(rng.normal(0, 0.3)),
+            "close": close[i],
+            "volume": 1000.0,
+        }
+        for i in range(count)
+    ]
+    return bars[::-1]
+
+
+def assert_same_channel(actual, expected):
+    assert (actual is None) == (expected is None)
+    if expected is None:
+        return
+    for field in (
+        "upper_line",
+        "lower_line",
+        "slope",
+        "width",
+        "strength",
+        "current_position",
+    ):
+        assert getattr(actual, field) == pytest.approx(
+            getattr(expected, field), rel=1e-9, abs=1e-12
+        ), field
+    assert actual.touches_upper == expected.touches_upper
+    assert actual.touches_lower == expected.touches_lower
+    assert actual.start_time == expected.start_time
+    assert actual.end_time == expected.end_time
+
+
+@pytest.mark.parametrize("seed", [3, 4])
+def test_fast_path_matches_legacy_detector(seed):
+    """Every window of a synthetic series gives the same channel"""
+    logger.disable("src.strategies.channel.detector")
+    detector = ChannelDetector(CONFIG)
+    legacy = LegacyChannelDetector(CONFIG)
+    bars = make_bars(seed)
+
+    found = 0
+    for start in range(0, len(bars) - 50, 3):
+        window = bars[start : start + 60]
+        expected = legacy.find_channel("BTC", window)
+        assert_same_channel(detector.find_channel("BTC", window), expected)
+        found += expected is not None
+    assert found > 20
+
+
+def test_array_input_matches_list_input():
+    """detect_channel_arrays on oldest-first arrays matches the list path"""
+    detector = ChannelDetector(CONFIG)
+    bars = make_bars(5)
+
+    for start in range(0, 600, 7):
+        window = bars[start : start + 50]
+        chronological = window[::-1]
+        channel = detector.find_channel_arrays(
+            "ETH",
+            np.array([b["high"] for b in chronological]),
+            np.array([b["low"] for b in chronological]),
+            np.array([b["close"] for b in chronological]),
+            start_time=chronological[0]["timestamp"],
+            end_time=chronological[-1]["timestamp"],
+        )
+        assert_same_channel(channel, detector.find_channel("ETH", window))
+
+
+def test_local_extremes_match_loop():
+    """Vectorized extremes keep the loop's indices, including the fallback"""
+    detector = ChannelDetector(CONFIG)
+    legacy = LegacyChannelDetector(CONFIG)
+    rng = np.random.default_rng(0)
+
+    zigzag = 100 * np.exp(np.cumsum(np.where(np.arange(60) % 2, -0.01, 0.03)))
+    for prices in [rng.normal(100, 1, 60), zigzag, -zigzag, np.ones(60)]:
+        for is_high in (True, False):
+            assert detector._find_local_extremes(
+                prices, is_high
+            ) == legacy._find_local_extremes(prices, is_high)
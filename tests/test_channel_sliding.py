@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Tests for the sliding-window channel engine
+Every window must give the same channel as ChannelDetector.detect_channel
+"""
+
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+
+from src.strategies.channel.detector import ChannelDetector  # noqa: E402
+from src.strategies.channel.sliding import SlidingChannelEngine  # noqa: E402
+
+CONFIG = {
+    "min_touches": 2,
+    "lookback_periods": 50,
+    "touch_tolerance": 0.005,
+    "min_channel_width": 0.01,
+    "max_channel_width": 0.20,
+    "buy_zone": 0.30,
+    "sell_zone": 0.70,
+}
+
+
+def make_bars(seed, count=1500):
+    """Oscillating prices with drifting trend, so channels come and go"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(count)
+    trend = np.cumsum(rng.normal(0, 0.02, count)) + 0.01 * t * (t % 400 < 200)
+    close = 100 + trend + 3 * np.sin(t / 6) + rng.normal(0, 0.4, count)
+    start = datetime(2025, 1, 1)
+    return [
+        {
+            "timestamp": (start + timedelta(hours=i)).isoformat(),
+            "open": close[i],
+            "high": close[i] + abs(rng.normal(0, 0.3)),
+            "low": close[i] - abs(rng.normal(0, 0.3)),
+            "close": close[i],
+            "volume": 1000.0,
+        }
+        for i in range(count)
+    ]
+
+
+def reference_channel(detector, symbol, window):
+    """detect_channel without the final Channel.is_valid filter"""
+    return detector.find_channel(symbol, list(reversed(window)))
+
+
+@pytest.mark.parametrize("seed", [1, 2])
+def test_engine_matches_detector_for_every_window(seed):
+    """Channel fields match window by window, and so does detect_channel"""
+    detector = ChannelDetector(CONFIG)
+    engine = SlidingChannelEngine(detector, chunk_size=300)
+    bars = make_bars(seed)
+    lookback = detector.lookback_periods
+
+    candidates = engine.channels("BTC", bars, valid_only=False)
+    valid = engine.channels("BTC", bars)
+
+    found = 0
+    for end in range(lookback, len(bars) + 1):
+        window = bars[end - lookback : end]
+        expected = reference_channel(detector, "BTC", window)
+        actual = candidates.get(end)
+
+        assert (actual is None) == (expected is None), f"window ending {end}"
+        if expected is None:
+            continue
+        found += 1
+        for field in (
+            "upper_line",
+            "lower_line",
+            "slope",
+            "width",
+            "strength",
+            "current_position",
+        ):
+            assert getattr(actual, field) == pytest.approx(
+                getattr(expected, field), rel=1e-9, abs=1e-12
+            ), field
+        assert actual.touches_upper == expected.touches_upper
+        assert actual.touches_lower == expected.touches_lower
+        assert actual.start_time == expected.start_time
+        assert actual.end_time == expected.end_time
+
+        detected = detector.detect_channel("BTC", list(reversed(window)))
+        assert (detected is None) == (end not in valid)
+
+    assert found > 50
+
+
+def test_fallback_to_strict_turning_points():
+    """A steady zigzag trend has no near-max extremes; both use the fallback"""
+    detector = ChannelDetector(
+        {**CONFIG, "min_channel_width": 0, "max_channel_width": 5}
+    )
+    engine = SlidingChannelEngine(detector)
+    rng = np.random.default_rng(0)
+    steps = np.where(np.arange(300) % 2 == 0, 0.03, -0.01) * rng.uniform(0.5, 1.5, 300)
+    close = 100 * np.exp(np.cumsum(steps))
+    bars = [
+        {
+            "timestamp": (datetime(2025, 1, 1) + timedelta(hours=i)).isoformat(),
+            "high": close[i] * 1.001,
+            "low": close[i] * 0.999,
+            "close": close[i],
+        }
+        for i in range(300)
+    ]
+
+    candidates = engine.channels("ETH", bars, valid_only=False)
+    assert len(candidates) == 300 - detector.lookback_periods + 1
+    for end, channel in candidates.items():
+        expected = reference_channel(detector, "ETH", bars[end - 50 : end])
+        assert channel.strength == pytest.approx(expected.strength)
+        assert channel.upper_line == pytest.approx(expected.upper_line)
+        assert channel.touches_lower == expected.touches_lower
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Tests for the event-driven exit engine
+Triggers must match the per-position loop check_and_close_positions used to run
+"""
+
+import asyncio
+import copy
+import random
+import threading
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.data.latest_prices import LatestPriceService  # noqa: E402
+from src.trading.exit_engine import ExitEngine  # noqa: E402
+from src.trading.simple_paper_trader_v2 import (  # noqa: E402
+    Position,
+    SimplePaperTraderV2,
+)
+
+
+def reference_exits(positions, prices, max_hold_hours, now):
+    """The original O(n) loop from SimplePaperTraderV2.check_and_close_positions"""
+    exits = []
+    for symbol, position in list(positions.items()):
+        if symbol not in prices:
+            continue
+        current_price = prices[symbol]
+        hold_duration = (now - position.entry_time).total_seconds() / 3600
+        if current_price > position.highest_price:
+            position.highest_price = current_price
+        trailing_stop_price = position.highest_price * (1 - position.trailing_stop_pct)
+
+        exit_reason = None
+        if current_price <= position.stop_loss:
+            exit_reason = "stop_loss"
+        elif (
+            current_price <= trailing_stop_price
+            and position.highest_price > position.entry_price * 1.001
+        ):
+            exit_reason = "trailing_stop"
+        elif current_price >= position.take_profit:
+            exit_reason = "take_profit"
+        elif hold_duration >= max_hold_hours:
+            exit_reason = "time_exit"
+
+        if exit_reason:
+            exits.append((symbol, exit_reason))
+            del positions[symbol]
+    return sorted(exits)
+
+
+def make_position(symbol, price, rng, now):
+    return Position(
+        symbol=symbol,
+        entry_price=price,
+        amount=1.0,
+        usd_value=price,
+        entry_time=now - timedelta(hours=rng.uniform(0, 80)),
+        strategy="DCA",
+        stop_loss=price * (1 - rng.uniform(0.02, 0.08)),
+        take_profit=price * (1 + rng.uniform(0.02, 0.10)),
+        trailing_stop_pct=rng.uniform(0.01, 0.05),
+        highest_price=price,
+    )
+
+
+def run_engine(engine, prices, max_hold_hours, now):
+    exits = []
+    for symbol, price in prices.items():
+        exits.extend(engine.on_price(symbol, price))
+    exits.extend((key, "time_exit") for key in engine.expired(max_hold_hours, now))
+    return sorted(exits)
+
+
+def test_engine_matches_reference_loop():
+    """Random walks with positions opening and closing give identical exits"""
+    rng = random.Random(11)
+    now = datetime.now(timezone.utc)
+    symbols = [f"SYM{i}" for i in range(40)]
+    prices = {s: rng.uniform(1, 100) for s in symbols}
+
+    reference = {}
+    engine = ExitEngine()
+    engine_positions = {}
+
+    for step in range(300):
+        now += timedelta(minutes=15)
+
+        # Open positions on free symbols
+        for symbol in rng.sample(symbols, 5):
+            if symbol not in reference:
+                position = make_position(symbol, prices[symbol], rng, now)
+                reference[symbol] = position
+                engine_positions[symbol] = copy.deepcopy(position)
+                engine.add(symbol, engine_positions[symbol])
+
+        # Tick a random subset of symbols
+        ticked = {}
+        for symbol in rng.sample(symbols, 25):
+            prices[symbol] *= 1 + rng.gauss(0, 0.015)
+            ticked[symbol] = prices[symbol]
+
+        expected = reference_exits(reference, ticked, 72, now)
+        actual = run_engine(engine, ticked, 72, now)
+
+        # The reference only time-exits symbols that ticked this round
+        actual_ticked = [e for e in actual if e[0] in ticked or e[1] != "time_exit"]
+        for key, reason in actual:
+            if (key, reason) not in actual_ticked:
+                del reference[key]  # Timed out on a stale price; drop from both
+        assert actual_ticked == expected, f"step {step}"
+
+        for key, _ in actual:
+            del engine_positions[key]
+        for symbol, position in reference.items():
+            assert engine_positions[symbol].highest_price == position.highest_price
+
+    assert len(engine) == len(reference)
+
+
+def test_trailing_stop_rises_with_new_highs():
+    """A trailing stop follows the high-water mark and fires on the pullback"""
+    now = datetime.now(timezone.utc)
+    position = Position(
+        symbol="BTC",
+        entry_price=100.0,
+        amount=1.0,
+        usd_value=100.0,
+        entry_time=now,
+        strategy="SWING",
+        stop_loss=90.0,
+        take_profit=200.0,
+        trailing_stop_pct=0.05,
+        highest_price=100.0,
+    )
+    engine = ExitEngine()
+    engine.add("BTC", position)
+
+    for price in range(101, 150):
+        assert engine.on_price("BTC", float(price)) == []
+    assert position.highest_price == 149.0
+    assert len(engine.symbols["BTC"].trailing) < 100  # Stale levels compacted
+
+    assert engine.on_price("BTC", 142.0) == []
+    assert engine.on_price("BTC", 141.0) == [("BTC", "trailing_stop")]
+    assert "BTC" not in engine
+
+
+def test_removed_positions_do_not_trigger():
+    """Levels of a closed position are ignored, even if the symbol reopens"""
+    now = datetime.now(timezone.utc)
+    rng = random.Random(2)
+    engine = ExitEngine()
+
+    old = make_position("ETH", 100.0, rng, now)
+    engine.add("ETH", old)
+    engine.remove("ETH")
+
+    new = make_position("ETH", 50.0, rng, now)
+    new.stop_loss = 40.0
+    new.take_profit = 200.0
+    engine.add("ETH", new)
+
+    assert engine.on_price("ETH", old.stop_loss - 1) == []
+    assert engine.on_price("ETH", 39.0) == [("ETH", "stop_loss")]
+
+
+def test_sync_replaces_swapped_positions():
+    """Reloaded state with a different position set is picked up by sync"""
+    now = datetime.now(timezone.utc)
+    rng = random.Random(3)
+    engine = ExitEngine()
+    positions = {"BTC": make_position("BTC", 100.0, rng, now)}
+    engine.sync(positions)
+
+    closed = positions.pop("BTC")
+    positions["ETH"] = make_position("ETH", 50.0, rng, now)
+    engine.sync(positions)
+    assert list(engine.positions) == ["ETH"]
+    assert engine.on_price("BTC", closed.stop_loss - 1) == []
+    assert engine.on_price("ETH", positions["ETH"].stop_loss - 1) == [
+        ("ETH", "stop_loss")
+    ]
+
+
+def test_stream_ticks_close_positions_on_the_loop():
+    """A tick from another thread closes the position it crosses"""
+
+    async def scenario():
+        trader = SimplePaperTraderV2(initial_balance=1000.0, persist=False)
+        service = LatestPriceService()
+        closed = []
+        trader.attach_price_stream(service, on_close=closed.append)
+
+        await trader.open_position("BTC", 100.0, 100.0, "DCA", stop_loss_pct=5.0)
+        assert "BTC" in trader.exit_engine
+
+        now = datetime.now(timezone.utc)
+        feed = threading.Thread(target=service.on_tick, args=("BTC", 90.0, now))
+        feed.start()
+        feed.join()
+        while not closed:
+            await asyncio.sleep(0.01)
+
+        assert [(t.symbol, t.exit_reason) for t in closed] == [("BTC", "stop_loss")]
+        assert "BTC" not in trader.positions and "BTC" not in trader.exit_engine
+
+    asyncio.run(scenario())
+
+
+def test_time_exits_wait_for_a_fresh_quote():
+    """Expired positions close at a fresh price, never the last stale tick"""
+
+    async def scenario():
+        opened = datetime.now(timezone.utc) - timedelta(hours=80)
+        clock = [opened]
+        service = LatestPriceService(max_age=60)
+        trader = SimplePaperTraderV2(
+            initial_balance=1000.0, persist=False, clock=lambda tz=None: clock[0]
+        )
+        trader.price_service = service
+        await trader.open_position("ETH", 100.0, 100.0, "DCA", stop_loss_pct=5.0)
+        clock[0] = datetime.now(timezone.utc)
+
+        stale = datetime.now(timezone.utc) - timedelta(minutes=10)
+        service.update("ETH", 101.0, stale)
+        assert await trader.check_and_close_positions({}, max_hold_hours=72) == []
+        assert "ETH" in trader.exit_engine  # Back in line for the next check
+
+        service.update("ETH", 102.0)
+        [trade] = await trader.check_and_close_positions({}, max_hold_hours=72)
+        assert trade.exit_reason == "time_exit"
+        assert trade.exit_price < 102.0 * 1.01 and trade.exit_price > 102.0 * 0.99
+
+    asyncio.run(scenario())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests for the pipelined feature refresh in FeatureCalculator
+"""
+
+import asyncio
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np  # noqa: E402
+
+from src.data.hybrid_fetcher import HybridDataFetcher  # noqa: E402
+from src.ml.feature_calculator import FeatureCalculator  # noqa: E402
+from tests.fakes import FakeClient  # noqa: E402
+
+
+def make_records(seed: int, bars: int = 200):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)))
+    start = datetime(2025, 8, 1)
+    return [
+        {
+            "timestamp": (start + timedelta(minutes=15 * i)).isoformat() + "+00:00",
+            "close": float(close[i]),
+            "volume": float(rng.uniform(100, 1000)),
+        }
+        for i in range(bars)
+    ]
+
+
+class RecordingSupabase:
+    def __init__(self):
+        self.batches = []
+
+    def insert_ml_features(self, records):
+        self.batches.append(records)
+
+
+def build_calculator(tmp_path, data):
+    async def get_recent_data(symbol, hours, timeframe):
+        return data[symbol]
+
+    async def get_recent_data_batch(symbols, hours, timeframe):
+        return {symbol: data[symbol] for symbol in symbols}
+
+    settings = SimpleNamespace(data_dir=str(tmp_path))
+    fetcher = SimpleNamespace(
+        get_recent_data=get_recent_data, get_recent_data_batch=get_recent_data_batch
+    )
+    supabase = RecordingSupabase()
+    with patch("src.ml.feature_calculator.get_settings", return_value=settings), patch(
+        "src.ml.feature_calculator.HybridDataFetcher", return_value=fetcher
+    ), patch("src.ml.feature_calculator.SupabaseClient", return_value=supabase):
+        return FeatureCalculator(), supabase
+
+
+def test_pipelined_matches_serial_with_one_insert(tmp_path):
+    """Pipelined refresh writes the same rows as the serial loop in one insert"""
+    data = {"BTC": make_records(1), "ETH": make_records(2), "NEW": make_records(3, 20)}
+
+    serial, serial_db = build_calculator(tmp_path / "serial", data)
+    serial_results = asyncio.run(
+        serial.update_all_symbols(list(data), incremental=False)
+    )
+
+    pipelined, pipelined_db = build_calculator(tmp_path / "pipelined", data)
+    pipelined.max_workers = 2
+    results = asyncio.run(pipelined.update_all_symbols_pipelined(list(data)))
+
+    assert results == serial_results == {"BTC": True, "ETH": True, "NEW": False}
+    assert len(pipelined_db.batches) == 1
+
+    def by_key(batches):
+        return {(r["symbol"], r["timestamp"]): r for b in batches for r in b}
+
+    assert by_key(pipelined_db.batches) == by_key(serial_db.batches)
+
+
+class BlockingClient(FakeClient):
+    """FakeClient whose queries block their thread like the real client"""
+
+    def __init__(self, rows, latency):
+        super().__init__(rows=rows)
+        self.latency = latency
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def after_execute(self, query):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self.lock:
+            self.in_flight -= 1
+
+
+def test_pipelined_fetches_overlap_with_blocking_client(tmp_path):
+    """Blocking fetches run on threads instead of serializing on the loop"""
+    now = datetime.utcnow().replace(second=0, microsecond=0)
+    symbols = [f"SYM{i}" for i in range(12)]
+    rows = [
+        {
+            "symbol": symbol,
+            "timeframe": "15m",
+            "timestamp": (now - timedelta(minutes=15 * i)).isoformat() + "+00:00",
+            "open": 100.0 + i,
+            "high": 101.0 + i,
+            "low": 99.0 + i,
+            "close": 100.0 + i,
+            "volume": 1000.0,
+        }
+        for symbol in symbols
+        for i in range(200)
+    ]
+    db = BlockingClient(rows, latency=0.05)
+    settings = SimpleNamespace(ohlc_store_enabled=False)
+    with patch("src.data.hybrid_fetcher.get_settings", return_value=settings), patch(
+        "src.data.hybrid_fetcher.SupabaseClient", return_value=db
+    ):
+        fetcher = HybridDataFetcher()
+
+    calculator, supabase = build_calculator(tmp_path, {})
+    calculator.fetcher = fetcher
+    calculator.max_workers = 1
+    calculator.fetch_chunk_size = 2
+
+    results = asyncio.run(calculator.update_all_symbols_pipelined(symbols))
+
+    assert results == {symbol: True for symbol in symbols}
+    assert db.max_in_flight > 1
+    assert {r["symbol"] for r in supabase.batches[0]} == set(symbols)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Tests for the vectorized forward-outcome kernel
+Outcomes must match the per-bar loops the label generators used
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+
+from src.analysis.forward_outcomes import (  # noqa: E402
+    EXPIRED,
+    LONG,
+    SHORT,
+    STOP_LOSS,
+    TAKE_PROFIT,
+    forward_outcomes,
+)
+
+
+def make_series(seed, count=3000):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, count)))
+    high = close * (1 + np.abs(rng.normal(0, 0.004, count)))
+    low = close * (1 - np.abs(rng.normal(0, 0.004, count)))
+    return high, low, close
+
+
+def reference_outcome(
+    high, low, close, entry, entry_price, tp, sl, max_bars, side, include_exit_bar
+):
+    """
+    The generators' loop: excursions tracked before (channel, swing) or
+    after (simple channel) the exit checks, take profit checked first
+    """
+    outcome = {
+        "exit_index": -1,
+        "exit_reason": EXPIRED,
+        "exit_price": entry_price,
+        "pnl_pct": 0.0,
+        "bars_held": 0,
+        "max_favorable_pct": 0.0,
+        "max_adverse_pct": 0.0,
+    }
+    bars = min(max_bars, len(close) - entry)
+    if bars <= 0:
+        return outcome
+
+    for j in range(bars):
+        i = entry + j
+        if side == LONG:
+            profit = (high[i] - entry_price) / entry_price * 100
+            loss = (low[i] - entry_price) / entry_price * 100
+            tp_hit, sl_hit = high[i] >= tp, low[i] <= sl
+        else:
+            profit = (entry_price - low[i]) / entry_price * 100
+            loss = (entry_price - high[i]) / entry_price * 100
+            tp_hit, sl_hit = low[i] <= tp, high[i] >= sl
+
+        if include_exit_bar or not (tp_hit or sl_hit):
+            outcome["max_favorable_pct"] = max(outcome["max_favorable_pct"], profit)
+            outcome["max_adverse_pct"] = min(outcome["max_adverse_pct"], loss)
+
+        if tp_hit or sl_hit:
+            exit_price = tp if tp_hit else sl
+            outcome.update(
+                exit_index=i,
+                exit_reason=TAKE_PROFIT if tp_hit else STOP_LOSS,
+                exit_price=exit_price,
+                bars_held=j + 1,
+            )
+            break
+    else:
+        outcome.update(
+            exit_index=entry + bars - 1,
+            exit_price=close[entry + bars - 1],
+            bars_held=bars,
+        )
+
+    sign = 1.0 if side == LONG else -1.0
+    outcome["pnl_pct"] = (
+        sign * (outcome["exit_price"] - entry_price) / entry_price * 100
+    )
+    return outcome
+
+
+@pytest.mark.parametrize("include_exit_bar", [True, False])
+@pytest.mark.parametrize("seed", [1, 2])
+def test_matches_bar_by_bar_loop(seed, include_exit_bar):
+    high, low, close = make_series(seed)
+    rng = np.random.default_rng(seed + 10)
+    m = 800
+
+    # Entries run past the end of the series so horizons get clipped
+    entries = rng.integers(0, len(close) + 5, m)
+    prices = close[np.minimum(entries, len(close) - 1)]
+    side = np.where(rng.random(m) < 0.5, LONG, SHORT)
+    width = rng.uniform(0.005, 0.08, (2, m))
+    tp = np.where(side == LONG, prices * (1 + width[0]), prices * (1 - width[0]))
+    sl = np.where(side == LONG, prices * (1 - width[1]), prices * (1 + width[1]))
+    max_bars = rng.integers(0, 120, m)
+
+    result = forward_outcomes(
+        high,
+        low,
+        close,
+        entries,
+        prices,
+        tp,
+        sl,
+        max_bars,
+        side=side,
+        include_exit_bar=include_exit_bar,
+        chunk_elements=5000,  # Several chunks
+    )
+
+    reasons = set()
+    for k in range(m):
+        expected = reference_outcome(
+            high,
+            low,
+            close,
+            entries[k],
+            prices[k],
+            tp[k],
+            sl[k],
+            max_bars[k],
+            side[k],
+            include_exit_bar,
+        )
+        for key, value in expected.items():
+            assert result[key][k] == value, (k, key)
+        reasons.add(expected["exit_reason"])
+
+    assert reasons == {EXPIRED, TAKE_PROFIT, STOP_LOSS}
+
+
+def test_same_bar_tie_goes_to_take_profit():
+    high = np.array([100.0, 112.0, 100.0])
+    low = np.array([100.0, 90.0, 100.0])
+    close = np.array([100.0, 100.0, 100.0])
+
+    result = forward_outcomes(
+        high,
+        low,
+        close,
+        [1, 1],
+        [100.0, 100.0],
+        [110.0, 92.0],
+        [95.0, 108.0],
+        2,
+        side=[LONG, SHORT],
+    )
+    assert result["exit_reason"].tolist() == [TAKE_PROFIT, TAKE_PROFIT]
+    assert result["pnl_pct"].tolist() == pytest.approx([10.0, 8.0])
+
+
+def test_scalar_parameters_broadcast_and_empty_input():
+    high, low, close = make_series(3, 200)
+    result = forward_outcomes(high, low, close, [10, 20, 30], close[10], 1e9, 0.0, 25)
+    assert result["exit_reason"].tolist() == [EXPIRED] * 3
+    assert result["exit_index"].tolist() == [34, 44, 54]
+    assert result["bars_held"].tolist() == [25, 25, 25]
+
+    empty = forward_outcomes(high, low, close, [], [], [], [], 10)
+    assert all(len(array) == 0 for array in empty.values())
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Tests for the Supabase -> Freqtrade OHLCV export
+Cascaded resampling must match pandas' resample, and incremental syncs must
+leave the same files as a full export
+"""
+
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent.parent / "freqtrade"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import pytest  # noqa: E402
+
+from ohlcv_export import (  # noqa: E402
+    CandleBuffer,
+    FreqtradeExporter,
+    ohlcv_path,
+    read_ohlcv,
+    resample_all,
+    to_frame,
+    write_ohlcv,
+)
+from tests.fakes import FakeClient  # noqa: E402
+
+START = datetime(2025, 6, 1, tzinfo=timezone.utc)
+
+
+def make_rows(symbol="BTC", minutes=3000, seed=0):
+    """1m ohlc_data rows with a few missing minutes"""
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, minutes)))
+    missing = set(rng.choice(minutes, 40, replace=False))
+    rows = []
+    for k in range(minutes):
+        if k in missing:
+            continue
+        rows.append(
+            {
+                "symbol": symbol,
+                "timeframe": "1m",
+                "timestamp": (START + timedelta(minutes=k)).isoformat(),
+                "open": close[k - 1] if k else close[0],
+                "high": close[k] * 1.001,
+                "low": close[k] * 0.999,
+                "close": close[k],
+                "volume": float(rng.integers(1, 100)),
+            }
+        )
+    return rows
+
+
+def reference_frame(rows, rule, end):
+    """The old sync_5m_from_1m.resample_to_5m"""
+    df = pd.DataFrame(rows)
+    df["timestamp"] = pd.to_datetime(df["timestamp"])
+    df = df.set_index("timestamp").sort_index()
+    out = (
+        df.resample(rule)
+        .agg(
+            {
+                "open": "first",
+                "high": "max",
+                "low": "min",
+                "close": "last",
+                "volume": "sum",
+            }
+        )
+        .dropna()
+    )
+    out = out[out.index + pd.Timedelta(rule) <= end]  # Closed candles only
+    return out.rename_axis("date").reset_index()
+
+
+def test_cascaded_resample_matches_pandas():
+    rows = make_rows()
+    end = START + timedelta(minutes=2990)
+    buffer = CandleBuffer()
+    for k in range(0, len(rows), 700):  # Pages
+        buffer.extend(rows[k : k + 700])
+    buffer.extend(rows[:5])  # Overlapping page
+
+    candles = buffer.arrays()
+    assert len(candles["date"]) == len(rows)
+
+    resampled = resample_all(candles, ["1h", "5m", "15m"], end)
+    for timeframe, rule in [("5m", "5min"), ("15m", "15min"), ("1h", "1h")]:
+        expected = reference_frame(rows, rule, end)
+        got = resampled[timeframe]
+        assert np.array_equal(got["date"], expected["date"].astype("int64") // 10**9)
+        for column in ["open", "high", "low", "close", "volume"]:
+            assert np.allclose(got[column], expected[column]), (timeframe, column)
+
+
+@pytest.mark.parametrize("data_format", ["json", "feather"])
+def test_write_read_round_trip(tmp_path, data_format):
+    if data_format == "feather":
+        pytest.importorskip("pyarrow")
+    buffer = CandleBuffer()
+    buffer.extend(make_rows(minutes=120))
+    frame = to_frame(resample_all(buffer.arrays(), ["5m"])["5m"])
+    path = ohlcv_path(tmp_path, "BTC/USDT", "5m", data_format)
+    write_ohlcv(frame, path, data_format)
+
+    assert path.name == f"BTC_USDT-5m.{data_format}"
+    assert read_ohlcv(path, data_format).equals(frame)
+    if data_format == "json":
+        first = json.loads(path.read_text())[0]
+        assert first[0] == int(START.timestamp() * 1000) and len(first) == 6
+
+
+def test_incremental_sync_appends_only_new_candles(tmp_path):
+    rows = make_rows(minutes=4000, seed=1)
+    client = FakeClient(
+        [
+            r
+            for r in rows
+            if r["timestamp"] < (START + timedelta(minutes=2500)).isoformat()
+        ]
+    )
+    exporter = FreqtradeExporter(
+        client, tmp_path / "inc", data_format="json", page_size=500, history_days=30
+    )
+
+    first_end = START + timedelta(minutes=2500)
+    first = exporter.export_pair("BTC", end=first_end)
+    assert first == {"5m": 500, "15m": 166, "1h": 41}
+    assert client.pages == [500, 500, 500, 500, 479]  # Keyset pages until a short one
+
+    # New minutes land; the next sync only reads from the last open hour
+    client.rows = rows
+    client.reset()
+    second_end = START + timedelta(minutes=4000)
+    second = exporter.export_pair("BTC", end=second_end)
+    assert second == {"5m": 300, "15m": 100, "1h": 25}
+    assert sum(client.pages) < 1600
+
+    assert exporter.export_pair("BTC", end=second_end) == {"5m": 0, "15m": 0, "1h": 0}
+
+    full = FreqtradeExporter(
+        FakeClient(rows), tmp_path / "full", data_format="json", history_days=30
+    )
+    full.export_pair("BTC", end=second_end)
+    for timeframe in ("5m", "15m", "1h"):
+        incremental = exporter.load("BTC/USDT", timeframe)
+        assert incremental.equals(full.load("BTC/USDT", timeframe))
+        assert incremental["date"].is_unique
+
+
+def test_existing_json_files_seed_a_feather_export(tmp_path):
+    pytest.importorskip("pyarrow")
+    rows = make_rows("ETH", minutes=600, seed=2)
+    old = FreqtradeExporter(FakeClient(rows[:300]), tmp_path, data_format="json")
+    old.export_pair("ETH", end=START + timedelta(minutes=300))
+
+    client = FakeClient(rows)
+    new = FreqtradeExporter(client, tmp_path, data_format="feather")
+    new.export_pair("ETH", end=START + timedelta(minutes=600))
+
+    assert ohlcv_path(tmp_path, "ETH/USDT", "5m", "feather").exists()
+    assert len(new.load("ETH/USDT", "5m")) == 120
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for the incremental feature engine
+Streaming features must match the `ta`-based batch path in FeatureCalculator
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from src.ml.feature_calculator import FeatureCalculator  # noqa: E402
+from src.ml.incremental_features import (  # noqa: E402
+    FEATURE_COLUMNS,
+    IncrementalFeatureEngine,
+)
+
+
+def make_bars(count: int, seed: int = 1) -> pd.DataFrame:
+    """15m random walk with a flat stretch and a run of zero volume"""
+    rng = np.random.default_rng(seed)
+    price = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, count)))
+    price[100:130] = price[100]
+    volume = rng.uniform(10, 1000, count)
+    volume[200:270] = 0
+    index = pd.date_range("2025-08-01", periods=count, freq="15min", tz="UTC")
+    return pd.DataFrame({"price": price, "close": price, "volume": volume}, index=index)
+
+
+def build_calculator(tmp_path, price_data=None):
+    settings = SimpleNamespace(data_dir=str(tmp_path))
+    fetcher = SimpleNamespace(get_recent_data=None)
+
+    async def get_recent_data(symbol, hours, timeframe):
+        return price_data()
+
+    fetcher.get_recent_data = get_recent_data
+    with patch("src.ml.feature_calculator.get_settings", return_value=settings), patch(
+        "src.ml.feature_calculator.HybridDataFetcher", return_value=fetcher
+    ), patch("src.ml.feature_calculator.SupabaseClient"):
+        return FeatureCalculator()
+
+
+def test_engine_matches_ta_batch_path(tmp_path):
+    """Every feature column matches the batch computation bar for bar"""
+    df = make_bars(600)
+    batch = build_calculator(tmp_path)._calculate_technical_indicators(df)
+
+    engine = IncrementalFeatureEngine("BTC")
+    rows = engine.update_many(
+        list(range(len(df))), df["price"].tolist(), df["volume"].tolist()
+    )
+    streamed = pd.DataFrame(rows, index=df.index)
+
+    assert list(batch.columns) == FEATURE_COLUMNS
+    pd.testing.assert_frame_equal(streamed, batch, check_exact=True)
+
+
+def test_state_round_trip_continues_identically(tmp_path):
+    """An engine restored from disk produces the same rows as one that never stopped"""
+    df = make_bars(400, seed=5)
+    prices, volumes = df["price"].tolist(), df["volume"].tolist()
+
+    reference = IncrementalFeatureEngine("ETH")
+    expected = reference.update_many(list(range(400)), prices, volumes)
+
+    first = IncrementalFeatureEngine("ETH")
+    first.update_many(list(range(300)), prices[:300], volumes[:300])
+    first.save(tmp_path / "ETH.json")
+
+    restored = IncrementalFeatureEngine.load(tmp_path / "ETH.json")
+    assert restored.last_timestamp == 299
+    resumed = restored.update_many(list(range(300, 400)), prices[300:], volumes[300:])
+
+    assert resumed == expected[300:]
+
+
+def test_calculator_only_computes_new_bars(tmp_path):
+    """Later refreshes return rows for new bars and warm-start from saved state"""
+    df = make_bars(300, seed=9)
+    records = [
+        {
+            "timestamp": ts.isoformat(),
+            "close": row.price,
+            "volume": row.volume,
+        }
+        for ts, row in df.iterrows()
+    ]
+    window = {"end": 288}
+
+    calculator = build_calculator(tmp_path, lambda: records[: window["end"]])
+    first = asyncio.run(calculator.calculate_features_incremental("SOL"))
+    assert len(first) == 288
+
+    window["end"] = 290
+    second = asyncio.run(calculator.calculate_features_incremental("SOL"))
+    assert len(second) == 2
+    assert second.index[-1] == df.index[289]
+
+    # Nothing new since the last refresh
+    assert asyncio.run(calculator.calculate_features_incremental("SOL")).empty
+
+    # A fresh calculator picks up the saved state instead of replaying
+    window["end"] = 291
+    restarted = build_calculator(tmp_path, lambda: records[: window["end"]])
+    third = asyncio.run(restarted.calculate_features_incremental("SOL"))
+    assert len(third) == 1
+
+    batch = calculator._calculate_technical_indicators(df.iloc[:291])
+    np.testing.assert_array_equal(third[FEATURE_COLUMNS].values[-1], batch.values[-1])
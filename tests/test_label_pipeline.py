@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared label-generation pipeline
+Parallel runs match in-process ones, rows reach one batched writer, and
+finished symbols are skipped on resume
+"""
+
+import json
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import pytest  # noqa: E402
+
+from src.ml.label_pipeline import LabelJob, LabelPipeline  # noqa: E402
+
+SYMBOLS = ["BTC", "ETH", "SOL", "ADA", "DOT", "LINK"]
+
+
+class FakeGenerator:
+    """Deterministic labels per symbol; remembers what it was asked for"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.calls = []
+
+    def label(self, symbol):
+        self.calls.append(symbol)
+        if symbol in self.failing:
+            raise RuntimeError("fetch failed")
+        count = len(symbol) + (symbol == "LINK") * 3
+        return [
+            {
+                "symbol": symbol,
+                "timestamp": pd.Timestamp("2025-01-01") + pd.Timedelta(hours=i),
+                "outcome": "WIN" if i % 2 == 0 else "SKIP",
+                "pnl": np.float64(i * 1.5),
+                "index": np.int64(i),
+            }
+            for i in range(count)
+        ]
+
+
+def label_fake_symbol(generator, symbol):
+    return generator.label(symbol)
+
+
+def fake_row(label):
+    if label["outcome"] == "SKIP":
+        return None
+    return {
+        "symbol": label["symbol"],
+        "timestamp": label["timestamp"],
+        "pnl": label["pnl"],
+    }
+
+
+def make_job(config=None):
+    return LabelJob(
+        name="fake",
+        make_generator=FakeGenerator,
+        label_symbol=label_fake_symbol,
+        table="strategy_fake_labels",
+        to_row=fake_row,
+        config=config or {"threshold": 0.05},
+    )
+
+
+def make_client(fail=False):
+    client = SimpleNamespace(calls=[])
+
+    def bulk_upsert(table, records, on_conflict=None, ignore_duplicates=True):
+        if fail:
+            raise RuntimeError("gateway timeout")
+        client.calls.append((table, records, on_conflict, ignore_duplicates))
+        return len(records)
+
+    client.bulk_upsert = bulk_upsert
+    return client
+
+
+def test_rows_are_batched_and_symbols_checkpointed(tmp_path):
+    client = make_client()
+    pipeline = LabelPipeline(
+        make_job(), client, max_workers=1, checkpoint_dir=tmp_path, batch_size=10**6
+    )
+
+    results = pipeline.run(SYMBOLS, generator=FakeGenerator())
+
+    assert list(results) == SYMBOLS
+    # In-process labelling never lets the writer fall behind, but every
+    # write still goes through bulk_upsert with the job's conflict key
+    rows = [row for call in client.calls for row in call[1]]
+    expected = [fake_row(label) for s in SYMBOLS for label in FakeGenerator().label(s)]
+    assert len(rows) == sum(r is not None for r in expected)
+    assert {call[0] for call in client.calls} == {"strategy_fake_labels"}
+    assert {call[2] for call in client.calls} == {"symbol,timestamp"}
+    assert all(json.dumps(row) for row in rows)  # JSON-ready
+    assert pipeline.stats["rows_written"] == len(rows)
+
+    # Returned labels are JSON-normalised, like the checkpoint copies
+    btc = results["BTC"]
+    assert btc[0]["timestamp"] == "2025-01-01 00:00:00"
+    assert btc[1]["index"] == 1 and isinstance(btc[1]["index"], int)
+
+    manifest = json.loads((tmp_path / "fake" / "manifest.json").read_text())
+    assert manifest["completed"] == {s: len(results[s]) for s in SYMBOLS}
+
+
+def test_resume_only_relabels_unfinished_symbols(tmp_path):
+    client = make_client()
+    pipeline = LabelPipeline(make_job(), client, max_workers=1, checkpoint_dir=tmp_path)
+
+    first = pipeline.run(SYMBOLS, generator=FakeGenerator(failing={"SOL", "DOT"}))
+    assert "SOL" not in first and "DOT" not in first
+    assert pipeline.stats["failed"] == 2
+
+    generator = FakeGenerator()
+    second = pipeline.run(SYMBOLS, generator=generator)
+    assert generator.calls == ["SOL", "DOT"]
+    assert pipeline.stats["resumed"] == 4
+    assert list(second) == SYMBOLS
+    assert second["BTC"] == first["BTC"]
+
+    # Without resume everything is labelled again
+    generator = FakeGenerator()
+    pipeline.run(SYMBOLS, resume=False, generator=generator)
+    assert generator.calls == SYMBOLS
+
+
+def test_config_change_discards_checkpoint(tmp_path):
+    client = make_client()
+    LabelPipeline(make_job(), client, max_workers=1, checkpoint_dir=tmp_path).run(
+        SYMBOLS, generator=FakeGenerator()
+    )
+
+    generator = FakeGenerator()
+    pipeline = LabelPipeline(
+        make_job({"threshold": 0.03}), client, max_workers=1, checkpoint_dir=tmp_path
+    )
+    pipeline.run(SYMBOLS, generator=generator)
+    assert generator.calls == SYMBOLS
+    assert pipeline.stats["resumed"] == 0
+
+
+def test_failed_write_is_not_checkpointed(tmp_path):
+    pipeline = LabelPipeline(
+        make_job(), make_client(fail=True), max_workers=1, checkpoint_dir=tmp_path
+    )
+    results = pipeline.run(SYMBOLS, generator=FakeGenerator())
+
+    # Labels are still returned, but the next run redoes every symbol
+    assert list(results) == SYMBOLS
+    assert pipeline.stats["write_errors"] == len(SYMBOLS)
+
+    generator = FakeGenerator()
+    LabelPipeline(
+        make_job(), make_client(), max_workers=1, checkpoint_dir=tmp_path
+    ).run(SYMBOLS, generator=generator)
+    assert generator.calls == SYMBOLS
+
+
+def test_process_pool_matches_in_process_run(tmp_path):
+    inline = LabelPipeline(
+        make_job(), make_client(), max_workers=1, checkpoint_dir=tmp_path / "a"
+    ).run(SYMBOLS)
+
+    client = make_client()
+    pipeline = LabelPipeline(
+        make_job(), client, max_workers=2, checkpoint_dir=tmp_path / "b", queue_size=1
+    )
+    parallel = pipeline.run(SYMBOLS)
+
+    assert list(parallel) == SYMBOLS
+    assert parallel == inline
+    written = sorted(
+        (row["symbol"], row["timestamp"]) for call in client.calls for row in call[1]
+    )
+    assert len(written) == pipeline.stats["rows_written"]
+    assert len(written) == len(set(written))
+
+
+def test_job_with_table_needs_a_client():
+    with pytest.raises(ValueError):
+        LabelPipeline(make_job())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared latest-price service
+Stream ticks are served from memory; missing and stale symbols cost one
+batched lookup, not a query per symbol per consumer
+"""
+
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.data.latest_prices import (  # noqa: E402
+    LatestPriceService,
+    SupabasePriceSource,
+)
+from tests.fakes import FakeClient  # noqa: E402
+
+
+class CountingFallback:
+    """Database stand-in recording every lookup"""
+
+    def __init__(self, prices):
+        self.prices = prices
+        self.calls = []
+
+    def __call__(self, symbols):
+        self.calls.append(list(symbols))
+        return {s: self.prices[s] for s in symbols if s in self.prices}
+
+
+def test_stream_ticks_are_served_without_lookups():
+    fallback = CountingFallback({})
+    service = LatestPriceService(fallback)
+    now = datetime.now(timezone.utc)
+
+    service.on_tick("BTC", 50000.0, now - timedelta(seconds=5))
+    service.on_message({"symbol": "ETH", "price": 3000.0, "timestamp": now})
+    service.on_tick("BTC", 49000.0, now - timedelta(seconds=30))  # Out of order
+
+    quotes = service.get(["BTC", "ETH"])
+    assert fallback.calls == []
+    assert quotes["BTC"].price == 50000.0 and quotes["ETH"].price == 3000.0
+    assert quotes["BTC"].source == "stream" and not quotes["BTC"].stale
+    assert 4 < quotes["BTC"].age_seconds < 60
+    assert service.get_metrics()["stream_updates"] == 2
+
+
+def test_missing_and_stale_symbols_share_one_lookup():
+    now = datetime.now(timezone.utc)
+    fallback = CountingFallback(
+        {"SOL": (150.0, now.isoformat()), "ETH": (3100.0, now.isoformat())}
+    )
+    service = LatestPriceService(fallback, max_age=60, fallback_interval=30)
+    service.on_tick("BTC", 50000.0, now)
+    service.on_tick("ETH", 3000.0, now - timedelta(minutes=10))
+
+    quotes = service.get(["BTC", "ETH", "SOL", "DOGE"])
+    assert fallback.calls == [["ETH", "SOL", "DOGE"]]
+    assert quotes["ETH"].price == 3100.0 and quotes["ETH"].source == "database"
+    assert quotes["SOL"].price == 150.0
+    assert "DOGE" not in quotes
+
+    # Other consumers asking again inside the interval don't query
+    assert service.prices(["SOL", "DOGE"]) == {"SOL": 150.0}
+    assert service.price("DOGE") is None
+    assert len(fallback.calls) == 1
+
+
+def test_stale_quote_is_flagged_when_nothing_newer_exists():
+    old = datetime.now(timezone.utc) - timedelta(hours=2)
+    fallback = CountingFallback({"PEPE": (0.00001, old.isoformat())})
+    service = LatestPriceService(fallback, max_age=60)
+
+    quote = service.get(["PEPE"])["PEPE"]
+    assert quote.stale and quote.age_seconds > 7000
+    assert service.get(["PEPE"], max_age=3 * 3600)["PEPE"].stale is False
+
+
+def test_attach_subscribes_to_collector_ticks():
+    class Collector:
+        def __init__(self):
+            self.listeners = []
+
+        def add_price_listener(self, callback):
+            self.listeners.append(callback)
+
+    collector = Collector()
+    service = LatestPriceService().attach(collector)
+    for listener in collector.listeners:
+        listener("LINK", 20.0, datetime.now(timezone.utc))
+    assert service.prices(["LINK"]) == {"LINK": 20.0}
+
+
+def test_supabase_source_batches_symbols():
+    now = datetime.now(timezone.utc)
+    rows = []
+    for symbol, price in [("BTC", 50000.0), ("ETH", 3000.0), ("SOL", 150.0)]:
+        for minute in range(3):
+            rows.append(
+                {
+                    "symbol": symbol,
+                    "timeframe": "1m",
+                    "close": price + minute,
+                    "timestamp": (now - timedelta(minutes=minute)).isoformat(),
+                }
+            )
+    # Symbols that last traded hours and days ago, outside the first window
+    for symbol, age in [("OLD", timedelta(hours=3)), ("STALE", timedelta(days=3))]:
+        rows.append(
+            {
+                "symbol": symbol,
+                "timeframe": "1m",
+                "close": 1.5,
+                "timestamp": (now - age).isoformat(),
+            }
+        )
+    supabase = FakeClient(tables={"ohlc_data": rows})
+    source = SupabasePriceSource(supabase)
+    symbols = ["BTC", "ETH", "SOL", "OLD", "STALE", "NONE"]
+
+    prices = source(symbols)
+    assert {s: p for s, (p, _) in prices.items()} == {
+        "BTC": 50000.0,
+        "ETH": 3000.0,
+        "SOL": 150.0,
+        "OLD": 1.5,
+        "STALE": 1.5,
+    }
+    # Recent window, then a wide window for the quiet symbols, then one
+    # query each for the symbols neither covered
+    assert len(supabase.queries) == 4
+    assert supabase.queries[1].filters[-2] == ("in", "symbol", ["OLD", "STALE", "NONE"])
+
+    # A symbol with no bars at all isn't queried singly again right away
+    supabase.reset()
+    source(symbols)
+    assert len(supabase.queries) == 3
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Tests for the local columnar OHLC store
+Covers round-tripping Supabase rows, top-up appends and coverage tracking
+"""
+
+import sys
+from pathlib import Path
+from datetime import datetime, timedelta
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.data.ohlc_store import OHLCStore  # noqa: E402
+
+
+def make_bars(start: datetime, count: int, price: float = 100.0):
+    """Create 1m bars in the format Supabase returns"""
+    bars = []
+    for i in range(count):
+        ts = start + timedelta(minutes=i)
+        bars.append(
+            {
+                "symbol": "BTC",
+                "timeframe": "1m",
+                "timestamp": ts.isoformat() + "+00:00",
+                "open": price + i,
+                "high": price + i + 1,
+                "low": price + i - 1,
+                "close": price + i + 0.5,
+                "volume": 1000.0 + i,
+                "vwap": None,
+                "trades": 10,
+            }
+        )
+    return bars
+
+
+def test_round_trip(tmp_path):
+    """Rows read back match the rows written"""
+    store = OHLCStore(str(tmp_path))
+    start = datetime(2025, 8, 27, 12, 0)
+    bars = make_bars(start, 60)
+
+    store.write("BTC", "1m", bars, start=start)
+    records = store.read_records("BTC", "1m")
+
+    assert len(records) == 60
+    assert records[0]["timestamp"] == bars[0]["timestamp"]
+    assert records[-1]["close"] == bars[-1]["close"]
+    assert records[5]["vwap"] is None
+    assert records[5]["trades"] == 10
+
+
+def test_top_up_appends_and_extends_coverage(tmp_path):
+    """Newer bars are appended and coverage follows the last bar"""
+    store = OHLCStore(str(tmp_path))
+    start = datetime(2025, 8, 27, 12, 0)
+    bars = make_bars(start, 120)
+
+    store.write("BTC", "1m", bars[:100], start=start)
+    covered_from, covered_to = store.coverage("BTC", "1m")
+    assert covered_from == start
+    assert covered_to == start + timedelta(minutes=99)
+
+    rows = store.write("BTC", "1m", bars[100:], start=covered_to)
+    assert rows == 120
+    assert store.coverage("BTC", "1m")[1] == start + timedelta(minutes=119)
+
+    window = store.read_records("BTC", "1m", start=start + timedelta(minutes=110))
+    assert len(window) == 10
+
+
+def test_overlapping_write_deduplicates(tmp_path):
+    """Overlapping writes keep one row per timestamp, latest values win"""
+    store = OHLCStore(str(tmp_path))
+    start = datetime(2025, 8, 27, 12, 0)
+
+    store.write("BTC", "1m", make_bars(start, 30), start=start)
+    store.write(
+        "BTC",
+        "1m",
+        make_bars(start + timedelta(minutes=20), 20, price=200.0),
+        start=start + timedelta(minutes=20),
+    )
+
+    arr = store.read("BTC", "1m")
+    assert len(arr) == 40
+    assert (arr["timestamp"][1:] > arr["timestamp"][:-1]).all()
+    assert arr["open"][20] == 200.0
+
+
+def test_disjoint_write_replaces_segment(tmp_path):
+    """A range that doesn't touch coverage replaces it to stay contiguous"""
+    store = OHLCStore(str(tmp_path))
+    start = datetime(2025, 8, 27, 12, 0)
+    later = start + timedelta(days=2)
+
+    store.write("BTC", "1m", make_bars(start, 30), start=start)
+    store.write("BTC", "1m", make_bars(later, 30), start=later)
+
+    assert store.coverage("BTC", "1m")[0] == later
+    assert len(store.read("BTC", "1m")) == 30
+
+
+def test_retention_trims_oldest_rows(tmp_path):
+    """Segments are compacted back to max_rows"""
+    store = OHLCStore(str(tmp_path), max_rows=50)
+    start = datetime(2025, 8, 27, 12, 0)
+    bars = make_bars(start, 100)
+
+    for i in range(0, 100, 10):
+        store.write("BTC", "1m", bars[i : i + 10], start=start + timedelta(minutes=i))
+
+    arr = store.read("BTC", "1m")
+    assert len(arr) <= 62
+    assert store.coverage("BTC", "1m")[0] >= start + timedelta(minutes=38)
+    assert store.coverage("BTC", "1m")[1] == start + timedelta(minutes=99)
+
+
+def test_store_survives_restart(tmp_path):
+    """A new store instance picks up segments written by a previous one"""
+    start = datetime(2025, 8, 27, 12, 0)
+    OHLCStore(str(tmp_path)).write("ETH", "15m", make_bars(start, 10), start=start)
+
+    store = OHLCStore(str(tmp_path))
+    assert store.coverage("ETH", "15m")[0] == start
+    assert len(store.read_records("ETH", "15m")) == 10
+
+
+def test_manager_top_up_pages_past_row_limit(tmp_path):
+    """Bars newer than the store are fetched in full, not cut at one page"""
+    from src.data.ohlc_manager import OHLCDataManager
+    from tests.fakes import FakeClient
+
+    start = datetime(2025, 8, 27, 12, 0)
+    bars = make_bars(start, 2600)
+    manager = OHLCDataManager.__new__(OHLCDataManager)
+    manager.store = OHLCStore(str(tmp_path))
+    manager.db = FakeClient(tables={"ohlc_data": bars})
+    manager.page_size = 1000
+    manager.store.write("BTC", "1m", bars[:100], start=start)
+
+    end = start + timedelta(minutes=2599)
+    records = manager._query_store("BTC", "1m", start, end)
+
+    assert len(records) == 2600
+    assert records[-1]["timestamp"] == bars[-1]["timestamp"]
+    assert manager.db.pages == [1000, 1000, 500]
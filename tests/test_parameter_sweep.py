@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for the parameter sweep runner
+Overrides, samplers, caching, and pool results matching in-process runs
+"""
+
+import json
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+
+from src.data.ohlc_store import OHLC_DTYPE, OHLCStore, to_epoch  # noqa: E402
+from src.trading.parameter_sweep import (  # noqa: E402
+    BayesianSampler,
+    ParameterSweep,
+    apply_overrides,
+    grid,
+    random_samples,
+)
+
+CONFIG = Path(__file__).parent.parent / "configs/paper_trading_config_unified.json"
+START = datetime(2025, 3, 1)
+SYMBOLS = ["BTC", "ETH", "SOL", "DOGE"]
+BARS = 2000
+
+DROP = "strategies.DCA.detection_thresholds.drop_threshold"
+TAKE_PROFIT = "strategies.DCA.exits_by_tier.*.take_profit"
+
+
+def make_store(root, seed=3):
+    """Alts with dumps on scan bars so DCA fires"""
+    rng = np.random.default_rng(seed)
+    store = OHLCStore(str(root), max_rows=10**6)
+    t0 = to_epoch(START)
+    for k, symbol in enumerate(SYMBOLS):
+        steps = rng.normal(0, 0.0004 if symbol == "BTC" else 0.0015, BARS)
+        if symbol != "BTC":
+            steps[rng.choice(BARS // 5, 6, replace=False) * 5] -= 0.05
+        close = 10.0 * (k + 1) * np.exp(np.cumsum(steps))
+
+        arr = np.zeros(BARS, dtype=OHLC_DTYPE)
+        arr["timestamp"] = t0 + 60 * np.arange(BARS)
+        arr["open"] = close
+        arr["high"] = close * (1 + np.abs(rng.normal(0, 0.0005, BARS)))
+        arr["low"] = close * (1 - np.abs(rng.normal(0, 0.0005, BARS)))
+        arr["close"] = close
+        arr["volume"] = rng.lognormal(3, 0.5, BARS)
+        store.write_array(symbol, "1m", arr, START)
+    return store
+
+
+def make_sweep(store, cache_dir, **kwargs):
+    return ParameterSweep(
+        SYMBOLS,
+        START,
+        START + timedelta(minutes=BARS - 1),
+        config_path=str(CONFIG),
+        store=store,
+        cache_dir=str(cache_dir),
+        max_hold_hours=4,
+        scan_every=5,
+        **kwargs,
+    )
+
+
+def test_overrides_copy_and_expand_wildcards():
+    config = json.loads(CONFIG.read_text())
+    changed = apply_overrides(config, {DROP: -2.5, TAKE_PROFIT: 0.07})
+
+    dca = changed["strategies"]["DCA"]
+    assert dca["detection_thresholds"]["drop_threshold"] == -2.5
+    assert {tier["take_profit"] for tier in dca["exits_by_tier"].values()} == {0.07}
+    assert config["strategies"]["DCA"]["exits_by_tier"] != dca["exits_by_tier"]
+
+    with pytest.raises(ValueError, match="Unknown config path"):
+        apply_overrides(config, {"strategies.DCA.detection_thresholds.dorp": 1})
+
+
+def test_samplers():
+    combos = grid({"a": [1, 2, 3], "b": ["x", "y"]})
+    assert len(combos) == 6 and {"a": 3, "b": "y"} in combos
+    with pytest.raises(ValueError):
+        grid({"a": (0.0, 1.0)})
+
+    space = {"a": (1, 4), "b": (0.5, 0.75), "c": ["x", "y"]}
+    samples = random_samples(space, 50, seed=1)
+    assert samples == random_samples(space, 50, seed=1)
+    assert {s["a"] for s in samples} <= {1, 2, 3, 4}
+    assert all(0.5 <= s["b"] <= 0.75 for s in samples)
+
+    # On a smooth objective the GP proposals beat random guessing
+    sampler = BayesianSampler({"x": (0.0, 1.0)}, seed=0, initial=5, candidates=500)
+    for _ in range(4):
+        for combo in sampler.ask(3):
+            sampler.tell(combo, -((combo["x"] - 0.3) ** 2))
+    best = max(sampler.scores)
+    assert best > -0.001
+
+
+def test_sweep_ranks_and_caches(tmp_path):
+    store = make_store(tmp_path / "store")
+    combos = grid({DROP: [-6.0, -3.0], TAKE_PROFIT: [0.02, 0.2]})
+
+    first = make_sweep(store, tmp_path / "cache", max_workers=1).run(combos)
+    assert len(first) == 4 and not first["cached"].any()
+    assert first["total_pnl_usd"].is_monotonic_decreasing
+    assert first["trades"].sum() > 0
+    assert len(set(first["trades"])) > 1  # The parameters reach the backtest
+
+    again = make_sweep(store, tmp_path / "cache", max_workers=1).run(combos)
+    assert again["cached"].all()
+    assert again.drop(columns="cached").equals(first.drop(columns="cached"))
+
+    # Different backtest settings are a different cache entry
+    other = make_sweep(store, tmp_path / "cache", max_workers=1, position_size=25)
+    assert not other.run(combos[:1])["cached"].any()
+
+
+def test_process_pool_matches_in_process(tmp_path):
+    store = make_store(tmp_path / "store")
+    combos = grid({DROP: [-6.0, -4.0, -3.0]})
+
+    inline = make_sweep(store, tmp_path / "a", max_workers=1).run(combos)
+    pooled = make_sweep(store, tmp_path / "b", max_workers=2).run(combos)
+    assert pooled.equals(inline)
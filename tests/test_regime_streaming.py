@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming statistics behind RegimeDetector
+Rolling windows and lookbacks must agree with a brute-force scan of the ticks
+"""
+
+import random
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.strategies.regime_detector import (  # noqa: E402
+    PriceLookback,
+    RegimeDetector,
+    RollingPriceWindow,
+)
+
+
+def make_ticks(count: int, step_seconds: int, seed: int = 3):
+    """Random walk BTC ticks ending just before now"""
+    rng = random.Random(seed)
+    now = datetime.now()
+    price = 100000.0
+    ticks = []
+    for i in range(count):
+        price *= 1 + rng.gauss(0, 0.002)
+        ticks.append((now - timedelta(seconds=step_seconds * (count - i)), price))
+    return ticks
+
+
+def test_rolling_window_matches_brute_force():
+    """High/low/open/last match a full scan after every tick"""
+    ticks = make_ticks(3000, 60)
+    window = RollingPriceWindow(hours=4)
+
+    for i, (timestamp, price) in enumerate(ticks):
+        window.push(timestamp, price)
+        window.expire(timestamp)
+
+        cutoff = timestamp - timedelta(hours=4)
+        expected = [p for t, p in ticks[: i + 1] if t >= cutoff]
+        assert len(window) == len(expected)
+        assert window.high == max(expected)
+        assert window.low == min(expected)
+        assert window.open == expected[0]
+        assert window.last == expected[-1]
+
+
+def test_lookback_returns_price_at_target_time():
+    """The anchor is the newest price at least `hours` old"""
+    ticks = make_ticks(600, 60)
+    lookback = PriceLookback(hours=1)
+
+    for i, (timestamp, price) in enumerate(ticks):
+        lookback.push(timestamp, price)
+
+        target = timestamp - timedelta(hours=1)
+        old_enough = [p for t, p in ticks[: i + 1] if t <= target]
+        expected = old_enough[-1] if old_enough else None
+        assert lookback.past_price() == expected
+
+
+def test_detector_uses_horizon_specific_changes():
+    """1h and 4h changes look back different distances"""
+    detector = RegimeDetector(enabled=True)
+    ticks = make_ticks(200, 60)  # Less than 4h of history
+    for timestamp, price in ticks:
+        detector.update_btc_price(price, timestamp)
+
+    current = ticks[-1][1]
+    target_1h = ticks[-1][0] - timedelta(hours=1)
+    past_1h = [p for t, p in ticks if t <= target_1h][-1]
+
+    assert detector.get_btc_change(1) == ((current - past_1h) / past_1h) * 100
+    assert detector.get_btc_change(4) is None
+
+
+def test_detector_volatility_and_decline():
+    """Volatility and peak decline come from the rolling windows"""
+    detector = RegimeDetector(enabled=True)
+    ticks = make_ticks(2000, 60)
+    for timestamp, price in ticks:
+        detector.update_btc_price(price, timestamp)
+
+    cutoff = datetime.now() - timedelta(hours=24)
+    recent = [p for t, p in ticks if t >= cutoff]
+    expected = ((max(recent) - min(recent)) / recent[0]) * 100
+    assert abs(detector.calculate_volatility(24) - expected) < 1e-9
+
+    # A window size that isn't tracked yet is seeded from history
+    cutoff = datetime.now() - timedelta(hours=2)
+    recent = [p for t, p in ticks if t >= cutoff]
+    expected = ((max(recent) - min(recent)) / recent[0]) * 100
+    assert abs(detector.calculate_volatility(2) - expected) < 1e-9
+
+    # Slow bleed from the peak trips the cumulative decline check
+    peak = detector.windows[24].high
+    detector.update_btc_price(peak * 0.95)
+    assert detector.check_cumulative_decline()
+
+    detector.reset()
+    assert len(detector.price_history) == 0
+    assert detector.get_btc_change(1) is None
+
+    detector.update_btc_price(ticks[-1][1], ticks[-1][0])
+    assert detector.get_btc_change(1) is None
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Tests for the freqtrade ScanLogger
+Logging from the bot loop only queues tuples; the writer thread builds the
+scan_history records and inserts them in batches
+"""
+
+import json
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / "freqtrade" / "user_data"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from scan_logger import ScanLogger  # noqa: E402
+
+
+class FakeTable:
+    def __init__(self, client):
+        self.client = client
+
+    def insert(self, records):
+        self.records = records
+        return self
+
+    def execute(self):
+        self.client.gate.wait(5)
+        if self.client.fail:
+            raise ConnectionError("database unavailable")
+        self.client.batches.append(list(self.records))
+
+
+class FakeClient:
+    def __init__(self):
+        self.batches = []
+        self.fail = False
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def table(self, name):
+        assert name == "scan_history"
+        return FakeTable(self)
+
+    @property
+    def records(self):
+        return [r for batch in self.batches for r in batch]
+
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_records_match_scan_history_format():
+    client = FakeClient()
+    scans = ScanLogger(batch_size=100, flush_interval=3600, client=client)
+    row = pd.Series(
+        {
+            "channel_position": np.float64(0.12),
+            "rsi": np.nan,
+            "volume_ratio": 1.8,
+            "close": 101.5,
+            "volume": np.int64(900),
+            "enter_long": 1.0,
+        }
+    )
+    when = datetime(2025, 6, 1, 12, tzinfo=timezone.utc)
+
+    scans.log_entry_analysis("BTC/USDT", row, entry_signal=True)
+    scans.log_exit_analysis("ETH/USDT", {"rsi": 71.0}, exit_signal=False)
+    scans.log_scan(
+        "SOL/USDT",
+        "CHANNEL",
+        "SKIP",
+        {"rsi": 40.0, "skip_reason": "symbol_limit"},
+        metadata={"reason": "symbol_limit"},
+        timestamp=when,
+    )
+    scans.flush()
+
+    entry, exit_, skip = client.records
+    assert entry["symbol"] == "BTC" and entry["decision"] == "TAKE"
+    assert entry["strategy_name"] == "CHANNEL" and entry["ml_confidence"] == 0.0
+    assert json.loads(entry["features"]) == {
+        "channel_position": 0.12,
+        "rsi": 50,  # NaN falls back to the default
+        "volume_ratio": 1.8,
+        "volatility": 0,
+        "price_drop_pct": 0,
+        "bb_upper": 0,
+        "bb_lower": 0,
+        "close": 101.5,
+        "volume": 900,
+    }
+    assert exit_["decision"] == "HOLD"
+    assert json.loads(exit_["features"])["rsi"] == 71.0
+    assert skip["timestamp"] == when.isoformat() and skip["reason"] == "symbol_limit"
+    scans.stop()
+
+
+def test_rejected_entry_keeps_row_features_and_reason():
+    """A limit rejection keeps the candle's features and doesn't read as a SKIP"""
+    client = FakeClient()
+    scans = ScanLogger(batch_size=100, flush_interval=3600, client=client)
+    row = pd.Series({"channel_position": 0.08, "rsi": 38.5, "close": 2.5})
+
+    scans.log_entry_analysis("ADA/USDT", row, entry_signal=True)
+    scans.log_entry_rejection("ADA/USDT", row, reason="strategy_limit")
+    scans.flush()
+
+    take, rejected = client.records
+    assert take["decision"] == "TAKE"
+    assert rejected["decision"] == "REJECTED"
+    assert rejected["reason"] == "strategy_limit"
+    features = json.loads(rejected["features"])
+    assert features["channel_position"] == 0.08 and features["rsi"] == 38.5
+    scans.stop()
+
+
+def test_logging_never_waits_for_the_database():
+    client = FakeClient()
+    client.gate.clear()  # Inserts hang until released
+    scans = ScanLogger(batch_size=50, flush_interval=3600, capacity=500, client=client)
+    row = pd.Series({"channel_position": 0.5, "rsi": 55.0, "close": 10.0})
+
+    scans.log_entry_analysis("BTC/USDT", row, entry_signal=False)
+    assert wait_for(lambda: scans.get_metrics()["queue_depth"] == 1)
+    for _ in range(49):  # Fills a batch: the writer picks it up and blocks
+        scans.log_entry_analysis("BTC/USDT", row, entry_signal=False)
+    assert wait_for(lambda: scans.get_metrics()["pending_batch"] == 50)
+
+    started = time.perf_counter()
+    for k in range(1000):
+        scans.log_entry_analysis(f"PAIR{k}/USDT", row, entry_signal=False)
+    assert time.perf_counter() - started < 0.5
+
+    metrics = scans.get_metrics()
+    assert metrics["queue_depth"] == 500 and metrics["dropped"] == 500
+    assert metrics["enqueued"] == 550
+
+    client.gate.set()
+    assert wait_for(lambda: scans.get_metrics()["written"] >= 100)
+    scans.stop()
+    assert len(client.records) == 550
+    assert all(len(batch) <= 50 for batch in client.batches)
+
+
+def test_failed_batch_is_retried():
+    client = FakeClient()
+    client.fail = True
+    scans = ScanLogger(batch_size=10, flush_interval=3600, client=client)
+    for k in range(25):
+        scans.log_scan("BTC", "CHANNEL", "SKIP", {"k": k})
+
+    scans.flush()
+    metrics = scans.get_metrics()
+    assert metrics["failed_batches"] >= 1 and metrics["written"] == 0
+    assert metrics["pending_batch"] + metrics["queue_depth"] == 25
+
+    client.fail = False
+    scans.flush()
+    assert [json.loads(r["features"])["k"] for r in client.records] == list(range(25))
+    scans.stop()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Tests for the compiled shadow decision matrix
+Batch decisions must match ShadowLogger's per-variation evaluation
+"""
+
+import asyncio
+import random
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest  # noqa: E402
+
+from src.analysis.shadow_logger import ShadowLogger  # noqa: E402
+
+BASE_PARAMETERS = [
+    {"min_confidence": 0.60, "position_size": 100},
+    {
+        "confidence_threshold": 0.60,
+        "position_size_multiplier": 1.0,
+        "stop_loss": 0.05,
+        "grid_levels": 4,
+        "breakout_threshold": 0.03,
+    },
+]
+
+
+class EmptyQuery:
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        return SimpleNamespace(data=[])
+
+
+def make_logger():
+    """ShadowLogger with variations from ShadowConfig"""
+    supabase = SimpleNamespace(client=SimpleNamespace(table=lambda name: EmptyQuery()))
+    return ShadowLogger(supabase)
+
+
+def make_scan(rng, scan_id):
+    return {
+        "scan_id": scan_id,
+        "symbol": "BTC",
+        "strategy_name": rng.choice(["DCA", "SWING", "CHANNEL"]),
+        "features": {"volatility_24h": rng.uniform(0.0, 0.08)},
+        "ml_predictions": {
+            "take_profit_pct": rng.uniform(1, 15),
+            "stop_loss_pct": rng.uniform(1, 8),
+            "hold_hours": rng.choice([6, 12, 24, 48]),
+        },
+        "ml_confidence": rng.uniform(0.4, 0.8),
+        "current_price": rng.uniform(0.1, 50000),
+    }
+
+
+def reference_decisions(shadow_logger, scan, base_parameters):
+    """The per-variation loop log_shadow_decisions used to run"""
+    decisions = []
+    for variation in shadow_logger.active_variations:
+        var_config = variation.get("variation_config", {})
+        if var_config.get("type", "scenario") == "isolated":
+            parameters = var_config.get("parameters", {})
+            for test_value in parameters.get("test_values", []):
+                decisions.append(
+                    shadow_logger._evaluate_isolated_single(
+                        variation_name=variation["variation_name"],
+                        test_parameter=parameters.get("test_parameter"),
+                        test_value=test_value,
+                        ml_predictions=scan["ml_predictions"],
+                        ml_confidence=scan["ml_confidence"],
+                        current_price=scan["current_price"],
+                        base_parameters=base_parameters,
+                        strategy_name=scan["strategy_name"],
+                    )
+                )
+        else:
+            decisions.append(
+                asyncio.run(
+                    shadow_logger._evaluate_variation(
+                        variation=variation,
+                        symbol=scan["symbol"],
+                        strategy_name=scan["strategy_name"],
+                        features=scan["features"],
+                        ml_predictions=scan["ml_predictions"],
+                        ml_confidence=scan["ml_confidence"],
+                        current_price=scan["current_price"],
+                        base_parameters=base_parameters,
+                    )
+                )
+            )
+    return decisions
+
+
+@pytest.mark.parametrize("base_parameters", BASE_PARAMETERS)
+def test_matrix_matches_per_variation_evaluation(base_parameters):
+    """Decisions and database rows match the scalar methods for every scan"""
+    rng = random.Random(5)
+    shadow_logger = make_logger()
+    scans = [make_scan(rng, i) for i in range(200)]
+
+    matrix = shadow_logger._decision_matrix(base_parameters)
+    result = matrix.evaluate(scans)
+    rows = matrix.records(scans, result)
+    assert len(rows) == len(scans) * len(matrix)
+
+    for i, scan in enumerate(scans):
+        expected = reference_decisions(shadow_logger, scan, base_parameters)
+        actual = matrix.decisions(result, i, scan["strategy_name"])
+        assert [d.variation_name for d in actual] == [
+            d.variation_name for d in expected
+        ]
+
+        for j, (a, e) in enumerate(zip(actual, expected)):
+            assert a.would_take_trade == e.would_take_trade, e.variation_name
+            for field in (
+                "shadow_confidence",
+                "shadow_position_size",
+                "shadow_entry_price",
+                "shadow_take_profit",
+                "shadow_stop_loss",
+                "shadow_hold_hours",
+            ):
+                assert getattr(a, field) == pytest.approx(getattr(e, field)), field
+            assert a.parameters_used == e.parameters_used
+
+            row = rows[i * len(matrix) + j]
+            expected_row = shadow_logger._prepare_shadow_record(
+                scan_id=scan["scan_id"],
+                decision=e,
+                strategy_name=scan["strategy_name"],
+                current_price=scan["current_price"],
+            )
+            assert row.keys() == expected_row.keys()
+            for key, value in expected_row.items():
+                if key != "created_at":
+                    assert row[key] == pytest.approx(value), key
+
+
+def test_batch_is_queued_in_one_flush():
+    """A batch of scans reaches the write-behind queue as one enqueue"""
+    rng = random.Random(9)
+    shadow_logger = make_logger()
+    scans = [make_scan(rng, i) for i in range(50)]
+    queue = SimpleNamespace(calls=[])
+    queue.enqueue = lambda table, rows: queue.calls.append((table, len(rows)))
+
+    with patch("src.analysis.shadow_logger.get_write_behind_queue", return_value=queue):
+        count = asyncio.run(
+            shadow_logger.log_shadow_decisions_batch(scans, BASE_PARAMETERS[0])
+        )
+
+    assert queue.calls == [("shadow_variations", count)]
+    assert count == 50 * len(shadow_logger._decision_matrix(BASE_PARAMETERS[0]))
+    assert shadow_logger.batch == []
+
+
+def test_malformed_scans_are_skipped_individually():
+    """A bad scan is dropped on its own instead of failing the whole batch"""
+    rng = random.Random(10)
+    shadow_logger = make_logger()
+    scans = [make_scan(rng, i) for i in range(20)]
+    scans[3]["current_price"] = None
+    scans[7]["ml_predictions"]["hold_hours"] = "soon"
+    del scans[11]["scan_id"]
+    queue = SimpleNamespace(calls=[])
+    queue.enqueue = lambda table, rows: queue.calls.append((table, rows))
+
+    with patch("src.analysis.shadow_logger.get_write_behind_queue", return_value=queue):
+        count = asyncio.run(
+            shadow_logger.log_shadow_decisions_batch(scans, BASE_PARAMETERS[0])
+        )
+
+    columns = len(shadow_logger._decision_matrix(BASE_PARAMETERS[0]))
+    assert count == 17 * columns
+    written = {row["scan_id"] for row in queue.calls[0][1]}
+    assert written == set(range(20)) - {3, 7, 11}
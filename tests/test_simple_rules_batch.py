@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Parity tests for the SimpleRules batch mode
+The vectorized checks must return exactly what the per-symbol checks return
+"""
+
+import random
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.strategies.simple_rules import SimpleRules  # noqa: E402
+
+
+def make_data(rng: random.Random, bars: int, pattern: str):
+    """Random walk OHLC bars with an optional move at the end"""
+    price = rng.uniform(0.01, 50000)
+    data = []
+    for i in range(bars):
+        price *= 1 + rng.gauss(0, 0.01)
+        if pattern == "dump" and i >= bars - 3:
+            price *= 0.97
+        elif pattern == "pump" and i == bars - 1:
+            price *= 1.04
+        volume = rng.uniform(100, 10000)
+        if pattern == "pump" and i == bars - 1:
+            volume *= 4
+        data.append(
+            {
+                "open": price,
+                "high": price * (1 + abs(rng.gauss(0, 0.003))),
+                "low": price * (1 - abs(rng.gauss(0, 0.003))),
+                "close": price,
+                "volume": volume,
+            }
+        )
+
+    if pattern == "flat":
+        for d in data:
+            d["high"] = d["low"] = d["close"] = 1.0
+    elif pattern == "zero_volume":
+        for d in data:
+            d["volume"] = 0
+    elif pattern == "missing" and data:
+        data[-5]["high"] = None
+
+    return data
+
+
+def build_market(seed: int, count: int):
+    rng = random.Random(seed)
+    patterns = ["walk", "dump", "pump", "flat", "zero_volume", "missing"]
+    market = {}
+    for i in range(count):
+        bars = rng.choice([0, 5, 9, 10, 15, 19, 20, 21, 100, 300])
+        market[f"SYM{i}"] = make_data(rng, bars, rng.choice(patterns))
+    return market
+
+
+def scalar_signals(rules: SimpleRules, market):
+    signals = {"DCA": {}, "SWING": {}, "CHANNEL": {}}
+    for symbol, data in market.items():
+        for strategy, check in (
+            ("DCA", rules.check_dca_setup),
+            ("SWING", rules.check_swing_setup),
+            ("CHANNEL", rules.check_channel_setup),
+        ):
+            setup = check(symbol, data)
+            if setup:
+                signals[strategy][symbol] = setup
+    return signals
+
+
+def test_batch_matches_scalar_defaults():
+    """Default thresholds: batch and per-symbol signals are identical"""
+    rules = SimpleRules()
+    market = build_market(seed=7, count=400)
+
+    expected = scalar_signals(rules, market)
+    actual = rules.check_all_batch(market)
+
+    assert actual == expected
+    assert all(expected.values()), "fixture should trigger every strategy"
+
+
+def test_batch_matches_scalar_custom_thresholds():
+    """Config thresholds are honoured the same way in both modes"""
+    rules = SimpleRules(
+        {
+            "dca_drop_threshold": -1.0,
+            "swing_breakout_threshold": 1.001,
+            "swing_volume_surge": 1.1,
+            "channel_position_threshold": 0.35,
+        }
+    )
+    market = build_market(seed=11, count=400)
+
+    assert rules.check_all_batch(market) == scalar_signals(rules, market)
+
+
+def test_batch_empty_market():
+    """No symbols means no signals"""
+    assert SimpleRules().check_all_batch({}) == {"DCA": {}, "SWING": {}, "CHANNEL": {}}
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for SupabaseClient.bulk_upsert
+Duplicates are resolved by ON CONFLICT and gateway errors shrink the batch
+instead of falling back to row-by-row inserts
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest  # noqa: E402
+
+from src.data.supabase_client import SupabaseClient  # noqa: E402
+
+
+class FakeTable:
+    """Records every upsert call and fails batches above a size limit"""
+
+    def __init__(self, calls, limit, error):
+        self.calls = calls
+        self.limit = limit
+        self.error = error
+        self.pending = None
+
+    def upsert(self, rows, **kwargs):
+        self.pending = (rows, kwargs)
+        return self
+
+    def insert(self, rows):
+        raise AssertionError("bulk path must not insert row by row")
+
+    def execute(self):
+        rows, kwargs = self.pending
+        self.calls.append((len(rows), kwargs))
+        if len(rows) > self.limit:
+            raise Exception(self.error)
+        return SimpleNamespace(data=[], count=len(rows))
+
+
+def build_client(limit=10_000, error="502 Bad Gateway"):
+    calls = []
+    fake = SimpleNamespace(table=lambda name: FakeTable(calls, limit, error))
+    settings = SimpleNamespace(supabase_url="http://localhost", supabase_key="key")
+    with patch("src.data.supabase_client.get_settings", return_value=settings), patch(
+        "src.data.supabase_client.create_client", return_value=fake
+    ):
+        client = SupabaseClient()
+    client.upsert_retry_delay = 0
+    return client, calls
+
+
+def price_rows(count, offset=0):
+    return [
+        {"symbol": "BTC", "timestamp": f"t{offset + i}", "price": float(i)}
+        for i in range(count)
+    ]
+
+
+def test_duplicates_use_conflict_clause():
+    """Rows go out in one batch with ON CONFLICT DO NOTHING on the primary key"""
+    client, calls = build_client()
+    rows = price_rows(300) + price_rows(50)  # 50 repeated keys
+
+    assert client.insert_price_data(rows) == 300
+    assert len(calls) == 1
+    size, kwargs = calls[0]
+    assert size == 300
+    assert kwargs["on_conflict"] == "symbol,timestamp"
+    assert kwargs["ignore_duplicates"] is True
+
+
+def test_gateway_errors_halve_then_grow_batch():
+    """A 502 halves the batch size and successes grow it back additively"""
+    client, calls = build_client(limit=400)
+
+    assert client.insert_price_data(price_rows(3000)) == 3000
+    sizes = [size for size, _ in calls]
+    assert sizes[:4] == [1000, 500, 250, 500]
+    assert client.upsert_batch_sizes["price_data"] > 250
+    assert sum(size for size in sizes if size <= 400) == 3000
+
+
+def test_gives_up_after_retries_at_minimum_batch():
+    """Persistent gateway errors eventually surface to the caller"""
+    client, calls = build_client(limit=0, error="504 Gateway Timeout")
+
+    with pytest.raises(Exception, match="504"):
+        client.bulk_upsert("ml_features", price_rows(100))
+    assert calls[-1][0] == client.upsert_min_batch
+    assert sum(1 for size, _ in calls if size == client.upsert_min_batch) == (
+        client.upsert_max_retries + 1
+    )
+
+
+def test_other_errors_are_raised_immediately():
+    """Data errors are not retried"""
+    client, calls = build_client(limit=0, error='column "foo" does not exist')
+
+    with pytest.raises(Exception, match="does not exist"):
+        client.save_ml_features(price_rows(10))
+    assert len(calls) == 1
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Tests for the cached Freqtrade SupabaseDataProvider
+Cached, tail-refreshed and resampled frames must match what a cold provider
+reads straight from the table
+"""
+
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent.parent / "freqtrade" / "user_data"))
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from data.supabase_dataprovider import SupabaseDataProvider  # noqa: E402
+from tests.fakes import FakeClient  # noqa: E402
+
+START = datetime(2025, 6, 1, tzinfo=timezone.utc)
+
+
+def make_rows(symbol, minutes, timeframe="1m", seed=0):
+    rng = np.random.default_rng(seed)
+    step = {"1m": 1, "15m": 15, "1h": 60}[timeframe]
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.001, minutes // step)))
+    return [
+        {
+            "symbol": symbol,
+            "timeframe": timeframe,
+            "timestamp": (START + timedelta(minutes=k * step)).isoformat(),
+            "open": close[k - 1] if k else close[0],
+            "high": close[k] * 1.001,
+            "low": close[k] * 0.999,
+            "close": close[k],
+            "volume": float(rng.integers(1, 100)),
+        }
+        for k in range(len(close))
+    ]
+
+
+def reference(rows, minutes, count, now):
+    """Resample the table's 1m rows from scratch"""
+    df = pd.DataFrame(rows)
+    df = df[df["timeframe"] == "1m"]
+    df.index = pd.to_datetime(df.pop("timestamp"), utc=True)
+    df = df[df.index <= now][["open", "high", "low", "close", "volume"]]
+    df = (
+        df.resample(f"{minutes}min")
+        .agg(
+            {
+                "open": "first",
+                "high": "max",
+                "low": "min",
+                "close": "last",
+                "volume": "sum",
+            }
+        )
+        .dropna()
+    )
+    start = now - timedelta(minutes=minutes * count)
+    return df[df.index >= start].tail(count)
+
+
+def test_tail_refreshes_match_cold_reads():
+    rows = make_rows("BTC", 3000)
+    noise = make_rows("BTC", 3000, timeframe="15m", seed=9)  # Other timeframe
+    client = FakeClient(rows[:2000] + noise)
+    provider = SupabaseDataProvider(client, refresh_interval=0, page_size=400)
+
+    now = START + timedelta(minutes=1999)
+    for timeframe, minutes in [("5m", 5), ("15m", 15), ("1h", 60)]:
+        df = provider.get_pair_dataframe("BTC/USDT", timeframe, 20, now=now)
+        expected = reference(client.rows, minutes, 20, now)
+        assert np.allclose(df[["open", "high", "low", "close", "volume"]], expected)
+        assert df.index.equals(expected.index) and df.index.name == "date"
+        assert (df["market_cap"] == 1000000).all()
+
+    # New minutes arrive: each call only reads the tail
+    for minute in range(2000, 2300, 7):
+        client.rows = rows[: minute + 1] + noise
+        client.reset()
+        now = START + timedelta(minutes=minute)
+        df = provider.get_pair_dataframe("BTC/USDT", "15m", 20, now=now)
+        assert client.returned <= 8
+        expected = reference(client.rows, 15, 20, now)
+        assert np.allclose(df[["open", "high", "low", "close", "volume"]], expected)
+
+    # Other timeframes were kept up to date from the same 1m series
+    df = provider.get_pair_dataframe("BTC/USDT", "1h", 20, now=now)
+    assert np.allclose(df["close"], reference(client.rows, 60, 20, now)["close"])
+
+
+def test_refresh_interval_serves_from_cache():
+    client = FakeClient(make_rows("ETH", 600))
+    provider = SupabaseDataProvider(client, refresh_interval=3600)
+    now = START + timedelta(minutes=599)
+
+    first = provider.get_pair_dataframe("ETH/USDT", "5m", 50, now=now)
+    queries = provider.get_cache_stats()["db_queries"]
+    second = provider.get_pair_dataframe("ETH/USDT", "5m", 50, now=now)
+
+    assert second.equals(first)
+    stats = provider.get_cache_stats()
+    assert stats["db_queries"] == queries and stats["cache_hits"] == 1
+
+
+def test_long_timeframes_resample_stored_hours():
+    rows = make_rows("SOL", 60 * 24 * 6, timeframe="1h")
+    provider = SupabaseDataProvider(FakeClient(rows))
+    now = START + timedelta(days=6)
+
+    df = provider.get_pair_dataframe("SOL/USDT", "1d", 10, now=now)
+    assert len(df) == 6
+    day = [r for r in rows if r["timestamp"] < (START + timedelta(days=1)).isoformat()]
+    assert df["high"].iloc[0] == max(r["high"] for r in day)
+    assert df["close"].iloc[0] == day[-1]["close"]
+
+
+def test_lru_eviction_and_window_trim():
+    rows = [r for s in ("A", "B", "C") for r in make_rows(s, 2500)]
+    provider = SupabaseDataProvider(FakeClient(rows), max_pairs=2, refresh_interval=0)
+    now = START + timedelta(minutes=1499)
+
+    for symbol in ("A", "B", "A", "C"):
+        provider.get_pair_dataframe(f"{symbol}/USDT", "5m", 100, now=now)
+    stats = provider.get_cache_stats()
+    assert stats["pairs"] == 2 and stats["evictions"] == 1
+    assert list(provider._candles) == ["A", "C"]  # B was least recently used
+
+    # Cached minutes stay bounded by the requested window as time moves on
+    for step in range(1, 6):
+        later = now + timedelta(minutes=200 * step)
+        df = provider.get_pair_dataframe("C/USDT", "5m", 50, now=later)
+        assert df.index[-1] == pd.Timestamp(later).floor("5min")
+    assert len(provider._candles["C"]["1m"].frame) <= 100 * 5 + 5
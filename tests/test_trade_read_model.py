@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Tests for the dashboard trade read model
+Incrementally folded pages must match the per-request regrouping that
+/api/trades used to do over the whole table
+"""
+
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+import pytest  # noqa: E402
+
+from src.data.trade_read_model import TradeReadModel, parse_time  # noqa: E402
+
+NOW = datetime(2025, 6, 1, 12, tzinfo=timezone.utc)
+SYMBOLS = ["BTC", "ETH", "SOL", "DOGE", "PEPE"]
+
+
+class ListSource:
+    """Trades table held in a list, queried like SupabaseTradeSource"""
+
+    id_column = "trade_id"
+
+    def __init__(self, rows, prices):
+        self.rows = []
+        self.prices = prices
+        self.queries = 0
+        self.insert(rows)
+
+    def insert(self, rows):
+        """Append rows, numbering them in arrival order like a serial key"""
+        for row in rows:
+            self.rows.append(dict(row, trade_id=len(self.rows) + 1))
+
+    def rows_after(self, last_id):
+        self.queries += 1
+        return [r for r in self.rows if last_id is None or r["trade_id"] > last_id]
+
+    def latest_prices(self, symbols):
+        return {s: self.prices[s] for s in symbols if s in self.prices}
+
+
+def make_model(source, *args, **kwargs):
+    return TradeReadModel(source, *args, price_source=source.latest_prices, **kwargs)
+
+
+def make_rows(seed=0, groups=60):
+    rng = random.Random(seed)
+    rows = []
+    for g in range(groups):
+        symbol = rng.choice(SYMBOLS)
+        opened = NOW - timedelta(minutes=rng.randint(60, 5000))
+        price = rng.uniform(1, 100)
+        for k in range(rng.choice([1, 1, 2, 3])):  # DCA adds
+            rows.append(
+                {
+                    "trade_group_id": f"g{g}",
+                    "symbol": symbol,
+                    "side": "BUY",
+                    "price": price * (1 - 0.02 * k),
+                    "amount": rng.uniform(0.5, 2),
+                    "created_at": (opened + timedelta(minutes=5 * k)).isoformat(),
+                    "strategy_name": rng.choice(["DCA", "SWING", "CHANNEL"]),
+                    "stop_loss": price * 0.95 if rng.random() < 0.7 else None,
+                    "take_profit": price * 1.05 if rng.random() < 0.7 else None,
+                    "trailing_stop_pct": 0.02 if rng.random() < 0.5 else None,
+                }
+            )
+        if rng.random() < 0.6:
+            rows.append(
+                {
+                    "trade_group_id": f"g{g}",
+                    "symbol": symbol,
+                    "side": "SELL",
+                    "price": price * rng.uniform(0.9, 1.1),
+                    "amount": 1.0,
+                    "created_at": (opened + timedelta(minutes=rng.randint(30, 50)))
+                    .isoformat()
+                    .replace("+00:00", "Z"),
+                    "exit_reason": rng.choice(["take_profit", "stop_loss"]),
+                }
+            )
+    return rows
+
+
+def reference_trades(rows, prices):
+    """The old endpoint: group the newest-first rows, closed then open"""
+    rows = sorted(rows, key=lambda r: r["created_at"].replace("Z", "+00:00"))[::-1]
+    groups = {}
+    for row in rows:
+        group = groups.setdefault(
+            row["trade_group_id"],
+            {"buys": [], "sells": [], "symbol": row["symbol"]},
+        )
+        group["buys" if row["side"] == "BUY" else "sells"].append(row)
+
+    closed, open_ = [], []
+    pnl = wins = 0
+    for group in groups.values():
+        if not group["buys"]:
+            continue
+        group["buys"].sort(key=lambda r: parse_time(r["created_at"]))
+        group["sells"].sort(key=lambda r: parse_time(r["created_at"]))
+        cost = sum(b["price"] * b["amount"] for b in group["buys"])
+        amount = sum(b["amount"] for b in group["buys"])
+        entry = cost / amount
+        first = group["buys"][0]
+        if group["sells"]:
+            sell = group["sells"][-1]
+            trade_pnl = (sell["price"] - entry) * amount
+            pnl += trade_pnl
+            wins += trade_pnl > 0
+            closed.append(
+                (group["symbol"], first["created_at"], sell["price"], trade_pnl)
+            )
+        else:
+            price = prices.get(group["symbol"])
+            unrealized = (price - entry) * amount if price else 0
+            open_.append(
+                (group["symbol"], first["created_at"], len(group["buys"]), unrealized)
+            )
+    return closed, open_, pnl, wins
+
+
+def summarize(model, filter_type="all", per_page=1000):
+    page = model.page(filter_type, 1, per_page, now=NOW)
+    rows = page["open_trades"] if filter_type == "open" else page["trades"]
+    closed = [
+        (t["symbol"], t["entry_time"], t["exit_price"], t["pnl"])
+        for t in rows
+        if t.get("status") == "closed"
+    ]
+    open_ = [
+        (
+            t["symbol"],
+            t["entry_time"],
+            int(t["dca_status"].split("x")[-1]) if "x" in t["dca_status"] else 1,
+            t["unrealized_pnl"],
+        )
+        for t in rows
+        if t.get("status") != "closed"
+    ]
+    return closed, open_, page
+
+
+def assert_matches_reference(model, rows, prices):
+    closed, open_, pnl, wins = reference_trades(rows, prices)
+    got_closed, got_open, page = summarize(model)
+    # Rows fold in arrival order, so P&L sums may differ in the last bits
+    for got, expected in ((got_closed, closed), (got_open, open_)):
+        assert [t[:-1] for t in got] == [t[:-1] for t in expected]
+        assert [t[-1] for t in got] == pytest.approx([t[-1] for t in expected])
+    assert page["stats"]["total_pnl_dollar"] == pytest.approx(pnl)
+    assert page["stats"]["win_count"] == wins
+    assert page["stats"]["open_count"] == len(open_)
+    assert page["stats"]["closed_count"] == len(closed)
+
+
+def test_incremental_refreshes_match_full_regrouping():
+    rows = make_rows()
+    prices = {s: 50.0 for s in SYMBOLS}
+    by_time = sorted(rows, key=lambda r: parse_time(r["created_at"]))
+
+    source = ListSource([], prices)
+    model = make_model(source)
+    # Rows arrive in batches, out of created_at order
+    for k in range(0, len(by_time), 17):
+        batch = by_time[k : k + 17]
+        random.Random(k).shuffle(batch)
+        source.insert(batch)
+        model.refresh()
+
+    assert model.rows_folded == len(rows)  # Each row fetched and folded once
+    assert_matches_reference(model, rows, prices)
+
+    rebuilt = make_model(ListSource(rows, prices))
+    rebuilt.refresh()
+    assert_matches_reference(rebuilt, rows, prices)
+
+
+def test_rows_replayed_with_old_timestamps_are_picked_up():
+    """A row written hours after its created_at shows up on the next refresh"""
+    rows = make_rows(seed=3)
+    by_time = sorted(rows, key=lambda r: parse_time(r["created_at"]))
+    prices = {s: 30.0 for s in SYMBOLS}
+    late = by_time.pop(len(by_time) // 3)  # Spilled during an outage
+
+    source = ListSource(by_time, prices)
+    model = make_model(source)
+    model.refresh()
+
+    source.insert([late])
+    assert model.refresh() == 1
+    assert source.queries == 2  # Incremental, not a rebuild
+    assert_matches_reference(model, rows, prices)
+
+
+def test_pages_are_slices_of_the_full_list():
+    rows = make_rows(seed=1, groups=45)
+    model = make_model(ListSource(rows, {}))
+    model.refresh()
+
+    for filter_type in ("all", "open", "closed"):
+        everything = summarize(model, filter_type)[2]
+        key = "open_trades" if filter_type == "open" else "trades"
+        full = everything[key]
+        total_pages = model.page(filter_type, 1, 7)["pagination"]["total_pages"]
+        pages = [
+            model.page(filter_type, p, 7, now=NOW) for p in range(1, total_pages + 1)
+        ]
+        assert [t for p in pages for t in p[key]] == full
+        assert total_pages == (len(full) + 6) // 7
+        assert model.page(filter_type, 99, 7, now=NOW) == pages[-1]  # Clamped
+    # Closed trades come first in "all"
+    statuses = [t.get("status") for t in model.page("all", 1, 1000, now=NOW)["trades"]]
+    assert statuses == sorted(statuses, key=lambda s: s != "closed")
+
+
+def test_snapshot_restores_state_and_resumes_from_cursor(tmp_path):
+    rows = make_rows(seed=2)
+    by_time = sorted(rows, key=lambda r: parse_time(r["created_at"]))
+    prices = {s: 20.0 for s in SYMBOLS}
+    half = len(by_time) // 2
+
+    first = make_model(ListSource(by_time[:half], prices), tmp_path / "snap.json")
+    first.refresh()
+
+    source = ListSource(by_time, prices)
+    second = make_model(source, tmp_path / "snap.json")
+    assert second.load_snapshot()
+    second.refresh()
+
+    assert source.queries == 1  # Incremental, not a rebuild
+    assert second.rows_folded == len(by_time) - half
+    assert_matches_reference(second, rows, prices)
+
+
+def test_open_position_view():
+    rows = [
+        {
+            "trade_id": 1,
+            "trade_group_id": "a",
+            "symbol": "ETH",
+            "side": "BUY",
+            "price": 100.0,
+            "amount": 1.0,
+            "created_at": (NOW - timedelta(hours=2, minutes=5)).isoformat(),
+            "strategy_name": "DCA",
+            "stop_loss": 95.0,
+            "take_profit": 104.0,
+            "trailing_stop_pct": 0.02,
+        },
+        {
+            "trade_id": 2,
+            "trade_group_id": "a",
+            "symbol": "ETH",
+            "side": "BUY",
+            "price": 90.0,
+            "amount": 1.0,
+            "created_at": (NOW - timedelta(hours=1)).isoformat(),
+            "strategy_name": "DCA",
+        },
+    ]
+    model = make_model(ListSource(rows, {"ETH": 100.0}))
+    model.refresh()
+    (trade,) = model.page("open", 1, 10, now=NOW)["open_trades"]
+
+    assert trade["entry_price"] == 95.0
+    assert trade["dca_status"] == "DCA x2"
+    assert trade["unrealized_pnl"] == pytest.approx(10.0)
+    assert trade["hold_time"] == "2h 5m"
+    assert trade["sl_display"] == "5.3% / 0.0%"
+    assert trade["ts_display"] == "⚪ Inactive (activates at TP: 9.5%)"
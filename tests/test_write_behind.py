@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Tests for the write-behind queue
+Rows are batched per table, coalesced for upserts, and spilled to disk
+while the database is unreachable
+"""
+
+import json
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from src.data.write_behind import WriteBehindQueue  # noqa: E402
+from src.utils.retry import CircuitBreaker  # noqa: E402
+
+
+class FakeDatabase:
+    """Supabase stand-in that records requests and can be taken offline"""
+
+    def __init__(self):
+        self.requests = []
+        self.offline = False
+        self.error = None
+        self.is_bad = lambda row: False
+
+    def table(self, name):
+        db = self
+
+        class Request:
+            def insert(self, rows):
+                self.call = ("insert", name, rows, None)
+                return self
+
+            def upsert(self, rows, on_conflict=None):
+                self.call = ("upsert", name, rows, on_conflict)
+                return self
+
+            def execute(self):
+                if db.offline:
+                    raise ConnectionError("connection refused")
+                if db.error and any(db.is_bad(row) for row in self.call[2]):
+                    raise Exception(db.error)
+                db.requests.append(self.call)
+                return SimpleNamespace(data=[])
+
+        return Request()
+
+    def rows(self, table):
+        return [
+            row for _, name, rows, _ in self.requests if name == table for row in rows
+        ]
+
+
+def build_queue(tmp_path, **kwargs):
+    db = FakeDatabase()
+    queue = WriteBehindQueue(
+        SimpleNamespace(client=db),
+        spill_dir=tmp_path,
+        retry_policy={"max_attempts": 2, "delay": 0, "backoff": 1},
+        circuit_breaker=CircuitBreaker(failure_threshold=2, recovery_timeout=0.05),
+        **kwargs,
+    )
+    return queue, db
+
+
+def trade_leg(i, side="BUY"):
+    return {
+        "trade_group_id": f"group-{i}",
+        "side": side,
+        "created_at": f"2026-10-16T12:00:{i:02d}+00:00",
+    }
+
+
+def test_batches_and_coalesces(tmp_path):
+    """Inserts go out in batch_size chunks; heartbeats keep only the newest row"""
+    queue, db = build_queue(tmp_path, batch_size=100)
+
+    for i in range(250):
+        queue.enqueue("scan_history", {"id": i})
+    for i in range(5):
+        queue.enqueue("system_heartbeat", {"service_name": "paper", "beat": i})
+    assert queue.pending == 251
+
+    queue.drain()
+
+    inserts = [len(rows) for kind, name, rows, _ in db.requests if kind == "insert"]
+    assert inserts == [100, 100, 50]
+    assert [row["id"] for row in db.rows("scan_history")] == list(range(250))
+    assert db.rows("system_heartbeat") == [{"service_name": "paper", "beat": 4}]
+
+    metrics = queue.get_metrics()
+    assert metrics["pending"] == 0
+    assert metrics["tables"]["system_heartbeat"]["coalesced"] == 4
+    assert metrics["tables"]["scan_history"]["batches"] == 3
+
+
+def test_outage_spills_and_replays(tmp_path):
+    """Rows written during an outage land on disk and are replayed later"""
+    queue, db = build_queue(tmp_path, batch_size=10)
+    db.offline = True
+
+    queue.enqueue("paper_trades", [trade_leg(i) for i in range(25)])
+    queue.drain()
+    assert db.requests == []
+    assert queue.get_metrics()["spilled"] == 25
+    assert queue.circuit_breaker.state == "open"
+
+    # Circuit stays open until the recovery timeout, so nothing is replayed yet
+    db.offline = False
+    assert queue.replay_spill() == 0
+
+    time.sleep(0.06)
+    assert queue.replay_spill(force=True) == 25
+    assert db.rows("paper_trades") == [trade_leg(i) for i in range(25)]
+    assert not queue.spill_path.exists()
+    assert not queue.replay_path.exists()
+
+
+def test_full_queue_overflows_to_spill(tmp_path):
+    """A full queue never blocks the producer"""
+    queue, db = build_queue(tmp_path, max_queue_size=5)
+
+    assert queue.enqueue("scan_history", [{"n": i} for i in range(8)]) == 5
+    assert queue.spill_path.exists()
+
+    queue.drain()
+    queue.replay_spill(force=True)
+    assert sorted(row["n"] for row in db.rows("scan_history")) == list(range(8))
+
+
+def test_replayed_trades_upsert_on_idempotency_key(tmp_path):
+    """A trade leg spilled twice is sent once, as an upsert on its key"""
+    queue, db = build_queue(tmp_path)
+    db.offline = True
+    queue.enqueue("paper_trades", [trade_leg(1), trade_leg(2)])
+    queue.drain()
+    queue.enqueue("paper_trades", trade_leg(1))
+    queue.drain()
+
+    db.offline = False
+    time.sleep(0.06)
+    assert queue.replay_spill(force=True) == 2
+
+    [(kind, _, rows, on_conflict)] = db.requests
+    assert (kind, on_conflict) == ("upsert", "trade_group_id,side,created_at")
+    assert rows == [trade_leg(1), trade_leg(2)]
+
+
+def test_bad_rows_are_isolated_and_set_aside(tmp_path):
+    """A data error only costs the offending rows, which go to the rejects file"""
+    queue, db = build_queue(tmp_path, batch_size=100)
+    db.error = 'invalid input syntax for type numeric: "NaN"'
+    db.is_bad = lambda row: row["n"] in (13, 70)
+
+    queue.enqueue("health_metrics", [{"n": i} for i in range(100)])
+    queue.drain()
+
+    written = sorted(row["n"] for row in db.rows("health_metrics"))
+    assert written == [i for i in range(100) if i not in (13, 70)]
+
+    metrics = queue.get_metrics()
+    assert metrics["failed"] == metrics["rejected"] == 2
+    assert queue.circuit_breaker.state == "closed"
+    assert not queue.spill_path.exists()
+
+    rejected = [json.loads(line) for line in queue.reject_path.read_text().splitlines()]
+    assert [entry["rows"] for entry in rejected] == [[{"n": 13}], [{"n": 70}]]
+    assert rejected[0]["error"] == db.error
+
+
+def test_background_worker_flushes_and_stops(tmp_path):
+    """The worker thread drains the queue; stop() spills what it couldn't send"""
+    queue, db = build_queue(tmp_path, flush_interval=0.01)
+    queue.start()
+
+    queue.enqueue("paper_trades", {"symbol": "BTC"})
+    assert queue.flush(timeout=2)
+    assert db.rows("paper_trades") == [{"symbol": "BTC"}]
+
+    db.offline = True
+    queue.enqueue("paper_trades", {"symbol": "ETH"})
+    queue.stop()
+    assert '"ETH"' in queue.spill_path.read_text()